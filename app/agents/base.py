@@ -1,7 +1,20 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, Protocol, Sequence, runtime_checkable
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    runtime_checkable,
+)
+
+import numpy as np
 
 from app.core.schemas import (
     EvaluationResult,
@@ -22,6 +35,42 @@ class ExtractorAgentProtocol(Protocol):
         """Return structured fields to be stored as the quotation structured_json."""
         
 
+# ((extractor name, extractor version, text hash), fields, extraction ms)
+ExtractionCacheEntry = Tuple[Tuple[str, str, str], Dict[str, Any], float]
+
+
+@runtime_checkable
+class CachedExtractorProtocol(ExtractorAgentProtocol, Protocol):
+    """
+    Extractor with an extraction cache that callers can consult directly.
+
+    Lets the ingest pool skip cached uploads in the parent process and
+    bring the results of worker processes back into the parent's cache.
+    """
+
+    def extract_cached_many(
+        self,
+        upload_requests: Sequence[QuotationUploadRequest],
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Per upload, the fields if they can be built from the cache, else None."""
+        ...
+
+    def cache_entry(
+        self,
+        upload_request: QuotationUploadRequest,
+    ) -> Optional[ExtractionCacheEntry]:
+        """Return the in-memory cache entry of an upload extracted before."""
+        ...
+
+    def store_cache_entries(self, entries: Sequence[ExtractionCacheEntry]) -> None:
+        """Record entries produced by an equivalent extractor elsewhere."""
+        ...
+
+    def worker_factory(self) -> Callable[[], ExtractorAgentProtocol]:
+        """Return a picklable factory of an equivalent extractor for workers."""
+        ...
+
+
 
 @runtime_checkable
 class RetrieverAgentProtocol(Protocol):
@@ -35,6 +84,38 @@ class RetrieverAgentProtocol(Protocol):
         ...
 
 
+@runtime_checkable
+class EmbeddingRetrieverProtocol(RetrieverAgentProtocol, Protocol):
+    """Retriever that can search with a query embedding computed by the caller."""
+
+    def retrieve_embedded(
+        self,
+        query: QueryRequest,
+        embedding: np.ndarray,
+        supplier: Optional[str] = None,
+    ) -> Sequence[StructuredQuotation]:
+        """Return up to query.top_k quotations ranked by similarity to `embedding`."""
+        ...
+
+
+@runtime_checkable
+class GeneratorAgentProtocol(Protocol):
+    """Agent responsible for writing an answer from retrieved quotations."""
+
+    def astream(
+        self,
+        query: QueryRequest,
+        context: Sequence[StructuredQuotation],
+    ) -> AsyncGenerator[str, None]:
+        """
+        Yield the answer as it is produced, in chunks (tokens or lines).
+
+        Consumers may stop iterating early (e.g. the client disconnected);
+        implementations should release their resources when closed.
+        """
+        ...
+
+
 @runtime_checkable
 class EvaluatorAgentProtocol(Protocol):
     """Agent responsible for evaluating an answer against supporting quotations."""
@@ -47,3 +128,17 @@ class EvaluatorAgentProtocol(Protocol):
     ) -> EvaluationResult:
         """Return an evaluation result for the given answer and context."""
         ...
+
+
+@runtime_checkable
+class RerankerProtocol(Protocol):
+    """Stage that re-orders retrieval candidates after the vector search."""
+
+    def rerank(
+        self,
+        query: QueryRequest,
+        candidates: Sequence[StructuredQuotation],
+        distances: Sequence[float],
+    ) -> Sequence[StructuredQuotation]:
+        """Return up to query.top_k candidates, best first."""
+        ...
@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.agents.base import EvaluatorAgentProtocol
+from app.agents.extractor_rules import parse_amount
+from app.core.config import settings
+from app.core.schemas import EvaluationResult, QueryRequest, StructuredQuotation
+from app.core.tracing import traced
+
+# (query, answer, context) as passed to EvaluatorAgentProtocol.evaluate.
+EvaluationItem = Tuple[QueryRequest, str, Sequence[StructuredQuotation]]
+
+_TOKEN_RE = re.compile(r"\w+")
+_NUMBER_RUN_RE = re.compile(r"\d[\d.,]*")
+_CENTS_RE = re.compile(r"[.,]\d\d$")
+_CURRENCY_BEFORE_RE = re.compile(
+    r"(?:[$€£¥]|\b(?:USD|EUR|GBP|BRL|JPY|CHF|CAD|AUD))\s?$", re.IGNORECASE
+)
+_CURRENCY_AFTER_RE = re.compile(
+    r"\s?(?:[$€£¥]|(?:USD|EUR|GBP|BRL|JPY|CHF|CAD|AUD)\b)", re.IGNORECASE
+)
+
+# Larger amounts are not prices; in cents they would overflow int64.
+_MAX_AMOUNT = 1e15
+
+# Odd multiplier used to fold token ids into shingle hashes (uint64 wraps).
+_SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_EMPTY_SIGNATURE = np.iinfo(np.uint64).max
+
+
+def _numbers(text: str, prices_only: bool) -> List[float]:
+    """
+    Return the numbers written in `text`.
+
+    With `prices_only`, only numbers that look like prices are kept: next
+    to a currency symbol or code, or written with cents ("12.50"). Counts,
+    positions and ids in an answer ("3 quotations", "#12") are not prices.
+    """
+    values: List[float] = []
+    for run in _NUMBER_RUN_RE.finditer(text):
+        number = run.group().rstrip(".,")
+        start = run.start()
+        end = start + len(number)
+        if prices_only and not (
+            _CENTS_RE.search(number)
+            or _CURRENCY_BEFORE_RE.search(text, max(0, start - 5), start)
+            or _CURRENCY_AFTER_RE.match(text, end)
+        ):
+            continue
+        try:
+            values.append(parse_amount(number))
+        except ValueError:
+            continue
+    return values
+
+
+def _cents(values: List[float]) -> np.ndarray:
+    """Amounts in integer cents, dropping non-finite and out-of-range ones."""
+    amounts = np.asarray(values, dtype=np.float64)
+    amounts = amounts[np.abs(amounts) < _MAX_AMOUNT]
+    return np.round(amounts * 100).astype(np.int64)
+
+
+def _context_text(context: Sequence[StructuredQuotation]) -> str:
+    return "\n".join(
+        f"{quotation.supplier}\n{quotation.raw_text}" for quotation in context
+    )
+
+
+def _pair_keys(values: List[np.ndarray]) -> np.ndarray:
+    """
+    Return the unique (pair, value) rows of per-pair value arrays.
+
+    Rows rather than one combined integer, so no value can wrap into
+    another pair's key; set operations for every pair of the batch still
+    run as single NumPy calls.
+    """
+    batch = len(values)
+    lengths = np.fromiter((len(array) for array in values), dtype=np.int64, count=batch)
+    pairs = np.repeat(np.arange(batch, dtype=np.int64), lengths)
+    flat = np.concatenate(values).astype(np.int64)
+    return np.unique(np.stack([pairs, flat], axis=1), axis=0)
+
+
+def _covered(
+    needles: List[np.ndarray],
+    haystacks: List[np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Per pair: (number of distinct needles, how many occur in the haystack)."""
+    batch = len(needles)
+    needle_keys = _pair_keys(needles)
+    haystack_keys = _pair_keys(haystacks)
+    # Number the distinct rows of both sides, so membership is a 1-D test.
+    _, ids = np.unique(
+        np.concatenate([needle_keys, haystack_keys]), axis=0, return_inverse=True
+    )
+    ids = ids.reshape(-1)
+    found = np.isin(
+        ids[: len(needle_keys)], ids[len(needle_keys) :], assume_unique=True
+    )
+    needle_pairs = needle_keys[:, 0]
+    total = np.bincount(needle_pairs, minlength=batch)
+    hits = np.bincount(needle_pairs, weights=found, minlength=batch)
+    return total, hits
+
+
+def _ratio(hits: np.ndarray, total: np.ndarray, empty: float) -> np.ndarray:
+    return np.divide(hits, total, out=np.full(len(total), empty), where=total > 0)
+
+
+class LocalGroundingEvaluator(EvaluatorAgentProtocol):
+    """
+    Evaluate answers locally, without calling a model.
+
+    Each answer is compared with the text of its context (supplier and
+    raw_text of every retrieved quotation) on four criteria, reported in
+    EvaluationResult.metadata:
+    - `ngram_containment`: share of the answer's word n-grams that occur
+      in the context;
+    - `minhash_similarity`: MinHash estimate of the Jaccard similarity of
+      the answer and context n-gram sets;
+    - `numeric_consistency`: share of the prices cited in the answer that
+      appear among the context numbers (1.0 when none is cited);
+    - `query_coverage`: share of the query words found in the context.
+
+    An answer is grounded when it has context, its containment reaches
+    `min_containment` and its numeric consistency reaches
+    `min_numeric_consistency`. relevance_score is the mean of containment,
+    numeric consistency and query coverage.
+
+    `evaluate_batch` scores many (query, answer, context) items with one
+    set of NumPy operations for the whole batch; an item gets the same
+    scores whatever batch it is evaluated in.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        *,
+        shingle_size: int = 3,
+        num_perm: int = 64,
+        min_containment: float = 0.5,
+        min_numeric_consistency: float = 1.0,
+        seed: int = 1,
+    ) -> None:
+        self.shingle_size = shingle_size
+        self.num_perm = num_perm
+        self.min_containment = min_containment
+        self.min_numeric_consistency = min_numeric_consistency
+        rng = np.random.default_rng(seed)
+        high = np.iinfo(np.uint64).max
+        self._perm_a = rng.integers(
+            1, high, size=num_perm, dtype=np.uint64
+        ) | np.uint64(1)
+        self._perm_b = rng.integers(0, high, size=num_perm, dtype=np.uint64)
+
+    @classmethod
+    def from_settings(cls) -> "LocalGroundingEvaluator":
+        return cls(
+            shingle_size=settings.evaluator_shingle_size,
+            num_perm=settings.evaluator_num_perm,
+            min_containment=settings.evaluator_min_containment,
+            min_numeric_consistency=settings.evaluator_min_numeric_consistency,
+        )
+
+    def evaluate(
+        self,
+        query: QueryRequest,
+        answer: str,
+        context: Sequence[StructuredQuotation],
+    ) -> EvaluationResult:
+        """Return an evaluation result for the given answer and context."""
+        return self.evaluate_batch([(query, answer, context)])[0]
+
+    @traced("agent.evaluator")
+    def evaluate_batch(self, items: Sequence[EvaluationItem]) -> List[EvaluationResult]:
+        """Evaluate every (query, answer, context) item, in order."""
+        if not items:
+            return []
+
+        # Tokens are identified by their CRC-32, so scores do not depend on
+        # which other items share the batch.
+        token_hashes: Dict[str, int] = {}
+
+        def token_ids(text: str) -> np.ndarray:
+            ids = []
+            for token in _TOKEN_RE.findall(text.lower()):
+                token_id = token_hashes.get(token)
+                if token_id is None:
+                    token_id = token_hashes[token] = zlib.crc32(token.encode("utf-8"))
+                ids.append(token_id)
+            return np.asarray(ids, dtype=np.int64)
+
+        context_texts = [_context_text(context) for _, _, context in items]
+        query_tokens = [token_ids(query.query) for query, _, _ in items]
+        answer_tokens = [token_ids(answer) for _, answer, _ in items]
+        context_tokens = [token_ids(text) for text in context_texts]
+
+        batch = len(items)
+        shingles = [self._shingles(tokens) for tokens in answer_tokens + context_tokens]
+        dense = self._dense(shingles)
+
+        shingle_total, shingle_hits = _covered(dense[:batch], dense[batch:])
+        containment = _ratio(shingle_hits, shingle_total, 0.0)
+
+        query_total, query_hits = _covered(query_tokens, context_tokens)
+        query_coverage = _ratio(query_hits, query_total, 0.0)
+
+        similarity = self._minhash_similarity(shingles[:batch], shingles[batch:])
+
+        cited = [_cents(_numbers(answer, True)) for _, answer, _ in items]
+        available = [_cents(_numbers(text, False)) for text in context_texts]
+        price_total, price_hits = _covered(cited, available)
+        numeric_consistency = _ratio(price_hits, price_total, 1.0)
+
+        has_context = np.fromiter(
+            (bool(context) for _, _, context in items), dtype=bool
+        )
+        grounded = (
+            has_context
+            & (containment >= self.min_containment)
+            & (numeric_consistency >= self.min_numeric_consistency)
+        )
+        relevance = np.where(
+            has_context, (containment + numeric_consistency + query_coverage) / 3.0, 0.0
+        )
+
+        results: List[EvaluationResult] = []
+        for index, (query, answer, _) in enumerate(items):
+            available_set = set(available[index].tolist())
+            unsupported = sorted(
+                {
+                    cents / 100
+                    for cents in cited[index].tolist()
+                    if cents not in available_set
+                }
+            )
+            results.append(
+                EvaluationResult(
+                    query=query.query,
+                    answer=answer,
+                    is_answer_grounded=bool(grounded[index]),
+                    relevance_score=float(np.clip(relevance[index], 0.0, 1.0)),
+                    reasoning=(
+                        f"{containment[index]:.0%} of the answer "
+                        f"{self.shingle_size}-grams occur in the context; "
+                        f"{int(price_total[index] - price_hits[index])} of "
+                        f"{int(price_total[index])} cited prices are unsupported."
+                    ),
+                    metadata={
+                        "evaluator": self.name,
+                        "ngram_containment": round(float(containment[index]), 4),
+                        "minhash_similarity": round(float(similarity[index]), 4),
+                        "numeric_consistency": round(
+                            float(numeric_consistency[index]), 4
+                        ),
+                        "query_coverage": round(float(query_coverage[index]), 4),
+                        "unsupported_prices": unsupported,
+                    },
+                )
+            )
+        return results
+
+    def _shingles(self, tokens: np.ndarray) -> np.ndarray:
+        """Hash every run of `shingle_size` token ids (one run for short texts)."""
+        size = min(self.shingle_size, len(tokens))
+        if size == 0:
+            return np.empty(0, dtype=np.uint64)
+        count = len(tokens) - size + 1
+        hashes = np.zeros(count, dtype=np.uint64)
+        for offset in range(size):
+            hashes = hashes * _SHINGLE_MULTIPLIER + tokens[
+                offset : offset + count
+            ].astype(np.uint64)
+        return hashes
+
+    @staticmethod
+    def _dense(hashed: List[np.ndarray]) -> List[np.ndarray]:
+        """Renumber shingle hashes 0..n-1 over the batch (usable as pair keys)."""
+        _, inverse = np.unique(np.concatenate(hashed), return_inverse=True)
+        return np.split(
+            inverse.astype(np.int64), np.cumsum([len(h) for h in hashed])[:-1]
+        )
+
+    def _minhash_similarity(
+        self,
+        answer_shingles: List[np.ndarray],
+        context_shingles: List[np.ndarray],
+    ) -> np.ndarray:
+        """
+        MinHash Jaccard estimate per pair; 0 when either side is empty.
+
+        Signatures are computed from the shingle hashes themselves, so a
+        pair gets the same estimate whatever batch it is evaluated in.
+        """
+        documents = [np.unique(hashes) for hashes in answer_shingles + context_shingles]
+        lengths = np.array([len(ids) for ids in documents])
+        nonempty = lengths > 0
+        signatures = np.full(
+            (self.num_perm, len(documents)), _EMPTY_SIGNATURE, dtype=np.uint64
+        )
+
+        if nonempty.any():
+            values = np.concatenate(documents)
+            offsets = np.concatenate(([0], np.cumsum(lengths[nonempty])[:-1]))
+            # One pass per permutation keeps memory linear in the batch size.
+            for row, (a, b) in enumerate(zip(self._perm_a, self._perm_b, strict=True)):
+                permuted = (values * a + b) >> np.uint64(32)
+                signatures[row, nonempty] = np.minimum.reduceat(permuted, offsets)
+
+        batch = len(answer_shingles)
+        similarity = (signatures[:, :batch] == signatures[:, batch:]).mean(axis=0)
+        return np.where(nonempty[:batch] & nonempty[batch:], similarity, 0.0)
+
+
+_local_evaluator: Optional[LocalGroundingEvaluator] = None
+_local_evaluator_lock = threading.Lock()
+
+
+def get_local_evaluator() -> Optional[LocalGroundingEvaluator]:
+    """
+    Return the process-wide LocalGroundingEvaluator, or None when disabled.
+
+    Created on first use from the evaluator_* settings.
+    """
+    global _local_evaluator
+    if not settings.evaluator_enabled:
+        return None
+    with _local_evaluator_lock:
+        if _local_evaluator is None:
+            _local_evaluator = LocalGroundingEvaluator.from_settings()
+        return _local_evaluator
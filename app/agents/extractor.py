@@ -1,26 +1,94 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
-from app.agents.base import ExtractorAgentProtocol
+from app.agents.base import (
+    CachedExtractorProtocol,
+    ExtractionCacheEntry,
+    ExtractorAgentProtocol,
+)
+from app.agents.extractor_cache import CachingExtractorAgent, ExtractionCache
+from app.agents.extractor_rules import RuleBasedExtractorAgent
 from app.agents.extractor_simple import SimpleExtractorAgent
+from app.core.config import settings
 from app.core.schemas import QuotationUploadRequest
+from app.core.tracing import traced
 
 
-class ExtractorAgent(ExtractorAgentProtocol):
+class ExtractorAgent(CachedExtractorProtocol):
     """
     Production extractor agent placeholder.
 
-    For now this agent is a thin wrapper around SimpleExtractorAgent,
-    adding a few extra fields. It already implements the
+    For now this agent combines SimpleExtractorAgent (basic fields) with
+    RuleBasedExtractorAgent (items, totals and currency parsed from the
+    raw text), adding a few extra fields. It already implements the
     ExtractorAgentProtocol, so it can be used by the orchestrator and
     later replaced by an LLM-based implementation without changing
     the public interface.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, cache: Optional[ExtractionCache] = None) -> None:
+        """
+        Initialize the sub-extractors.
+
+        With a cache, the text-derived fields from RuleBasedExtractorAgent
+        are reused across uploads of the same (normalized) text.
+        """
         self._base_extractor = SimpleExtractorAgent()
+        self._rules_extractor: ExtractorAgentProtocol = RuleBasedExtractorAgent()
+        if cache is not None:
+            self._rules_extractor = CachingExtractorAgent(self._rules_extractor, cache)
+
+    @classmethod
+    def for_worker(cls) -> "ExtractorAgent":
+        """
+        Build the extractor used inside ingest worker processes.
 
+        Its cache is in-memory only: workers never open DB connections, the
+        parent stores their results (see `cache_entry`).
+        """
+        return cls(
+            cache=ExtractionCache(max_entries=settings.extraction_cache_max_entries)
+        )
+
+    def worker_factory(self) -> Callable[[], ExtractorAgentProtocol]:
+        return ExtractorAgent.for_worker
+
+    def preload_cache(self) -> int:
+        """Warm the extraction cache from its table; returns entries loaded."""
+        if isinstance(self._rules_extractor, CachingExtractorAgent):
+            return self._rules_extractor.preload()
+        return 0
+
+    def extract_cached_many(
+        self,
+        upload_requests: Sequence[QuotationUploadRequest],
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Return the fields of uploads whose rule-based part is cached."""
+        if not isinstance(self._rules_extractor, CachingExtractorAgent):
+            return [None] * len(upload_requests)
+        return [
+            None if rules_fields is None else self._combine(upload, rules_fields)
+            for upload, rules_fields in zip(
+                upload_requests,
+                self._rules_extractor.extract_cached_many(upload_requests),
+                strict=True,
+            )
+        ]
+
+    def cache_entry(
+        self,
+        upload_request: QuotationUploadRequest,
+    ) -> Optional[ExtractionCacheEntry]:
+        if not isinstance(self._rules_extractor, CachingExtractorAgent):
+            return None
+        return self._rules_extractor.cache_entry(upload_request)
+
+    def store_cache_entries(self, entries: Sequence[ExtractionCacheEntry]) -> None:
+        if isinstance(self._rules_extractor, CachingExtractorAgent):
+            self._rules_extractor.store_cache_entries(entries)
+
+    @traced("agent.extractor")
     def extract_structured_fields(
         self,
         upload_request: QuotationUploadRequest,
@@ -30,9 +98,23 @@ class ExtractorAgent(ExtractorAgentProtocol):
 
         This implementation:
         - delegates basic fields to SimpleExtractorAgent;
+        - adds the contracts.StructuredQuotation fields (title, customer and
+          vendor names, items, subtotal, taxes, total, currency) parsed by
+          RuleBasedExtractorAgent;
         - adds raw_text and metadata so downstream agents have more context.
         """
+        return self._combine(
+            upload_request,
+            self._rules_extractor.extract_structured_fields(upload_request),
+        )
+
+    def _combine(
+        self,
+        upload_request: QuotationUploadRequest,
+        rules_fields: Dict[str, Any],
+    ) -> Dict[str, Any]:
         fields = self._base_extractor.extract_structured_fields(upload_request)
+        fields.update(rules_fields)
 
         # Enrich with extra context that may be useful later
         fields["raw_text"] = upload_request.raw_text
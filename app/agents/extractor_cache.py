@@ -0,0 +1,458 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import orjson
+from sqlalchemy.orm import Session
+
+from app.agents.base import ExtractionCacheEntry, ExtractorAgentProtocol
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.core.schemas import QuotationUploadRequest
+from app.core.tracing import traced
+from app.db.repositories import (
+    delete_stale_extraction_cache_entries,
+    get_extraction_cache_entries,
+    get_extraction_cache_entry,
+    list_recent_extraction_cache_entries,
+    save_extraction_cache_entries,
+    save_extraction_cache_entry,
+)
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_CACHE_LOOKUPS = REGISTRY.counter(
+    "extraction_cache_lookups_total",
+    "Extraction cache lookups by extractor and result (memory, store, miss).",
+    ("extractor", "result"),
+)
+EXTRACTION_CACHE_SAVED = REGISTRY.counter(
+    "extraction_cache_saved_seconds_total",
+    "Extraction time avoided by cache hits (original extraction duration).",
+    ("extractor",),
+)
+EXTRACTION_DURATION = REGISTRY.histogram(
+    "extraction_duration_seconds",
+    "Time spent running an extractor on a cache miss.",
+    ("extractor",),
+)
+
+# (extractor name, extractor version, text hash)
+CacheKey = Tuple[str, str, str]
+# (fields, extraction_ms, level) of a cache hit
+CacheHit = Tuple[Dict[str, Any], float, str]
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize quotation text before hashing.
+
+    Unicode is put in NFC form, line endings are unified and trailing
+    whitespace is dropped from every line and from the text, so re-uploads
+    that only differ in encoding details share a cache entry.
+    """
+    text = unicodedata.normalize("NFC", text)
+    return "\n".join(line.rstrip() for line in text.splitlines()).strip()
+
+
+def text_fingerprint(text: str) -> str:
+    """Return the SHA-256 hex digest of the normalized text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """
+    Two-level cache of extraction results.
+
+    The first level is an in-process LRU of orjson-encoded results, so
+    callers never share mutable dicts with the cache. The second level,
+    when a session factory is given, is the extraction_cache table, which
+    survives restarts and is shared by all workers. Store errors are
+    logged and treated as misses: the cache never fails an ingestion.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        session_factory: Optional[Callable[[], Session]] = None,
+        stale_retention: timedelta = timedelta(days=7),
+    ) -> None:
+        self.max_entries = max_entries
+        self._session_factory = session_factory
+        self.stale_retention = stale_retention
+        self._entries: "OrderedDict[CacheKey, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._purged: Set[Tuple[str, str]] = set()
+
+    @classmethod
+    def from_settings(cls) -> "ExtractionCache":
+        persistent = settings.extraction_cache_persistent
+        return cls(
+            max_entries=settings.extraction_cache_max_entries,
+            session_factory=SessionLocal if persistent else None,
+            stale_retention=timedelta(
+                seconds=settings.extraction_cache_stale_retention_s
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> Optional[CacheHit]:
+        """Return (fields, extraction_ms, level) for a cached result, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            blob, extraction_ms = entry
+            return orjson.loads(blob), extraction_ms, "memory"
+
+        if self._session_factory is None:
+            return None
+
+        try:
+            self._purge_stale(key[0], key[1])
+            db = self._session_factory()
+            try:
+                stored = get_extraction_cache_entry(
+                    db,
+                    extractor_name=key[0],
+                    extractor_version=key[1],
+                    text_hash=key[2],
+                )
+                if stored is None:
+                    return None
+                fields, extraction_ms = stored.fields, stored.extraction_ms
+            finally:
+                db.close()
+        except Exception:
+            logger.warning("Extraction cache lookup failed", exc_info=True)
+            return None
+
+        self._remember(key, orjson.dumps(fields), extraction_ms)
+        return fields, extraction_ms, "store"
+
+    def get_many(self, keys: Sequence[CacheKey]) -> List[Optional[CacheHit]]:
+        """
+        Look up several keys, reading the table once per extractor version.
+
+        Same results as `get` for each key, for callers like the ingest
+        pool that would otherwise pay one round-trip per upload.
+        """
+        hits: List[Optional[CacheHit]] = []
+        missing: Dict[Tuple[str, str], Set[str]] = {}
+        for key in keys:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+            if entry is None:
+                hits.append(None)
+                missing.setdefault((key[0], key[1]), set()).add(key[2])
+            else:
+                blob, extraction_ms = entry
+                hits.append((orjson.loads(blob), extraction_ms, "memory"))
+
+        if self._session_factory is None or not missing:
+            return hits
+
+        stored: Dict[CacheKey, Tuple[Dict[str, Any], float]] = {}
+        try:
+            for (name, version), text_hashes in missing.items():
+                self._purge_stale(name, version)
+                db = self._session_factory()
+                try:
+                    rows = get_extraction_cache_entries(
+                        db,
+                        extractor_name=name,
+                        extractor_version=version,
+                        text_hashes=sorted(text_hashes),
+                    )
+                    for row in rows:
+                        stored[(name, version, row.text_hash)] = (
+                            row.fields,
+                            row.extraction_ms,
+                        )
+                finally:
+                    db.close()
+        except Exception:
+            logger.warning("Extraction cache lookup failed", exc_info=True)
+            return hits
+
+        for index, key in enumerate(keys):
+            if hits[index] is None and key in stored:
+                fields, extraction_ms = stored[key]
+                blob = orjson.dumps(fields)
+                self._remember(key, blob, extraction_ms)
+                # Decoded per hit: the same text may appear twice in `keys`.
+                hits[index] = (orjson.loads(blob), extraction_ms, "store")
+        return hits
+
+    def peek(self, key: CacheKey) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return (fields, extraction_ms) from the in-process level only."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        blob, extraction_ms = entry
+        return orjson.loads(blob), extraction_ms
+
+    def preload(self, extractor_name: str, extractor_version: str) -> int:
+        """
+        Fill the in-process level with the newest stored results.
+
+        Loads up to `max_entries` rows of one extractor version, oldest
+        first so the newest end up most recently used. Returns the number
+        of loaded entries; store errors are logged and load nothing.
+        """
+        if self._session_factory is None:
+            return 0
+        try:
+            db = self._session_factory()
+            try:
+                rows = list_recent_extraction_cache_entries(
+                    db,
+                    extractor_name=extractor_name,
+                    extractor_version=extractor_version,
+                    limit=self.max_entries,
+                )
+                entries = [
+                    (row.text_hash, orjson.dumps(row.fields), row.extraction_ms)
+                    for row in rows
+                ]
+            finally:
+                db.close()
+        except Exception:
+            logger.warning("Extraction cache preload failed", exc_info=True)
+            return 0
+
+        for text_hash, blob, extraction_ms in reversed(entries):
+            self._remember(
+                (extractor_name, extractor_version, text_hash), blob, extraction_ms
+            )
+        return len(entries)
+
+    def put(self, key: CacheKey, fields: Dict[str, Any], extraction_ms: float) -> None:
+        """Store a result in memory and, if configured, in the table."""
+        self._remember(key, orjson.dumps(fields), extraction_ms)
+
+        if self._session_factory is None:
+            return
+        try:
+            db = self._session_factory()
+            try:
+                save_extraction_cache_entry(
+                    db,
+                    extractor_name=key[0],
+                    extractor_version=key[1],
+                    text_hash=key[2],
+                    fields=fields,
+                    extraction_ms=extraction_ms,
+                )
+            finally:
+                db.close()
+        except Exception:
+            logger.warning("Extraction cache write failed", exc_info=True)
+
+    def put_many(self, entries: Sequence[ExtractionCacheEntry]) -> None:
+        """Store several results, writing the table once per extractor version."""
+        rows: Dict[Tuple[str, str], Dict[str, Tuple[Dict[str, Any], float]]] = {}
+        for key, fields, extraction_ms in entries:
+            self._remember(key, orjson.dumps(fields), extraction_ms)
+            rows.setdefault((key[0], key[1]), {})[key[2]] = (fields, extraction_ms)
+
+        if self._session_factory is None:
+            return
+        try:
+            for (name, version), by_hash in rows.items():
+                db = self._session_factory()
+                try:
+                    save_extraction_cache_entries(
+                        db,
+                        extractor_name=name,
+                        extractor_version=version,
+                        entries=[
+                            (text_hash, fields, extraction_ms)
+                            for text_hash, (fields, extraction_ms) in by_hash.items()
+                        ],
+                    )
+                finally:
+                    db.close()
+        except Exception:
+            logger.warning("Extraction cache write failed", exc_info=True)
+
+    def _remember(self, key: CacheKey, blob: bytes, extraction_ms: float) -> None:
+        with self._lock:
+            self._entries[key] = (blob, extraction_ms)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _purge_stale(self, extractor_name: str, extractor_version: str) -> None:
+        """
+        Once per process and extractor version, drop old rows of other versions.
+
+        Keys already include the version, so stale rows are never read;
+        this only reclaims their space after a version bump. Rows newer than
+        `stale_retention` are kept: during a rolling deploy the other
+        version is still serving and writing them.
+        """
+        name_version = (extractor_name, extractor_version)
+        with self._lock:
+            if name_version in self._purged:
+                return
+            self._purged.add(name_version)
+
+        db = self._session_factory()  # type: ignore[misc]
+        try:
+            deleted = delete_stale_extraction_cache_entries(
+                db,
+                extractor_name=extractor_name,
+                current_version=extractor_version,
+                min_age=self.stale_retention,
+            )
+        finally:
+            db.close()
+        if deleted:
+            logger.info(
+                "Removed %d cached extractions of older %s versions",
+                deleted,
+                extractor_name,
+            )
+
+
+class CachingExtractorAgent(ExtractorAgentProtocol):
+    """
+    Wrap an extractor with an ExtractionCache.
+
+    Results are keyed by the hash of the normalized raw_text plus the
+    extractor name and version, so the wrapped extractor's output must
+    depend on raw_text only. Bumping the version invalidates every cached
+    result of the previous one. Hits add the original extraction duration
+    to `extraction_cache_saved_seconds_total`.
+    """
+
+    def __init__(
+        self,
+        extractor: ExtractorAgentProtocol,
+        cache: ExtractionCache,
+        *,
+        name: Optional[str] = None,
+        version: Optional[str] = None,
+    ) -> None:
+        self._extractor = extractor
+        self._cache = cache
+        self.name = str(name or getattr(extractor, "name", type(extractor).__name__))
+        version = version or getattr(extractor, "version", None)
+        if version is None:
+            raise ValueError(
+                f"Extractor {self.name!r} needs a version to be cached safely."
+            )
+        self.version = str(version)
+
+    def preload(self) -> int:
+        """Load this extractor's newest stored results into memory."""
+        return self._cache.preload(self.name, self.version)
+
+    def extract_cached_many(
+        self,
+        upload_requests: Sequence[QuotationUploadRequest],
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Return cached fields per text (None when not cached), with one
+        table read for the whole batch; misses are not counted.
+        """
+        keys = [self._key(upload_request) for upload_request in upload_requests]
+        return [self._count_hit(hit) for hit in self._cache.get_many(keys)]
+
+    def cache_entry(
+        self,
+        upload_request: QuotationUploadRequest,
+    ) -> Optional[ExtractionCacheEntry]:
+        """Return the in-memory entry of this text, e.g. to ship it to a parent."""
+        key = self._key(upload_request)
+        cached = self._cache.peek(key)
+        if cached is None:
+            return None
+        fields, extraction_ms = cached
+        return key, fields, extraction_ms
+
+    def store_cache_entries(self, entries: Sequence[ExtractionCacheEntry]) -> None:
+        """
+        Record misses that were extracted elsewhere (e.g. in ingest workers),
+        with one table write for the whole batch.
+
+        Entries of another extractor name or version are ignored.
+        """
+        own = [entry for entry in entries if entry[0][:2] == (self.name, self.version)]
+        for _, _, extraction_ms in own:
+            self._count_miss(extraction_ms)
+        self._cache.put_many(own)
+
+    @traced("agent.extraction_cache")
+    def extract_structured_fields(
+        self,
+        upload_request: QuotationUploadRequest,
+    ) -> Dict[str, Any]:
+        """Return cached fields for this text, running the extractor on a miss."""
+        key = self._key(upload_request)
+        fields = self._lookup(key)
+        if fields is not None:
+            return fields
+
+        started = time.perf_counter()
+        fields = self._extractor.extract_structured_fields(upload_request)
+        self._store(key, fields, (time.perf_counter() - started) * 1000.0)
+        return fields
+
+    def _key(self, upload_request: QuotationUploadRequest) -> CacheKey:
+        return (self.name, self.version, text_fingerprint(upload_request.raw_text))
+
+    def _lookup(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        return self._count_hit(self._cache.get(key))
+
+    def _count_hit(self, cached: Optional[CacheHit]) -> Optional[Dict[str, Any]]:
+        if cached is None:
+            return None
+        fields, extraction_ms, level = cached
+        EXTRACTION_CACHE_LOOKUPS.inc(extractor=self.name, result=level)
+        EXTRACTION_CACHE_SAVED.inc(extraction_ms / 1000.0, extractor=self.name)
+        return fields
+
+    def _store(
+        self, key: CacheKey, fields: Dict[str, Any], extraction_ms: float
+    ) -> None:
+        self._count_miss(extraction_ms)
+        self._cache.put(key, fields, extraction_ms)
+
+    def _count_miss(self, extraction_ms: float) -> None:
+        EXTRACTION_CACHE_LOOKUPS.inc(extractor=self.name, result="miss")
+        EXTRACTION_DURATION.observe(extraction_ms / 1000.0, extractor=self.name)
+
+
+_shared_cache: Optional[ExtractionCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """
+    Return the process-wide ExtractionCache, or None when disabled.
+
+    Created on first use from the extraction_cache_* settings.
+    """
+    global _shared_cache
+    if not settings.extraction_cache_enabled:
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ExtractionCache.from_settings()
+        return _shared_cache
@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.agents.base import ExtractorAgentProtocol
+from app.core.contracts import QuotationItem, StructuredQuotation
+from app.core.schemas import QuotationUploadRequest
+from app.core.tracing import traced
+
+# Lines longer than this are not parsed for items or totals (they are
+# prose or data blobs, not quotation lines). It also bounds the work any
+# single line can cost.
+MAX_LINE_CHARS = 1000
+
+TITLE_CHARS = 200
+
+# All patterns below are built so that each position of a line is only
+# tried a bounded number of times: no nested quantifiers over the same
+# characters and no two adjacent unbounded repeats that can match the
+# same text. Matching is linear in the length of the input.
+_NUMBER = r"\d{1,3}(?:[.,]\d{3})+(?:[.,]\d{1,4})?|\d+(?:[.,]\d{1,4})?"
+_CURRENCY = r"R\$|US\$|[$€£¥]|\b(?:USD|EUR|GBP|BRL|JPY|CHF|CAD|AUD)\b"
+
+_CURRENCY_CODES = {
+    "R$": "BRL",
+    "US$": "USD",
+    "$": "USD",
+    "€": "EUR",
+    "£": "GBP",
+    "¥": "JPY",
+}
+
+_SUBTOTAL_LABELS = ("subtotal", "sub-total", "sub total", "net total", "net amount")
+_TAX_LABELS = ("tax", "taxes", "sales tax", "vat", "iva", "impostos")
+_TOTAL_LABELS = (
+    "total",
+    "grand total",
+    "total due",
+    "total amount",
+    "amount due",
+    "balance due",
+)
+_CUSTOMER_LABELS = ("customer", "client", "bill to", "billed to")
+_VENDOR_LABELS = ("vendor", "supplier", "seller", "from")
+
+
+def _alternation(*groups: tuple) -> str:
+    # Longest first, so "sub total" is not read as "sub" + "total".
+    labels = sorted((label for group in groups for label in group), key=len, reverse=True)
+    return "|".join(re.escape(label) for label in labels)
+
+
+_AMOUNT_LABEL_RE = re.compile(
+    rf"\s*(?P<label>{_alternation(_SUBTOTAL_LABELS, _TAX_LABELS, _TOTAL_LABELS)})\b",
+    re.IGNORECASE,
+)
+# Matched against the stripped rest of the line, so no unbounded run of
+# whitespace can be split between two repeats.
+_AMOUNT_VALUE_RE = re.compile(
+    r"(?:\([^)\n]{0,40}\)\s*)?"
+    r"(?:[:=\-]\s*)?"
+    rf"(?:(?P<currency>{_CURRENCY})\s*)?"
+    rf"(?P<sign>-)?(?P<amount>{_NUMBER})"
+    rf"(?:\s*(?P<currency_after>{_CURRENCY}))?",
+    re.IGNORECASE,
+)
+_NAME_LINE_RE = re.compile(
+    rf"\s*(?P<label>{_alternation(_CUSTOMER_LABELS, _VENDOR_LABELS)})\s*[:\-]\s*"
+    r"(?P<value>\S[^\n]*)",
+    re.IGNORECASE,
+)
+_TITLE_RE = re.compile(r"\s*(?:quotation|quote|proposal|orçamento|cotação)\b", re.IGNORECASE)
+# A run of digits and separators; boundaries are checked in _last_numbers.
+_NUMBER_RUN_RE = re.compile(r"\d[\d.,]*")
+_CURRENCY_RE = re.compile(_CURRENCY)
+# What may separate quantity and unit price in "10 x 5.00" / "10 @ $5".
+_TIMES_RE = re.compile(rf"\s*[x×*@]\s*(?:(?:{_CURRENCY})\s*)?", re.IGNORECASE)
+# "3 x Server rack" on the left side of an "@ unit price" line.
+_LEADING_QTY_RE = re.compile(rf"\s*(?P<qty>{_NUMBER})\s*[x×]\s*(?P<desc>[^\n]*)", re.IGNORECASE)
+_UNIT_PRICE_RE = re.compile(
+    rf"\s*(?:(?:{_CURRENCY})\s*)?(?P<unit>{_NUMBER})\s*(?:(?:{_CURRENCY})\s*)?$"
+)
+_LETTER_RE = re.compile(r"[^\W\d_]")
+
+_DESCRIPTION_STRIP = " \t|:;,-–—=*x×@$€£¥"
+
+
+def parse_amount(text: str) -> float:
+    """
+    Parse a number written with either `.` or `,` as decimal separator.
+
+    When both appear, the last one is the decimal separator. A single
+    separator followed by exactly three digits is a thousands separator
+    ("5,000"), unless the integer part is 0 ("0.125").
+    """
+    last_dot = text.rfind(".")
+    last_comma = text.rfind(",")
+    if last_dot >= 0 and last_comma >= 0:
+        if last_dot > last_comma:
+            return float(text.replace(",", ""))
+        return float(text.replace(".", "").replace(",", "."))
+
+    separator = "." if last_dot >= 0 else "," if last_comma >= 0 else ""
+    if not separator:
+        return float(text)
+
+    integer, _, fraction = text.rpartition(separator)
+    if text.count(separator) > 1 or (len(fraction) == 3 and integer.strip("0")):
+        return float(text.replace(separator, ""))
+    return float(integer.replace(separator, "") + "." + fraction)
+
+
+def _currency_code(symbol: str) -> str:
+    return _CURRENCY_CODES.get(symbol, symbol.upper())
+
+
+def _description(text: str) -> Optional[str]:
+    description = text.strip(_DESCRIPTION_STRIP)
+    if not description or not _LETTER_RE.search(description):
+        return None
+    return description
+
+
+def _close(expected: float, actual: float) -> bool:
+    return abs(expected - actual) <= max(0.01, abs(actual) * 0.005)
+
+
+def _glued(line: str, start: int, end: int) -> bool:
+    """Whether the number at [start, end) is part of a word ("42U", "A4")."""
+    before = line[start - 1] if start else " "
+    after = line[end] if end < len(line) else " "
+    # "10x5.00" is still a quantity and a unit price.
+    return (before.isalpha() and before not in "xX") or (
+        after.isalpha() and after not in "xX"
+    )
+
+
+def _last_numbers(
+    line: str,
+    runs: List[str],
+    count: int,
+) -> Optional[List[Tuple[int, float]]]:
+    """
+    Return (start, value) for the last `count` of the number `runs` found
+    in a line.
+
+    The runs come from `findall`, which runs entirely in C; positions are
+    recovered with rfind from the end of the line, which is exact because
+    consecutive runs have no digits between them. None when there are
+    fewer runs or one of them is glued to a word.
+    """
+    if len(runs) < count:
+        return None
+
+    numbers: List[Tuple[int, float]] = []
+    limit = len(line)
+    for run in reversed(runs[-count:]):
+        start = line.rfind(run, 0, limit)
+        text = run.rstrip(".,")
+        end = start + len(text)
+        if _glued(line, start, end):
+            return None
+        try:
+            value = parse_amount(text)
+        except ValueError:
+            # Not a number after all, e.g. "1.2,3,4".
+            return None
+        numbers.append((start, value))
+        limit = start
+    numbers.reverse()
+    return numbers
+
+
+def _parse_item(line: str) -> Optional[QuotationItem]:
+    """
+    Recognize one line item, or return None.
+
+    Accepted shapes (separators may be spaces, tabs, `|` or `;`):
+    - `<description> <qty> [x] <unit price> [=] <line total>`, kept only
+      when qty * unit price matches the line total;
+    - `<description> <qty> x|@ <unit price>`;
+    - `<qty> x <description> @ <unit price>`.
+    """
+    if "@" in line:
+        left, _, right = line.rpartition("@")
+        leading = _LEADING_QTY_RE.match(left)
+        unit_match = _UNIT_PRICE_RE.match(right)
+        if leading is not None and unit_match is not None:
+            description = _description(leading.group("desc"))
+            if description is not None:
+                quantity = parse_amount(leading.group("qty"))
+                unit_price = parse_amount(unit_match.group("unit"))
+                return QuotationItem.construct(
+                    description=description,
+                    quantity=quantity,
+                    unit_price=unit_price,
+                    total_price=round(quantity * unit_price, 2),
+                )
+
+    runs = _NUMBER_RUN_RE.findall(line)
+    if len(runs) < 2:
+        return None
+
+    numbers = _last_numbers(line, runs, 3)
+    if numbers is not None:
+        (qty_start, quantity), (_, unit_price), (_, total_price) = numbers
+        if quantity > 0 and _close(quantity * unit_price, total_price):
+            description = _description(line[:qty_start])
+            if description is not None:
+                return QuotationItem.construct(
+                    description=description,
+                    quantity=quantity,
+                    unit_price=unit_price,
+                    total_price=total_price,
+                )
+
+    numbers = _last_numbers(line, runs, 2)
+    if numbers is None:
+        return None
+    (qty_start, quantity), (unit_start, unit_price) = numbers
+    separator = line[qty_start:unit_start].lstrip("0123456789.,")
+    if not _TIMES_RE.fullmatch(separator):
+        return None
+    unit_run = _NUMBER_RUN_RE.match(line, unit_start)
+    if unit_run is None or line[unit_run.end() :].strip(" \t$€£¥"):
+        return None
+    description = _description(line[:qty_start])
+    if description is None:
+        return None
+    return QuotationItem.construct(
+        description=description,
+        quantity=quantity,
+        unit_price=unit_price,
+        total_price=round(quantity * unit_price, 2),
+    )
+
+
+class RuleBasedExtractorAgent(ExtractorAgentProtocol):
+    """
+    Local extractor that fills contracts.StructuredQuotation from raw text.
+
+    The text is scanned once, line by line, with precompiled patterns that
+    run in linear time, so multi-megabyte inputs are safe. It recognizes:
+    - the title (first line starting with "Quotation", "Quote", ...);
+    - customer and vendor names ("Customer: ...", "Supplier: ...");
+    - line items with quantity, unit price and line total;
+    - subtotal, taxes and total lines, and the first currency seen.
+
+    Missing totals are derived: subtotal from the items, total from
+    subtotal plus taxes.
+
+    The output depends on raw_text only. Bump `version` whenever a change
+    alters what is extracted, so cached results are invalidated.
+    """
+
+    name = "rules"
+    version = "1"
+
+    def extract(self, raw_text: str) -> StructuredQuotation:
+        """Return the structured quotation found in `raw_text`."""
+        title: Optional[str] = None
+        customer_name: Optional[str] = None
+        vendor_name: Optional[str] = None
+        currency: Optional[str] = None
+        items: List[QuotationItem] = []
+        subtotal: Optional[float] = None
+        taxes: Optional[float] = None
+        total: Optional[float] = None
+
+        for line in raw_text.splitlines():
+            if not line or len(line) > MAX_LINE_CHARS:
+                continue
+
+            if title is None and _TITLE_RE.match(line):
+                title = line.strip()[:TITLE_CHARS]
+                continue
+
+            if currency is None:
+                found = _CURRENCY_RE.search(line)
+                if found is not None:
+                    currency = _currency_code(found.group())
+
+            amount_label = _AMOUNT_LABEL_RE.match(line)
+            amount_line = (
+                _AMOUNT_VALUE_RE.fullmatch(line[amount_label.end() :].strip())
+                if amount_label is not None
+                else None
+            )
+            if amount_label is not None and amount_line is not None:
+                label = amount_label.group("label").lower()
+                amount = parse_amount(amount_line.group("amount"))
+                if amount_line.group("sign"):
+                    amount = -amount
+                if label in _TAX_LABELS:
+                    taxes = round((taxes or 0.0) + amount, 2)
+                elif label in _SUBTOTAL_LABELS:
+                    subtotal = amount
+                else:
+                    # The last total wins: grand totals come at the bottom.
+                    total = amount
+                continue
+
+            name_line = _NAME_LINE_RE.match(line)
+            if name_line is not None:
+                value = name_line.group("value").strip()[:TITLE_CHARS]
+                if name_line.group("label").lower() in _CUSTOMER_LABELS:
+                    customer_name = customer_name or value
+                else:
+                    vendor_name = vendor_name or value
+                continue
+
+            item = _parse_item(line)
+            if item is not None:
+                items.append(item)
+
+        if subtotal is None and items:
+            subtotal = round(sum(item.total_price for item in items), 2)
+        if total is None and subtotal is not None:
+            total = round(subtotal + (taxes or 0.0), 2)
+
+        # Every value was produced by the parser above; skip re-validation.
+        return StructuredQuotation.construct(
+            raw_text=raw_text,
+            title=title,
+            customer_name=customer_name,
+            vendor_name=vendor_name,
+            items=items,
+            subtotal=subtotal,
+            taxes=taxes,
+            total=total,
+            currency=currency,
+        )
+
+    @traced("agent.rules_extractor")
+    def extract_structured_fields(
+        self,
+        upload_request: QuotationUploadRequest,
+    ) -> Dict[str, Any]:
+        """Return the contract fields (without raw_text) as a plain dict."""
+        return self.extract(upload_request.raw_text).dict(exclude={"raw_text"})
@@ -4,6 +4,7 @@ from typing import Any, Dict
 
 from app.agents.base import ExtractorAgentProtocol
 from app.core.schemas import QuotationUploadRequest
+from app.core.tracing import traced
 
 
 class SimpleExtractorAgent(ExtractorAgentProtocol):
@@ -13,6 +14,7 @@ class SimpleExtractorAgent(ExtractorAgentProtocol):
     used in tests and local development before introducing an LLM-based agent.
     """
 
+    @traced("agent.simple_extractor")
     def extract_structured_fields(
         self,
         upload_request: QuotationUploadRequest,
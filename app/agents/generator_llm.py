@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, List, Optional, Sequence, Union, cast
+
+import httpx
+import orjson
+
+from app.agents.base import GeneratorAgentProtocol
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.core.schemas import QueryRequest, StructuredQuotation
+from app.core.tracing import traced
+
+LLM_GENERATIONS = REGISTRY.counter(
+    "llm_generations_total",
+    "Answer generations by model and outcome (ok, error, cancelled).",
+    ("model", "outcome"),
+)
+LLM_TIME_TO_FIRST_TOKEN = REGISTRY.histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from submitting a prompt to receiving its first token.",
+    ("model",),
+)
+LLM_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "llm_tokens_per_second",
+    "Streaming rate of a generation after its first token.",
+    ("model",),
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+)
+LLM_GENERATION_DURATION = REGISTRY.histogram(
+    "llm_generation_duration_seconds",
+    "Time from submitting a prompt to its last token.",
+    ("model",),
+)
+LLM_BATCH_SIZE = REGISTRY.histogram(
+    "llm_batch_size",
+    "Prompts sent per completions request.",
+    ("model",),
+    buckets=(1, 2, 4, 8, 16, 32),
+)
+
+INSTRUCTIONS = (
+    "Answer the question using only the quotations below. Refer to "
+    "quotations as [#id] and copy prices exactly as written. If the "
+    "quotations do not answer the question, say so."
+)
+
+
+class LLMGenerationError(RuntimeError):
+    """The completions server failed or returned an invalid response."""
+
+
+def build_prompt(
+    query: QueryRequest,
+    context: Sequence[StructuredQuotation],
+    max_context_chars: int = 6000,
+) -> str:
+    """
+    Build the completion prompt for a query and its retrieved quotations.
+
+    Quotations are added best first with whitespace collapsed, until
+    `max_context_chars` characters of quotation text have been used.
+    """
+    lines = [INSTRUCTIONS, ""]
+    remaining = max_context_chars
+    for quotation in context:
+        if remaining <= 0:
+            break
+        text = " ".join(quotation.raw_text.split())[:remaining]
+        remaining -= len(text)
+        lines.append(f"[#{quotation.id}] {quotation.supplier}: {text}")
+    lines += ["", f"Question: {query.query}", "Answer:"]
+    return "\n".join(lines)
+
+
+_DONE = object()
+
+
+@dataclass(eq=False)
+class _Generation:
+    """One prompt waiting for, or receiving, its streamed completion."""
+
+    prompt: str
+    chunks: "asyncio.Queue[Union[str, LLMGenerationError, object]]" = field(
+        default_factory=asyncio.Queue
+    )
+    batch: Optional["_Batch"] = None
+    finished: bool = False
+    listening: bool = True
+
+    def finish(self, item: object = _DONE) -> None:
+        if not self.finished:
+            self.finished = True
+            self.chunks.put_nowait(item)
+
+
+@dataclass(eq=False)
+class _Batch:
+    """Prompts sent together in one streaming completions request."""
+
+    generations: List[_Generation]
+    task: Optional["asyncio.Task[None]"] = None
+
+    def release(self, generation: _Generation) -> None:
+        """Stop listening for `generation`; cancel the request once nobody is."""
+        generation.listening = False
+        if self.task is not None and not any(g.listening for g in self.generations):
+            # Closing the response drops the connection, which tells the
+            # server to stop generating.
+            self.task.cancel()
+
+
+class LLMGeneratorAgent(GeneratorAgentProtocol):
+    """
+    Answer generator backed by an OpenAI-compatible completions server.
+
+    - The httpx client keeps a pool of keep-alive connections, so calls
+      do not pay for a new TCP (or TLS) handshake.
+    - Prompts submitted within `batch_window_ms` of each other are sent
+      as one streaming `/completions` request with a list of prompts (up
+      to `max_batch_size`), and the streamed choices are routed back to
+      each caller by their index.
+    - When every caller of a request stops iterating (e.g. the HTTP
+      client disconnected), the request is cancelled and its connection
+      closed, so the server stops generating.
+
+    Time to first token, tokens per second, duration and outcome are
+    recorded for every call in the llm_* metrics.
+
+    Batching state lives on the agent, so it must be shared by the
+    callers that should batch together and used from a single event loop
+    (see get_llm_generator).
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        *,
+        model: str,
+        max_tokens: int = 256,
+        temperature: float = 0.0,
+        max_context_chars: int = 6000,
+        batch_window_ms: float = 5.0,
+        max_batch_size: int = 8,
+    ) -> None:
+        self._client = client
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.max_context_chars = max_context_chars
+        self.batch_window_ms = batch_window_ms
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending: List[_Generation] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    @classmethod
+    def from_settings(cls, client: httpx.AsyncClient) -> "LLMGeneratorAgent":
+        return cls(
+            client,
+            model=settings.llm_model,
+            max_tokens=settings.llm_max_tokens,
+            temperature=settings.llm_temperature,
+            max_context_chars=settings.llm_max_context_chars,
+            batch_window_ms=settings.llm_batch_window_ms,
+            max_batch_size=settings.llm_max_batch_size,
+        )
+
+    @traced("agent.llm_generator")
+    async def astream(
+        self,
+        query: QueryRequest,
+        context: Sequence[StructuredQuotation],
+    ) -> AsyncGenerator[str, None]:
+        """Yield the answer token by token as the server streams it."""
+        generation = _Generation(build_prompt(query, context, self.max_context_chars))
+        started = time.perf_counter()
+        first_token_at: Optional[float] = None
+        tokens = 0
+        outcome = "cancelled"
+
+        self._submit(generation)
+        try:
+            while True:
+                item = await generation.chunks.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, LLMGenerationError):
+                    outcome = "error"
+                    raise item
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    LLM_TIME_TO_FIRST_TOKEN.observe(
+                        first_token_at - started, model=self.model
+                    )
+                tokens += 1
+                yield cast(str, item)
+            outcome = "ok"
+        finally:
+            self._release(generation)
+            finished_at = time.perf_counter()
+            LLM_GENERATIONS.inc(model=self.model, outcome=outcome)
+            LLM_GENERATION_DURATION.observe(finished_at - started, model=self.model)
+            if (
+                first_token_at is not None
+                and tokens > 1
+                and finished_at > first_token_at
+            ):
+                LLM_TOKENS_PER_SECOND.observe(
+                    (tokens - 1) / (finished_at - first_token_at), model=self.model
+                )
+
+    async def agenerate(
+        self,
+        query: QueryRequest,
+        context: Sequence[StructuredQuotation],
+    ) -> str:
+        """Return the full answer as a single string."""
+        return "".join([chunk async for chunk in self.astream(query, context)])
+
+    async def aclose(self) -> None:
+        """Close the client and its pooled connections."""
+        await self._client.aclose()
+
+    def _submit(self, generation: _Generation) -> None:
+        self._pending.append(generation)
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.batch_window_ms / 1000.0, self._flush
+            )
+
+    def _release(self, generation: _Generation) -> None:
+        if generation.batch is not None:
+            generation.batch.release(generation)
+        elif generation in self._pending:
+            # Left before its batch was sent.
+            self._pending.remove(generation)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        batch = _Batch(self._pending)
+        self._pending = []
+        for generation in batch.generations:
+            generation.batch = batch
+        batch.task = asyncio.get_running_loop().create_task(self._complete(batch))
+
+    async def _complete(self, batch: _Batch) -> None:
+        """Stream one completions request and route choices to their callers."""
+        generations = batch.generations
+        prompts = [generation.prompt for generation in generations]
+        LLM_BATCH_SIZE.observe(len(prompts), model=self.model)
+        payload = {
+            "model": self.model,
+            "prompt": prompts if len(prompts) > 1 else prompts[0],
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "stream": True,
+        }
+
+        error: Optional[str] = None
+        try:
+            async with self._client.stream(
+                "POST",
+                "completions",
+                content=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"},
+            ) as response:
+                if response.status_code >= 400:
+                    body = (await response.aread())[:200].decode("utf-8", "replace")
+                    raise LLMGenerationError(
+                        "Completions request failed with "
+                        f"{response.status_code}: {body}"
+                    )
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    for choice in orjson.loads(data).get("choices", ()):
+                        index = choice.get("index", 0)
+                        if not 0 <= index < len(generations):
+                            continue
+                        generation = generations[index]
+                        text = choice.get("text")
+                        if text and not generation.finished:
+                            generation.chunks.put_nowait(text)
+                        if choice.get("finish_reason") is not None:
+                            generation.finish()
+        except (httpx.HTTPError, LLMGenerationError, ValueError) as exc:
+            error = str(exc) or type(exc).__name__
+        finally:
+            for generation in generations:
+                generation.finish(
+                    LLMGenerationError(error) if error is not None else _DONE
+                )
+
+
+_llm_generator: Optional[LLMGeneratorAgent] = None
+_llm_generator_lock = threading.Lock()
+
+
+def build_llm_client() -> httpx.AsyncClient:
+    """Build the pooled keep-alive client for the llm_* settings."""
+    headers = {}
+    if settings.llm_api_key:
+        headers["Authorization"] = f"Bearer {settings.llm_api_key}"
+    return httpx.AsyncClient(
+        base_url=settings.llm_base_url,
+        headers=headers,
+        timeout=httpx.Timeout(settings.llm_timeout_s),
+        limits=httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+        ),
+    )
+
+
+def get_llm_generator() -> LLMGeneratorAgent:
+    """
+    Return the process-wide LLMGeneratorAgent.
+
+    Sharing one agent lets concurrent requests batch their prompts and
+    reuse the same connection pool. Created on first use.
+    """
+    global _llm_generator
+    with _llm_generator_lock:
+        if _llm_generator is None:
+            _llm_generator = LLMGeneratorAgent.from_settings(build_llm_client())
+        return _llm_generator
+
+
+async def close_llm_generator() -> None:
+    """Close the pooled connections of the shared agent, if it was created."""
+    global _llm_generator
+    with _llm_generator_lock:
+        generator, _llm_generator = _llm_generator, None
+    if generator is not None:
+        await generator.aclose()
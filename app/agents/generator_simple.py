@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import AsyncGenerator, Iterator, Sequence
+
+from app.agents.base import GeneratorAgentProtocol
+from app.core.schemas import QueryRequest, StructuredQuotation
+from app.core.tracing import traced
+
+SNIPPET_CHARS = 200
+
+
+class SimpleGeneratorAgent(GeneratorAgentProtocol):
+    """Minimal answer generator that summarizes the retrieved quotations.
+
+    This implementation is intentionally simple and deterministic so it can be
+    used in tests and local development before introducing an LLM-based agent.
+    The answer is produced line by line, so callers can stream it.
+    """
+
+    def stream(
+        self,
+        query: QueryRequest,
+        context: Sequence[StructuredQuotation],
+    ) -> Iterator[str]:
+        """Yield the answer in chunks (one line per quotation)."""
+        if not context:
+            yield f"No quotations matched the query {query.query!r}."
+            return
+
+        yield f"Found {len(context)} quotation(s) relevant to {query.query!r}:\n"
+        for position, quotation in enumerate(context, start=1):
+            snippet = " ".join(quotation.raw_text.split())
+            if len(snippet) > SNIPPET_CHARS:
+                snippet = snippet[: SNIPPET_CHARS - 3].rstrip() + "..."
+            yield f"{position}. {quotation.supplier} (#{quotation.id}): {snippet}\n"
+
+    @traced("agent.generator")
+    async def astream(
+        self,
+        query: QueryRequest,
+        context: Sequence[StructuredQuotation],
+    ) -> AsyncGenerator[str, None]:
+        """Async version of `stream`; each chunk is cheap to build."""
+        for chunk in self.stream(query, context):
+            yield chunk
+
+    def generate(
+        self,
+        query: QueryRequest,
+        context: Sequence[StructuredQuotation],
+    ) -> str:
+        """Return the full answer as a single string."""
+        return "".join(self.stream(query, context))
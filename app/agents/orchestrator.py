@@ -1,11 +1,28 @@
 from __future__ import annotations
 
+from typing import List, Optional, Sequence
+
 from sqlalchemy.orm import Session
 
 from app.agents.base import ExtractorAgentProtocol
+from app.agents.query_cache import SemanticQueryCache
 from app.core.embeddings import embed_text
-from app.core.schemas import QuotationUploadRequest, StructuredQuotation
-from app.db.repositories import create_quotation, upsert_quotation_embedding
+from app.core.executors import BULK, workload
+from app.core.ingest_pool import IngestProcessPool, PreparedUpload, prepare_upload
+from app.core.schemas import (
+    IngestItemResult,
+    QuotationUploadRequest,
+    StructuredQuotation,
+)
+from app.core.serialization import quotation_model
+from app.core.tracing import traced
+from app.db.repositories import (
+    add_quotation_with_embedding,
+    create_quotation,
+    is_transient_db_error,
+    upsert_quotation_embedding,
+)
+from app.db.sharding import ShardedVectorStore, ShardWrite
 
 
 class Orchestrator:
@@ -16,9 +33,32 @@ class Orchestrator:
     Later this class can be extended with retrieval and evaluation flows.
     """
 
-    def __init__(self, extractor: ExtractorAgentProtocol) -> None:
+    def __init__(
+        self,
+        extractor: ExtractorAgentProtocol,
+        pool: Optional[IngestProcessPool] = None,
+        query_cache: Optional[SemanticQueryCache] = None,
+        store: Optional[ShardedVectorStore] = None,
+    ) -> None:
+        """
+        Initialize the orchestrator.
+
+        With a pool, `ingest_batch` runs extraction and embedding of large
+        batches in worker processes; uploads found in `extractor`'s cache
+        are prepared in process, and worker results are stored in that
+        cache. Smaller batches and `ingest_quotation` use `extractor` in
+        process.
+        A query cache is invalidated after every ingestion that stored
+        quotations, so cached rankings never miss them.
+        With a ShardedVectorStore, quotations are written to their shards
+        instead of the session's database.
+        """
         self._extractor = extractor
+        self._pool = pool
+        self._query_cache = query_cache
+        self._store = store
 
+    @workload(BULK)
     def ingest_quotation(
         self,
         db: Session,
@@ -32,10 +72,27 @@ class Orchestrator:
         2. Persist a Quotation row with raw_text + structured_json.
         3. Generate an embedding for the quotation text.
         4. Upsert the embedding into the quotation_embeddings table.
-        5. Return a StructuredQuotation schema built from the ORM object.
+        5. Return a StructuredQuotation schema built from the ORM object
+           (without re-validating values that were just stored).
         """
         structured_fields = self._extractor.extract_structured_fields(upload)
 
+        if self._store is not None:
+            (result,) = self._store.add_batch(
+                [
+                    ShardWrite(
+                        supplier=upload.supplier,
+                        raw_text=upload.raw_text,
+                        structured_json=structured_fields,
+                        embedding=embed_text(upload.raw_text),
+                    )
+                ]
+            )
+            if isinstance(result, Exception):
+                raise result
+            self._invalidate_query_cache()
+            return quotation_model(result)
+
         quotation = create_quotation(
             db=db,
             supplier=upload.supplier,
@@ -49,5 +106,136 @@ class Orchestrator:
             quotation_id=quotation.id,
             embedding=embedding_vector,
         )
+        self._invalidate_query_cache()
+
+        return quotation_model(quotation)
+
+    @traced("ingest.ingest_batch")
+    @workload(BULK)
+    def ingest_batch(
+        self,
+        db: Session,
+        uploads: Sequence[QuotationUploadRequest],
+    ) -> List[IngestItemResult]:
+        """
+        Ingest several quotations using a single group commit.
+
+        Extraction and embedding are CPU-bound, so for batches of at least
+        `pool.min_items` they are fanned out to the process pool in
+        chunks. The database writes stay in this process.
+
+        Each item runs inside its own SAVEPOINT, so an item the database
+        rejects is rolled back and reported without affecting the rest of
+        the batch. All successful items are committed together at the end.
+        Results keep the input order.
+
+        Lost connections (see `is_transient_db_error`) and a failing final
+        commit are not item errors: the transaction is rolled back and the
+        exception propagates, so callers such as the ingest queue can
+        retry the whole batch.
 
-        return StructuredQuotation.from_orm(quotation)
+        With a sharded store, each shard commits its part of the batch and
+        the same rules apply per shard.
+        """
+        if self._store is not None:
+            return self._ingest_sharded(uploads, self._prepare(uploads))
+
+        results: List[IngestItemResult] = []
+
+        for index, (upload, prepared) in enumerate(
+            zip(uploads, self._prepare(uploads), strict=True)
+        ):
+            if prepared.error is not None:
+                results.append(
+                    IngestItemResult(index=index, status="error", error=prepared.error)
+                )
+                continue
+            assert prepared.embedding is not None
+
+            try:
+                with db.begin_nested():
+                    quotation = add_quotation_with_embedding(
+                        db=db,
+                        supplier=upload.supplier,
+                        raw_text=upload.raw_text,
+                        structured_json=prepared.structured_json,
+                        embedding=prepared.embedding,
+                    )
+                    structured = quotation_model(quotation)
+            except Exception as exc:
+                if is_transient_db_error(exc):
+                    db.rollback()
+                    raise
+                results.append(
+                    IngestItemResult(index=index, status="error", error=str(exc))
+                )
+                continue
+
+            results.append(
+                IngestItemResult(index=index, status="ok", quotation=structured)
+            )
+
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        if any(result.status == "ok" for result in results):
+            self._invalidate_query_cache()
+        return results
+
+    def _ingest_sharded(
+        self,
+        uploads: Sequence[QuotationUploadRequest],
+        prepared_uploads: Sequence[PreparedUpload],
+    ) -> List[IngestItemResult]:
+        assert self._store is not None
+        results: List[Optional[IngestItemResult]] = [None] * len(uploads)
+        writes: List[ShardWrite] = []
+        positions: List[int] = []
+        for index, (upload, prepared) in enumerate(
+            zip(uploads, prepared_uploads, strict=True)
+        ):
+            if prepared.error is not None:
+                results[index] = IngestItemResult(
+                    index=index, status="error", error=prepared.error
+                )
+                continue
+            assert prepared.embedding is not None
+            writes.append(
+                ShardWrite(
+                    supplier=upload.supplier,
+                    raw_text=upload.raw_text,
+                    structured_json=prepared.structured_json,
+                    embedding=prepared.embedding,
+                )
+            )
+            positions.append(index)
+
+        written_items = self._store.add_batch(writes)
+        for index, written in zip(positions, written_items, strict=True):
+            if isinstance(written, Exception):
+                results[index] = IngestItemResult(
+                    index=index, status="error", error=str(written)
+                )
+            else:
+                results[index] = IngestItemResult(
+                    index=index, status="ok", quotation=quotation_model(written)
+                )
+
+        if positions:
+            self._invalidate_query_cache()
+        return results  # type: ignore[return-value]
+
+    def _invalidate_query_cache(self) -> None:
+        if self._query_cache is not None:
+            self._query_cache.invalidate()
+
+    def _prepare(
+        self,
+        uploads: Sequence[QuotationUploadRequest],
+    ) -> List[PreparedUpload]:
+        if self._pool is not None and len(uploads) >= self._pool.min_items:
+            return self._pool.prepare(uploads, self._extractor)
+        return [prepare_upload(self._extractor, upload) for upload in uploads]
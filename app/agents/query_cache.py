@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import orjson
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+
+QUERY_CACHE_LOOKUPS = REGISTRY.counter(
+    "query_cache_lookups_total",
+    "Semantic query cache lookups by result (hit, miss).",
+    ("result",),
+)
+QUERY_CACHE_HIT_SIMILARITY = REGISTRY.histogram(
+    "query_cache_hit_similarity",
+    "Cosine similarity between a query and the cached query that served it.",
+    buckets=(0.8, 0.85, 0.9, 0.925, 0.95, 0.97, 0.98, 0.99, 0.995, 1.0),
+)
+QUERY_CACHE_INVALIDATIONS = REGISTRY.counter(
+    "query_cache_invalidations_total",
+    "Times the semantic query cache was cleared because quotations changed.",
+)
+QUERY_CACHE_ENTRIES = REGISTRY.gauge(
+    "query_cache_entries",
+    "Live entries of the process-wide semantic query cache.",
+)
+
+
+def filters_key(filters: Dict[str, Any]) -> bytes:
+    """Canonical form of query filters: equal filters give equal keys."""
+    return orjson.dumps(filters, option=orjson.OPT_SORT_KEYS, default=str)
+
+
+class SemanticQueryCache:
+    """
+    Cache of ranked quotation ids keyed by query embedding.
+
+    Embeddings of recent queries are kept, unit-normalized, in one
+    float32 matrix, so a lookup is a single matrix-vector product. A
+    query is served from an entry whose cosine similarity is at least
+    `threshold`, whose filters are identical and which ranked at least
+    as many quotations as requested (the first top_k ids are returned).
+
+    Entries expire after `ttl_s` seconds; when the cache is full the least
+    recently used entry is replaced. `invalidate` drops everything and
+    must be called whenever quotations are added or changed. Results of
+    searches that started before an invalidation are not stored (see
+    `generation`). The cache is per process: writes made by other
+    processes are only picked up once entries expire.
+
+    Lowering `threshold` raises the hit rate at the cost of serving
+    rankings computed for less similar queries; scripts/tune_query_cache.py
+    measures both on a query log.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1024,
+        threshold: float = 0.95,
+        ttl_s: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.threshold = threshold
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._expires = np.full(self.max_entries, -np.inf)
+        self._last_used = np.zeros(self.max_entries, dtype=np.int64)
+        self._top_k = np.zeros(self.max_entries, dtype=np.int64)
+        self._filter_ids = np.full(self.max_entries, -1, dtype=np.int64)
+        self._ids: List[Optional[List[int]]] = [None] * self.max_entries
+        self._filter_keys: Dict[bytes, int] = {}
+        self._next_filter_id = 0
+        self._tick = 0
+        self.generation = 0
+
+    @classmethod
+    def from_settings(cls) -> "SemanticQueryCache":
+        return cls(
+            max_entries=settings.query_cache_max_entries,
+            threshold=settings.query_cache_similarity_threshold,
+            ttl_s=settings.query_cache_ttl_s,
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(np.count_nonzero(self._expires > self._clock()))
+
+    def lookup(
+        self,
+        embedding: np.ndarray,
+        filters: Dict[str, Any],
+        top_k: int,
+    ) -> Optional[List[int]]:
+        """Return the cached ranked ids for a similar query, or None."""
+        vector = _unit(embedding)
+        with self._lock:
+            filter_id = self._filter_keys.get(filters_key(filters))
+            if self._matrix is None or filter_id is None or vector is None:
+                QUERY_CACHE_LOOKUPS.inc(result="miss")
+                return None
+            if len(vector) != self._matrix.shape[1]:
+                raise ValueError(
+                    f"Expected a {self._matrix.shape[1]}-dimensional embedding."
+                )
+
+            usable = (
+                (self._filter_ids == filter_id)
+                & (self._top_k >= top_k)
+                & (self._expires > self._clock())
+            )
+            similarity = np.where(usable, self._matrix @ vector, -np.inf)
+            slot = int(np.argmax(similarity))
+            best = float(similarity[slot])
+            if best < self.threshold:
+                QUERY_CACHE_LOOKUPS.inc(result="miss")
+                return None
+
+            self._tick += 1
+            self._last_used[slot] = self._tick
+            ids = self._ids[slot][:top_k]  # type: ignore[index]
+
+        QUERY_CACHE_LOOKUPS.inc(result="hit")
+        QUERY_CACHE_HIT_SIMILARITY.observe(best)
+        return ids
+
+    def store(
+        self,
+        embedding: np.ndarray,
+        filters: Dict[str, Any],
+        top_k: int,
+        ids: Sequence[int],
+        generation: int,
+    ) -> None:
+        """
+        Remember the ranked ids of a search.
+
+        `generation` is the value of `self.generation` read before the
+        search ran; if the cache was invalidated since, the ids may miss
+        new quotations and are not stored.
+        """
+        vector = _unit(embedding)
+        if vector is None:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            if self._matrix is None:
+                self._matrix = np.zeros(
+                    (self.max_entries, len(vector)), dtype=np.float32
+                )
+
+            now = self._clock()
+            expired = np.flatnonzero(self._expires <= now)
+            if len(expired):
+                slot = int(expired[0])
+            else:
+                slot = int(np.argmin(self._last_used))
+
+            key = filters_key(filters)
+            filter_id = self._filter_keys.get(key)
+            if filter_id is None:
+                if len(self._filter_keys) >= 2 * self.max_entries:
+                    # Forget filter combinations no live entry uses any more.
+                    live = set(self._filter_ids[self._expires > now].tolist())
+                    self._filter_keys = {
+                        k: v for k, v in self._filter_keys.items() if v in live
+                    }
+                filter_id = self._filter_keys[key] = self._next_filter_id
+                self._next_filter_id += 1
+
+            self._tick += 1
+            self._matrix[slot] = vector
+            self._expires[slot] = now + self.ttl_s
+            self._last_used[slot] = self._tick
+            self._top_k[slot] = top_k
+            self._filter_ids[slot] = filter_id
+            self._ids[slot] = list(ids)
+
+    def invalidate(self) -> None:
+        """Drop every entry; searches already running will not be stored."""
+        with self._lock:
+            self.generation += 1
+            self._expires[:] = -np.inf
+            self._ids = [None] * self.max_entries
+            self._filter_ids[:] = -1
+            self._filter_keys.clear()
+        QUERY_CACHE_INVALIDATIONS.inc()
+
+
+def _unit(embedding: np.ndarray) -> Optional[np.ndarray]:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    if norm == 0.0 or not np.isfinite(norm):
+        return None
+    return vector / norm
+
+
+_query_cache: Optional[SemanticQueryCache] = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> Optional[SemanticQueryCache]:
+    """
+    Return the process-wide SemanticQueryCache, or None when disabled.
+
+    Created on first use from the query_cache_* settings.
+    """
+    global _query_cache
+    if not settings.query_cache_enabled:
+        return None
+    with _query_cache_lock:
+        if _query_cache is None:
+            _query_cache = SemanticQueryCache.from_settings()
+            QUERY_CACHE_ENTRIES.set_function(_query_cache.__len__)
+        return _query_cache
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+from app.agents.base import RerankerProtocol
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.core.schemas import QueryRequest, StructuredQuotation
+from app.core.tracing import traced
+
+RERANK_DURATION = REGISTRY.histogram(
+    "rerank_duration_seconds",
+    "Time spent re-ranking retrieval candidates.",
+)
+RERANK_CANDIDATES = REGISTRY.histogram(
+    "rerank_candidates",
+    "Number of candidates scored per re-rank.",
+    buckets=(5, 10, 20, 50, 100, 200, 500),
+)
+RERANK_RANK_SHIFT = REGISTRY.histogram(
+    "rerank_rank_shift",
+    "Mean absolute change of vector rank among the returned quotations.",
+    buckets=(0, 0.5, 1, 2, 4, 8, 16, 32),
+)
+RERANK_PROMOTED = REGISTRY.counter(
+    "rerank_promoted_total",
+    "Returned quotations that were outside the vector search top_k.",
+)
+
+FEATURES = ("vector", "lexical", "structured", "recency")
+
+_TOKEN_RE = re.compile(r"\w{2,}")
+_CURRENCY_SYMBOLS = {
+    "R$": "BRL",
+    "US$": "USD",
+    "$": "USD",
+    "€": "EUR",
+    "£": "GBP",
+    "¥": "JPY",
+}
+_QUERY_CURRENCY_RE = re.compile(
+    r"R\$|US\$|[$€£¥]|\b(?:USD|EUR|GBP|BRL|JPY|CHF|CAD|AUD)\b", re.IGNORECASE
+)
+_SECONDS_PER_DAY = 86400.0
+
+
+@dataclass
+class RerankWeights:
+    """Weight of each feature in the re-ranking score."""
+
+    vector: float = field(default_factory=lambda: settings.rerank_weight_vector)
+    lexical: float = field(default_factory=lambda: settings.rerank_weight_lexical)
+    structured: float = field(default_factory=lambda: settings.rerank_weight_structured)
+    recency: float = field(default_factory=lambda: settings.rerank_weight_recency)
+
+    def as_array(self) -> np.ndarray:
+        return np.array([getattr(self, name) for name in FEATURES], dtype=np.float64)
+
+
+def query_currency(query: QueryRequest) -> Optional[str]:
+    """Currency asked for in filters["currency"] or mentioned in the query."""
+    currency = query.filters.get("currency")
+    if isinstance(currency, str) and currency.strip():
+        return currency.strip().upper()
+    found = _QUERY_CURRENCY_RE.search(query.query)
+    if found is None:
+        return None
+    return _CURRENCY_SYMBOLS.get(found.group(), found.group().upper())
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+class FeatureReranker(RerankerProtocol):
+    """
+    Re-score vector search candidates with a linear feature model.
+
+    Features, each in [0, 1], one row per feature and one column per
+    candidate:
+    - `vector`: 1 / (1 + distance) from the vector search;
+    - `lexical`: share of the query words found in supplier + raw_text;
+    - `structured`: share of the structured criteria the candidate
+      matches: currency (filters["currency"] or a currency in the query),
+      total within filters["min_total"] / filters["max_total"], and the
+      supplier or vendor being named in the query;
+    - `recency`: halves every `recency_half_life_days` behind the newest
+      candidate.
+
+    The score is the weighted sum of the features. Ties keep the vector
+    order. Latency, candidate counts, rank shifts and promotions from
+    beyond the vector top_k are recorded as metrics, so the number of
+    candidates can be sized against the query budget.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[RerankWeights] = None,
+        *,
+        recency_half_life_days: float = 90.0,
+    ) -> None:
+        self.weights = weights or RerankWeights()
+        self.recency_half_life_days = recency_half_life_days
+
+    @classmethod
+    def from_settings(cls) -> "FeatureReranker":
+        return cls(
+            RerankWeights(),
+            recency_half_life_days=settings.rerank_recency_half_life_days,
+        )
+
+    def features(
+        self,
+        query: QueryRequest,
+        candidates: Sequence[StructuredQuotation],
+        distances: Sequence[float],
+    ) -> np.ndarray:
+        """Return the (len(FEATURES), len(candidates)) feature matrix."""
+        count = len(candidates)
+        matrix = np.zeros((len(FEATURES), count), dtype=np.float64)
+        if not count:
+            return matrix
+
+        matrix[0] = 1.0 / (
+            1.0 + np.maximum(np.asarray(distances, dtype=np.float64), 0.0)
+        )
+
+        words = sorted(set(_TOKEN_RE.findall(query.query.lower())))
+        if words:
+            texts = [
+                f"{candidate.supplier}\n{candidate.raw_text}".lower()
+                for candidate in candidates
+            ]
+            hits = np.array(
+                [[word in text for word in words] for text in texts], dtype=np.float64
+            )
+            matrix[1] = hits.mean(axis=1)
+
+        matrix[2] = self._structured(query, candidates)
+
+        timestamps = np.array(
+            [candidate.created_at.timestamp() for candidate in candidates],
+            dtype=np.float64,
+        )
+        age_days = (timestamps.max() - timestamps) / _SECONDS_PER_DAY
+        matrix[3] = np.exp2(-age_days / self.recency_half_life_days)
+        return matrix
+
+    def scores(
+        self,
+        query: QueryRequest,
+        candidates: Sequence[StructuredQuotation],
+        distances: Sequence[float],
+    ) -> np.ndarray:
+        """Return the weighted score of every candidate."""
+        return self.weights.as_array() @ self.features(query, candidates, distances)
+
+    @traced("agent.reranker")
+    def rerank(
+        self,
+        query: QueryRequest,
+        candidates: Sequence[StructuredQuotation],
+        distances: Sequence[float],
+    ) -> List[StructuredQuotation]:
+        """Return the query.top_k best candidates by score."""
+        started = time.perf_counter()
+        scores = self.scores(query, candidates, distances)
+        # Stable sort on the negated score: ties keep the vector order.
+        order = np.argsort(-scores, kind="stable")[: query.top_k]
+
+        RERANK_DURATION.observe(time.perf_counter() - started)
+        RERANK_CANDIDATES.observe(len(candidates))
+        if len(order):
+            RERANK_RANK_SHIFT.observe(
+                float(np.abs(order - np.arange(len(order))).mean())
+            )
+            RERANK_PROMOTED.inc(int((order >= query.top_k).sum()))
+        return [candidates[index] for index in order.tolist()]
+
+    def _structured(
+        self,
+        query: QueryRequest,
+        candidates: Sequence[StructuredQuotation],
+    ) -> np.ndarray:
+        fields = [candidate.structured_json or {} for candidate in candidates]
+        criteria: List[np.ndarray] = []
+
+        currency = query_currency(query)
+        if currency is not None:
+            criteria.append(
+                np.array(
+                    [
+                        str(item.get("currency") or "").upper() == currency
+                        for item in fields
+                    ]
+                )
+            )
+
+        min_total = _number(query.filters.get("min_total"))
+        max_total = _number(query.filters.get("max_total"))
+        if min_total is not None or max_total is not None:
+            totals = np.array(
+                [_number(item.get("total")) for item in fields], dtype=np.float64
+            )
+            # Missing totals are NaN and never match.
+            in_range = ~np.isnan(totals)
+            if min_total is not None:
+                in_range &= totals >= min_total
+            if max_total is not None:
+                in_range &= totals <= max_total
+            criteria.append(in_range)
+
+        query_text = query.query.lower()
+        named = np.array(
+            [
+                any(
+                    name and name.lower() in query_text
+                    for name in (candidate.supplier, item.get("vendor_name"))
+                    if isinstance(name, str)
+                )
+                for candidate, item in zip(candidates, fields, strict=True)
+            ]
+        )
+        if named.any():
+            criteria.append(named)
+
+        if not criteria:
+            return np.zeros(len(candidates), dtype=np.float64)
+        return np.mean(np.vstack(criteria).astype(np.float64), axis=0)
@@ -1,16 +1,41 @@
 from __future__ import annotations
 
-from typing import Sequence
+from typing import Any, Callable, Dict, List, Optional, Sequence, cast
 
+import numpy as np
 from sqlalchemy.orm import Session
 
-from app.agents.base import RetrieverAgentProtocol
+from app.agents.base import EmbeddingRetrieverProtocol, RerankerProtocol
+from app.agents.query_cache import SemanticQueryCache
+from app.core.config import settings
 from app.core.embeddings import embed_text
+from app.core.hits import DetailsRow, HitDetailsLoader, QuotationHit
 from app.core.schemas import QueryRequest, StructuredQuotation
-from app.db.retrieval import get_similar_quotations
+from app.core.serialization import quotation_model
+from app.core.tracing import traced
+from app.db.retrieval import (
+    get_quotation_details_by_ids,
+    get_quotation_rows_by_ids,
+    get_similar_quotation_hits,
+    get_similar_quotation_rows,
+)
+from app.db.session import get_session_factory
+from app.db.sharding import ShardedVectorStore
 
 
-class RetrieverAgent(RetrieverAgentProtocol):
+def parse_supplier_filter(filters: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Return the cleaned supplier filter from query filters, if any."""
+    if not filters:
+        return None
+    raw_supplier = filters.get("supplier")
+    if isinstance(raw_supplier, str):
+        cleaned = raw_supplier.strip()
+        if cleaned:
+            return cleaned
+    return None
+
+
+class RetrieverAgent(EmbeddingRetrieverProtocol):
     """
     Agent responsible for retrieving quotations using vector similarity search.
 
@@ -18,9 +43,38 @@ class RetrieverAgent(RetrieverAgentProtocol):
     - embeds the natural language query,
     - runs a pgvector similarity search in Postgres,
     - returns the top-k quotations as StructuredQuotation objects.
+
+    With a reranker, the search over-fetches `candidates` quotations
+    (never fewer than top_k) together with their vector distances, and
+    the reranker picks and orders the top_k.
+
+    With a SemanticQueryCache, a query close enough to a recent one (and
+    with the same filters) reuses its ranking: only the cached ids are
+    loaded, skipping the similarity search and re-ranking.
+
+    With a ShardedVectorStore, searches and cached-id lookups go to the
+    shards instead of the session's database. `partial` is set when the
+    last search was answered without every shard (such rankings are not
+    cached).
+
+    With `compact=True` (RETRIEVAL_COMPACT_HITS) results are QuotationHit
+    objects instead: the search selects only id, supplier, created_at and
+    the distance, and raw_text/structured_json are loaded in one query for
+    all hits of a search when first read, through a short-lived session
+    from `details_session_factory` (the caller's session may be closed by
+    then).
     """
 
-    def __init__(self, db: Session) -> None:
+    def __init__(
+        self,
+        db: Session,
+        reranker: Optional[RerankerProtocol] = None,
+        candidates: Optional[int] = None,
+        cache: Optional[SemanticQueryCache] = None,
+        store: Optional[ShardedVectorStore] = None,
+        compact: Optional[bool] = None,
+        details_session_factory: Optional[Callable[[], Session]] = None,
+    ) -> None:
         """
         Initialize the retriever with an existing database session.
 
@@ -28,6 +82,17 @@ class RetrieverAgent(RetrieverAgentProtocol):
         (opening, committing/rolling back, and closing).
         """
         self._db = db
+        self._reranker = reranker
+        self._candidates = (
+            candidates if candidates is not None else settings.rerank_candidates
+        )
+        self._cache = cache
+        self._store = store
+        self._compact = (
+            compact if compact is not None else settings.retrieval_compact_hits
+        )
+        self._details_session_factory = details_session_factory
+        self.partial = False
 
     def retrieve(self, query: QueryRequest) -> Sequence[StructuredQuotation]:
         """
@@ -42,22 +107,128 @@ class RetrieverAgent(RetrieverAgentProtocol):
         if not query_text:
             return []
 
-        embedding_vector = embed_text(query_text)
-        top_k = query.top_k
-
-        supplier_filter = None
-        if query.filters:
-            raw_supplier = query.filters.get("supplier")
-            if isinstance(raw_supplier, str):
-                cleaned = raw_supplier.strip()
-                if cleaned:
-                    supplier_filter = cleaned
-
-        quotations = get_similar_quotations(
-            db=self._db,
-            embedding=embedding_vector,
-            limit=top_k,
-            supplier=supplier_filter,
+        return self.retrieve_embedded(
+            query,
+            embed_text(query_text),
+            parse_supplier_filter(query.filters),
         )
 
-        return [StructuredQuotation.from_orm(q) for q in quotations]
+    @traced("agent.retriever")
+    def retrieve_embedded(
+        self,
+        query: QueryRequest,
+        embedding: np.ndarray,
+        supplier: Optional[str] = None,
+    ) -> Sequence[StructuredQuotation]:
+        """
+        Run the similarity search for an embedding computed by the caller.
+
+        This lets the orchestrator embed the query and parse its filters
+        concurrently before touching the database.
+        """
+        cache = self._cache
+        if cache is None:
+            return self._search(query, embedding, supplier)
+
+        ids = cache.lookup(embedding, query.filters, query.top_k)
+        if ids is not None:
+            return self._results(self._rows_by_ids(ids))
+
+        generation = cache.generation
+        results = self._search(query, embedding, supplier)
+        if self.partial:
+            return results
+        cache.store(
+            embedding,
+            query.filters,
+            query.top_k,
+            [quotation.id for quotation in results],
+            generation,
+        )
+        return results
+
+    def _search(
+        self,
+        query: QueryRequest,
+        embedding: np.ndarray,
+        supplier: Optional[str],
+    ) -> Sequence[StructuredQuotation]:
+        if self._reranker is None:
+            rows = self._similar_rows(embedding, query.top_k, supplier, False)
+            return self._results(rows)
+
+        rows = self._similar_rows(
+            embedding, max(query.top_k, self._candidates), supplier, True
+        )
+        # Hits of a similarity search always carry their distance (only
+        # cached rankings have no score).
+        distances = [
+            cast(float, row.score) if isinstance(row, QuotationHit) else row.distance
+            for row in rows
+        ]
+        return self._reranker.rerank(query, self._results(rows), distances)
+
+    def _results(self, rows: Sequence[Any]) -> List[Any]:
+        if rows and isinstance(rows[0], QuotationHit):
+            return list(rows)
+        if self._compact:
+            # Details are already in memory (sharded store, cached ids).
+            return [
+                QuotationHit(
+                    row.id,
+                    row.supplier,
+                    getattr(row, "distance", None),
+                    row.created_at,
+                    details=(row.raw_text, row.structured_json),
+                )
+                for row in rows
+            ]
+        # Rows come straight from the database, so skip re-validation.
+        return [quotation_model(row) for row in rows]
+
+    def _similar_rows(
+        self,
+        embedding: np.ndarray,
+        limit: int,
+        supplier: Optional[str],
+        with_distance: bool,
+    ) -> List[Any]:
+        if self._store is None and self._compact:
+            self.partial = False
+            return get_similar_quotation_hits(
+                db=self._db,
+                embedding=embedding,
+                loader=HitDetailsLoader(self._fetch_details),
+                limit=limit,
+                supplier=supplier,
+            )
+        if self._store is None:
+            self.partial = False
+            if with_distance:
+                # Distances are only selected for re-ranking.
+                return get_similar_quotation_rows(
+                    db=self._db,
+                    embedding=embedding,
+                    limit=limit,
+                    supplier=supplier,
+                    with_distance=True,
+                )
+            return get_similar_quotation_rows(
+                db=self._db, embedding=embedding, limit=limit, supplier=supplier
+            )
+        result = self._store.search(embedding, limit, supplier)
+        self.partial = result.partial
+        return result.rows
+
+    def _rows_by_ids(self, ids: Sequence[int]) -> List[Any]:
+        if self._store is None:
+            self.partial = False
+            return get_quotation_rows_by_ids(self._db, ids)
+        result = self._store.get_rows(ids)
+        self.partial = result.partial
+        return result.rows
+
+    def _fetch_details(self, ids: Sequence[int]) -> List[DetailsRow]:
+        session_factory = self._details_session_factory or get_session_factory()
+        with session_factory() as db:
+            return get_quotation_details_by_ids(db, ids)
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Optional
+
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import Settings
+from app.core.executors import BULK, INTERACTIVE
+from app.core.metrics import REGISTRY
+from app.db.pool import PoolStats
+
+INGEST = "ingest"
+QUERY = "query"
+HEALTH = "health"
+
+ADMISSION_DECISIONS = REGISTRY.counter(
+    "admission_decisions_total",
+    "Admission control decisions by route class and outcome.",
+    ("route_class", "decision"),
+)
+ADMISSION_INFLIGHT = REGISTRY.gauge(
+    "admission_inflight_requests",
+    "Requests currently being processed, by route class.",
+    ("route_class",),
+)
+ADMISSION_QUEUED = REGISTRY.gauge(
+    "admission_queued_requests",
+    "Requests waiting for an admission slot, by route class.",
+    ("route_class",),
+)
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.future: asyncio.Future[None] = loop.create_future()
+        self.granted = False
+
+
+def _wake(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class AdmissionGate:
+    """
+    Concurrency limit with a bounded FIFO wait queue for one route class.
+
+    Slots are handed directly to the oldest waiter on release. State is
+    guarded by a thread lock and waiters are woken on their own loop, so
+    the gate does not depend on a particular event loop.
+    """
+
+    def __init__(self, max_inflight: int, max_queue: int) -> None:
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.inflight = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.inflight < self.max_inflight and not self._waiters:
+                self.inflight += 1
+                return True
+            return False
+
+    def can_queue(self) -> bool:
+        with self._lock:
+            return len(self._waiters) < self.max_queue
+
+    async def acquire(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for a slot; False if none was granted."""
+        if self.try_acquire():
+            return True
+
+        waiter = _Waiter(asyncio.get_running_loop())
+        with self._lock:
+            self._waiters.append(waiter)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if not waiter.granted:
+                    self._waiters.remove(waiter)
+                    return False
+            # The slot was handed over while we were timing out: keep it.
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                self.release()
+            raise
+        return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.inflight -= 1
+            if self._waiters and self.inflight < self.max_inflight:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                self.inflight += 1
+                waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+
+
+@dataclass
+class RouteClassPolicy:
+    gate: AdmissionGate
+    # Shed the class when the smoothed checkout wait of the connection
+    # pool of its workload class exceeds this.
+    max_pool_wait_ms: float
+    workload: str = INTERACTIVE
+
+
+class AdmissionController:
+    """
+    Decide whether a request may start, wait, or must be rejected.
+
+    Requests are grouped into route classes by path: ingest (`/upload`),
+    query (`/query`, `/quotations`, `/jobs`, `/internal`) and health
+    (`/health`, `/metrics`). Health requests are never limited. For the
+    other classes:
+
+    1. if more threads are queued on the class's DB pool (ingest uses
+       the bulk pool, queries the interactive one) than the pool has
+       connections, or its smoothed checkout wait exceeds the class
+       threshold, reply 503 so clients back off before the pool is
+       exhausted. The queue depth reacts at once; the wait average
+       catches sustained slowness;
+    2. if all slots are busy and the wait queue is full, reply 429;
+    3. otherwise wait for a slot up to `queue_timeout_s`, then reply 503.
+
+    Rejections carry a Retry-After header, and every decision is counted
+    in `admission_decisions_total`.
+    """
+
+    def __init__(
+        self,
+        policies: Dict[str, RouteClassPolicy],
+        *,
+        api_prefix: str,
+        pool_stats: Callable[[str], PoolStats] = lambda workload: PoolStats(),
+        queue_timeout_s: float = 2.0,
+        retry_after_s: int = 1,
+    ) -> None:
+        self.policies = policies
+        self._pool_stats = pool_stats
+        self._queue_timeout_s = queue_timeout_s
+        self._retry_after_s = retry_after_s
+        self._prefixes = {
+            f"{api_prefix}/upload": INGEST,
+            f"{api_prefix}/query": QUERY,
+            f"{api_prefix}/quotations": QUERY,
+            f"{api_prefix}/jobs": QUERY,
+            f"{api_prefix}/internal": QUERY,
+            f"{api_prefix}/health": HEALTH,
+            f"{api_prefix}/metrics": HEALTH,
+        }
+
+        for route_class, policy in policies.items():
+            ADMISSION_INFLIGHT.set_function(
+                functools.partial(getattr, policy.gate, "inflight"),
+                route_class=route_class,
+            )
+            ADMISSION_QUEUED.set_function(
+                functools.partial(getattr, policy.gate, "queued"),
+                route_class=route_class,
+            )
+
+    @classmethod
+    def from_settings(
+        cls,
+        settings: Settings,
+        pool_stats: Callable[[str], PoolStats] = lambda workload: PoolStats(),
+    ) -> "AdmissionController":
+        return cls(
+            {
+                INGEST: RouteClassPolicy(
+                    gate=AdmissionGate(
+                        settings.admission_max_inflight_ingest,
+                        settings.admission_max_queue_ingest,
+                    ),
+                    max_pool_wait_ms=settings.admission_ingest_pool_wait_ms,
+                    workload=BULK,
+                ),
+                QUERY: RouteClassPolicy(
+                    gate=AdmissionGate(
+                        settings.admission_max_inflight_query,
+                        settings.admission_max_queue_query,
+                    ),
+                    max_pool_wait_ms=settings.admission_query_pool_wait_ms,
+                    workload=INTERACTIVE,
+                ),
+            },
+            api_prefix=settings.api_prefix,
+            pool_stats=pool_stats,
+            queue_timeout_s=settings.admission_queue_timeout_ms / 1000.0,
+            retry_after_s=settings.admission_retry_after_s,
+        )
+
+    def classify(self, path: str) -> Optional[str]:
+        for prefix, route_class in self._prefixes.items():
+            if path == prefix or path.startswith(prefix + "/"):
+                return route_class
+        return None
+
+    def reject(self, status_code: int, detail: str) -> ORJSONResponse:
+        return ORJSONResponse(
+            status_code=status_code,
+            content={"detail": detail},
+            headers={"Retry-After": str(self._retry_after_s)},
+        )
+
+    async def admit(self, route_class: str) -> Optional[ORJSONResponse]:
+        """Acquire a slot for the class, or return the rejection response."""
+        policy = self.policies[route_class]
+
+        pool = self._pool_stats(policy.workload)
+        if pool.capacity and pool.waiting > pool.capacity:
+            ADMISSION_DECISIONS.inc(
+                route_class=route_class, decision="shed_pool_queue"
+            )
+            return self.reject(503, "Database is saturated, retry later.")
+        if pool.checkout_wait_ms > policy.max_pool_wait_ms:
+            ADMISSION_DECISIONS.inc(route_class=route_class, decision="shed_pool")
+            return self.reject(503, "Database is saturated, retry later.")
+
+        if policy.gate.try_acquire():
+            ADMISSION_DECISIONS.inc(route_class=route_class, decision="admitted")
+            return None
+
+        if not policy.gate.can_queue():
+            ADMISSION_DECISIONS.inc(
+                route_class=route_class, decision="shed_queue_full"
+            )
+            return self.reject(429, "Too many concurrent requests, retry later.")
+
+        if await policy.gate.acquire(self._queue_timeout_s):
+            ADMISSION_DECISIONS.inc(
+                route_class=route_class, decision="admitted_after_wait"
+            )
+            return None
+
+        ADMISSION_DECISIONS.inc(route_class=route_class, decision="shed_timeout")
+        return self.reject(503, "Timed out waiting for capacity, retry later.")
+
+    def release(self, route_class: str) -> None:
+        self.policies[route_class].gate.release()
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware applying an AdmissionController to HTTP requests."""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController) -> None:
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = self.controller.classify(scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        if route_class not in self.controller.policies:
+            # Health checks are counted but never limited or shed.
+            ADMISSION_INFLIGHT.inc(route_class=route_class)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                ADMISSION_INFLIGHT.dec(route_class=route_class)
+            return
+
+        rejection = await self.controller.admit(route_class)
+        if rejection is not None:
+            await rejection(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route_class)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.executors import shutdown_workload_executors
+from app.core.registry import AgentRegistry
+from app.core.tracing import configure_tracing, shutdown_tracing
+
+logger = logging.getLogger(__name__)
+
+_registry_lock = threading.Lock()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Application lifespan: build the AgentRegistry and release it at exit.
+
+    With WARMUP_ENABLED the database pool, the retrieval path and the
+    caches are warmed before the first request is accepted. The
+    write-behind ingestion worker then starts, replaying uploads a
+    previous process accepted but did not store. Shutdown lets it finish
+    its current batch before the extract/embed worker processes and
+    pooled connections are closed.
+    """
+    configure_tracing()
+    registry = AgentRegistry.from_settings()
+    app.state.registry = registry
+    if settings.warmup_enabled:
+        durations = await run_in_threadpool(registry.warmup)
+        logger.info(
+            "Warmup finished: %s",
+            ", ".join(
+                f"{step} {seconds * 1000:.0f} ms" for step, seconds in durations.items()
+            ),
+        )
+    registry.ingest_queue.start()
+    try:
+        yield
+    finally:
+        await registry.aclose()
+        await run_in_threadpool(shutdown_workload_executors)
+        shutdown_tracing()
+
+
+def get_registry(request: Request) -> AgentRegistry:
+    """
+    FastAPI dependency that provides the application's AgentRegistry.
+
+    Normally built by `lifespan`; apps served without running it (e.g. a
+    TestClient not used as a context manager) build one on first use.
+    """
+    registry = getattr(request.app.state, "registry", None)
+    if registry is None:
+        with _registry_lock:
+            registry = getattr(request.app.state, "registry", None)
+            if registry is None:
+                registry = request.app.state.registry = AgentRegistry.from_settings()
+    return registry
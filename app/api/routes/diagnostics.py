@@ -0,0 +1,36 @@
+from typing import Optional
+
+from fastapi import APIRouter, Query
+from fastapi.responses import ORJSONResponse
+
+from app.db.slow_queries import get_slow_query_log
+
+router = APIRouter()
+
+
+@router.get("/internal/slow-queries", tags=["internal"])
+async def slow_queries(
+    limit: int = Query(default=50, ge=1, le=1000),
+    flagged: bool = Query(
+        default=False,
+        description="Only return statements whose plan was flagged (e.g. seq scans).",
+    ),
+    fingerprint: Optional[str] = Query(
+        default=None,
+        description="Only return statements with this SQL shape fingerprint.",
+    ),
+) -> ORJSONResponse:
+    """
+    Recently captured slow SQL statements, newest first.
+
+    Each entry has the statement shape and fingerprint, redacted
+    parameters, duration and workload class, and, when it was sampled for
+    EXPLAIN, the plan and the problems found in it.
+    """
+    entries = [
+        entry
+        for entry in get_slow_query_log().entries()
+        if (entry.flags or not flagged)
+        and (fingerprint is None or entry.fingerprint == fingerprint)
+    ]
+    return ORJSONResponse([entry.to_dict() for entry in entries[:limit]])
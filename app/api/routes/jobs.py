@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.api.lifespan import get_registry
+from app.core.ingest_jobs import IngestQueue
+from app.core.registry import AgentRegistry
+from app.core.schemas import IngestJobStatus
+
+router = APIRouter()
+
+
+def get_ingest_queue(registry: AgentRegistry = Depends(get_registry)) -> IngestQueue:
+    """FastAPI dependency that provides the registry's IngestQueue."""
+    return registry.ingest_queue
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=IngestJobStatus,
+    tags=["upload"],
+    summary="Report progress and per-item results of an ingestion job",
+)
+def get_job_status(
+    job_id: str,
+    queue: IngestQueue = Depends(get_ingest_queue),
+) -> IngestJobStatus:
+    """Return the status of a job created by POST /upload?mode=async."""
+    job = queue.get_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown ingestion job: {job_id}",
+        )
+    return job.to_schema()
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.agents.base import (
+    EvaluatorAgentProtocol,
+    GeneratorAgentProtocol,
+    RetrieverAgentProtocol,
+)
+from app.agents.generator_llm import LLMGenerationError
+from app.api.lifespan import get_registry
+from app.core.executors import INTERACTIVE, workload
+from app.core.orchestrator import MultiAgentOrchestrator
+from app.core.registry import AgentRegistry
+from app.core.schemas import QueryRequest, QueryResponse, StructuredQuotation
+from app.core.serialization import quotation_payload
+from app.db.session import get_session_factory
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+RetrieverFactory = Callable[[Session], RetrieverAgentProtocol]
+
+
+def get_retriever_factory(
+    registry: AgentRegistry = Depends(get_registry),
+) -> RetrieverFactory:
+    """
+    FastAPI dependency that builds a retriever for a database session.
+
+    Routes open their own session (the streaming route outlives the
+    handler), so they receive a factory rather than a ready retriever.
+    Candidates are re-ranked with the registry's FeatureReranker unless
+    RERANK_ENABLED=false.
+    """
+    return registry.retriever
+
+
+def get_generator(
+    registry: AgentRegistry = Depends(get_registry),
+) -> GeneratorAgentProtocol:
+    """
+    FastAPI dependency that provides the answer generator.
+
+    With GENERATOR_BACKEND=llm every request shares one LLMGeneratorAgent,
+    so concurrent prompts are batched over the same connection pool.
+    """
+    return registry.generator
+
+
+def get_evaluator(
+    registry: AgentRegistry = Depends(get_registry),
+) -> Optional[EvaluatorAgentProtocol]:
+    """
+    FastAPI dependency that provides the answer evaluator.
+
+    Answers are scored by the local grounding evaluator; with
+    EVALUATOR_ENABLED=false they are returned without an EvaluationResult.
+    """
+    return registry.evaluator
+
+
+def _sse(event: str, data: Any) -> bytes:
+    """Render one Server-Sent Event with an orjson-encoded payload."""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+def _payloads(
+    quotations: List[StructuredQuotation],
+    include_raw_text: bool,
+) -> List[Dict[str, Any]]:
+    return [
+        quotation_payload(quotation, include_raw_text=include_raw_text)
+        for quotation in quotations
+    ]
+
+
+def _orchestrator(
+    retriever: RetrieverAgentProtocol,
+    generator: GeneratorAgentProtocol,
+    evaluator: Optional[EvaluatorAgentProtocol],
+) -> MultiAgentOrchestrator:
+    return MultiAgentOrchestrator(
+        extractor=None,
+        retriever=retriever,
+        evaluator=evaluator,
+        generator=generator,
+    )
+
+
+BUDGET_QUERY = Query(
+    default=None,
+    gt=0,
+    description="Latency budget in milliseconds (defaults to settings.query_budget_ms).",
+)
+
+
+@router.post(
+    "/query",
+    response_model=QueryResponse,
+    tags=["query"],
+    summary="Answer a query from the stored quotations",
+)
+@workload(INTERACTIVE)
+async def query_quotations(
+    query: QueryRequest,
+    include_raw_text: bool = Query(
+        default=True,
+        description="Set to false to omit raw_text from the returned quotations.",
+    ),
+    budget_ms: Optional[float] = BUDGET_QUERY,
+    session_factory: Callable[[], Session] = Depends(get_session_factory),
+    retriever_factory: RetrieverFactory = Depends(get_retriever_factory),
+    generator: GeneratorAgentProtocol = Depends(get_generator),
+    evaluator: Optional[EvaluatorAgentProtocol] = Depends(get_evaluator),
+) -> ORJSONResponse:
+    """
+    Retrieve quotations for the query, generate an answer and evaluate it.
+
+    The pipeline runs in MultiAgentOrchestrator within the latency budget.
+    The response includes the wall-clock duration of each stage and the
+    stages that were degraded. It is built from plain dicts and rendered
+    with orjson rather than validated against QueryResponse a second time.
+    A failing completions server is reported as 502 Bad Gateway.
+    """
+    db = session_factory()
+    try:
+        orchestrator = _orchestrator(retriever_factory(db), generator, evaluator)
+        result = await orchestrator.answer_query(
+            query, budget_ms=budget_ms, after_retrieve=db.close
+        )
+    except LLMGenerationError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Answer generation failed: {exc}",
+        ) from exc
+    finally:
+        db.close()
+
+    return ORJSONResponse(
+        content={
+            "query": result.query,
+            "quotations": _payloads(result.quotations, include_raw_text),
+            "answer": result.answer,
+            "evaluation": (
+                result.evaluation.dict() if result.evaluation is not None else None
+            ),
+            "timings_ms": result.timings_ms,
+            "degraded": result.degraded,
+        }
+    )
+
+
+@router.post(
+    "/query/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {SSE_MEDIA_TYPE: {}},
+            "description": (
+                "Server-Sent Events: quotations, answer (repeated), "
+                "evaluation, done."
+            ),
+        }
+    },
+    tags=["query"],
+    summary="Answer a query as a stream of Server-Sent Events",
+)
+@workload(INTERACTIVE)
+async def query_quotations_stream(
+    query: QueryRequest,
+    include_raw_text: bool = Query(
+        default=True,
+        description="Set to false to omit raw_text from the streamed quotations.",
+    ),
+    budget_ms: Optional[float] = BUDGET_QUERY,
+    session_factory: Callable[[], Session] = Depends(get_session_factory),
+    retriever_factory: RetrieverFactory = Depends(get_retriever_factory),
+    generator: GeneratorAgentProtocol = Depends(get_generator),
+    evaluator: Optional[EvaluatorAgentProtocol] = Depends(get_evaluator),
+) -> StreamingResponse:
+    """
+    Stream the query pipeline stage by stage.
+
+    Events, in order:
+    - `quotations`: ranked quotations, sent as soon as retrieval finishes;
+    - `answer`: one event per generated chunk (`{"delta": ...}`);
+    - `evaluation`: the EvaluationResult, or null without an evaluator or
+      when the budget did not leave time for it;
+    - `done`: per-stage timings in milliseconds, the effective top_k and
+      the degraded stages.
+
+    An `error` event is sent if a stage fails. It carries a stable `code`
+    ("generation_failed" when the completions server fails, otherwise
+    "internal_error") and a generic `detail`; the exception itself is
+    only logged.
+    """
+
+    async def events() -> AsyncIterator[bytes]:
+        db = session_factory()
+        orchestrator = _orchestrator(retriever_factory(db), generator, evaluator)
+        try:
+            async for event in orchestrator.stream_query(
+                query, budget_ms=budget_ms, after_retrieve=db.close
+            ):
+                if event.kind == "quotations":
+                    yield _sse(
+                        "quotations",
+                        {
+                            "quotations": _payloads(
+                                event.data["quotations"], include_raw_text
+                            ),
+                            "timings_ms": event.data["timings_ms"],
+                        },
+                    )
+                elif event.kind == "answer":
+                    yield _sse("answer", {"delta": event.data})
+                elif event.kind == "evaluation":
+                    evaluation = event.data["evaluation"]
+                    yield _sse(
+                        "evaluation",
+                        {
+                            "evaluation": (
+                                evaluation.dict() if evaluation is not None else None
+                            ),
+                            "timings_ms": event.data["timings_ms"],
+                        },
+                    )
+                else:
+                    yield _sse(event.kind, event.data)
+        except LLMGenerationError:
+            logger.exception("Streamed answer generation failed")
+            yield _sse(
+                "error",
+                {"code": "generation_failed", "detail": "Answer generation failed."},
+            )
+        except Exception:
+            logger.exception("Streamed query failed")
+            yield _sse(
+                "error", {"code": "internal_error", "detail": "Internal server error."}
+            )
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        events(),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
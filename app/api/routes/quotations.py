@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+
+from app.api.lifespan import get_registry
+from app.core.config import settings
+from app.core.registry import AgentRegistry
+from app.core.schemas import StructuredQuotation
+from app.core.serialization import quotation_payload
+from app.db.repositories import (
+    get_quotation_by_id,
+    get_quotation_version,
+    list_quotation_versions,
+    list_quotations,
+)
+from app.db.session import get_db
+from app.db.sharding import ShardedSearchResult, ShardRow
+
+router = APIRouter()
+
+
+def _quotation_etag(quotation_id: int, version: int, include_raw_text: bool) -> str:
+    # The representation without raw_text is a different entity body, so
+    # it needs its own strong validator.
+    suffix = "" if include_raw_text else ".n"
+    return f'"q{quotation_id}.v{version}{suffix}"'
+
+
+def _list_etag(
+    versions: Iterable[Tuple[int, int]],
+    *,
+    skip: int,
+    limit: int,
+    include_raw_text: bool,
+) -> str:
+    digest = hashlib.sha1(f"{skip}:{limit}:{int(include_raw_text)}".encode())
+    for quotation_id, version in versions:
+        digest.update(f";{quotation_id}.{version}".encode())
+    return f'"l{digest.hexdigest()}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluate If-None-Match against the current ETag.
+
+    If-None-Match uses the weak comparison (RFC 9110 13.1.2), so a `W/`
+    prefix sent back by an intermediary still matches.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _cache_headers(etag: str, max_age_s: int) -> dict:
+    return {"ETag": etag, "Cache-Control": f"public, max-age={max_age_s}"}
+
+
+def _complete_rows(result: ShardedSearchResult) -> List[ShardRow]:
+    # A page missing a shard's rows would be cached under a valid ETag.
+    if result.partial:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Some quotation shards did not answer.",
+        )
+    return result.rows
+
+
+@router.get(
+    "/quotations",
+    response_model=List[StructuredQuotation],
+    tags=["quotations"],
+    summary="List stored quotations, newest first",
+)
+def list_quotation_records(
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=500),
+    include_raw_text: bool = Query(
+        default=True,
+        description="Set to false to omit raw_text from the returned quotations.",
+    ),
+    if_none_match: Optional[str] = Header(default=None),
+    db: Session = Depends(get_db),
+    registry: AgentRegistry = Depends(get_registry),
+) -> Response:
+    """
+    Return one page of quotations with an ETag covering the whole page.
+
+    The ETag is a hash of the (id, version) pairs on the page. A request
+    carrying a matching If-None-Match only reads those pairs and gets an
+    empty 304 response. With sharded storage the page is merged from the
+    shards' newest rows (503 if a shard does not answer) and the ETag is
+    checked after loading it.
+    """
+    store = registry.vector_store
+    if store is None and if_none_match:
+        versions = list_quotation_versions(db, skip=skip, limit=limit)
+        etag = _list_etag(
+            versions, skip=skip, limit=limit, include_raw_text=include_raw_text
+        )
+        if _etag_matches(if_none_match, etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers=_cache_headers(etag, settings.quotation_list_cache_max_age_s),
+            )
+
+    quotations: Sequence[Any]
+    if store is None:
+        quotations = list_quotations(db, skip=skip, limit=limit)
+    else:
+        quotations = _complete_rows(store.list_rows(skip=skip, limit=limit))
+    # Hash what is actually returned: rows may have changed since the
+    # version check above.
+    etag = _list_etag(
+        ((quotation.id, quotation.version) for quotation in quotations),
+        skip=skip,
+        limit=limit,
+        include_raw_text=include_raw_text,
+    )
+    if store is not None and _etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=_cache_headers(etag, settings.quotation_list_cache_max_age_s),
+        )
+
+    return ORJSONResponse(
+        content=[
+            quotation_payload(quotation, include_raw_text=include_raw_text)
+            for quotation in quotations
+        ],
+        headers=_cache_headers(etag, settings.quotation_list_cache_max_age_s),
+    )
+
+
+@router.get(
+    "/quotations/{quotation_id}",
+    response_model=StructuredQuotation,
+    tags=["quotations"],
+    summary="Get a single stored quotation",
+)
+def get_quotation_record(
+    quotation_id: int,
+    include_raw_text: bool = Query(
+        default=True,
+        description="Set to false to omit raw_text from the returned quotation.",
+    ),
+    if_none_match: Optional[str] = Header(default=None),
+    db: Session = Depends(get_db),
+    registry: AgentRegistry = Depends(get_registry),
+) -> Response:
+    """
+    Return a quotation with a strong ETag derived from its row version.
+
+    Conditional requests are answered from the version column alone, so a
+    304 never loads raw_text. With sharded storage the row is fetched from
+    the shards first; if it is not found while a shard did not answer, the
+    response is 503 rather than 404.
+    """
+    store = registry.vector_store
+    if store is None and if_none_match:
+        version = get_quotation_version(db, quotation_id)
+        if version is not None:
+            etag = _quotation_etag(quotation_id, version, include_raw_text)
+            if _etag_matches(if_none_match, etag):
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers=_cache_headers(etag, settings.quotation_cache_max_age_s),
+                )
+
+    quotation: Optional[Any]
+    if store is None:
+        quotation = get_quotation_by_id(db, quotation_id)
+    else:
+        result = store.get_rows([quotation_id])
+        quotation = result.rows[0] if result.rows else None
+        if quotation is None:
+            _complete_rows(result)
+    if quotation is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown quotation: {quotation_id}",
+        )
+
+    etag = _quotation_etag(quotation.id, quotation.version, include_raw_text)
+    if store is not None and _etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=_cache_headers(etag, settings.quotation_cache_max_age_s),
+        )
+    return ORJSONResponse(
+        content=quotation_payload(quotation, include_raw_text=include_raw_text),
+        headers=_cache_headers(etag, settings.quotation_cache_max_age_s),
+    )
@@ -1,59 +1,292 @@
 from __future__ import annotations
 
-from typing import List
+import logging
+from typing import AsyncIterator, Callable, Iterator, List, Literal, Optional, Tuple
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
+from starlette.types import Receive, Scope, Send
 
-from app.agents.extractor import ExtractorAgent
 from app.agents.orchestrator import Orchestrator
-from app.core.schemas import QuotationUploadRequest, StructuredQuotation
-from app.db.session import get_db
+from app.api.lifespan import get_registry
+from app.api.routes.jobs import get_ingest_queue
+from app.core.config import settings
+from app.core.executors import BULK, run_in_workload, workload
+from app.core.ingest_jobs import IngestQueue
+from app.core.registry import AgentRegistry
+from app.core.schemas import (
+    IngestItemResult,
+    IngestJobAccepted,
+    QuotationUploadRequest,
+    StructuredQuotation,
+)
+from app.core.serialization import quotation_payload
+from app.db.session import get_db, get_session_factory
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 UploadPayload = QuotationUploadRequest | List[QuotationUploadRequest]
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# (upload position, parsed upload, parse error) for one NDJSON line.
+PendingLine = Tuple[int, Optional[QuotationUploadRequest], Optional[str]]
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for handlers that keep reading the request body.
+
+    Starlette's StreamingResponse watches for client disconnects by calling
+    `receive()` concurrently, which would swallow request body chunks. Here
+    the body reader notices a disconnect itself (`request.stream()` raises
+    ClientDisconnect), so the response only streams.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
 
-def get_orchestrator() -> Orchestrator:
+def get_orchestrator(registry: AgentRegistry = Depends(get_registry)) -> Orchestrator:
     """
-    FastAPI dependency that provides an Orchestrator instance.
+    FastAPI dependency that provides the shared ingestion Orchestrator.
 
-    For now we create it on demand with a local ExtractorAgent
-    implementation. Later this can be replaced with a more complex
-    wiring or dependency injection container if needed.
+    It is built once with the application's AgentRegistry, together
+    with its ExtractorAgent, extraction cache and process pool.
     """
-    extractor = ExtractorAgent()
-    return Orchestrator(extractor=extractor)
+    return registry.orchestrator
 
 
 @router.post(
     "/upload",
     response_model=List[StructuredQuotation],
+    responses={status.HTTP_202_ACCEPTED: {"model": IngestJobAccepted}},
     tags=["upload"],
     summary="Upload one or more quotations and store them in the database",
 )
-def upload_quotations(
+@workload(BULK)
+async def upload_quotations(
     payload: UploadPayload,
+    mode: Optional[Literal["sync", "async"]] = Query(
+        default=None,
+        description="'sync' stores before responding, 'async' queues a job.",
+    ),
+    include_raw_text: bool = Query(
+        default=True,
+        description="Set to false to omit raw_text from the returned quotations.",
+    ),
     db: Session = Depends(get_db),
     orchestrator: Orchestrator = Depends(get_orchestrator),
-) -> List[StructuredQuotation]:
+    ingest_queue: IngestQueue = Depends(get_ingest_queue),
+) -> JSONResponse:
     """
     Ingest one or multiple quotations.
 
     Accepts either a single QuotationUploadRequest object or a list of
-    them. Returns the persisted StructuredQuotation objects for each
-    upload request.
+    them. In sync mode, ingests them with Orchestrator.ingest_batch (large
+    batches are extracted and embedded in worker processes) and returns
+    the persisted StructuredQuotation objects in input order, serialized
+    straight to JSON with orjson (the values were just stored, so they are
+    not validated a second time). Items that fail are reported in a 500
+    response; the other items of the batch are still stored. If the
+    database connection or the commit fails, nothing is stored. In async
+    mode, appends the uploads to the
+    durable ingest log and returns 202 with a job id to poll at
+    GET /jobs/{job_id}.
     """
     if isinstance(payload, QuotationUploadRequest):
         uploads: List[QuotationUploadRequest] = [payload]
     else:
         uploads = payload
 
-    results: List[StructuredQuotation] = []
+    if (mode or settings.upload_mode) == "async":
+        job = await run_in_workload(BULK, ingest_queue.submit, uploads)
+        accepted = IngestJobAccepted(
+            job_id=job.job_id,
+            status=job.status,
+            total=job.total,
+        )
+        return ORJSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=accepted.dict(),
+            headers={"Location": f"{settings.api_prefix}/jobs/{job.job_id}"},
+        )
+
+    results = await run_in_workload(BULK, orchestrator.ingest_batch, db, uploads)
+
+    errors = [
+        {"index": result.index, "error": result.error}
+        for result in results
+        if result.status == "error"
+    ]
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "message": "Some quotations could not be ingested.",
+                "errors": errors,
+            },
+        )
+
+    return ORJSONResponse(
+        content=[
+            quotation_payload(result.quotation, include_raw_text=include_raw_text)
+            for result in results
+        ]
+    )
+
+
+async def _iter_ndjson_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int,
+) -> AsyncIterator[Optional[bytes]]:
+    """
+    Split a byte stream into lines without buffering more than one line.
+
+    Yields each complete line, or None for a line longer than
+    `max_line_bytes`; the rest of an oversized line is discarded as it
+    arrives rather than accumulated.
+    """
+    buffer = bytearray()
+    oversized = False
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            if newline == -1:
+                if not oversized:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        buffer.clear()
+                        oversized = True
+                break
+
+            if not oversized:
+                buffer += chunk[start:newline]
+            yield None if oversized or len(buffer) > max_line_bytes else bytes(buffer)
+            buffer.clear()
+            oversized = False
+            start = newline + 1
+
+    if oversized:
+        yield None
+    elif buffer.strip():
+        yield bytes(buffer)
+
+
+@router.post(
+    "/upload/stream",
+    response_class=BodyStreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "content": {NDJSON_MEDIA_TYPE: {}},
+            "description": "One IngestItemResult JSON document per input line.",
+        }
+    },
+    tags=["upload"],
+    summary="Stream quotations as NDJSON and receive per-item results as NDJSON",
+)
+@workload(BULK)
+async def upload_quotations_stream(
+    request: Request,
+    batch_size: int = Query(
+        default=settings.upload_stream_batch_size,
+        ge=1,
+        le=1000,
+        description="Number of lines handed to the orchestrator per commit.",
+    ),
+    orchestrator: Orchestrator = Depends(get_orchestrator),
+    session_factory: Callable[[], Session] = Depends(get_session_factory),
+) -> BodyStreamingResponse:
+    """
+    Ingest an application/x-ndjson body one line at a time.
+
+    Each non-blank line must be a QuotationUploadRequest. Lines are parsed
+    as they arrive and ingested in batches of `batch_size` with one commit
+    per batch; an IngestItemResult line is streamed back for every input
+    line, in input order. Invalid lines produce an error result without
+    stopping the upload; so does every line of a batch whose commit
+    fails, and those lines can be sent again.
+
+    The request body is only read as fast as results are written back, so
+    peak memory is bounded by the batch size, not the upload size.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type != NDJSON_MEDIA_TYPE:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Expected {NDJSON_MEDIA_TYPE} request body.",
+        )
+
+    max_line_bytes = settings.upload_stream_max_line_bytes
+
+    async def ingest_lines() -> AsyncIterator[bytes]:
+        db = session_factory()
+        try:
+            pending: List[PendingLine] = []
+            index = 0
+
+            async for line in _iter_ndjson_lines(request.stream(), max_line_bytes):
+                if line is None:
+                    pending.append(
+                        (index, None, f"Line exceeds {max_line_bytes} bytes.")
+                    )
+                elif not line.strip():
+                    continue
+                else:
+                    try:
+                        pending.append(
+                            (index, QuotationUploadRequest.parse_raw(line), None)
+                        )
+                    except (ValidationError, ValueError) as exc:
+                        pending.append((index, None, str(exc)))
+                index += 1
+
+                if len(pending) >= batch_size:
+                    yield await _ingest_pending(orchestrator, db, pending)
+                    pending = []
+
+            if pending:
+                yield await _ingest_pending(orchestrator, db, pending)
+        finally:
+            db.close()
+
+    return BodyStreamingResponse(ingest_lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def _ingest_pending(
+    orchestrator: Orchestrator,
+    db: Session,
+    pending: List[PendingLine],
+) -> bytes:
+    """Ingest the valid lines of a batch and render all results as NDJSON."""
+    uploads = [upload for _, upload, _ in pending if upload is not None]
+    ingested: Optional[Iterator[IngestItemResult]] = None
+    if uploads:
+        try:
+            ingested = iter(
+                await run_in_workload(BULK, orchestrator.ingest_batch, db, uploads)
+            )
+        except Exception:
+            logger.exception("Streamed upload batch could not be stored")
 
-    for upload in uploads:
-        quotation = orchestrator.ingest_quotation(db=db, upload=upload)
-        results.append(quotation)
+    lines: List[str] = []
+    for index, upload, error in pending:
+        if upload is None:
+            result = IngestItemResult(index=index, status="error", error=error)
+        elif ingested is None:
+            result = IngestItemResult(
+                index=index, status="error", error="Batch could not be stored."
+            )
+        else:
+            result = next(ingested).copy(update={"index": index})
+        lines.append(result.json())
 
-    return results
+    return ("\n".join(lines) + "\n").encode("utf-8")
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import re
+from typing import Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.tracing import KIND_SERVER, tracer
+
+# W3C trace context: version-traceid-parentid-flags.
+_TRACEPARENT_RE = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Return (trace_id, parent span id) from a traceparent header, if valid."""
+    if not value:
+        return None
+    match = _TRACEPARENT_RE.match(value.strip().lower())
+    if match is None or set(match.group(1)) == {"0"} or set(match.group(2)) == {"0"}:
+        return None
+    return match.group(1), match.group(2)
+
+
+def _route_template(scope: Scope) -> str:
+    """The matched route path ("/api/quotations/{quotation_id}"), not the raw path."""
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is not None and app is not None:
+        for route in getattr(app, "routes", ()):
+            if getattr(route, "endpoint", None) is endpoint:
+                return route.path
+    return "unmatched"
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware running each HTTP request in a server span.
+
+    The span continues the caller's trace when a valid `traceparent`
+    header is present, and is current while the request is handled, so
+    agent, embedding and repository spans become its children. It is
+    named after the route template to keep the span metrics' label
+    cardinality bounded.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope.get("headers", ()):
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        method = scope["method"]
+        span = tracer.start_span(
+            "http.request",
+            parent=parse_traceparent(traceparent),
+            kind=KIND_SERVER,
+            attributes={"http.request.method": method, "url.path": scope["path"]},
+        )
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        error: Optional[BaseException] = None
+        try:
+            with tracer.activate(span):
+                await self.app(scope, receive, send_with_status)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            route = _route_template(scope)
+            span.rename(f"http.{method} {route}")
+            span.set_attribute("http.route", route)
+            span.set_attribute("http.response.status_code", status_code)
+            if error is None and status_code >= 500:
+                span.error = f"HTTP {status_code}"
+            tracer.end_span(span, error)
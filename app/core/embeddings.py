@@ -1,7 +1,11 @@
 from __future__ import annotations
 import hashlib
 import random
-from typing import List
+import threading
+
+import numpy as np
+
+from app.core.tracing import traced
 
 EMBEDDING_DIM = 1536
 
@@ -19,10 +23,44 @@ def _stable_seed(text: str) -> int:
     return int.from_bytes(digest[:8], byteorder="big", signed=False)
 
 
-def embed_text(text: str, *, dim: int = EMBEDDING_DIM) -> List[float]:
+_generators = threading.local()
+
+
+def _random_state(seed: int) -> np.random.RandomState:
+    """
+    Return this thread's NumPy RandomState, reseeded to produce the same
+    stream as `random.Random(seed)`, so vectors match the ones embedded
+    (and stored) before embed_text returned arrays.
+
+    Both seed MT19937 with the 32-bit words of the seed, except that NumPy
+    treats a single word as a plain integer seed; in that (rare) case the
+    generator state is copied from `random.Random`. The generator is
+    reused because creating one gathers OS entropy (~100 us).
+    """
+    rng = getattr(_generators, "rng", None)
+    if rng is None:
+        rng = _generators.rng = np.random.RandomState(0)
+    if seed >> 32:
+        words = []
+        while seed:
+            words.append(seed & 0xFFFFFFFF)
+            seed >>= 32
+        rng.seed(np.array(words, dtype=np.uint32))
+    else:
+        _, state, _ = random.Random(seed).getstate()
+        key = np.array(state[:-1], dtype=np.uint32)
+        rng.set_state(("MT19937", key, state[-1], 0, 0.0))
+    return rng
+
+
+@traced("embedding.embed_text")
+def embed_text(text: str, *, dim: int = EMBEDDING_DIM) -> np.ndarray:
     """
     Build a deterministic embedding vector for a text.
 
+    Returns a float32 array (pgvector stores float4), which is handed to
+    the database driver as is and sent in pgvector's binary format.
+
     This is a local, dependency-free placeholder that enables:
     - storing vectors in pgvector,
     - running similarity search in Postgres,
@@ -31,5 +69,9 @@ def embed_text(text: str, *, dim: int = EMBEDDING_DIM) -> List[float]:
     Replace this implementation with a real embedding provider later.
     """
     normalized = " ".join(text.strip().split())
-    rng = random.Random(_stable_seed(normalized))
-    return [rng.uniform(-1.0, 1.0) for _ in range(dim)]
+    rng = _random_state(_stable_seed(normalized))
+    # Same arithmetic as random.uniform(-1.0, 1.0), in float64.
+    values = rng.random_sample(dim)
+    values *= 2.0
+    values -= 1.0
+    return values.astype(np.float32)
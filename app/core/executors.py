@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+
+T = TypeVar("T")
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Workload classes, highest priority first.
+INTERACTIVE = "interactive"
+BULK = "bulk"
+WORKLOAD_CLASSES = (INTERACTIVE, BULK)
+
+WORKLOAD_ACTIVE = REGISTRY.gauge(
+    "workload_active_tasks",
+    "Tasks currently holding a slot, by workload class.",
+    ("workload",),
+)
+WORKLOAD_WAIT = REGISTRY.histogram(
+    "workload_wait_seconds",
+    "Time a task waited for a thread and a slot, by workload class.",
+    ("workload",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+_current_workload: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "workload", default=INTERACTIVE
+)
+# Workload whose slot the current context holds, so nested tagged calls
+# (e.g. a tagged method run on its class's executor) take only one slot.
+_held_slot: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "workload_slot", default=None
+)
+
+
+def current_workload() -> str:
+    """Workload class of the running code ("interactive" unless tagged)."""
+    return _current_workload.get()
+
+
+class PriorityScheduler:
+    """
+    Per-class concurrency slots with strict priority between classes.
+
+    A class may run up to `limits[class]` tasks at once. While any task of
+    a higher-priority class holds a slot, a class is limited to
+    `limits_under_load[class]` instead, so bulk work yields CPU (and the
+    GIL) to interactive work without being stopped entirely. Slots are
+    taken in the thread that runs the task, so they also bound threads
+    outside the executors, like the ingest queue's writer.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        limits_under_load: Optional[Dict[str, int]] = None,
+        priorities: Sequence[str] = WORKLOAD_CLASSES,
+    ) -> None:
+        self.priorities = tuple(priorities)
+        self.limits = {name: max(1, limits[name]) for name in self.priorities}
+        under_load = limits_under_load or {}
+        self.limits_under_load = {
+            name: max(1, min(under_load.get(name, limit), limit))
+            for name, limit in self.limits.items()
+        }
+        self.active = {name: 0 for name in self.priorities}
+        self._condition = threading.Condition()
+
+    def _limit(self, workload: str) -> int:
+        higher = self.priorities[: self.priorities.index(workload)]
+        if any(self.active[name] for name in higher):
+            return self.limits_under_load[workload]
+        return self.limits[workload]
+
+    @contextmanager
+    def slot(self, workload: str) -> Iterator[None]:
+        """Hold a slot of `workload` (blocking until one is free)."""
+        if _held_slot.get() == workload:
+            yield
+            return
+        with self._condition:
+            while self.active[workload] >= self._limit(workload):
+                self._condition.wait()
+            self.active[workload] += 1
+        token = _held_slot.set(workload)
+        try:
+            yield
+        finally:
+            _held_slot.reset(token)
+            with self._condition:
+                self.active[workload] -= 1
+                self._condition.notify_all()
+
+
+class WorkloadExecutors:
+    """
+    One bounded thread pool per workload class, sharing a PriorityScheduler.
+
+    `run` awaits a blocking call on the class's own threads, so a burst of
+    ingestion can no longer occupy the threads interactive requests need.
+    The call runs in a copy of the caller's context (spans stay nested)
+    tagged with the class, which also routes its database sessions to the
+    class's connection pool (see app.db.session).
+    """
+
+    def __init__(self, workers: Dict[str, int], scheduler: PriorityScheduler) -> None:
+        self.scheduler = scheduler
+        self._executors = {
+            name: ThreadPoolExecutor(
+                max_workers=max(1, count), thread_name_prefix=f"{name}-worker"
+            )
+            for name, count in workers.items()
+        }
+        for name in workers:
+            WORKLOAD_ACTIVE.set_function(
+                functools.partial(scheduler.active.__getitem__, name),
+                workload=name,
+            )
+
+    @classmethod
+    def from_settings(cls) -> "WorkloadExecutors":
+        workers = {
+            INTERACTIVE: settings.workload_interactive_workers,
+            BULK: settings.workload_bulk_workers,
+        }
+        under_load = {BULK: settings.workload_bulk_workers_under_load}
+        if not settings.workload_priority_enabled:
+            under_load = {}
+        return cls(workers, PriorityScheduler(workers, under_load))
+
+    async def run(
+        self,
+        workload: str,
+        function: Callable[..., T],
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        """Run `function(*args, **kwargs)` on the executor of `workload`."""
+        context = contextvars.copy_context()
+        submitted = time.perf_counter()
+
+        def call() -> T:
+            token = _current_workload.set(workload)
+            try:
+                with self.scheduler.slot(workload):
+                    WORKLOAD_WAIT.observe(
+                        time.perf_counter() - submitted, workload=workload
+                    )
+                    return function(*args, **kwargs)
+            finally:
+                _current_workload.reset(token)
+
+        future = self._executors[workload].submit(context.run, call)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait: bool = True) -> None:
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_executors: Optional[WorkloadExecutors] = None
+_executors_lock = threading.Lock()
+
+
+def get_workload_executors() -> WorkloadExecutors:
+    """
+    Return the process-wide WorkloadExecutors.
+
+    Created on first use from the workload_* settings.
+    """
+    global _executors
+    with _executors_lock:
+        if _executors is None:
+            _executors = WorkloadExecutors.from_settings()
+        return _executors
+
+
+def shutdown_workload_executors() -> None:
+    """Stop the executor threads, if they were ever created."""
+    global _executors
+    with _executors_lock:
+        executors, _executors = _executors, None
+    if executors is not None:
+        executors.shutdown()
+
+
+async def run_in_workload(
+    workload: str,
+    function: Callable[..., T],
+    *args: Any,
+    **kwargs: Any,
+) -> T:
+    """Await a blocking call on the shared executor of `workload`."""
+    return await get_workload_executors().run(workload, function, *args, **kwargs)
+
+
+def workload(name: str) -> Callable[[F], F]:
+    """
+    Tag a function or coroutine function with a workload class.
+
+    Calls run with `name` as the current workload, so their database
+    sessions use that class's connection pool. Plain functions also hold
+    a slot of the class for the duration of the call, which is how work
+    started outside the executors (background threads) is scheduled.
+    """
+    if name not in WORKLOAD_CLASSES:
+        raise ValueError(f"Unknown workload class: {name!r}")
+
+    def decorate(function: F) -> F:
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                token = _current_workload.set(name)
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    _current_workload.reset(token)
+
+            # FastAPI resolves string annotations in the wrapper's module;
+            # hand it the evaluated signature of the route instead.
+            signature = inspect.signature(function, eval_str=True)
+            async_wrapper.__signature__ = signature  # type: ignore[attr-defined]
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            token = _current_workload.set(name)
+            try:
+                with get_workload_executors().scheduler.slot(name):
+                    return function(*args, **kwargs)
+            finally:
+                _current_workload.reset(token)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# (id, raw_text, structured_json) for each requested id that still exists.
+DetailsRow = Tuple[int, str, Optional[Dict[str, Any]]]
+DetailsFetcher = Callable[[Sequence[int]], Iterable[DetailsRow]]
+
+# Ids per details query, to keep IN lists and result sets bounded.
+DETAILS_CHUNK_SIZE = 1000
+
+
+class QuotationHit:
+    """
+    A retrieved quotation holding only what ranking needs.
+
+    id, supplier, score (vector distance, lower is closer; None when the
+    ranking came from the query cache) and created_at are stored in slots;
+    raw_text and structured_json are loaded on first access, together for
+    every hit of the same HitDetailsLoader, with one query per
+    DETAILS_CHUNK_SIZE hits. Exposes the QUOTATION_FIELDS as
+    attributes, so it can be used wherever a StructuredQuotation is read
+    (response payloads, generators, evaluators, the reranker).
+    """
+
+    __slots__ = ("id", "supplier", "score", "created_at", "_details", "_loader")
+
+    def __init__(
+        self,
+        id: int,
+        supplier: str,
+        score: Optional[float],
+        created_at: datetime,
+        loader: Optional["HitDetailsLoader"] = None,
+        details: Optional[Tuple[str, Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        self.id = id
+        self.supplier = supplier
+        self.score = score
+        self.created_at = created_at
+        self._details = details
+        self._loader = loader
+        if loader is not None and details is None:
+            loader.register(self)
+
+    @property
+    def loaded(self) -> bool:
+        return self._details is not None
+
+    @property
+    def raw_text(self) -> str:
+        return self._load()[0]
+
+    @property
+    def structured_json(self) -> Optional[Dict[str, Any]]:
+        return self._load()[1]
+
+    def _load(self) -> Tuple[str, Optional[Dict[str, Any]]]:
+        details = self._details
+        if details is None:
+            if self._loader is None:
+                raise LookupError(f"Quotation {self.id} has no details loader.")
+            self._loader.load()
+            details = self._details
+            if details is None:
+                raise LookupError(f"Quotation {self.id} no longer exists.")
+        return details
+
+    def __repr__(self) -> str:
+        return (
+            f"QuotationHit(id={self.id!r}, supplier={self.supplier!r}, "
+            f"score={self.score!r}, loaded={self.loaded})"
+        )
+
+
+class HitDetailsLoader:
+    """
+    Loads raw_text and structured_json for a group of hits in bulk.
+
+    Hits register when created; the first access to the details of any
+    of them loads every registered hit that is not loaded yet.
+    """
+
+    def __init__(self, fetch: DetailsFetcher) -> None:
+        self._fetch = fetch
+        self._hits: List[QuotationHit] = []
+        self._lock = threading.Lock()
+
+    def register(self, hit: QuotationHit) -> None:
+        with self._lock:
+            self._hits.append(hit)
+
+    def load(self) -> None:
+        with self._lock:
+            pending: Dict[int, List[QuotationHit]] = {}
+            for hit in self._hits:
+                if hit._details is None:
+                    pending.setdefault(hit.id, []).append(hit)
+            ids = list(pending)
+            for start in range(0, len(ids), DETAILS_CHUNK_SIZE):
+                chunk = ids[start : start + DETAILS_CHUNK_SIZE]
+                for quotation_id, raw_text, structured_json in self._fetch(chunk):
+                    for hit in pending.get(quotation_id, ()):
+                        hit._details = (raw_text, structured_json)
+
+
+def load_hit_details(results: Sequence[Any]) -> None:
+    """
+    Load the details of every lazy hit among `results` now.
+
+    The async query pipeline calls this on a worker thread right after
+    retrieval, so generators and evaluators never query the database
+    from the event loop. Other result types are left alone.
+    """
+    loaders = {
+        id(result._loader): result._loader
+        for result in results
+        if isinstance(result, QuotationHit)
+        and not result.loaded
+        and result._loader is not None
+    }
+    for loader in loaders.values():
+        loader.load()
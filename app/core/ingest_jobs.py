@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Protocol, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.ingest_log import IngestLog
+from app.core.schemas import (
+    IngestItemResult,
+    IngestJobState,
+    IngestJobStatus,
+    QuotationUploadRequest,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BatchIngestor(Protocol):
+    """Anything that can ingest a batch of uploads in one transaction."""
+
+    def ingest_batch(
+        self,
+        db: Session,
+        uploads: Sequence[QuotationUploadRequest],
+    ) -> List[IngestItemResult]:
+        ...
+
+
+@dataclass
+class IngestJob:
+    """In-memory progress of a background ingestion job."""
+
+    job_id: str
+    total: int
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+    results: Dict[int, IngestItemResult] = field(default_factory=dict)
+
+    @property
+    def processed(self) -> int:
+        return len(self.results)
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for result in self.results.values() if result.status == "error")
+
+    @property
+    def status(self) -> IngestJobState:
+        if self.processed >= self.total:
+            return "completed"
+        return "running" if self.results else "queued"
+
+    def to_schema(self) -> IngestJobStatus:
+        return IngestJobStatus(
+            job_id=self.job_id,
+            status=self.status,
+            total=self.total,
+            processed=self.processed,
+            failed=self.failed,
+            created_at=self.created_at,
+            finished_at=self.finished_at,
+            results=[self.results[index] for index in sorted(self.results)],
+        )
+
+
+class IngestQueue:
+    """
+    Write-behind ingestion: durable log in front, group commits behind.
+
+    `submit` appends the uploads to the IngestLog and returns immediately.
+    A single background thread drains the log in batches of at most
+    `batch_size` items, waiting no longer than `max_latency_s` after the
+    first pending item before committing a partial batch. Each batch is
+    written with one `ingest_batch` call, i.e. one database commit.
+
+    Job progress lives in memory and keeps the most recent `job_retention`
+    jobs. Records replayed from the log after a restart recreate their job
+    entries, but results recorded before the restart are lost.
+    """
+
+    def __init__(
+        self,
+        log: IngestLog,
+        ingestor: BatchIngestor,
+        session_factory: Callable[[], Session],
+        *,
+        batch_size: int = 64,
+        max_latency_s: float = 0.2,
+        job_retention: int = 1000,
+        autostart: bool = True,
+    ) -> None:
+        self._log = log
+        self._ingestor = ingestor
+        self._session_factory = session_factory
+        self._batch_size = batch_size
+        self._max_latency_s = max_latency_s
+        self._job_retention = job_retention
+        self._autostart = autostart
+
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, uploads: Sequence[QuotationUploadRequest]) -> IngestJob:
+        """
+        Durably queue uploads as a new job and return it.
+
+        The drain thread is started on first use (unless `autostart` is
+        off), so constructing a queue has no side effects.
+        """
+        if self._autostart:
+            self.start()
+        job = IngestJob(job_id=uuid.uuid4().hex, total=len(uploads))
+        self._remember(job)
+
+        self._log.append(
+            [
+                {
+                    "job_id": job.job_id,
+                    "index": index,
+                    "total": job.total,
+                    "payload": upload.dict(),
+                }
+                for index, upload in enumerate(uploads)
+            ]
+        )
+        self._wakeup.set()
+        return job
+
+    def get_job(self, job_id: str) -> Optional[IngestJob]:
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def start(self) -> None:
+        """Start the background drain thread (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="ingest-writer",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the drain thread after its current batch."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def drain_once(self) -> int:
+        """
+        Collect and write one batch synchronously.
+
+        Returns the number of records processed. Used by the worker loop and
+        handy for tests that do not want a background thread.
+        """
+        records, offset = self._collect_batch()
+        if not records:
+            return 0
+        try:
+            self._write_batch(records)
+        except Exception:
+            self._log.rewind()
+            raise
+        self._log.commit(offset)
+        return len(records)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.drain_once()
+            except Exception:
+                # Records stay uncommitted in the log and are retried.
+                logger.exception("Background ingestion batch failed")
+                self._stopping.wait(self._max_latency_s)
+
+    def _collect_batch(self) -> Tuple[List[Dict[str, Any]], int]:
+        records: List[Dict[str, Any]] = []
+        offset = 0
+        deadline: Optional[float] = None
+
+        while True:
+            new_records, offset = self._log.read(self._batch_size - len(records))
+            records.extend(new_records)
+
+            if len(records) >= self._batch_size or self._stopping.is_set():
+                break
+
+            now = time.monotonic()
+            if records and deadline is None:
+                deadline = now + self._max_latency_s
+            if deadline is not None and now >= deadline:
+                break
+
+            timeout = deadline - now if deadline is not None else 1.0
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+        return records, offset
+
+    def _write_batch(self, records: List[Dict[str, Any]]) -> None:
+        uploads = [
+            QuotationUploadRequest.parse_obj(record["payload"]) for record in records
+        ]
+
+        db = self._session_factory()
+        try:
+            results = self._ingestor.ingest_batch(db, uploads)
+        finally:
+            db.close()
+
+        finished_at = datetime.now(timezone.utc)
+        with self._jobs_lock:
+            for record, result in zip(records, results, strict=True):
+                job = self._jobs.get(record["job_id"])
+                if job is None:
+                    # Replayed after a restart: recreate the job entry.
+                    job = IngestJob(job_id=record["job_id"], total=record["total"])
+                    self._jobs[job.job_id] = job
+                job.results[record["index"]] = result.copy(
+                    update={"index": record["index"]}
+                )
+                if job.status == "completed":
+                    job.finished_at = finished_at
+            self._evict()
+
+    def _remember(self, job: IngestJob) -> None:
+        with self._jobs_lock:
+            self._jobs[job.job_id] = job
+            self._evict()
+
+    def _evict(self) -> None:
+        while len(self._jobs) > self._job_retention:
+            self._jobs.popitem(last=False)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+
+class IngestLog:
+    """
+    Durable, append-only log of pending ingestion records.
+
+    Records are stored as one JSON document per line. Writers append whole
+    jobs at once and fsync before returning, so an accepted upload survives
+    a process crash. The consumer keeps a committed byte offset in a side
+    file (`<path>.offset`); records past that offset are replayed on restart,
+    which gives at-least-once delivery.
+
+    When the consumer has committed everything written so far, the log and
+    its offset are truncated so the file does not grow without bound.
+    """
+
+    def __init__(self, path: str | os.PathLike[str], *, fsync: bool = True) -> None:
+        self._path = Path(path)
+        self._offset_path = self._path.with_name(self._path.name + ".offset")
+        self._fsync = fsync
+        self._lock = threading.Lock()
+
+        self._committed = self._load_offset()
+        self._read_position = self._committed
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def append(self, records: Sequence[Dict[str, Any]]) -> None:
+        """Append records to the log and make them durable."""
+        if not records:
+            return
+
+        data = b"".join(
+            json.dumps(record, separators=(",", ":"), default=str).encode("utf-8")
+            + b"\n"
+            for record in records
+        )
+
+        with self._lock:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with self._path.open("ab") as handle:
+                handle.write(data)
+                handle.flush()
+                if self._fsync:
+                    os.fsync(handle.fileno())
+
+    def read(self, max_records: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Return up to `max_records` unread records and the offset after them.
+
+        Reading advances an in-memory cursor only. Call `commit` with the
+        returned offset once the records have been durably processed. A
+        trailing line without a newline (a write still in progress) is left
+        for the next read.
+        """
+        records: List[Dict[str, Any]] = []
+
+        with self._lock:
+            if not self._path.exists():
+                return records, self._read_position
+
+            with self._path.open("rb") as handle:
+                handle.seek(self._read_position)
+                while len(records) < max_records:
+                    line = handle.readline()
+                    if not line.endswith(b"\n"):
+                        break
+                    self._read_position += len(line)
+                    if line.strip():
+                        records.append(json.loads(line))
+
+            return records, self._read_position
+
+    def rewind(self) -> None:
+        """Move the read cursor back to the last committed offset."""
+        with self._lock:
+            self._read_position = self._committed
+
+    def commit(self, offset: int) -> None:
+        """Mark every record before `offset` as processed."""
+        with self._lock:
+            self._committed = max(self._committed, offset)
+
+            if self._committed >= self._size():
+                # Fully drained: start over with an empty log.
+                with self._path.open("wb"):
+                    pass
+                self._committed = 0
+                self._read_position = 0
+
+            self._store_offset(self._committed)
+
+    def pending_bytes(self) -> int:
+        """Return how many bytes have been written but not yet committed."""
+        with self._lock:
+            return self._size() - self._committed
+
+    def _size(self) -> int:
+        try:
+            return self._path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _load_offset(self) -> int:
+        try:
+            offset = int(self._offset_path.read_text().strip() or 0)
+        except FileNotFoundError:
+            return 0
+        # A log truncated behind our back means there is nothing to replay.
+        return min(offset, self._size())
+
+    def _store_offset(self, offset: int) -> None:
+        tmp_path = self._offset_path.with_name(self._offset_path.name + ".tmp")
+        tmp_path.write_text(str(offset))
+        os.replace(tmp_path, self._offset_path)
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from app.agents.base import (
+    CachedExtractorProtocol,
+    ExtractionCacheEntry,
+    ExtractorAgentProtocol,
+)
+from app.core.config import settings
+from app.core.embeddings import embed_text
+from app.core.schemas import QuotationUploadRequest
+from app.core.tracing import traced
+
+ExtractorFactory = Callable[[], ExtractorAgentProtocol]
+
+
+class PreparedUpload(NamedTuple):
+    """
+    Output of the CPU-bound ingest stages for one upload.
+
+    Exactly one of (structured_json and embedding) or error is set. The
+    embedding is a float32 array (pgvector stores float4), which pickles
+    as a single buffer instead of 1536 Python floats. Uploads prepared in
+    a worker carry the worker's extraction cache entry, if any, so the
+    parent can store it in its own cache.
+    """
+
+    structured_json: Optional[dict]
+    embedding: Optional[np.ndarray]
+    error: Optional[str]
+    cache_entry: Optional[ExtractionCacheEntry] = None
+
+
+def prepare_upload(
+    extractor: ExtractorAgentProtocol,
+    upload: QuotationUploadRequest,
+) -> PreparedUpload:
+    """Run extraction and embedding for one upload, capturing its failure."""
+    try:
+        structured_json = extractor.extract_structured_fields(upload)
+        embedding = embed_text(upload.raw_text)
+    except Exception as exc:
+        return PreparedUpload(None, None, str(exc))
+    return PreparedUpload(structured_json, embedding, None)
+
+
+def _prepare_cached(
+    upload: QuotationUploadRequest,
+    structured_json: Optional[dict],
+) -> Optional[PreparedUpload]:
+    """Prepare an upload from its cached fields, or None on a miss."""
+    if structured_json is None:
+        return None
+    try:
+        embedding = embed_text(upload.raw_text)
+    except Exception as exc:
+        return PreparedUpload(None, None, str(exc))
+    return PreparedUpload(structured_json, embedding, None)
+
+
+def default_worker_extractor() -> ExtractorAgentProtocol:
+    """
+    Build the extractor used inside worker processes.
+
+    Each worker keeps its own in-memory extraction cache; the persistent
+    cache table is left to the parent so workers never open DB
+    connections.
+    """
+    from app.agents.extractor import ExtractorAgent
+
+    return ExtractorAgent.for_worker()
+
+
+# Extractors of this worker process by factory; None is the pool default.
+_worker_extractors: Dict[Optional[ExtractorFactory], ExtractorAgentProtocol] = {}
+
+
+def _init_worker(extractor_factory: ExtractorFactory) -> None:
+    _worker_extractors[None] = extractor_factory()
+
+
+def _prepare_chunk(
+    uploads: List[QuotationUploadRequest],
+    extractor_factory: Optional[ExtractorFactory] = None,
+) -> List[PreparedUpload]:
+    extractor = _worker_extractors.get(extractor_factory)
+    if extractor is None:
+        assert extractor_factory is not None, "worker was not initialized"
+        extractor = _worker_extractors[extractor_factory] = extractor_factory()
+
+    prepared = [prepare_upload(extractor, upload) for upload in uploads]
+    if isinstance(extractor, CachedExtractorProtocol):
+        for index, (upload, item) in enumerate(zip(uploads, prepared, strict=True)):
+            if item.error is None:
+                entry = extractor.cache_entry(upload)
+                prepared[index] = item._replace(cache_entry=entry)
+    return prepared
+
+
+class IngestProcessPool:
+    """
+    Fan the extract + embed stages of a batch out to worker processes.
+
+    Uploads are sent in chunks of `chunk_size` so each task amortizes the
+    IPC cost over several items. Workers build one extractor per factory
+    they are asked to use (see `prepare`). Results come back in input
+    order. A failing item only marks itself as failed; a chunk whose worker
+    died marks its own items as failed. Workers are started with the
+    `spawn` method so they do not inherit the parent's threads, locks or
+    database connections.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        *,
+        chunk_size: int = 16,
+        min_items: int = 32,
+        extractor_factory: ExtractorFactory = default_worker_extractor,
+    ) -> None:
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.min_items = min_items
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(extractor_factory,),
+        )
+
+    @classmethod
+    def from_settings(cls) -> Optional["IngestProcessPool"]:
+        """Build the pool from the ingest_* settings, or None when disabled."""
+        workers = settings.ingest_workers
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 0:
+            return None
+        return cls(
+            workers,
+            chunk_size=settings.ingest_chunk_size,
+            min_items=settings.ingest_parallel_min_items,
+        )
+
+    @traced("ingest.pool_prepare")
+    def prepare(
+        self,
+        uploads: Sequence[QuotationUploadRequest],
+        extractor: Optional[ExtractorAgentProtocol] = None,
+    ) -> List[PreparedUpload]:
+        """
+        Prepare every upload, keeping input order.
+
+        With a CachedExtractorProtocol `extractor` (the caller's own), the
+        whole batch is looked up in its cache at once and the hits are
+        prepared in this process. Only the misses are sent to the workers,
+        which run an equivalent extractor built by
+        `extractor.worker_factory()`; their cache entries are then stored
+        through `extractor` in one write. Hits, misses and the persistent
+        cache stay with the caller, at two table round-trips per batch.
+        Otherwise every upload goes to the workers and their default
+        extractor.
+        """
+        if not isinstance(extractor, CachedExtractorProtocol):
+            return self._prepare_in_workers(uploads, None)
+
+        prepared = [
+            _prepare_cached(upload, structured_json)
+            for upload, structured_json in zip(
+                uploads, extractor.extract_cached_many(uploads), strict=True
+            )
+        ]
+        misses = [index for index, item in enumerate(prepared) if item is None]
+        if misses:
+            computed = self._prepare_in_workers(
+                [uploads[index] for index in misses], extractor.worker_factory()
+            )
+            for index, item in zip(misses, computed, strict=True):
+                prepared[index] = item
+            extractor.store_cache_entries(
+                [item.cache_entry for item in computed if item.cache_entry is not None]
+            )
+        return prepared  # type: ignore[return-value]
+
+    def _prepare_in_workers(
+        self,
+        uploads: Sequence[QuotationUploadRequest],
+        extractor_factory: Optional[ExtractorFactory],
+    ) -> List[PreparedUpload]:
+        chunks = [
+            list(uploads[start : start + self.chunk_size])
+            for start in range(0, len(uploads), self.chunk_size)
+        ]
+        futures: List[Future] = [
+            self._executor.submit(_prepare_chunk, chunk, extractor_factory)
+            for chunk in chunks
+        ]
+
+        prepared: List[PreparedUpload] = []
+        for chunk, future in zip(chunks, futures, strict=True):
+            try:
+                prepared.extend(future.result())
+            except Exception as exc:
+                error = f"Ingest worker failed: {exc}"
+                prepared.extend(PreparedUpload(None, None, error) for _ in chunk)
+        return prepared
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_ingest_pool: Optional[IngestProcessPool] = None
+_ingest_pool_created = False
+_ingest_pool_lock = threading.Lock()
+
+
+def get_ingest_pool() -> Optional[IngestProcessPool]:
+    """
+    Return the process-wide IngestProcessPool, or None when disabled.
+
+    Created on first use; worker processes start with the first batch.
+    """
+    global _ingest_pool, _ingest_pool_created
+    with _ingest_pool_lock:
+        if not _ingest_pool_created:
+            _ingest_pool = IngestProcessPool.from_settings()
+            _ingest_pool_created = True
+        return _ingest_pool
+
+
+def shutdown_ingest_pool() -> None:
+    """Stop the worker processes, if the pool was ever created."""
+    global _ingest_pool, _ingest_pool_created
+    with _ingest_pool_lock:
+        if _ingest_pool is not None:
+            _ingest_pool.shutdown()
+        _ingest_pool = None
+        _ingest_pool_created = False
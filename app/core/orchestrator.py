@@ -1,23 +1,86 @@
-
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+import time
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
 
 from app.agents.base import (
+    EmbeddingRetrieverProtocol,
     EvaluatorAgentProtocol,
     ExtractorAgentProtocol,
+    GeneratorAgentProtocol,
     RetrieverAgentProtocol,
 )
-from app.core.schemas import StructuredQuotation
+from app.agents.generator_simple import SimpleGeneratorAgent
+from app.agents.retriever import parse_supplier_filter
+from app.core.config import settings
+from app.core.embeddings import embed_text
+from app.core.executors import INTERACTIVE, run_in_workload, workload
+from app.core.hits import load_hit_details
+from app.core.schemas import (
+    EvaluationResult,
+    QueryRequest,
+    QueryResponse,
+    StructuredQuotation,
+)
+
+
+@dataclass
+class QueryBudget:
+    """Latency budget and degradation thresholds for one query."""
+
+    budget_ms: float = field(default_factory=lambda: settings.query_budget_ms)
+    degraded_top_k: int = field(default_factory=lambda: settings.query_degraded_top_k)
+    min_evaluate_ms: float = field(
+        default_factory=lambda: settings.query_min_evaluate_ms
+    )
+
+
+class Deadline:
+    """Monotonic deadline measured from construction."""
+
+    def __init__(self, budget_ms: float) -> None:
+        self.budget_ms = budget_ms
+        self.started = time.perf_counter()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000.0
+
+    def remaining_ms(self) -> float:
+        return self.budget_ms - self.elapsed_ms()
+
+
+@dataclass
+class QueryEvent:
+    """
+    One step of the query pipeline, as produced by `stream_query`.
+
+    Kinds, in order: `quotations` (retrieved context), `answer` (one per
+    generated chunk), `evaluation` (EvaluationResult or None) and `done`
+    (timings, effective top_k and degraded stages).
+    """
+
+    kind: str
+    data: Any
+
+
+def _round_ms(value: float) -> float:
+    return round(value, 3)
 
 
 @dataclass
 class MultiAgentOrchestrator:
     """High-level coordinator for the multi-agent RAG workflow."""
 
-    extractor: ExtractorAgentProtocol
+    extractor: Optional[ExtractorAgentProtocol]
     retriever: RetrieverAgentProtocol
-    evaluator: EvaluatorAgentProtocol
+    evaluator: Optional[EvaluatorAgentProtocol]
+    generator: GeneratorAgentProtocol = field(default_factory=SimpleGeneratorAgent)
+    budget: QueryBudget = field(default_factory=QueryBudget)
 
     def ingest_quotation(self, raw_text: str) -> StructuredQuotation:
         """
@@ -30,14 +93,232 @@ class MultiAgentOrchestrator:
         """
         raise NotImplementedError("ingest_quotation is not implemented yet.")
 
-    def answer_query(self, query: str) -> str:
+    @workload(INTERACTIVE)
+    async def answer_query(
+        self,
+        query: QueryRequest | str,
+        *,
+        budget_ms: Optional[float] = None,
+        after_retrieve: Optional[Callable[[], None]] = None,
+    ) -> QueryResponse:
         """
-        Stub method responsible for answering a user query.
+        Answer a query within a latency budget and return the full response.
 
-        In future stages this method will:
-        - Build a QueryRequest from the raw query string.
-        - Use the retriever agent to fetch relevant quotations.
-        - Generate an answer from retrieved quotations.
-        - Evaluate the answer using the evaluator agent.
+        This collects the events of `stream_query`; see there for how the
+        stages overlap and degrade.
         """
-        raise NotImplementedError("answer_query is not implemented yet.")
+        request = query if isinstance(query, QueryRequest) else QueryRequest(query=query)
+
+        quotations: List[StructuredQuotation] = []
+        chunks: List[str] = []
+        evaluation: Optional[EvaluationResult] = None
+        done: Dict[str, Any] = {}
+
+        async for event in self.stream_query(
+            request, budget_ms=budget_ms, after_retrieve=after_retrieve
+        ):
+            if event.kind == "quotations":
+                quotations = event.data["quotations"]
+            elif event.kind == "answer":
+                chunks.append(event.data)
+            elif event.kind == "evaluation":
+                evaluation = event.data["evaluation"]
+            elif event.kind == "done":
+                done = event.data
+
+        # Every part was produced by the agents above; skip re-validation.
+        return QueryResponse.construct(
+            query=request.query,
+            quotations=quotations,
+            answer="".join(chunks),
+            evaluation=evaluation,
+            timings_ms=done["timings_ms"],
+            degraded=done["degraded"],
+        )
+
+    async def stream_query(
+        self,
+        query: QueryRequest,
+        *,
+        budget_ms: Optional[float] = None,
+        after_retrieve: Optional[Callable[[], None]] = None,
+    ) -> AsyncIterator[QueryEvent]:
+        """
+        Run the query pipeline as a stream of QueryEvents.
+
+        - The query embedding and the filter parsing run concurrently when
+          the retriever accepts a precomputed embedding.
+        - When less than half of the budget is left before retrieval,
+          top_k is capped at `budget.degraded_top_k`.
+        - The answer is streamed chunk by chunk as the generator produces
+          it; when the consumer goes away, generation is cancelled.
+          Evaluation starts as soon
+          as generation finishes, while the consumer is still draining the
+          answer chunks.
+        - Evaluation is skipped when less than `budget.min_evaluate_ms`
+          remains, and abandoned when it runs past the deadline.
+
+        `after_retrieve` is called once retrieval is over, so callers can
+        release the database session before generation starts. Stage
+        timings, the effective top_k and the list of degraded stages are
+        reported in the `done` event and in EvaluationResult.metadata.
+        """
+        deadline = Deadline(
+            budget_ms if budget_ms is not None else self.budget.budget_ms
+        )
+        timings: Dict[str, float] = {}
+        degraded: List[str] = []
+
+        try:
+            quotations, top_k = await self._retrieve(query, deadline, timings, degraded)
+        finally:
+            if after_retrieve is not None:
+                after_retrieve()
+        yield QueryEvent(
+            "quotations", {"quotations": quotations, "timings_ms": dict(timings)}
+        )
+
+        chunk_queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        producer = asyncio.create_task(
+            self._generate(query, quotations, chunk_queue, timings)
+        )
+        evaluation_task = asyncio.create_task(
+            self._evaluate_after(producer, query, quotations, deadline, timings, degraded)
+        )
+        try:
+            while True:
+                chunk = await chunk_queue.get()
+                if chunk is None:
+                    break
+                yield QueryEvent("answer", chunk)
+            evaluation = await evaluation_task
+        finally:
+            # The consumer went away (e.g. client disconnect): stop waiting.
+            producer.cancel()
+            evaluation_task.cancel()
+
+        timings["total"] = _round_ms(deadline.elapsed_ms())
+        report = {
+            "timings_ms": timings,
+            "budget_ms": deadline.budget_ms,
+            "top_k": top_k,
+            "degraded": degraded,
+        }
+        if evaluation is not None:
+            evaluation = evaluation.copy(
+                update={"metadata": {**evaluation.metadata, **report}}
+            )
+        yield QueryEvent(
+            "evaluation", {"evaluation": evaluation, "timings_ms": dict(timings)}
+        )
+        yield QueryEvent("done", report)
+
+    async def _retrieve(
+        self,
+        query: QueryRequest,
+        deadline: Deadline,
+        timings: Dict[str, float],
+        degraded: List[str],
+    ) -> Tuple[List[StructuredQuotation], int]:
+        embedding_retriever: Optional[EmbeddingRetrieverProtocol] = None
+        prepared: Optional[Tuple[np.ndarray, Optional[str]]] = None
+        query_text = query.query.strip()
+
+        if isinstance(self.retriever, EmbeddingRetrieverProtocol) and query_text:
+            embedding_retriever = self.retriever
+            stage = time.perf_counter()
+            embedding, supplier = await asyncio.gather(
+                run_in_workload(INTERACTIVE, embed_text, query_text),
+                run_in_workload(INTERACTIVE, parse_supplier_filter, query.filters),
+            )
+            prepared = (embedding, supplier)
+            timings["prepare"] = _round_ms((time.perf_counter() - stage) * 1000.0)
+
+        top_k = query.top_k
+        if (
+            deadline.remaining_ms() < deadline.budget_ms / 2
+            and top_k > self.budget.degraded_top_k
+        ):
+            top_k = self.budget.degraded_top_k
+            query = query.copy(update={"top_k": top_k})
+            degraded.append("top_k")
+
+        stage = time.perf_counter()
+        if embedding_retriever is not None and prepared is not None:
+            quotations = await run_in_workload(
+                INTERACTIVE, embedding_retriever.retrieve_embedded, query, *prepared
+            )
+        elif query_text:
+            quotations = await run_in_workload(
+                INTERACTIVE, self.retriever.retrieve, query
+            )
+        else:
+            quotations = []
+        if any(not getattr(quotation, "loaded", True) for quotation in quotations):
+            # Compact hits: load their texts here rather than from the event
+            # loop when the generator first reads them.
+            await run_in_workload(INTERACTIVE, load_hit_details, quotations)
+        timings["retrieve"] = _round_ms((time.perf_counter() - stage) * 1000.0)
+        if getattr(self.retriever, "partial", False):
+            # Some vector shards missed their deadline (see app.db.sharding).
+            degraded.append("retrieve_partial")
+
+        return list(quotations), top_k
+
+    async def _generate(
+        self,
+        query: QueryRequest,
+        quotations: List[StructuredQuotation],
+        chunk_queue: "asyncio.Queue[Optional[str]]",
+        timings: Dict[str, float],
+    ) -> str:
+        stage = time.perf_counter()
+        chunks: List[str] = []
+        try:
+            # aclosing: a cancelled generation releases the generator's
+            # resources (e.g. its HTTP stream) right away.
+            async with aclosing(self.generator.astream(query, quotations)) as stream:
+                async for chunk in stream:
+                    chunks.append(chunk)
+                    chunk_queue.put_nowait(chunk)
+        finally:
+            chunk_queue.put_nowait(None)
+        timings["generate"] = _round_ms((time.perf_counter() - stage) * 1000.0)
+        return "".join(chunks)
+
+    async def _evaluate_after(
+        self,
+        producer: "asyncio.Task[str]",
+        query: QueryRequest,
+        quotations: List[StructuredQuotation],
+        deadline: Deadline,
+        timings: Dict[str, float],
+        degraded: List[str],
+    ) -> Optional[EvaluationResult]:
+        answer = await producer
+        if self.evaluator is None:
+            return None
+
+        remaining_ms = deadline.remaining_ms()
+        if remaining_ms < self.budget.min_evaluate_ms:
+            degraded.append("evaluate_skipped")
+            return None
+
+        stage = time.perf_counter()
+        try:
+            evaluation = await asyncio.wait_for(
+                run_in_workload(
+                    INTERACTIVE,
+                    self.evaluator.evaluate,
+                    query=query,
+                    answer=answer,
+                    context=quotations,
+                ),
+                timeout=remaining_ms / 1000.0,
+            )
+        except asyncio.TimeoutError:
+            degraded.append("evaluate_timeout")
+            return None
+        finally:
+            timings["evaluate"] = _round_ms((time.perf_counter() - stage) * 1000.0)
+        return evaluation
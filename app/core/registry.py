@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.agents.base import EvaluatorAgentProtocol, GeneratorAgentProtocol
+from app.agents.evaluator_local import get_local_evaluator
+from app.agents.extractor import ExtractorAgent
+from app.agents.extractor_cache import get_extraction_cache
+from app.agents.generator_llm import close_llm_generator, get_llm_generator
+from app.agents.generator_simple import SimpleGeneratorAgent
+from app.agents.orchestrator import Orchestrator
+from app.agents.query_cache import SemanticQueryCache, get_query_cache
+from app.agents.reranker import FeatureReranker
+from app.agents.retriever import RetrieverAgent
+from app.core.config import settings
+from app.core.ingest_jobs import IngestQueue
+from app.core.ingest_log import IngestLog
+from app.core.ingest_pool import get_ingest_pool, shutdown_ingest_pool
+from app.core.metrics import REGISTRY
+from app.core.schemas import QueryRequest
+from app.db.session import SessionLocal, dispose_engine, get_engine
+from app.db.sharding import (
+    ShardedVectorStore,
+    get_vector_store,
+    shutdown_vector_store,
+)
+
+logger = logging.getLogger(__name__)
+
+WARMUP_DURATION = REGISTRY.gauge(
+    "warmup_duration_seconds",
+    "Duration of each startup warmup step (database, retrieval, caches).",
+    ("step",),
+)
+WARMUP_FAILURES = REGISTRY.counter(
+    "warmup_failures_total",
+    "Startup warmup steps that raised (the application starts anyway).",
+    ("step",),
+)
+
+
+class AgentRegistry:
+    """
+    Agents and shared resources used by the API routes, built once.
+
+    The application lifespan creates one registry at startup, optionally
+    warms it up, and closes it at shutdown; routes get it through the
+    app.api.lifespan dependencies instead of building agents per request.
+    Everything held here is safe to share between concurrent requests.
+    """
+
+    def __init__(
+        self,
+        *,
+        extractor: ExtractorAgent,
+        orchestrator: Orchestrator,
+        reranker: Optional[FeatureReranker],
+        query_cache: Optional[SemanticQueryCache],
+        generator: GeneratorAgentProtocol,
+        evaluator: Optional[EvaluatorAgentProtocol],
+        ingest_queue: IngestQueue,
+        vector_store: Optional[ShardedVectorStore] = None,
+    ) -> None:
+        self.extractor = extractor
+        self.orchestrator = orchestrator
+        self.ingest_queue = ingest_queue
+        self.reranker = reranker
+        self.query_cache = query_cache
+        self.generator = generator
+        self.evaluator = evaluator
+        self.vector_store = vector_store
+
+    @classmethod
+    def from_settings(cls) -> "AgentRegistry":
+        """
+        Build the agents configured by the settings.
+
+        Shared process-wide resources (extraction and query caches, ingest
+        pool, evaluator, LLM client) come from their get_* accessors, so code
+        outside the API reuses the same ones. The ingest queue writes through
+        the registry's orchestrator; its drain thread is started by the
+        application lifespan, or by the first submitted job without it.
+        """
+        extractor = ExtractorAgent(cache=get_extraction_cache())
+        query_cache = get_query_cache()
+        vector_store = get_vector_store()
+        if settings.generator_backend == "llm":
+            generator: GeneratorAgentProtocol = get_llm_generator()
+        else:
+            generator = SimpleGeneratorAgent()
+        orchestrator = Orchestrator(
+            extractor=extractor,
+            pool=get_ingest_pool(),
+            query_cache=query_cache,
+            store=vector_store,
+        )
+        return cls(
+            extractor=extractor,
+            orchestrator=orchestrator,
+            reranker=(
+                FeatureReranker.from_settings() if settings.rerank_enabled else None
+            ),
+            query_cache=query_cache,
+            generator=generator,
+            evaluator=get_local_evaluator(),
+            ingest_queue=IngestQueue(
+                log=IngestLog(settings.ingest_log_path, fsync=settings.ingest_fsync),
+                ingestor=orchestrator,
+                session_factory=SessionLocal,
+                batch_size=settings.ingest_batch_size,
+                max_latency_s=settings.ingest_max_latency_ms / 1000.0,
+                job_retention=settings.ingest_job_retention,
+            ),
+            vector_store=vector_store,
+        )
+
+    def retriever(self, db: Session) -> RetrieverAgent:
+        """Build a retriever for a session (retrievers are per session)."""
+        return RetrieverAgent(
+            db=db,
+            reranker=self.reranker,
+            cache=self.query_cache,
+            store=self.vector_store,
+        )
+
+    def warmup(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ) -> Dict[str, float]:
+        """
+        Pay the first-request costs before serving traffic.
+
+        - database: opens `warmup_db_connections` pooled connections;
+        - retrieval: runs `warmup_query` through the retriever, which
+          embeds it and has the similarity statement prepared;
+        - caches: loads the newest stored extraction results.
+
+        Returns the duration of each step in seconds. A failing step
+        (e.g. the database is not up yet) is logged and skipped.
+        """
+        steps = {
+            "database": self._warm_database,
+            "retrieval": lambda: self._warm_retrieval(session_factory),
+            "caches": self.extractor.preload_cache,
+        }
+        durations: Dict[str, float] = {}
+        for step, run in steps.items():
+            started = time.perf_counter()
+            try:
+                run()
+            except Exception:
+                WARMUP_FAILURES.inc(step=step)
+                logger.warning("Warmup step %s failed", step, exc_info=True)
+            durations[step] = time.perf_counter() - started
+            WARMUP_DURATION.set(durations[step], step=step)
+        return durations
+
+    def _warm_database(self) -> None:
+        engine = get_engine()
+        connections = []
+        try:
+            for _ in range(max(1, settings.warmup_db_connections)):
+                connection = engine.connect()
+                connections.append(connection)
+                connection.execute(text("SELECT 1"))
+        finally:
+            # Closing returns the connections to the pool, still open.
+            for connection in connections:
+                connection.close()
+
+    def _warm_retrieval(self, session_factory: Callable[[], Session]) -> None:
+        db = session_factory()
+        try:
+            self.retriever(db).retrieve(QueryRequest(query=settings.warmup_query))
+        finally:
+            db.close()
+
+    async def aclose(self) -> None:
+        """
+        Stop the ingest workers and close pooled LLM and DB connections.
+
+        The ingest queue's drain thread finishes its current batch first
+        (for up to 5 seconds); whatever it leaves in the log is replayed
+        at the next start.
+        """
+        await asyncio.to_thread(self.ingest_queue.stop, 5.0)
+        shutdown_ingest_pool()
+        await close_llm_generator()
+        shutdown_vector_store()
+        dispose_engine()
@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -114,3 +114,123 @@ class EvaluationResult(BaseModel):
 
     class Config:
         extra = "forbid"
+
+
+class QueryResponse(BaseModel):
+    """Answer to a query together with its supporting quotations."""
+
+    query: str = Field(
+        ...,
+        description="Original user query.",
+    )
+    quotations: List[StructuredQuotation] = Field(
+        default_factory=list,
+        description="Retrieved quotations, best match first.",
+    )
+    answer: str = Field(
+        ...,
+        description="Answer generated from the retrieved quotations.",
+    )
+    evaluation: Optional[EvaluationResult] = Field(
+        default=None,
+        description="Evaluation of the answer, when an evaluator is configured.",
+    )
+    timings_ms: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Wall-clock duration of each stage in milliseconds.",
+    )
+    degraded: List[str] = Field(
+        default_factory=list,
+        description="Stages that were reduced or skipped to meet the latency budget.",
+    )
+
+    class Config:
+        extra = "forbid"
+
+
+# Lifecycle of a background ingestion job.
+IngestJobState = Literal["queued", "running", "completed"]
+
+
+class IngestItemResult(BaseModel):
+    """Outcome of ingesting a single quotation from a batch or job."""
+
+    index: int = Field(
+        ...,
+        description="Position of the item in the original upload.",
+    )
+    status: Literal["ok", "error"] = Field(
+        ...,
+        description="Whether the item was stored successfully.",
+    )
+    quotation: Optional[StructuredQuotation] = Field(
+        default=None,
+        description="Stored quotation when status is 'ok'.",
+    )
+    error: Optional[str] = Field(
+        default=None,
+        description="Error message when status is 'error'.",
+    )
+
+    class Config:
+        extra = "forbid"
+
+
+class IngestJobAccepted(BaseModel):
+    """Response returned when uploads are queued for background ingestion."""
+
+    job_id: str = Field(
+        ...,
+        description="Identifier used to poll the job status.",
+    )
+    status: IngestJobState = Field(
+        ...,
+        description="Current job status.",
+    )
+    total: int = Field(
+        ...,
+        description="Number of quotations in the job.",
+    )
+
+    class Config:
+        extra = "forbid"
+
+
+class IngestJobStatus(BaseModel):
+    """Progress and per-item results of a background ingestion job."""
+
+    job_id: str = Field(
+        ...,
+        description="Identifier of the job.",
+    )
+    status: IngestJobState = Field(
+        ...,
+        description="Current job status.",
+    )
+    total: int = Field(
+        ...,
+        description="Number of quotations in the job.",
+    )
+    processed: int = Field(
+        default=0,
+        description="Number of quotations processed so far.",
+    )
+    failed: int = Field(
+        default=0,
+        description="Number of quotations that failed to ingest.",
+    )
+    created_at: datetime = Field(
+        ...,
+        description="When the job was accepted.",
+    )
+    finished_at: Optional[datetime] = Field(
+        default=None,
+        description="When the last item of the job was processed.",
+    )
+    results: List[IngestItemResult] = Field(
+        default_factory=list,
+        description="Per-item results ordered by their upload position.",
+    )
+
+    class Config:
+        extra = "forbid"
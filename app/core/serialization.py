@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from operator import attrgetter
+from typing import Any, Dict
+
+from app.core.schemas import StructuredQuotation
+
+# Field order shared by StructuredQuotation, the Quotation ORM model and the
+# column tuples selected by app.db.retrieval.
+QUOTATION_FIELDS = ("id", "supplier", "raw_text", "structured_json", "created_at")
+
+_quotation_values = attrgetter(*QUOTATION_FIELDS)
+_SUMMARY_FIELDS = tuple(field for field in QUOTATION_FIELDS if field != "raw_text")
+_summary_values = attrgetter(*_SUMMARY_FIELDS)
+
+
+def quotation_payload(source: Any, *, include_raw_text: bool = True) -> Dict[str, Any]:
+    """
+    Build a plain response dict for a quotation.
+
+    `source` can be a Quotation ORM object, a SQLAlchemy Row selected with
+    the QUOTATION_FIELDS columns, a QuotationHit or a StructuredQuotation;
+    all expose the fields as attributes. Values coming from the database
+    are already valid, so nothing is re-validated. The dict is meant to be
+    serialized directly (e.g. with ORJSONResponse). raw_text is not read
+    at all when it is excluded.
+    """
+    if include_raw_text:
+        payload = dict(zip(QUOTATION_FIELDS, _quotation_values(source), strict=True))
+    else:
+        payload = dict(zip(_SUMMARY_FIELDS, _summary_values(source), strict=True))
+    if payload["structured_json"] is None:
+        payload["structured_json"] = {}
+    return payload
+
+
+def quotation_model(source: Any) -> StructuredQuotation:
+    """
+    Build a StructuredQuotation from trusted database values.
+
+    This replaces `StructuredQuotation.from_orm` on hot paths: it uses
+    `construct`, which skips per-field validation.
+    """
+    return StructuredQuotation.construct(**quotation_payload(source))
@@ -0,0 +1,484 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import aclosing, contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    TypeVar,
+)
+
+import httpx
+import orjson
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SPAN_DURATION = REGISTRY.histogram(
+    "span_duration_seconds",
+    "Duration of traced operations by component and operation.",
+    ("component", "operation"),
+)
+SPAN_CALLS = REGISTRY.counter(
+    "span_calls_total",
+    "Traced operations by component, operation and status (ok, error).",
+    ("component", "operation", "status"),
+)
+SPANS_DROPPED = REGISTRY.counter(
+    "tracing_spans_dropped_total",
+    "Finished spans dropped because the export queue was full.",
+)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# OTLP status codes and span kinds.
+STATUS_OK = 1
+STATUS_ERROR = 2
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+
+
+class Span:
+    """
+    One timed operation, exported in the OTLP/JSON span format.
+
+    `name` is "<component>.<operation>"; both parts label the span
+    metrics. Spans started while another span is current become its
+    children and share its trace id.
+    """
+
+    __slots__ = (
+        "name",
+        "component",
+        "operation",
+        "trace_id",
+        "span_id",
+        "parent_span_id",
+        "kind",
+        "start_time_ns",
+        "end_time_ns",
+        "attributes",
+        "error",
+        "_started",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        trace_id: Optional[str] = None,
+        parent_span_id: Optional[str] = None,
+        kind: int = KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.name = name
+        self.component, _, self.operation = name.partition(".")
+        self.trace_id = trace_id or f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = attributes or {}
+        self.error: Optional[str] = None
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns = 0
+        self._started = time.perf_counter_ns()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def rename(self, name: str) -> None:
+        self.name = name
+        self.component, _, self.operation = name.partition(".")
+
+    def end(self) -> float:
+        """Close the span and return its duration in seconds."""
+        elapsed_ns = time.perf_counter_ns() - self._started
+        self.end_time_ns = self.start_time_ns + elapsed_ns
+        return elapsed_ns / 1e9
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span: Dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_time_ns),
+            "endTimeUnixNano": str(self.end_time_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            "status": (
+                {"code": STATUS_ERROR, "message": self.error}
+                if self.error is not None
+                else {"code": STATUS_OK}
+            ),
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_payload(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    """Wrap spans in an OTLP ExportTraceServiceRequest (JSON encoding)."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": service_name}}
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __name__},
+                        "spans": [span.to_otlp() for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: List[Span]) -> None: ...
+
+    def shutdown(self) -> None: ...
+
+
+class FileSpanExporter:
+    """
+    Append spans to a file, one OTLP/JSON request per line.
+
+    This is the format of the OpenTelemetry Collector file exporter, so
+    the file can be replayed into a collector or read with jq.
+    """
+
+    def __init__(self, path: str, service_name: str) -> None:
+        self.path = path
+        self.service_name = service_name
+
+    def export(self, spans: List[Span]) -> None:
+        line = orjson.dumps(otlp_payload(spans, self.service_name)) + b"\n"
+        with open(self.path, "ab") as file:
+            file.write(line)
+
+    def shutdown(self) -> None:
+        pass
+
+
+class OTLPHttpSpanExporter:
+    """Send spans to an OTLP/HTTP collector endpoint (JSON encoding)."""
+
+    def __init__(self, endpoint: str, service_name: str, timeout_s: float = 5.0) -> None:
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._client = httpx.Client(timeout=timeout_s)
+
+    def export(self, spans: List[Span]) -> None:
+        response = self._client.post(
+            self.endpoint,
+            content=orjson.dumps(otlp_payload(spans, self.service_name)),
+            headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+
+    def shutdown(self) -> None:
+        self._client.close()
+
+
+class BatchSpanProcessor:
+    """
+    Export finished spans from a background thread.
+
+    Spans are queued (up to `max_queue_size`; extra spans are dropped
+    and counted) and exported in batches of `max_export_batch` every
+    `interval_s`, so request threads never wait on the exporter.
+    Export errors are logged and the batch is discarded.
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        *,
+        interval_s: float = 5.0,
+        max_queue_size: int = 2048,
+        max_export_batch: int = 512,
+    ) -> None:
+        self.exporter = exporter
+        self.interval_s = interval_s
+        self.max_queue_size = max_queue_size
+        self.max_export_batch = max_export_batch
+        self._queue: Deque[Span] = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name="span-exporter", daemon=True
+        )
+        self._thread.start()
+
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            if len(self._queue) >= self.max_queue_size:
+                SPANS_DROPPED.inc()
+                return
+            self._queue.append(span)
+            full = len(self._queue) >= self.max_export_batch
+        if full:
+            self._wake.set()
+
+    def force_flush(self) -> None:
+        """Export every queued span now, on the calling thread."""
+        while self._export_batch():
+            pass
+
+    def shutdown(self) -> None:
+        self._stopped = True
+        self._wake.set()
+        self._thread.join(timeout=self.interval_s + 5.0)
+        self.force_flush()
+        self.exporter.shutdown()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
+            self.force_flush()
+
+    def _export_batch(self) -> bool:
+        with self._lock:
+            count = min(len(self._queue), self.max_export_batch)
+            batch = [self._queue.popleft() for _ in range(count)]
+        if not batch:
+            return False
+        try:
+            self.exporter.export(batch)
+        except Exception:
+            logger.warning("Span export failed; dropped %d spans", len(batch), exc_info=True)
+        return True
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Create spans, record their metrics and hand them to the processor.
+
+    When disabled, `span` yields None and `traced` wrappers call straight
+    through after a single attribute check.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        processor: Optional[BatchSpanProcessor] = None,
+    ) -> None:
+        self.enabled = enabled
+        self.processor = processor
+
+    def start_span(
+        self,
+        name: str,
+        *,
+        parent: Optional[Tuple[str, str]] = None,
+        kind: int = KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Span:
+        """
+        Start a span under `parent` ((trace_id, span_id)) or the current span.
+
+        The span does not become current; see `span` for that.
+        """
+        if parent is None:
+            current = _current_span.get()
+            if current is not None:
+                parent = (current.trace_id, current.span_id)
+        return Span(
+            name,
+            trace_id=parent[0] if parent else None,
+            parent_span_id=parent[1] if parent else None,
+            kind=kind,
+            attributes=attributes,
+        )
+
+    def end_span(self, span: Span, error: Optional[BaseException] = None) -> None:
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        duration = span.end()
+        SPAN_DURATION.observe(duration, component=span.component, operation=span.operation)
+        SPAN_CALLS.inc(
+            component=span.component,
+            operation=span.operation,
+            status="error" if error is not None else "ok",
+        )
+        if self.processor is not None:
+            self.processor.on_end(span)
+
+    @contextmanager
+    def activate(self, span: Span) -> Iterator[Span]:
+        """Make `span` current inside the block without ending it."""
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Time the enclosed block as a span that is current inside it."""
+        if not self.enabled:
+            yield None
+            return
+        span = self.start_span(name, attributes=attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            self.end_span(span, exc)
+            raise
+        else:
+            self.end_span(span)
+        finally:
+            _current_span.reset(token)
+
+
+# Enabled from import time, so module-level decorators and worker
+# processes record span metrics; create_app attaches the exporter.
+tracer = Tracer(enabled=settings.tracing_enabled)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """
+    Decorate a function, coroutine function or async generator function
+    so every call runs in a span called `name` ("<component>.<operation>").
+
+    Async generator spans cover the whole iteration but do not become
+    current while it is suspended, so they never leak into the consumer.
+    """
+
+    def decorate(function: F) -> F:
+        if inspect.isasyncgenfunction(function):
+
+            @functools.wraps(function)
+            async def async_gen_wrapper(*args: Any, **kwargs: Any) -> Any:
+                # aclosing: closing the wrapper closes the wrapped generator
+                # right away, not when it is garbage collected.
+                async with aclosing(function(*args, **kwargs)) as items:
+                    if not tracer.enabled:
+                        async for item in items:
+                            yield item
+                        return
+                    span = tracer.start_span(name)
+                    try:
+                        async for item in items:
+                            yield item
+                    except GeneratorExit:
+                        # The consumer stopped early: not an error.
+                        span.set_attribute("cancelled", True)
+                        tracer.end_span(span)
+                        raise
+                    except BaseException as exc:
+                        tracer.end_span(span, exc)
+                        raise
+                    tracer.end_span(span)
+
+            return async_gen_wrapper  # type: ignore[return-value]
+
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not tracer.enabled:
+                    return await function(*args, **kwargs)
+                with tracer.span(name):
+                    return await function(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            with tracer.span(name):
+                return function(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def build_exporter() -> Optional[SpanExporter]:
+    """Return the exporter selected by settings.tracing_exporter, if any."""
+    service_name = settings.tracing_service_name
+    if settings.tracing_exporter == "file":
+        return FileSpanExporter(settings.tracing_file_path, service_name)
+    if settings.tracing_exporter == "otlp":
+        return OTLPHttpSpanExporter(settings.tracing_otlp_endpoint, service_name)
+    return None
+
+
+def configure_tracing(
+    *,
+    enabled: Optional[bool] = None,
+    exporter: Optional[SpanExporter] = None,
+    interval_s: Optional[float] = None,
+) -> Tracer:
+    """
+    (Re)configure the process-wide tracer.
+
+    Unset arguments come from the tracing_* settings. Any previous
+    processor is flushed and shut down first.
+    """
+    shutdown_tracing()
+    tracer.enabled = settings.tracing_enabled if enabled is None else enabled
+    if exporter is None:
+        exporter = build_exporter()
+    if tracer.enabled and exporter is not None:
+        tracer.processor = BatchSpanProcessor(
+            exporter,
+            interval_s=(
+                settings.tracing_export_interval_s if interval_s is None else interval_s
+            ),
+            max_queue_size=settings.tracing_max_queue_size,
+            max_export_batch=settings.tracing_max_export_batch,
+        )
+    return tracer
+
+
+def shutdown_tracing() -> None:
+    """Flush queued spans and stop the export thread."""
+    processor, tracer.processor = tracer.processor, None
+    if processor is not None:
+        processor.shutdown()
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional
 
 from sqlalchemy import (
     DateTime,
+    Float,
     ForeignKey,
     Integer,
     JSON,
@@ -14,7 +15,9 @@ from sqlalchemy import (
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
-from pgvector.sqlalchemy import VECTOR # type: ignore[import-untyped]
+import numpy as np
+
+from app.db.types import BinaryVector
 
 
 class Base(DeclarativeBase):
@@ -39,6 +42,20 @@ class Quotation(Base):
         server_default=func.now(),
         nullable=False,
     )
+    # Row version, incremented by the ORM on every UPDATE. The read
+    # endpoints derive ETags from (id, version) without loading raw_text.
+    version: Mapped[int] = mapped_column(
+        Integer,
+        server_default="1",
+        nullable=False,
+    )
+
+    __mapper_args__ = {
+        # Fetch server defaults (created_at) in the INSERT itself, so batched
+        # ingestion can build responses after a flush without extra SELECTs.
+        "eager_defaults": True,
+        "version_id_col": version,
+    }
 
     embedding: Mapped[Optional["QuotationEmbedding"]] = relationship(
         back_populates="quotation",
@@ -63,8 +80,35 @@ class QuotationEmbedding(Base):
         index=True,
     )
     # Adjust the dimension to match your embedding model (e.g. 1536 for many OpenAI models)
-    embedding: Mapped[List[float]] = mapped_column(VECTOR(1536), nullable=False)
+    # Loaded and bound as float32 NumPy arrays (see app.db.types).
+    embedding: Mapped[np.ndarray] = mapped_column(
+        BinaryVector(1536), nullable=False
+    )
 
     quotation: Mapped[Quotation] = relationship(
         back_populates="embedding",
     )
+
+
+class ExtractionCacheEntry(Base):
+    """
+    Persisted extractor output for a normalized quotation text.
+
+    Rows are keyed by extractor name, extractor version and the SHA-256 of
+    the normalized text, so a new extractor version never reads results
+    produced by an older one.
+    """
+
+    __tablename__ = "extraction_cache"
+
+    extractor_name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    extractor_version: Mapped[str] = mapped_column(String(50), primary_key=True)
+    text_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    fields: Mapped[dict] = mapped_column(JSON, nullable=False)
+    # How long the extraction took, i.e. what a cache hit saves.
+    extraction_ms: Mapped[float] = mapped_column(Float, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
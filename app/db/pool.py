@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Any, NamedTuple
+
+from sqlalchemy.pool import ConnectionPoolEntry, QueuePool
+
+from app.core.metrics import REGISTRY
+
+POOL_CHECKOUT_WAIT = REGISTRY.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool.",
+)
+
+# Half-life of the smoothed checkout wait. Without time decay a burst of
+# slow checkouts would keep the average high once traffic stops.
+WAIT_HALF_LIFE_S = 1.0
+
+
+class PoolStats(NamedTuple):
+    """Saturation signals of one connection pool."""
+
+    # Smoothed checkout wait, see TimedQueuePool.checkout_wait_ms.
+    checkout_wait_ms: float = 0.0
+    # Threads currently blocked waiting for a connection.
+    waiting: int = 0
+    # pool_size + max_overflow; 0 when overflow is unlimited (never waits).
+    capacity: int = 0
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that measures how long each checkout waits for a connection.
+
+    `checkout_wait_ms` is an exponentially weighted average of recent waits
+    that also decays with time, and `waiting` counts threads currently
+    blocked on the pool. Admission control reads both to detect pool
+    saturation before requests pile up behind it.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self._wait_ewma_ms = 0.0
+        self._wait_updated = time.monotonic()
+        self.waiting = 0
+
+    @property
+    def checkout_wait_ms(self) -> float:
+        with self._wait_lock:
+            return self._decayed(time.monotonic())
+
+    @property
+    def capacity(self) -> int:
+        if self._max_overflow < 0:
+            return 0
+        return self.size() + self._max_overflow
+
+    def stats(self) -> PoolStats:
+        with self._wait_lock:
+            return PoolStats(
+                self._decayed(time.monotonic()), self.waiting, self.capacity
+            )
+
+    def _decayed(self, now: float) -> float:
+        age = now - self._wait_updated
+        return self._wait_ewma_ms * math.pow(0.5, age / WAIT_HALF_LIFE_S)
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.monotonic()
+        with self._wait_lock:
+            self.waiting += 1
+        try:
+            return super()._do_get()
+        finally:
+            now = time.monotonic()
+            waited = now - start
+            with self._wait_lock:
+                self.waiting -= 1
+                self._wait_ewma_ms = 0.8 * self._decayed(now) + 0.2 * waited * 1000.0
+                self._wait_updated = now
+            POOL_CHECKOUT_WAIT.observe(waited)
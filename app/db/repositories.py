@@ -1,12 +1,34 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from datetime import timedelta
+from typing import List, Optional, Sequence, Tuple
 
+import numpy as np
+from sqlalchemy import CursorResult, delete, func, select
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
-from app.db.models import Quotation, QuotationEmbedding
+from app.core.tracing import traced
+from app.db.models import ExtractionCacheEntry, Quotation, QuotationEmbedding
 
 
+def is_transient_db_error(exc: BaseException) -> bool:
+    """
+    Whether `exc` is a connection-level failure rather than a bad row.
+
+    Lost or invalidated connections and pool timeouts say nothing about
+    the data being written, so callers should retry the whole unit of
+    work instead of reporting its items as failed.
+    """
+    if isinstance(
+        exc, (sa_exc.OperationalError, sa_exc.InterfaceError, sa_exc.TimeoutError)
+    ):
+        return True
+    return isinstance(exc, sa_exc.DBAPIError) and exc.connection_invalidated
+
+
+@traced("repository.create_quotation")
 def create_quotation(
     db: Session,
     *,
@@ -28,6 +50,35 @@ def create_quotation(
     return quotation
 
 
+@traced("repository.add_quotation_with_embedding")
+def add_quotation_with_embedding(
+    db: Session,
+    *,
+    supplier: str,
+    raw_text: str,
+    structured_json: Optional[dict],
+    embedding: np.ndarray,
+) -> Quotation:
+    """
+    Stage a new quotation together with its embedding without committing.
+
+    The rows are flushed so the id and created_at are populated, but the
+    caller owns the transaction. This lets batch ingestion group many
+    quotations into a single commit. `embedding` is a float32 NumPy array
+    (a list of floats is converted on bind).
+    """
+    quotation = Quotation(
+        supplier=supplier,
+        raw_text=raw_text,
+        structured_json=structured_json,
+    )
+    quotation.embedding = QuotationEmbedding(embedding=embedding)
+    db.add(quotation)
+    db.flush()
+    return quotation
+
+
+@traced("repository.get_quotation_by_id")
 def get_quotation_by_id(db: Session, quotation_id: int) -> Optional[Quotation]:
     """
     Retrieve a single quotation by its primary key.
@@ -35,6 +86,12 @@ def get_quotation_by_id(db: Session, quotation_id: int) -> Optional[Quotation]:
     return db.query(Quotation).filter(Quotation.id == quotation_id).first()
 
 
+# Newest first. Group commit stores many rows with the same created_at,
+# so the id breaks ties to keep pages (and list ETags) deterministic.
+QUOTATION_LIST_ORDER = (Quotation.created_at.desc(), Quotation.id.desc())
+
+
+@traced("repository.list_quotations")
 def list_quotations(
     db: Session,
     *,
@@ -42,22 +99,58 @@ def list_quotations(
     limit: int = 100,
 ) -> List[Quotation]:
     """
-    List quotations ordered by creation time (newest first).
+    List quotations ordered by creation time (newest first, then by id).
     """
     return (
         db.query(Quotation)
-        .order_by(Quotation.created_at.desc())
+        .order_by(*QUOTATION_LIST_ORDER)
         .offset(skip)
         .limit(limit)
         .all()
     )
 
 
+@traced("repository.get_quotation_version")
+def get_quotation_version(db: Session, quotation_id: int) -> Optional[int]:
+    """
+    Return the row version of a quotation, or None if it does not exist.
+
+    Only the primary key index is touched, so conditional reads can be
+    answered without loading raw_text.
+    """
+    return (
+        db.query(Quotation.version)
+        .filter(Quotation.id == quotation_id)
+        .scalar()
+    )
+
+
+@traced("repository.list_quotation_versions")
+def list_quotation_versions(
+    db: Session,
+    *,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[Tuple[int, int]]:
+    """
+    Return (id, version) pairs for the page `list_quotations` would return.
+    """
+    rows = (
+        db.query(Quotation.id, Quotation.version)
+        .order_by(*QUOTATION_LIST_ORDER)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    return [(row.id, row.version) for row in rows]
+
+
+@traced("repository.upsert_quotation_embedding")
 def upsert_quotation_embedding(
     db: Session,
     *,
     quotation_id: int,
-    embedding: List[float],
+    embedding: np.ndarray,
 ) -> QuotationEmbedding:
     """
     Insert or update the embedding associated with a quotation.
@@ -80,3 +173,159 @@ def upsert_quotation_embedding(
     db.commit()
     db.refresh(obj)
     return obj
+
+
+@traced("repository.get_extraction_cache_entry")
+def get_extraction_cache_entry(
+    db: Session,
+    *,
+    extractor_name: str,
+    extractor_version: str,
+    text_hash: str,
+) -> Optional[ExtractionCacheEntry]:
+    """
+    Retrieve a cached extraction result by its primary key.
+    """
+    return db.get(
+        ExtractionCacheEntry,
+        (extractor_name, extractor_version, text_hash),
+    )
+
+
+@traced("repository.get_extraction_cache_entries")
+def get_extraction_cache_entries(
+    db: Session,
+    *,
+    extractor_name: str,
+    extractor_version: str,
+    text_hashes: Sequence[str],
+) -> List[ExtractionCacheEntry]:
+    """
+    Retrieve the cached results of several texts with one query.
+
+    Hashes without a cached result are skipped; rows come in no
+    particular order.
+    """
+    if not text_hashes:
+        return []
+    stmt = select(ExtractionCacheEntry).where(
+        ExtractionCacheEntry.extractor_name == extractor_name,
+        ExtractionCacheEntry.extractor_version == extractor_version,
+        ExtractionCacheEntry.text_hash.in_(set(text_hashes)),
+    )
+    return list(db.scalars(stmt))
+
+
+@traced("repository.list_recent_extraction_cache_entries")
+def list_recent_extraction_cache_entries(
+    db: Session,
+    *,
+    extractor_name: str,
+    extractor_version: str,
+    limit: int,
+) -> List[ExtractionCacheEntry]:
+    """
+    Return the most recently cached results of an extractor version.
+    """
+    stmt = (
+        select(ExtractionCacheEntry)
+        .where(
+            ExtractionCacheEntry.extractor_name == extractor_name,
+            ExtractionCacheEntry.extractor_version == extractor_version,
+        )
+        .order_by(ExtractionCacheEntry.created_at.desc())
+        .limit(limit)
+    )
+    return list(db.scalars(stmt))
+
+
+@traced("repository.save_extraction_cache_entry")
+def save_extraction_cache_entry(
+    db: Session,
+    *,
+    extractor_name: str,
+    extractor_version: str,
+    text_hash: str,
+    fields: dict,
+    extraction_ms: float,
+) -> None:
+    """
+    Persist an extraction result, keeping the existing row on conflict.
+
+    Two workers extracting the same text at once produce the same result,
+    so whichever insert lands first wins.
+    """
+    stmt = (
+        insert(ExtractionCacheEntry)
+        .values(
+            extractor_name=extractor_name,
+            extractor_version=extractor_version,
+            text_hash=text_hash,
+            fields=fields,
+            extraction_ms=extraction_ms,
+        )
+        .on_conflict_do_nothing()
+    )
+    db.execute(stmt)
+    db.commit()
+
+
+@traced("repository.save_extraction_cache_entries")
+def save_extraction_cache_entries(
+    db: Session,
+    *,
+    extractor_name: str,
+    extractor_version: str,
+    entries: Sequence[Tuple[str, dict, float]],
+) -> None:
+    """
+    Persist (text_hash, fields, extraction_ms) results with one INSERT.
+
+    Existing rows are kept on conflict, as in `save_extraction_cache_entry`.
+    """
+    if not entries:
+        return
+    stmt = (
+        insert(ExtractionCacheEntry)
+        .values(
+            [
+                {
+                    "extractor_name": extractor_name,
+                    "extractor_version": extractor_version,
+                    "text_hash": text_hash,
+                    "fields": fields,
+                    "extraction_ms": extraction_ms,
+                }
+                for text_hash, fields, extraction_ms in entries
+            ]
+        )
+        .on_conflict_do_nothing()
+    )
+    db.execute(stmt)
+    db.commit()
+
+
+@traced("repository.delete_stale_extraction_cache_entries")
+def delete_stale_extraction_cache_entries(
+    db: Session,
+    *,
+    extractor_name: str,
+    current_version: str,
+    min_age: timedelta,
+) -> int:
+    """
+    Delete cached results produced by other versions of an extractor.
+
+    Only rows older than `min_age` (by the database clock) are deleted, so
+    workers still running another version during a rolling deploy keep
+    the entries they are writing. Returns the number of deleted rows.
+    """
+    result: CursorResult = db.execute(  # type: ignore[assignment]
+        delete(ExtractionCacheEntry).where(
+            ExtractionCacheEntry.extractor_name == extractor_name,
+            ExtractionCacheEntry.extractor_version != current_version,
+            ExtractionCacheEntry.created_at < func.now() - min_age,
+        )
+    )
+    db.commit()
+    return result.rowcount or 0
@@ -1,42 +1,202 @@
 from __future__ import annotations
 
-from typing import List, Optional, Sequence
+from functools import lru_cache
+from typing import Dict, List, Literal, Optional, Sequence
 
-from sqlalchemy import select
+import numpy as np
+from sqlalchemy import Integer, Row, Select, String, bindparam, select
 from sqlalchemy.orm import Session
 
+from app.core.embeddings import EMBEDDING_DIM
+from app.core.hits import DetailsRow, HitDetailsLoader, QuotationHit
+from app.core.serialization import QUOTATION_FIELDS
+from app.core.tracing import traced
 from app.db.models import Quotation, QuotationEmbedding
+from app.db.types import BinaryVector
 
+DistanceMetric = Literal["l2", "cosine", "inner_product"]
 
+# Columns selected for compact hits; raw_text and structured_json are
+# loaded separately, see get_quotation_details_by_ids.
+HIT_FIELDS = ("id", "supplier", "created_at")
+
+# pgvector distance operators; smaller values always mean "more similar".
+DISTANCE_OPERATORS: Dict[str, str] = {
+    "l2": "<->",
+    "cosine": "<=>",
+    "inner_product": "<#>",
+}
+
+
+@lru_cache(maxsize=None)
+def similarity_statement(
+    metric: str,
+    filtered: bool,
+    rows: bool = False,
+    with_distance: bool = False,
+    compact: bool = False,
+) -> Select:
+    """
+    Return the cached similarity statement for a metric/filter variant.
+
+    With `rows=True` the statement selects the QUOTATION_FIELDS columns as
+    plain tuples instead of Quotation entities, which skips ORM identity
+    map and instance construction for read-only callers. With
+    `with_distance=True` the distance to the query vector is selected as
+    an extra `distance` column. With `compact=True` only the HIT_FIELDS
+    columns and the distance are selected.
+
+    Every value that changes between calls (the query vector, the supplier
+    and the limit) is a bound parameter, so each variant is built once per
+    process and always renders the same SQL text. That lets SQLAlchemy reuse
+    its compiled form and lets psycopg promote it to a server-side prepared
+    statement after `settings.db_prepare_threshold` executions.
+    """
+    try:
+        operator = DISTANCE_OPERATORS[metric]
+    except KeyError:
+        raise ValueError(f"Unsupported distance metric: {metric!r}") from None
+
+    distance_expr = QuotationEmbedding.embedding.op(operator)(
+        bindparam("embedding", type_=BinaryVector(EMBEDDING_DIM))
+    )
+
+    if compact:
+        entities = [getattr(Quotation, field) for field in HIT_FIELDS]
+    elif rows:
+        entities = [getattr(Quotation, field) for field in QUOTATION_FIELDS]
+    else:
+        entities = [Quotation]
+    if with_distance or compact:
+        entities.append(distance_expr.label("distance"))
+
+    stmt = select(*entities).join(
+        QuotationEmbedding,
+        QuotationEmbedding.quotation_id == Quotation.id,
+    )
+
+    if filtered:
+        stmt = stmt.where(Quotation.supplier == bindparam("supplier", type_=String()))
+
+    return stmt.order_by(distance_expr).limit(bindparam("limit", type_=Integer()))
+
+
+@traced("repository.get_similar_quotations")
 def get_similar_quotations(
     db: Session,
-    embedding: Sequence[float],
+    embedding: np.ndarray,
     limit: int = 5,
     supplier: Optional[str] = None,
+    metric: DistanceMetric = "l2",
 ) -> List[Quotation]:
     """
     Return quotations ordered by vector similarity to the given embedding.
 
-    This function uses the pgvector `<->` operator through SQLAlchemy's
-    generic `op` interface. It assumes that:
+    This function uses the pgvector distance operators (`<->` by default)
+    through one of the prebuilt statements from `similarity_statement`.
+    It assumes that:
     - quotation_embeddings.embedding is a pgvector column
     - quotation_embeddings.quotation_id references quotations.id
     - optionally filters by supplier when provided
     """
-    distance_expr = QuotationEmbedding.embedding.op("<->")(embedding)
+    stmt = similarity_statement(metric, bool(supplier))
+
+    result = db.execute(stmt, _similarity_params(embedding, limit, supplier))
+    return list(result.scalars().all())
+
+
+@traced("repository.get_similar_quotation_rows")
+def get_similar_quotation_rows(
+    db: Session,
+    embedding: np.ndarray,
+    limit: int = 5,
+    supplier: Optional[str] = None,
+    metric: DistanceMetric = "l2",
+    with_distance: bool = False,
+) -> List[Row]:
+    """
+    Same search as `get_similar_quotations`, returning column tuples.
 
-    stmt = (
-        select(Quotation)
-        .join(
-            QuotationEmbedding,
-            QuotationEmbedding.quotation_id == Quotation.id,
-        )
+    Each row exposes the QUOTATION_FIELDS as attributes, which is all the
+    response and context-building paths need, plus `distance` when
+    `with_distance` is set (for re-ranking).
+    """
+    stmt = similarity_statement(
+        metric, bool(supplier), rows=True, with_distance=with_distance
     )
 
-    if supplier:
-        stmt = stmt.where(Quotation.supplier == supplier)
+    result = db.execute(stmt, _similarity_params(embedding, limit, supplier))
+    return list(result.all())
 
-    stmt = stmt.order_by(distance_expr).limit(limit)
 
-    result = db.execute(stmt)
-    return list(result.scalars().all())
+@traced("repository.get_similar_quotation_hits")
+def get_similar_quotation_hits(
+    db: Session,
+    embedding: np.ndarray,
+    loader: HitDetailsLoader,
+    limit: int = 5,
+    supplier: Optional[str] = None,
+    metric: DistanceMetric = "l2",
+) -> List[QuotationHit]:
+    """
+    Same search as `get_similar_quotations`, returning compact hits.
+
+    Only the HIT_FIELDS columns and the distance are selected; the hits
+    load raw_text and structured_json through `loader` when first read.
+    """
+    stmt = similarity_statement(metric, bool(supplier), compact=True)
+
+    result = db.execute(stmt, _similarity_params(embedding, limit, supplier))
+    return [
+        QuotationHit(row.id, row.supplier, row.distance, row.created_at, loader)
+        for row in result
+    ]
+
+
+@traced("repository.get_quotation_details_by_ids")
+def get_quotation_details_by_ids(db: Session, ids: Sequence[int]) -> List[DetailsRow]:
+    """
+    Return (id, raw_text, structured_json) for the given ids, in any order.
+
+    This is the bulk load behind QuotationHit's lazy fields; ids that no
+    longer exist are skipped.
+    """
+    if not ids:
+        return []
+    stmt = select(Quotation.id, Quotation.raw_text, Quotation.structured_json).where(
+        Quotation.id.in_(ids)
+    )
+    return [tuple(row) for row in db.execute(stmt)]  # type: ignore[misc]
+
+
+@traced("repository.get_quotation_rows_by_ids")
+def get_quotation_rows_by_ids(
+    db: Session,
+    ids: Sequence[int],
+    with_version: bool = False,
+) -> List[Row]:
+    """
+    Return QUOTATION_FIELDS rows for the given ids, in the order given.
+
+    Used to rehydrate a cached ranking; ids that no longer exist are
+    skipped. With `with_version=True` the row version is selected too.
+    """
+    if not ids:
+        return []
+    entities = [getattr(Quotation, field) for field in QUOTATION_FIELDS]
+    if with_version:
+        entities.append(Quotation.version)
+    rows = db.execute(select(*entities).where(Quotation.id.in_(ids))).all()
+    by_id = {row.id: row for row in rows}
+    return [by_id[quotation_id] for quotation_id in ids if quotation_id in by_id]
+
+
+def _similarity_params(
+    embedding: np.ndarray,
+    limit: int,
+    supplier: Optional[str],
+) -> Dict[str, object]:
+    params: Dict[str, object] = {"embedding": embedding, "limit": limit}
+    if supplier:
+        params["supplier"] = supplier
+    return params
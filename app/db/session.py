@@ -1,32 +1,141 @@
-from typing import Generator
+import threading
+from typing import Any, Callable, Dict, Generator, Tuple
 
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, Session
 
 from app.core.config import settings
-from pgvector.psycopg2 import register_vector # type: ignore[import-untyped]
+from app.core.executors import BULK, INTERACTIVE, current_workload
+from app.db.pool import PoolStats, TimedQueuePool
+from app.db.slow_queries import get_slow_query_log
+from app.db.vector_codec import register_numpy_vector
 
 
-# SQLAlchemy engine: single, shared connection factory
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-)
+def _connect_args(database_url: str) -> Dict[str, Any]:
+    """
+    Build driver specific connection arguments.
+
+    With psycopg (v3) we let the driver promote repeated statements to
+    server-side prepared statements, which skips parsing and planning for
+    the retrieval hot path.
+    """
+    if make_url(database_url).get_driver_name() == "psycopg":
+        return {"prepare_threshold": settings.db_prepare_threshold}
+    return {}
+
+
+_engines: Dict[str, Engine] = {}
+_engine_lock = threading.Lock()
 
 
-@event.listens_for(engine, "connect")
-def register_vector_type(dbapi_connection, connection_record) -> None:
+def _register_vector_type(dbapi_connection: Any, connection_record: Any) -> None:
     """
-    Register the pgvector type with the underlying psycopg2 connection.
-    This ensures that VECTOR columns are handled correctly by SQLAlchemy.
+    Register the pgvector type with the underlying DBAPI connection.
+    This ensures that VECTOR columns are handled correctly by SQLAlchemy,
+    and on psycopg (v3) it installs the NumPy binary vector dumper and
+    loaders (see app.db.vector_codec).
+    """
+    if type(dbapi_connection).__module__.startswith("psycopg2"):
+        import pgvector.psycopg2  # type: ignore[import-untyped]
+
+        pgvector.psycopg2.register_vector(dbapi_connection)
+        return
+
+    import pgvector.psycopg  # type: ignore[import-untyped]
+
+    pgvector.psycopg.register_vector(dbapi_connection)
+    register_numpy_vector(dbapi_connection)
+
+
+def build_engine(database_url: str, *, pool_size: int, max_overflow: int) -> Engine:
+    """
+    Create a pooled engine with the pgvector types registered.
+
+    Its statements are timed, and slow ones captured, by the SlowQueryLog
+    (unless DB_SLOW_QUERY_ENABLED is off).
+    """
+    engine = create_engine(
+        database_url,
+        pool_pre_ping=True,
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.db_pool_timeout_s,
+        connect_args=_connect_args(database_url),
+    )
+    event.listen(engine, "connect", _register_vector_type)
+    if settings.db_slow_query_enabled:
+        get_slow_query_log().install(engine)
+    return engine
+
+
+def _pool_limits(workload: str) -> Tuple[int, int]:
+    if workload == BULK:
+        return settings.db_bulk_pool_size, settings.db_bulk_max_overflow
+    return settings.db_pool_size, settings.db_max_overflow
+
+
+def get_engine(workload: str = INTERACTIVE) -> Engine:
+    """
+    Return the engine of a workload class, creating it on first use.
+
+    Each class has its own connection pool (db_pool_size for interactive
+    work, db_bulk_pool_size for bulk ingestion), so a large ingest cannot
+    take the connections queries need. Creating an engine imports the
+    DBAPI driver, so it is deferred until something actually talks to the
+    database rather than done on import. No connection is opened here;
+    see app.core.registry for warmup.
     """
-    register_vector(dbapi_connection)
-# Session factory: creates Session objects bound to the engine
+    engine = _engines.get(workload)
+    if engine is not None:
+        return engine
+    with _engine_lock:
+        if workload not in _engines:
+            pool_size, max_overflow = _pool_limits(workload)
+            _engines[workload] = build_engine(
+                settings.database_url, pool_size=pool_size, max_overflow=max_overflow
+            )
+        return _engines[workload]
+
+
+def pool_stats(workload: str = INTERACTIVE) -> PoolStats:
+    """
+    Saturation signals of the workload's pool (zeros until it is created).
+
+    Reported per pool, so a saturated bulk pool does not make interactive
+    requests look slow to admission control.
+    """
+    engine = _engines.get(workload)
+    if engine is None or not isinstance(engine.pool, TimedQueuePool):
+        return PoolStats()
+    return engine.pool.stats()
+
+
+def dispose_engine() -> None:
+    """Close the pooled connections of every engine created so far."""
+    for engine in list(_engines.values()):
+        engine.dispose()
+
+
+class WorkloadSession(Session):
+    """
+    Session that runs on the engine of the current workload class.
+
+    The engine is picked when the session first needs a connection, so a
+    session opened by a route dependency and used by a bulk-tagged
+    orchestrator method gets a bulk connection.
+    """
+
+    def get_bind(self, mapper: Any = None, **kw: Any) -> Engine:
+        return get_engine(current_workload())
+
+
+# Session factory: creates Session objects bound to the (lazy) engines
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
-    bind=engine,
-    class_=Session,
+    class_=WorkloadSession,
 )
 
 
@@ -39,4 +148,14 @@ def get_db() -> Generator[Session, None, None]:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_session_factory() -> Callable[[], Session]:
+    """
+    Dependency for routes that manage sessions themselves.
+
+    Streaming responses outlive the request handler, so they open (and
+    close) their own session instead of using `get_db`.
+    """
+    return SessionLocal
@@ -0,0 +1,567 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Union,
+    runtime_checkable,
+)
+
+import numpy as np
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY, Counter
+from app.core.serialization import QUOTATION_FIELDS
+from app.core.tracing import traced
+from app.db.repositories import (
+    add_quotation_with_embedding,
+    is_transient_db_error,
+    list_quotations,
+)
+from app.db.retrieval import get_quotation_rows_by_ids, get_similar_quotation_rows
+
+logger = logging.getLogger(__name__)
+
+ShardKey = Literal["supplier", "content"]
+
+SHARD_SEARCH_DURATION = REGISTRY.histogram(
+    "shard_search_duration_seconds",
+    "Similarity search time per shard (completed searches only).",
+    ("shard",),
+)
+SHARD_SEARCHES = REGISTRY.counter(
+    "shard_searches_total",
+    "Per-shard similarity searches by outcome (ok, timeout, error).",
+    ("shard", "outcome"),
+)
+SHARD_ROW_FETCHES = REGISTRY.counter(
+    "shard_row_fetches_total",
+    "Per-shard row fetches (by id or newest first), by outcome (ok, timeout, error).",
+    ("shard", "outcome"),
+)
+SHARDED_PARTIAL_RESULTS = REGISTRY.counter(
+    "sharded_search_partial_total",
+    "Scatter-gather searches answered without every shard.",
+)
+
+MEMORY_SCHEME = "memory://"
+
+
+@dataclass
+class ShardRow:
+    """A quotation row as returned by a shard, with its vector distance."""
+
+    id: int
+    supplier: str
+    raw_text: str
+    structured_json: Optional[dict]
+    created_at: datetime
+    distance: float = 0.0
+    # Row version (as Quotation.version); not loaded by similarity search.
+    version: int = 1
+
+
+@dataclass
+class ShardWrite:
+    """A quotation to store on the shard its key routes to."""
+
+    supplier: str
+    raw_text: str
+    structured_json: Optional[dict]
+    embedding: np.ndarray
+
+
+# Per item: the stored row, or the error that prevented storing it.
+WriteResult = Union[ShardRow, Exception]
+
+
+@dataclass
+class ShardedSearchResult:
+    """Merged top-k of a scatter-gather search (or rows fetched by id)."""
+
+    rows: List[ShardRow]
+    # Shards that missed the deadline or failed; rows may be missing.
+    missing_shards: List[str] = field(default_factory=list)
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.missing_shards)
+
+
+@runtime_checkable
+class VectorShard(Protocol):
+    """One partition of the quotations and their embeddings."""
+
+    name: str
+
+    def search(
+        self,
+        embedding: np.ndarray,
+        limit: int,
+        supplier: Optional[str] = None,
+    ) -> List[ShardRow]:
+        """Return up to `limit` rows ordered by increasing distance."""
+        ...
+
+    def get_rows(self, ids: Sequence[int]) -> List[ShardRow]:
+        """Return the rows of this shard among `ids` (any order)."""
+        ...
+
+    def list_rows(self, limit: int) -> List[ShardRow]:
+        """Return the newest `limit` rows (QUOTATION_LIST_ORDER)."""
+        ...
+
+    def add_batch(self, items: Sequence[ShardWrite]) -> List[WriteResult]:
+        """
+        Store quotations with one commit; one result per item, in order.
+
+        Raises, storing nothing, if the connection or the commit fails.
+        """
+        ...
+
+
+class PostgresShard:
+    """
+    A shard backed by its own Postgres database (same schema as the main one).
+
+    Quotation ids must be unique across shards, e.g. by giving every shard
+    database a different `quotations_id_seq` offset with an increment of
+    the shard count.
+    """
+
+    def __init__(self, name: str, session_factory: Callable[[], Session]) -> None:
+        self.name = name
+        self._session_factory = session_factory
+
+    @classmethod
+    def from_url(cls, name: str, database_url: str) -> "PostgresShard":
+        from app.db.session import build_engine
+
+        engine = build_engine(
+            database_url,
+            pool_size=settings.vector_shard_pool_size,
+            max_overflow=settings.vector_shard_max_overflow,
+        )
+        return cls(name, sessionmaker(bind=engine, autoflush=False))
+
+    def search(
+        self,
+        embedding: np.ndarray,
+        limit: int,
+        supplier: Optional[str] = None,
+    ) -> List[ShardRow]:
+        db = self._session_factory()
+        try:
+            rows = get_similar_quotation_rows(
+                db, embedding, limit=limit, supplier=supplier, with_distance=True
+            )
+        finally:
+            db.close()
+        return [_shard_row(row, row.distance) for row in rows]
+
+    def get_rows(self, ids: Sequence[int]) -> List[ShardRow]:
+        db = self._session_factory()
+        try:
+            rows = get_quotation_rows_by_ids(db, ids, with_version=True)
+        finally:
+            db.close()
+        return [_shard_row(row, version=row.version) for row in rows]
+
+    def list_rows(self, limit: int) -> List[ShardRow]:
+        db = self._session_factory()
+        try:
+            quotations = list_quotations(db, limit=limit)
+            return [_shard_row(row, version=row.version) for row in quotations]
+        finally:
+            db.close()
+
+    def add_batch(self, items: Sequence[ShardWrite]) -> List[WriteResult]:
+        results: List[WriteResult] = []
+        db = self._session_factory()
+        try:
+            for item in items:
+                try:
+                    with db.begin_nested():
+                        quotation = add_quotation_with_embedding(
+                            db,
+                            supplier=item.supplier,
+                            raw_text=item.raw_text,
+                            structured_json=item.structured_json,
+                            embedding=item.embedding,
+                        )
+                    results.append(_shard_row(quotation, version=quotation.version))
+                except Exception as exc:
+                    if is_transient_db_error(exc):
+                        db.rollback()
+                        raise
+                    results.append(exc)
+            try:
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        finally:
+            db.close()
+        return results
+
+
+class InMemoryShard:
+    """
+    In-process shard keeping embeddings in a NumPy matrix (L2 distance).
+
+    Meant for tests and local experiments. Ids start at `first_id` and
+    advance by `id_step`, so shards built by `build_shards` never collide.
+    """
+
+    def __init__(self, name: str, *, first_id: int = 1, id_step: int = 1) -> None:
+        self.name = name
+        self._ids = itertools.count(first_id, id_step)
+        self._rows: List[ShardRow] = []
+        self._vectors: List[np.ndarray] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def search(
+        self,
+        embedding: np.ndarray,
+        limit: int,
+        supplier: Optional[str] = None,
+    ) -> List[ShardRow]:
+        with self._lock:
+            if not self._rows:
+                return []
+            if self._matrix is None:
+                self._matrix = np.stack(self._vectors)
+            matrix, rows = self._matrix, self._rows
+
+        query = np.asarray(embedding, dtype=np.float32)
+        distances = np.linalg.norm(matrix - query, axis=1)
+        if supplier:
+            mask = np.fromiter(
+                (row.supplier == supplier for row in rows), bool, len(rows)
+            )
+            distances = np.where(mask, distances, np.inf)
+        count = min(limit, int(np.count_nonzero(np.isfinite(distances))))
+        if count <= 0:
+            return []
+        nearest = np.argpartition(distances, count - 1)[:count]
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        return [
+            _with_distance(rows[index], float(distances[index])) for index in nearest
+        ]
+
+    def get_rows(self, ids: Sequence[int]) -> List[ShardRow]:
+        wanted = set(ids)
+        with self._lock:
+            return [row for row in self._rows if row.id in wanted]
+
+    def list_rows(self, limit: int) -> List[ShardRow]:
+        with self._lock:
+            rows = list(self._rows)
+        rows.sort(key=_list_order, reverse=True)
+        return rows[:limit]
+
+    def add_batch(self, items: Sequence[ShardWrite]) -> List[WriteResult]:
+        created_at = datetime.now(timezone.utc)
+        with self._lock:
+            results: List[WriteResult] = []
+            for item in items:
+                row = ShardRow(
+                    id=next(self._ids),
+                    supplier=item.supplier,
+                    raw_text=item.raw_text,
+                    structured_json=item.structured_json,
+                    created_at=created_at,
+                )
+                self._rows.append(row)
+                self._vectors.append(np.asarray(item.embedding, dtype=np.float32))
+                results.append(row)
+            self._matrix = None
+        return results
+
+
+def _shard_row(source: object, distance: float = 0.0, version: int = 1) -> ShardRow:
+    values = {name: getattr(source, name) for name in QUOTATION_FIELDS}
+    return ShardRow(**values, distance=distance, version=version)
+
+
+def _with_distance(row: ShardRow, distance: float) -> ShardRow:
+    return ShardRow(
+        id=row.id,
+        supplier=row.supplier,
+        raw_text=row.raw_text,
+        structured_json=row.structured_json,
+        created_at=row.created_at,
+        distance=distance,
+        version=row.version,
+    )
+
+
+def _list_order(row: ShardRow) -> Tuple[datetime, int]:
+    # Sort key of QUOTATION_LIST_ORDER (newest first when reversed).
+    return row.created_at, row.id
+
+
+def shard_index(key: str, shard_count: int) -> int:
+    """Stable shard number for a routing key (CRC-32, not Python's hash)."""
+    return zlib.crc32(key.encode("utf-8")) % shard_count
+
+
+class ShardedVectorStore:
+    """
+    Routes quotation writes to shards and scatter-gathers similarity search.
+
+    Writes go to one shard chosen by the shard key:
+    - "supplier": the lower-cased supplier, so a supplier-filtered query
+      is answered by a single shard;
+    - "content": the raw text, which spreads suppliers with many
+      quotations evenly.
+
+    A search runs on every shard concurrently and waits up to `timeout_s`
+    for all of them; the per-shard top-k lists (already sorted) are then
+    merged with a heap. Shards that miss the deadline or fail are listed
+    in `missing_shards`, and their late results are dropped. Fetching rows
+    by id (`get_rows`) and listing the newest rows (`list_rows`) follow the
+    same rules.
+    """
+
+    def __init__(
+        self,
+        shards: Sequence[VectorShard],
+        *,
+        shard_key: ShardKey = "supplier",
+        timeout_s: float = 0.25,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        if not shards:
+            raise ValueError("A sharded store needs at least one shard.")
+        self.shards = list(shards)
+        self.shard_key = shard_key
+        self.timeout_s = timeout_s
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or 4 * len(self.shards),
+            thread_name_prefix="shard-search",
+        )
+
+    @classmethod
+    def from_settings(cls) -> "ShardedVectorStore":
+        return cls(
+            build_shards(settings.vector_shard_urls),
+            shard_key=settings.vector_shard_key,
+            timeout_s=settings.vector_shard_timeout_ms / 1000.0,
+        )
+
+    def shard_for(self, supplier: str, raw_text: str) -> VectorShard:
+        return self.shards[self._shard_number(supplier, raw_text)]
+
+    def _shard_number(self, supplier: str, raw_text: str) -> int:
+        key = supplier.strip().lower() if self.shard_key == "supplier" else raw_text
+        return shard_index(key, len(self.shards))
+
+    @traced("repository.sharded_add_batch")
+    def add_batch(self, items: Sequence[ShardWrite]) -> List[WriteResult]:
+        """
+        Store items on their shards (one commit per shard), in input order.
+
+        Rows the shard rejects come back as exceptions. A lost connection
+        or failed commit raises instead; shards that committed before it
+        keep their rows, so retrying the batch may store those twice.
+        """
+        positions: Dict[int, List[int]] = {}
+        for position, item in enumerate(items):
+            number = self._shard_number(item.supplier, item.raw_text)
+            positions.setdefault(number, []).append(position)
+
+        results: Dict[int, WriteResult] = {}
+        for index, shard_positions in positions.items():
+            written = self.shards[index].add_batch(
+                [items[position] for position in shard_positions]
+            )
+            results.update(zip(shard_positions, written, strict=True))
+        return [results[position] for position in range(len(items))]
+
+    @traced("repository.sharded_search")
+    def search(
+        self,
+        embedding: np.ndarray,
+        limit: int,
+        supplier: Optional[str] = None,
+    ) -> ShardedSearchResult:
+        """Return the global top `limit` rows by distance across shards."""
+        shards = self.shards
+        if supplier and self.shard_key == "supplier":
+            shards = [self.shard_for(supplier, "")]
+
+        futures = {
+            shard.name: self._executor.submit(
+                self._search_shard, shard, embedding, limit, supplier
+            )
+            for shard in shards
+        }
+        wait(futures.values(), timeout=self.timeout_s)
+
+        results: List[List[ShardRow]] = []
+        missing: List[str] = []
+        for name, future in futures.items():
+            rows = self._collect(name, future)
+            if rows is None:
+                missing.append(name)
+            else:
+                results.append(rows)
+
+        if missing:
+            SHARDED_PARTIAL_RESULTS.inc()
+        merged = heapq.merge(*results, key=lambda row: row.distance)
+        return ShardedSearchResult(list(itertools.islice(merged, limit)), missing)
+
+    @traced("repository.sharded_get_rows")
+    def get_rows(self, ids: Sequence[int]) -> ShardedSearchResult:
+        """
+        Return rows for `ids` in the given order, from whichever shard has them.
+
+        Uses the same deadline as `search`: rows of shards that missed it or
+        failed are left out and those shards are listed as missing.
+        """
+        futures = {
+            shard.name: self._executor.submit(shard.get_rows, ids)
+            for shard in self.shards
+        }
+        wait(futures.values(), timeout=self.timeout_s)
+
+        by_id: Dict[int, ShardRow] = {}
+        missing: List[str] = []
+        for name, future in futures.items():
+            rows = self._collect(name, future, SHARD_ROW_FETCHES)
+            if rows is None:
+                missing.append(name)
+            else:
+                by_id.update((row.id, row) for row in rows)
+
+        rows = [by_id[quotation_id] for quotation_id in ids if quotation_id in by_id]
+        return ShardedSearchResult(rows, missing)
+
+    @traced("repository.sharded_list_rows")
+    def list_rows(self, *, skip: int = 0, limit: int = 100) -> ShardedSearchResult:
+        """
+        Return one page of the newest rows across shards (QUOTATION_LIST_ORDER).
+
+        Every shard returns its newest `skip + limit` rows, which are merged
+        with a heap, so deep pages cost more than on a single database.
+        Uses the same deadline as `search`.
+        """
+        futures = {
+            shard.name: self._executor.submit(shard.list_rows, skip + limit)
+            for shard in self.shards
+        }
+        wait(futures.values(), timeout=self.timeout_s)
+
+        results: List[List[ShardRow]] = []
+        missing: List[str] = []
+        for name, future in futures.items():
+            rows = self._collect(name, future, SHARD_ROW_FETCHES)
+            if rows is None:
+                missing.append(name)
+            else:
+                results.append(rows)
+
+        merged = heapq.merge(*results, key=_list_order, reverse=True)
+        return ShardedSearchResult(
+            list(itertools.islice(merged, skip, skip + limit)), missing
+        )
+
+    def _search_shard(
+        self,
+        shard: VectorShard,
+        embedding: np.ndarray,
+        limit: int,
+        supplier: Optional[str],
+    ) -> List[ShardRow]:
+        started = time.perf_counter()
+        rows = shard.search(embedding, limit, supplier)
+        SHARD_SEARCH_DURATION.observe(time.perf_counter() - started, shard=shard.name)
+        return rows
+
+    def _collect(
+        self,
+        name: str,
+        future: Future[List[ShardRow]],
+        outcomes: Counter = SHARD_SEARCHES,
+    ) -> Optional[List[ShardRow]]:
+        if not future.done():
+            # Late: cancelled if still queued, otherwise its result is ignored.
+            future.cancel()
+            outcomes.inc(shard=name, outcome="timeout")
+            return None
+        error = future.exception()
+        if error is not None:
+            outcomes.inc(shard=name, outcome="error")
+            logger.warning("Request to shard %s failed: %s", name, error)
+            return None
+        outcomes.inc(shard=name, outcome="ok")
+        return future.result()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def build_shards(urls: Sequence[str]) -> List[VectorShard]:
+    """
+    Build shards from URLs: database URLs become PostgresShards and
+    "memory://<name>" an InMemoryShard (ids interleaved across shards).
+    """
+    shards: List[VectorShard] = []
+    for index, url in enumerate(urls):
+        if url.startswith(MEMORY_SCHEME):
+            name = url[len(MEMORY_SCHEME) :] or f"shard{index}"
+            shards.append(InMemoryShard(name, first_id=index + 1, id_step=len(urls)))
+        else:
+            shards.append(PostgresShard.from_url(f"shard{index}", url))
+    return shards
+
+
+_vector_store: Optional[ShardedVectorStore] = None
+_vector_store_lock = threading.Lock()
+
+
+def get_vector_store() -> Optional[ShardedVectorStore]:
+    """
+    Return the process-wide ShardedVectorStore, or None when no shards
+    are configured (the main database holds every quotation).
+
+    Created on first use from the vector_shard_* settings.
+    """
+    global _vector_store
+    if not settings.vector_shard_urls:
+        return None
+    with _vector_store_lock:
+        if _vector_store is None:
+            _vector_store = ShardedVectorStore.from_settings()
+        return _vector_store
+
+
+def shutdown_vector_store() -> None:
+    """Stop the search threads, if the store was ever created."""
+    global _vector_store
+    with _vector_store_lock:
+        store, _vector_store = _vector_store, None
+    if store is not None:
+        store.shutdown()
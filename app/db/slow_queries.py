@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.core.executors import current_workload
+from app.core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_DURATION = REGISTRY.histogram(
+    "db_statement_duration_seconds",
+    "Execution time of SQL statements, by statement kind (SELECT, INSERT...).",
+    ("kind",),
+)
+SLOW_QUERIES = REGISTRY.counter(
+    "db_slow_queries_total",
+    "Statements slower than DB_SLOW_QUERY_MS, by statement kind.",
+    ("kind",),
+)
+SLOW_QUERY_EXPLAINS = REGISTRY.counter(
+    "db_slow_query_explains_total",
+    "EXPLAIN (ANALYZE, BUFFERS) runs for slow statements, by outcome.",
+    ("outcome",),
+)
+SLOW_QUERY_FLAGS = REGISTRY.counter(
+    "db_slow_query_flags_total",
+    "Problems found in the plans of slow statements (e.g. seq_scan).",
+    ("flag",),
+)
+
+# Tables where a sequential scan means the vector index was not used.
+SEQ_SCAN_WATCHED_TABLES = ("quotation_embeddings",)
+MAX_SHAPE_CHARS = 4000
+MAX_PARAM_CHARS = 200
+# Sequences at least this long are treated as embeddings and redacted.
+MIN_VECTOR_LENGTH = 16
+
+
+@dataclass
+class SlowQuery:
+    """A statement that took longer than the slow-query threshold."""
+
+    fingerprint: str
+    kind: str
+    statement: str
+    parameters: Any
+    duration_ms: float
+    workload: str
+    captured_at: str
+    executemany: bool = False
+    plan: Optional[Any] = None
+    flags: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with whitespace collapsed (parameters stay placeholders)."""
+    return " ".join(statement.split())[:MAX_SHAPE_CHARS]
+
+
+def statement_kind(statement: str) -> str:
+    words = statement.lstrip(" (\n\t").split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+
+def redact(value: Any, redact_strings: bool = False) -> Any:
+    """
+    Make bound parameters safe and small enough to log.
+
+    Embeddings (pgvector values, arrays and long numeric sequences) become
+    "<vector dim=N>", binary values "<N bytes>", and long strings are
+    truncated. With `redact_strings` (parameters of writes, which carry
+    uploaded quotation text) every string becomes "<N chars>".
+    """
+    if isinstance(value, dict):
+        return {key: redact(item, redact_strings) for key, item in value.items()}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, str):
+        if redact_strings:
+            return f"<{len(value)} chars>"
+        if len(value) > MAX_PARAM_CHARS:
+            return f"{value[:MAX_PARAM_CHARS]}... <{len(value)} chars>"
+        return value
+    if hasattr(value, "to_list") and type(value).__name__ == "Vector":
+        return f"<vector dim={len(value.to_list())}>"
+    if hasattr(value, "ndim") and hasattr(value, "shape"):
+        return f"<vector dim={value.shape[-1] if value.ndim else 0}>"
+    if isinstance(value, (list, tuple)):
+        if len(value) >= MIN_VECTOR_LENGTH and all(
+            isinstance(item, (int, float)) for item in value[:MIN_VECTOR_LENGTH]
+        ):
+            return f"<vector dim={len(value)}>"
+        return [redact(item, redact_strings) for item in value]
+    return value
+
+
+def _plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+def plan_flags(plan: Any) -> List[str]:
+    """
+    Problems worth a look in an EXPLAIN (FORMAT JSON) plan:
+    - "seq_scan:<table>": a sequential scan on a watched table;
+    - "sort_spilled": a sort that went to disk (work_mem too small).
+    """
+    flags: List[str] = []
+    roots = plan if isinstance(plan, list) else [plan]
+    for root in roots:
+        if not isinstance(root, dict) or "Plan" not in root:
+            continue
+        for node in _plan_nodes(root["Plan"]):
+            table = node.get("Relation Name")
+            if node.get("Node Type") == "Seq Scan" and table in SEQ_SCAN_WATCHED_TABLES:
+                flags.append(f"seq_scan:{table}")
+            if node.get("Sort Space Type") == "Disk":
+                flags.append("sort_spilled")
+    return sorted(set(flags))
+
+
+class SlowQueryLog:
+    """
+    Times every statement of the engines it is installed on and keeps the
+    most recent slow ones.
+
+    Statements slower than `threshold_ms` are recorded with their SQL
+    shape and redacted parameters, logged as one JSON line, and kept in
+    a bounded buffer (served by GET /internal/slow-queries when
+    DB_SLOW_QUERY_ENDPOINT_ENABLED is set).
+
+    A slow SELECT on Postgres is re-run under EXPLAIN (ANALYZE, BUFFERS)
+    with a probability of `explain_sample_rate`, and at most once per
+    `explain_interval_s`, because the EXPLAIN executes the query again.
+    It runs on the same connection inside a savepoint, so a failing
+    EXPLAIN never affects the caller's transaction.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        *,
+        explain_sample_rate: float = 0.1,
+        explain_interval_s: float = 10.0,
+        max_entries: int = 200,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_interval_s = explain_interval_s
+        self._entries: Deque[SlowQuery] = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+        self._clock = clock
+        self._last_explain: Optional[float] = None
+
+    @classmethod
+    def from_settings(cls) -> "SlowQueryLog":
+        return cls(
+            settings.db_slow_query_ms,
+            explain_sample_rate=settings.db_slow_query_explain_sample_rate,
+            explain_interval_s=settings.db_slow_query_explain_interval_s,
+            max_entries=settings.db_slow_query_buffer_size,
+        )
+
+    def install(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def entries(self, limit: Optional[int] = None) -> List[SlowQuery]:
+        """Captured statements, newest first."""
+        with self._lock:
+            entries = list(reversed(self._entries))
+        return entries[:limit] if limit is not None else entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _before_execute(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        if context is not None:
+            context._slow_query_started = time.perf_counter()
+
+    def _after_execute(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        started = getattr(context, "_slow_query_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        kind = statement_kind(statement)
+        STATEMENT_DURATION.observe(elapsed, kind=kind)
+        if elapsed * 1000.0 < self.threshold_ms:
+            return
+
+        SLOW_QUERIES.inc(kind=kind)
+        shape = statement_shape(statement)
+        if executemany and isinstance(parameters, (list, tuple)) and parameters:
+            parameters = parameters[0]
+        entry = SlowQuery(
+            fingerprint=hashlib.sha1(shape.encode("utf-8")).hexdigest()[:12],
+            kind=kind,
+            statement=shape,
+            # Only SELECT parameters (search filters) keep their strings.
+            parameters=redact(parameters, redact_strings=kind != "SELECT"),
+            duration_ms=round(elapsed * 1000.0, 3),
+            workload=current_workload(),
+            captured_at=datetime.now(timezone.utc).isoformat(),
+            executemany=executemany,
+        )
+        if (
+            kind == "SELECT"
+            and not executemany
+            and conn.dialect.name == "postgresql"
+            and not getattr(context, "is_server_side", False)
+            and self._should_explain()
+        ):
+            entry.plan = self._explain(cursor, statement, parameters)
+            entry.flags = plan_flags(entry.plan)
+            for flag in entry.flags:
+                SLOW_QUERY_FLAGS.inc(flag=flag.split(":", 1)[0])
+
+        with self._lock:
+            self._entries.append(entry)
+        logger.warning(
+            "Slow query: %s", orjson.dumps(entry.to_dict(), default=str).decode()
+        )
+
+    def _should_explain(self) -> bool:
+        if random.random() >= self.explain_sample_rate:
+            return False
+        now = self._clock()
+        with self._lock:
+            if (
+                self._last_explain is not None
+                and now - self._last_explain < self.explain_interval_s
+            ):
+                return False
+            self._last_explain = now
+        return True
+
+    def _explain(self, cursor: Any, statement: str, parameters: Any) -> Optional[Any]:
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                explain_cursor.execute(
+                    "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters
+                )
+                plan = explain_cursor.fetchone()[0]
+            finally:
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        except Exception:
+            SLOW_QUERY_EXPLAINS.inc(outcome="error")
+            logger.warning("EXPLAIN of a slow query failed", exc_info=True)
+            return None
+        finally:
+            explain_cursor.close()
+        SLOW_QUERY_EXPLAINS.inc(outcome="ok")
+        return orjson.loads(plan) if isinstance(plan, (str, bytes)) else plan
+
+
+_slow_query_log: Optional[SlowQueryLog] = None
+_slow_query_log_lock = threading.Lock()
+
+
+def get_slow_query_log() -> SlowQueryLog:
+    """
+    Return the process-wide SlowQueryLog.
+
+    Created on first use from the db_slow_query_* settings.
+    """
+    global _slow_query_log
+    with _slow_query_log_lock:
+        if _slow_query_log is None:
+            _slow_query_log = SlowQueryLog.from_settings()
+        return _slow_query_log
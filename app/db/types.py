@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+from pgvector import Vector  # type: ignore[import-untyped]
+from pgvector.sqlalchemy import VECTOR  # type: ignore[import-untyped]
+from sqlalchemy.engine import Dialect
+
+from app.db.vector_codec import vector_from_text
+
+
+class BinaryVector(VECTOR):
+    """
+    pgvector type that exchanges vectors as float32 NumPy arrays.
+
+    The stock VECTOR type renders every bound value as a '[x,y,...]' string
+    and returns results as lists of Python floats. On the psycopg (v3)
+    driver, vectors are passed through as arrays and the connection's
+    dumpers send them in pgvector's binary format (see
+    app.db.vector_codec.register_numpy_vector). Other drivers fall back to
+    text parameters. Results are float32 arrays with every driver.
+    """
+
+    cache_ok = True
+
+    def bind_processor(self, dialect: Dialect) -> Any:
+        if dialect.driver != "psycopg":
+            return super().bind_processor(dialect)
+
+        def process(value: Any) -> Any:
+            if value is None or isinstance(value, (Vector, np.ndarray)):
+                return value
+            return np.asarray(value, dtype=np.float32)
+
+        return process
+
+    def result_processor(self, dialect: Dialect, coltype: Any) -> Any:
+        def process(value: Any) -> Any:
+            if value is None or isinstance(value, np.ndarray):
+                return value
+            if isinstance(value, Vector):
+                return value.to_numpy()
+            return vector_from_text(value)
+
+        return process
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import struct
+from typing import Any, Union
+
+import numpy as np
+
+# pgvector's binary format: uint16 dimensions, uint16 unused (0), then the
+# components as big-endian float4.
+VECTOR_HEADER = struct.Struct(">HH")
+WIRE_DTYPE = np.dtype(">f4")
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def vector_to_binary(value: np.ndarray) -> bytearray:
+    """Encode a 1-D array in pgvector's binary format (one conversion pass)."""
+    if value.ndim != 1:
+        raise ValueError(f"Expected a 1-D vector, got shape {value.shape}.")
+    dim = value.shape[0]
+    buffer = bytearray(VECTOR_HEADER.size + WIRE_DTYPE.itemsize * dim)
+    VECTOR_HEADER.pack_into(buffer, 0, dim, 0)
+    np.frombuffer(buffer, dtype=WIRE_DTYPE, offset=VECTOR_HEADER.size)[:] = value
+    return buffer
+
+
+def vector_from_binary(data: Buffer) -> np.ndarray:
+    """Decode pgvector's binary format into a native float32 array."""
+    dim, unused = VECTOR_HEADER.unpack_from(data)
+    if unused != 0:
+        raise ValueError("Malformed binary vector: unused header field is not 0.")
+    return np.frombuffer(
+        data, dtype=WIRE_DTYPE, count=dim, offset=VECTOR_HEADER.size
+    ).astype(np.float32)
+
+
+def vector_from_text(data: Union[str, Buffer]) -> np.ndarray:
+    """
+    Decode a '[x,y,...]' vector literal into a float32 array.
+
+    NumPy parses the components in C, without building a Python float
+    per component (pgvector's own loader goes through a list of floats).
+    """
+    if not isinstance(data, str):
+        data = bytes(data).decode("ascii")
+    return np.fromstring(data[1:-1], dtype=np.float32, sep=",")
+
+
+def register_numpy_vector(connection: Any) -> None:
+    """
+    Make a psycopg (v3) connection exchange vectors as NumPy arrays.
+
+    Must run after `pgvector.psycopg.register_vector`, which registers the
+    vector type info. NumPy arrays are then sent in the binary format and
+    vector results (text or binary) are loaded as float32 arrays rather
+    than pgvector Vector objects.
+    """
+    from psycopg.adapt import Dumper, Loader
+    from psycopg.pq import Format
+
+    info = connection.adapters.types.get("vector")
+    if info is None:
+        raise LookupError("The vector type is not registered on this connection.")
+
+    class NumpyVectorBinaryDumper(Dumper):
+        format = Format.BINARY
+        oid = info.oid
+
+        def dump(self, obj: np.ndarray) -> Buffer:
+            return vector_to_binary(obj)
+
+    class NumpyVectorLoader(Loader):
+        format = Format.TEXT
+
+        def load(self, data: Buffer) -> np.ndarray:
+            return vector_from_text(data)
+
+    class NumpyVectorBinaryLoader(Loader):
+        format = Format.BINARY
+
+        def load(self, data: Buffer) -> np.ndarray:
+            return vector_from_binary(data)
+
+    adapters = connection.adapters
+    # Registered last, so it is the one picked for %s placeholders.
+    adapters.register_dumper("numpy.ndarray", NumpyVectorBinaryDumper)
+    adapters.register_loader(info.oid, NumpyVectorLoader)
+    adapters.register_loader(info.oid, NumpyVectorBinaryLoader)
@@ -1,6 +1,19 @@
-from app.api.routes import health, upload
+from app.api.admission import AdmissionControlMiddleware, AdmissionController
+from app.api.lifespan import lifespan
+from app.api.routes import (
+    diagnostics,
+    health,
+    jobs,
+    metrics,
+    query,
+    quotations,
+    upload,
+)
+from app.api.tracing import TracingMiddleware
 from app.core.config import settings
+from app.db.session import pool_stats
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
 
 def create_app() -> FastAPI:
@@ -11,11 +24,36 @@ def create_app() -> FastAPI:
     - Configure the app differently for tests vs production.
     - Inject dependencies and middlewares in a single place.
     """
-    app = FastAPI(title=settings.project_name)
+    # orjson renders responses several times faster than the stdlib json
+    # encoder, which dominates CPU for large upload/query responses.
+    # The lifespan builds the shared agents (app.core.registry), warms
+    # them up, and closes them and the worker pools at shutdown.
+    app = FastAPI(
+        title=settings.project_name,
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan,
+    )
+
+    if settings.admission_enabled:
+        controller = AdmissionController.from_settings(
+            settings,
+            pool_stats=pool_stats,
+        )
+        app.add_middleware(AdmissionControlMiddleware, controller=controller)
+
+    # Outermost, so shed requests are traced too. Spans are exported by a
+    # background thread started by the lifespan (TRACING_EXPORTER).
+    app.add_middleware(TracingMiddleware)
 
     # Include routers
     app.include_router(health.router, prefix=settings.api_prefix)
+    app.include_router(metrics.router, prefix=settings.api_prefix)
     app.include_router(upload.router, prefix=settings.api_prefix)
+    app.include_router(jobs.router, prefix=settings.api_prefix)
+    app.include_router(query.router, prefix=settings.api_prefix)
+    app.include_router(quotations.router, prefix=settings.api_prefix)
+    if settings.db_slow_query_endpoint_enabled:
+        app.include_router(diagnostics.router, prefix=settings.api_prefix)
 
     return app
 
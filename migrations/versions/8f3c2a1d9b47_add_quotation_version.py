@@ -0,0 +1,39 @@
+"""add quotation row version
+
+Revision ID: 8f3c2a1d9b47
+Revises: 46bda2a5cc90
+Create Date: 2026-10-19 09:12:41.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3c2a1d9b47'
+down_revision: Union[str, Sequence[str], None] = '46bda2a5cc90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Add the row version used to build quotation ETags.
+    """
+    op.add_column(
+        "quotations",
+        sa.Column(
+            "version",
+            sa.Integer(),
+            server_default=sa.text("1"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """
+    Drop the quotation row version.
+    """
+    op.drop_column("quotations", "version")
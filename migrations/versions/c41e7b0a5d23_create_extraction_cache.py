@@ -0,0 +1,45 @@
+"""create extraction cache
+
+Revision ID: c41e7b0a5d23
+Revises: 8f3c2a1d9b47
+Create Date: 2026-10-19 10:05:12.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e7b0a5d23'
+down_revision: Union[str, Sequence[str], None] = '8f3c2a1d9b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Create the persistent extraction result cache.
+    """
+    op.create_table(
+        "extraction_cache",
+        sa.Column("extractor_name", sa.String(length=100), nullable=False),
+        sa.Column("extractor_version", sa.String(length=50), nullable=False),
+        sa.Column("text_hash", sa.String(length=64), nullable=False),
+        sa.Column("fields", sa.JSON(), nullable=False),
+        sa.Column("extraction_ms", sa.Float(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("extractor_name", "extractor_version", "text_hash"),
+    )
+
+
+def downgrade() -> None:
+    """
+    Drop the extraction result cache.
+    """
+    op.drop_table("extraction_cache")
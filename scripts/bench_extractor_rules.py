@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Callable, List
+
+from app.agents.extractor_rules import RuleBasedExtractorAgent
+
+PRODUCTS = (
+    "Server rack 42U",
+    "Network switch 48 ports",
+    "Patch cable Cat6",
+    "Installation services",
+    "Annual support contract",
+    "SSD 2TB enterprise",
+    "UPS 3kVA",
+    "Firewall appliance",
+)
+
+NOISE = (
+    "Prices are valid for 30 days from the date of this quotation.",
+    "Delivery within 10 business days after purchase order confirmation.",
+    "Payment terms: 50% upfront, remaining balance on delivery.",
+    "Please contact our sales team at +1 555 0100 for any questions.",
+    "",
+)
+
+
+def build_document(rng: random.Random, items: int, noise_lines: int) -> str:
+    """Build one synthetic quotation mixing item, total and prose lines."""
+    lines = [
+        f"Quotation #{rng.randint(1000, 9999)}",
+        "Supplier: ACME Corp",
+        "Customer: Globex Ltd",
+        "",
+    ]
+    subtotal = 0.0
+    for index in range(items):
+        product = rng.choice(PRODUCTS)
+        quantity = rng.randint(1, 50)
+        unit_price = round(rng.uniform(1, 2000), 2)
+        line_total = round(quantity * unit_price, 2)
+        subtotal += line_total
+        shape = index % 3
+        if shape == 0:
+            lines.append(f"{product} | {quantity} | ${unit_price:,.2f} | ${line_total:,.2f}")
+        elif shape == 1:
+            lines.append(f"{product} {quantity} x {unit_price:.2f} = {line_total:.2f}")
+        else:
+            lines.append(f"{quantity} x {product} @ ${unit_price:.2f}")
+        if rng.random() < noise_lines / max(items, 1):
+            lines.append(rng.choice(NOISE))
+    taxes = round(subtotal * 0.1, 2)
+    lines += [
+        f"Subtotal: ${subtotal:,.2f}",
+        f"Tax (10%): ${taxes:,.2f}",
+        f"Total: USD {subtotal + taxes:,.2f}",
+    ]
+    return "\n".join(lines)
+
+
+def _mb_per_s(fn: Callable[[], object], size_bytes: int, repeat: int) -> float:
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return size_bytes / best / 1e6
+
+
+def main() -> None:
+    """
+    Measure RuleBasedExtractorAgent throughput in MB/s.
+
+    Runs on a corpus of typical quotations and on a single multi-megabyte
+    document, plus an adversarial input (very long lines and separator
+    runs) that would make backtracking patterns blow up.
+
+    Usage:
+        python -m scripts.bench_extractor_rules --documents 2000
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--large-mb", type=float, default=8.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    extractor = RuleBasedExtractorAgent()
+
+    corpus: List[str] = [
+        build_document(rng, args.items, noise_lines=5) for _ in range(args.documents)
+    ]
+    corpus_bytes = sum(len(document.encode("utf-8")) for document in corpus)
+
+    large_parts: List[str] = []
+    large_bytes = 0
+    while large_bytes < args.large_mb * 1e6:
+        document = build_document(rng, 200, noise_lines=40)
+        large_parts.append(document)
+        large_bytes += len(document.encode("utf-8")) + 1
+    large = "\n".join(large_parts)
+
+    adversarial = "\n".join(
+        [
+            "total " + " " * 900 + "z",
+            "1," * 400 + "x",
+            "Item " + "9" * 900,
+            "x" * 2_000_000,
+        ]
+        * 200
+    )
+
+    cases = {
+        f"corpus ({args.documents} documents)": (
+            lambda: [extractor.extract(document) for document in corpus],
+            corpus_bytes,
+        ),
+        f"single document ({large_bytes / 1e6:.1f} MB)": (
+            lambda: extractor.extract(large),
+            large_bytes,
+        ),
+        "adversarial lines": (
+            lambda: extractor.extract(adversarial),
+            len(adversarial.encode("utf-8")),
+        ),
+    }
+
+    for name, (fn, size) in cases.items():
+        print(f"    {name:<32}: {_mb_per_s(fn, size, args.repeat):8.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
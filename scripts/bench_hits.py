@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+from app.core.hits import HitDetailsLoader, QuotationHit, load_hit_details
+from app.core.serialization import QUOTATION_FIELDS, quotation_model
+
+FullRow = namedtuple("FullRow", QUOTATION_FIELDS + ("distance",))
+HitRow = namedtuple("HitRow", ("id", "supplier", "created_at", "distance"))
+
+CREATED_AT = datetime(2025, 1, 1, tzinfo=timezone.utc)
+TEXT = "Line item with quantity and unit price. " * 256
+
+
+def _raw_text(index: int, text_chars: int) -> str:
+    # A new string per row, as the database driver would decode it.
+    return f"{index:08d} {TEXT[: max(text_chars - 9, 0)]}"
+
+
+def _structured_json(index: int) -> Dict[str, Any]:
+    return {
+        "supplier": f"Supplier {index % 50}",
+        "currency": "EUR",
+        "total": 1000.0 + index,
+        "items": [{"description": "Item", "quantity": 2, "unit_price": 10.0}],
+    }
+
+
+def full_rows(count: int, text_chars: int) -> Iterator[FullRow]:
+    """Rows of the current similarity statement (QUOTATION_FIELDS + distance)."""
+    for index in range(count):
+        yield FullRow(
+            index,
+            f"Supplier {index % 50}",
+            _raw_text(index, text_chars),
+            _structured_json(index),
+            CREATED_AT,
+            index / count,
+        )
+
+
+def fetch_details(text_chars: int) -> Callable[[Sequence[int]], List[Tuple]]:
+    """In-process stand-in for get_quotation_details_by_ids."""
+
+    def fetch(ids: Sequence[int]) -> List[Tuple]:
+        return [
+            (index, _raw_text(index, text_chars), _structured_json(index))
+            for index in ids
+        ]
+
+    return fetch
+
+
+def build_models(count: int, text_chars: int) -> List[Any]:
+    """Current path: StructuredQuotation per row, texts loaded eagerly."""
+    return [quotation_model(row) for row in full_rows(count, text_chars)]
+
+
+def build_hits(count: int, text_chars: int) -> List[QuotationHit]:
+    """Compact path: hits from the narrow statement, texts not loaded yet."""
+    loader = HitDetailsLoader(fetch_details(text_chars))
+    return [
+        QuotationHit(row.id, row.supplier, row.distance, row.created_at, loader)
+        for row in (
+            HitRow(index, f"Supplier {index % 50}", CREATED_AT, index / count)
+            for index in range(count)
+        )
+    ]
+
+
+def build_loaded_hits(count: int, text_chars: int) -> List[QuotationHit]:
+    """Compact path after the first access to raw_text (one bulk load)."""
+    hits = build_hits(count, text_chars)
+    load_hit_details(hits)
+    return hits
+
+
+def measure(build: Callable[[], List[Any]]) -> Tuple[int, int, float]:
+    """Return (retained bytes, peak bytes, seconds) for one build."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak, elapsed
+
+
+def main() -> None:
+    """
+    Compare the memory held by retrieval results: StructuredQuotation
+    models (the default) against compact QuotationHit objects, before and
+    after their texts are loaded.
+
+    "retained" is what the result list keeps alive, "peak" includes the
+    rows and temporaries used to build it. Timings include building the
+    rows, so they are only comparable with each other.
+
+    Usage:
+        python -m scripts.bench_hits --hits 10000
+        python -m scripts.bench_hits --hits 10000 --text-chars 200
+    """
+    parser = argparse.ArgumentParser(
+        description=main.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--hits", type=int, default=10_000)
+    parser.add_argument("--text-chars", type=int, default=2000)
+    args = parser.parse_args()
+
+    cases = {
+        "StructuredQuotation (current)": lambda: build_models(
+            args.hits, args.text_chars
+        ),
+        "QuotationHit, texts not loaded": lambda: build_hits(
+            args.hits, args.text_chars
+        ),
+        "QuotationHit, texts loaded": lambda: build_loaded_hits(
+            args.hits, args.text_chars
+        ),
+    }
+
+    print(f"{args.hits} hits, {args.text_chars} chars of raw_text each")
+    baseline = None
+    for name, build in cases.items():
+        retained, peak, elapsed = measure(build)
+        baseline = baseline or retained
+        print(
+            f"    {name:<32}: retained {retained / 1024:9.0f} KiB "
+            f"({retained / args.hits:6.0f} B/hit, {retained / baseline:5.1%}), "
+            f"peak {peak / 1024:9.0f} KiB, {elapsed * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
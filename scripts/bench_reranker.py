@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from app.agents.reranker import FeatureReranker, RerankWeights
+from app.core.schemas import QueryRequest, StructuredQuotation
+from scripts.bench_extractor_rules import build_document
+
+
+def build_candidates(rng: random.Random, count: int) -> List[StructuredQuotation]:
+    now = datetime.utcnow()
+    return [
+        StructuredQuotation.construct(
+            id=index,
+            supplier=rng.choice(("ACME Corp", "Globex Ltd", "Initech")),
+            raw_text=build_document(rng, items=20, noise_lines=5),
+            structured_json={
+                "currency": rng.choice(("USD", "EUR", "BRL")),
+                "total": round(rng.uniform(100, 100_000), 2),
+            },
+            created_at=now - timedelta(days=rng.uniform(0, 365)),
+        )
+        for index in range(count)
+    ]
+
+
+def main() -> None:
+    """
+    Measure FeatureReranker latency per number of candidates.
+
+    Use it to size RERANK_CANDIDATES against the query latency budget:
+    each row is the best-of-N time to score and order that many
+    candidates (the database over-fetch is not included).
+
+    Usage:
+        python -m scripts.bench_reranker --candidates 10 20 50 100 200
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "--candidates", type=int, nargs="+", default=[10, 20, 50, 100, 200, 500]
+    )
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    reranker = FeatureReranker(RerankWeights())
+    query = QueryRequest(
+        query="server rack installation for Globex in USD",
+        top_k=args.top_k,
+        filters={"min_total": 1000, "max_total": 50_000},
+    )
+
+    for count in args.candidates:
+        candidates = build_candidates(rng, count)
+        distances = sorted(rng.uniform(0.2, 1.2) for _ in range(count))
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            reranker.rerank(query, candidates, distances)
+            best = min(best, time.perf_counter() - start)
+        print(f"    {count:>5} candidates: {best * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
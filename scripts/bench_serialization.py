@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import parse_obj_as
+
+from app.core.schemas import StructuredQuotation
+from app.core.serialization import quotation_model, quotation_payload
+from app.db.models import Quotation
+
+
+def build_quotations(count: int, text_chars: int) -> List[Quotation]:
+    """Build detached ORM objects shaped like rows loaded from the database."""
+    created_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        Quotation(
+            id=index,
+            supplier=f"Supplier {index % 50}",
+            raw_text=("Line item with quantity and unit price. " * 64)[:text_chars],
+            structured_json={
+                "supplier": f"Supplier {index % 50}",
+                "currency": "EUR",
+                "total": 1000.0 + index,
+                "items": [{"description": "Item", "quantity": 2, "unit_price": 10.0}],
+            },
+            created_at=created_at,
+        )
+        for index in range(count)
+    ]
+
+
+def legacy_path(quotations: List[Quotation]) -> bytes:
+    """from_orm per row, response_model validation, jsonable_encoder + json."""
+    models = [StructuredQuotation.from_orm(quotation) for quotation in quotations]
+    validated = parse_obj_as(List[StructuredQuotation], models)
+    return json.dumps(
+        jsonable_encoder(validated),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def model_fast_path(quotations: List[Quotation]) -> bytes:
+    """Unvalidated models (retriever/orchestrator) rendered as payloads."""
+    models = [quotation_model(quotation) for quotation in quotations]
+    return orjson.dumps([quotation_payload(model) for model in models])
+
+
+def payload_path(quotations: List[Quotation], include_raw_text: bool) -> bytes:
+    """Payload dicts straight from rows, rendered with orjson."""
+    return orjson.dumps(
+        [
+            quotation_payload(quotation, include_raw_text=include_raw_text)
+            for quotation in quotations
+        ]
+    )
+
+
+def _per_item_us(fn: Callable[[], Any], items: int, repeat: int) -> float:
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best / items * 1e6
+
+
+def main() -> None:
+    """
+    Compare per-item response building cost for the legacy and fast paths.
+
+    Usage:
+        python -m scripts.bench_serialization --items 1000
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--text-chars", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    quotations = build_quotations(args.items, args.text_chars)
+
+    cases = {
+        "legacy (from_orm + validate + json)": lambda: legacy_path(quotations),
+        "construct + orjson": lambda: model_fast_path(quotations),
+        "row payload + orjson": lambda: payload_path(quotations, True),
+        "row payload + orjson, no raw_text": lambda: payload_path(quotations, False),
+    }
+
+    print(f"{args.items} quotations, {args.text_chars} chars of raw_text each")
+    for name, fn in cases.items():
+        per_item = _per_item_us(fn, args.items, args.repeat)
+        print(f"    {name:<38}: {per_item:8.2f} us/item")
+
+
+if __name__ == "__main__":
+    main()
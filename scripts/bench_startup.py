@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import orjson
+
+PHASES = ("import", "startup", "first_request", "second_request")
+
+
+def child(method: str, path: str, body: str) -> None:
+    """Measure one cold start in this (fresh) interpreter; print JSON timings."""
+    started = time.perf_counter()
+    from app.main import app
+
+    imported = time.perf_counter()
+
+    from fastapi.testclient import TestClient
+
+    timings: Dict[str, float] = {"import": imported - started}
+    content = body.encode("utf-8") if body else None
+    headers = {"Content-Type": "application/json"}
+    with TestClient(app, raise_server_exceptions=False) as client:
+        timings["startup"] = time.perf_counter() - imported
+        statuses = []
+        for phase in ("first_request", "second_request"):
+            begin = time.perf_counter()
+            response = client.request(method, path, content=content, headers=headers)
+            timings[phase] = time.perf_counter() - begin
+            statuses.append(response.status_code)
+    print(orjson.dumps({"timings": timings, "statuses": statuses}).decode())
+
+
+def run(args: argparse.Namespace, warmup: bool) -> List[Dict[str, float]]:
+    env = dict(os.environ, WARMUP_ENABLED="true" if warmup else "false")
+    command = [
+        sys.executable,
+        "-m",
+        "scripts.bench_startup",
+        "--child",
+        "--method",
+        args.method,
+        "--path",
+        args.path,
+        "--body",
+        args.body,
+    ]
+    results = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            command, env=env, check=True, capture_output=True, text=True
+        ).stdout
+        result = orjson.loads(output.strip().splitlines()[-1])
+        results.append(result["timings"])
+    print(f"  statuses of the last run: {result['statuses']}")
+    return results
+
+
+def main() -> None:
+    """
+    Measure cold-start costs of the API in fresh interpreters.
+
+    For each run a new Python process imports app.main, runs the
+    application lifespan (building the agent registry and, with warmup,
+    opening DB connections, priming retrieval and loading caches) and
+    sends two requests. Reports the median import time, lifespan startup
+    time and first/second request latencies, with and without warmup.
+
+    Against a running database, time-to-first-request is best seen on
+    the query route:
+
+    Usage:
+        python -m scripts.bench_startup --runs 5 \\
+            --method POST --path /api/query --body '{"query": "rack price"}'
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--path", default="/api/health")
+    parser.add_argument("--body", default="")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.method, args.path, args.body)
+        return
+
+    for warmup in (False, True):
+        print(f"warmup={'on' if warmup else 'off'} ({args.method} {args.path}):")
+        results = run(args, warmup)
+        for phase in PHASES:
+            median = statistics.median(result[phase] for result in results)
+            print(f"  {phase:>15}: {median * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,508 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+
+import numpy as np
+
+from app.agents.extractor import ExtractorAgent
+from app.agents.orchestrator import Orchestrator
+from app.core.embeddings import EMBEDDING_DIM, embed_text
+from app.core.schemas import QuotationUploadRequest
+from scripts.bench_extractor_rules import build_document
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+SUPPLIERS = 200
+POPULATE_CHUNK = 1_000
+
+DEFAULT_OUTPUT = "var/bench/latest.json"
+DEFAULT_BASELINE = "var/bench/baseline.json"
+
+# Metrics compared against the baseline, and whether higher is better.
+COMPARED_METRICS = {
+    "p50_us": False,
+    "p95_us": False,
+    "throughput_per_s": True,
+    "peak_kib": False,
+}
+
+
+def synthetic_quotation(index: int, seed: int = 0) -> QuotationUploadRequest:
+    """
+    Return quotation number `index` of the synthetic corpus for `seed`.
+
+    Each quotation depends only on (seed, index), so a corpus of any size
+    is reproducible and can be generated lazily, in any order.
+    """
+    rng = random.Random(seed * 1_000_003 + index)
+    return QuotationUploadRequest(
+        supplier=f"Supplier {rng.randrange(SUPPLIERS)}",
+        raw_text=build_document(rng, items=rng.randint(1, 8), noise_lines=2),
+        filename=f"quotation-{index}.txt",
+    )
+
+
+def synthetic_corpus(
+    count: int, seed: int = 0, start: int = 0
+) -> Iterator[QuotationUploadRequest]:
+    for index in range(start, start + count):
+        yield synthetic_quotation(index, seed)
+
+
+@dataclass
+class BenchResult:
+    """Latency, throughput and memory of one benchmark."""
+
+    name: str
+    ops: int
+    p50_us: float
+    p95_us: float
+    p99_us: float
+    mean_us: float
+    throughput_per_s: float
+    # Python heap peak during the memory pass (tracemalloc), or the growth
+    # of the process' peak RSS for one-shot stages such as populate.
+    peak_kib: float
+    memory: str = "tracemalloc"
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_benchmark(
+    name: str,
+    op: Callable[[int], Any],
+    ops: int,
+    rounds: int = 3,
+    warmup: int = 10,
+    memory_ops: int = 100,
+) -> BenchResult:
+    """
+    Time `rounds` x `ops` calls of `op(i)`, then measure memory separately.
+
+    The round with the lowest median is kept, which filters out most of
+    the noise of a busy machine. Every call gets a fresh index, so stages
+    that write never insert the same item twice. The memory pass over
+    `memory_ops` more calls runs last because tracemalloc slows
+    allocation-heavy code down too much to keep its timings.
+    """
+    index = 0
+    for _ in range(warmup):
+        op(index)
+        index += 1
+
+    best: List[float] = []
+    elapsed = 0.0
+    for _ in range(max(1, rounds)):
+        latencies: List[float] = []
+        started = time.perf_counter()
+        for _ in range(ops):
+            call_started = time.perf_counter()
+            op(index)
+            latencies.append(time.perf_counter() - call_started)
+            index += 1
+        latencies.sort()
+        if not best or _percentile(latencies, 0.5) < _percentile(best, 0.5):
+            best, elapsed = latencies, time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline_bytes = tracemalloc.get_traced_memory()[0]
+        for _ in range(memory_ops):
+            op(index)
+            index += 1
+        peak_bytes = tracemalloc.get_traced_memory()[1] - baseline_bytes
+    finally:
+        tracemalloc.stop()
+
+    ordered = best
+    return BenchResult(
+        name=name,
+        ops=ops,
+        p50_us=_percentile(ordered, 0.50) * 1e6,
+        p95_us=_percentile(ordered, 0.95) * 1e6,
+        p99_us=_percentile(ordered, 0.99) * 1e6,
+        mean_us=statistics.fmean(ordered) * 1e6,
+        throughput_per_s=ops / elapsed if elapsed else 0.0,
+        peak_kib=peak_bytes / 1024,
+    )
+
+
+def _max_rss_kib() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere.
+    return usage / 1024 if sys.platform == "darwin" else float(usage)
+
+
+def run_once(name: str, items: int, chunks: Iterator[Callable[[], int]]) -> BenchResult:
+    """Time a one-shot stage made of chunks; each chunk returns its size."""
+    rss_before = _max_rss_kib()
+    latencies: List[float] = []
+    done = 0
+    started = time.perf_counter()
+    for chunk in chunks:
+        chunk_started = time.perf_counter()
+        size = chunk()
+        if size:
+            latencies.append((time.perf_counter() - chunk_started) / size)
+        done += size
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies) or [0.0]
+    return BenchResult(
+        name=name,
+        ops=done,
+        p50_us=_percentile(ordered, 0.50) * 1e6,
+        p95_us=_percentile(ordered, 0.95) * 1e6,
+        p99_us=_percentile(ordered, 0.99) * 1e6,
+        mean_us=(elapsed / done if done else 0.0) * 1e6,
+        throughput_per_s=done / elapsed if elapsed else 0.0,
+        peak_kib=max(0.0, _max_rss_kib() - rss_before),
+        memory="rss",
+    )
+
+
+class MemoryBackend:
+    """
+    In-process backend built on the InMemoryShard of app.db.sharding.
+
+    The search index holds float32 vectors of `dim` dimensions; at the 1m
+    scale and the full 1536 dimensions that is about 6 GiB, so lower
+    --dim for large scales on small machines. Ingestion writes to a
+    separate shard (its embeddings always have the full size).
+    """
+
+    name = "memory"
+
+    def __init__(self, dim: int) -> None:
+        from app.db.sharding import InMemoryShard, ShardedVectorStore
+
+        self.dim = dim
+        self.shard = InMemoryShard("bench")
+        self.store = ShardedVectorStore([InMemoryShard("ingest")])
+        self.orchestrator = Orchestrator(extractor=ExtractorAgent(), store=self.store)
+
+    def populate(self, count: int, seed: int) -> BenchResult:
+        from app.db.sharding import ShardWrite
+
+        def chunk(start: int) -> Callable[[], int]:
+            def run() -> int:
+                size = min(POPULATE_CHUNK, count - start)
+                vectors = np.random.default_rng([seed, start]).standard_normal(
+                    (size, self.dim), dtype=np.float32
+                )
+                self.shard.add_batch(
+                    [
+                        ShardWrite(upload.supplier, upload.raw_text, None, vector)
+                        for upload, vector in zip(
+                            synthetic_corpus(size, seed, start), vectors, strict=True
+                        )
+                    ]
+                )
+                return size
+
+            return run
+
+        result = run_once(
+            "populate",
+            count,
+            (chunk(start) for start in range(0, count, POPULATE_CHUNK)),
+        )
+        # Build the search matrix now rather than inside the first search.
+        self.shard.search(np.zeros(self.dim, dtype=np.float32), 1)
+        return result
+
+    def stages(self, seed: int, ops: int) -> Dict[str, Callable[[int], Any]]:
+        # Fresh quotations for the write stages: past the populated ones.
+        offset = 10 * SCALES["1m"]
+        queries = [
+            np.asarray(embed_text(f"query {index}", dim=self.dim), dtype=np.float32)
+            for index in range(64)
+        ]
+        return {
+            "ingest_quotation": lambda i: self.orchestrator.ingest_quotation(
+                None, synthetic_quotation(offset + i, seed)  # type: ignore[arg-type]
+            ),
+            "get_similar_quotations": lambda i: self.shard.search(
+                queries[i % len(queries)], 5
+            ),
+        }
+
+    def close(self) -> None:
+        self.store.shutdown()
+
+
+class PostgresBackend:
+    """
+    The real repositories against a database at `database_url`.
+
+    Use a dedicated benchmark database: populate tops the quotations table
+    up to the scale (existing rows count), and the write stages insert
+    more quotations.
+    """
+
+    name = "postgres"
+
+    def __init__(self, database_url: str) -> None:
+        from sqlalchemy.orm import sessionmaker
+
+        from app.core.config import settings
+        from app.db.session import build_engine
+
+        self.dim = EMBEDDING_DIM
+        self.engine = build_engine(
+            database_url,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+        )
+        self.db = sessionmaker(bind=self.engine, autoflush=False)()
+        self.orchestrator = Orchestrator(extractor=ExtractorAgent())
+        self._ingested: List[int] = []
+
+    def populate(self, count: int, seed: int) -> BenchResult:
+        from sqlalchemy import func, select
+
+        from app.db.models import Quotation
+
+        existing = self.db.execute(select(func.count(Quotation.id))).scalar_one()
+        missing = max(0, count - existing)
+
+        def chunk(start: int) -> Callable[[], int]:
+            def run() -> int:
+                uploads = list(
+                    synthetic_corpus(min(POPULATE_CHUNK, missing - start), seed, start)
+                )
+                self.orchestrator.ingest_batch(self.db, uploads)
+                return len(uploads)
+
+            return run
+
+        return run_once(
+            "populate",
+            missing,
+            (chunk(start) for start in range(0, missing, POPULATE_CHUNK)),
+        )
+
+    def stages(self, seed: int, ops: int) -> Dict[str, Callable[[int], Any]]:
+        from app.db.repositories import upsert_quotation_embedding
+        from app.db.retrieval import get_similar_quotations
+
+        offset = 10 * SCALES["1m"]
+        queries = [embed_text(f"query {index}") for index in range(64)]
+        vectors = [embed_text(f"replacement {index}") for index in range(64)]
+
+        def ingest(i: int) -> None:
+            quotation = self.orchestrator.ingest_quotation(
+                self.db, synthetic_quotation(offset + i, seed)
+            )
+            self._ingested.append(quotation.id)
+
+        def upsert(i: int) -> None:
+            quotation_id = self._ingested[i % len(self._ingested)]
+            upsert_quotation_embedding(
+                self.db, quotation_id=quotation_id, embedding=vectors[i % len(vectors)]
+            )
+
+        def search(i: int) -> None:
+            get_similar_quotations(self.db, queries[i % len(queries)], limit=5)
+            # End the read transaction like a request-scoped session would.
+            self.db.rollback()
+
+        return {
+            "ingest_quotation": ingest,
+            "upsert_quotation_embedding": upsert,
+            "get_similar_quotations": search,
+        }
+
+    def close(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+    memory_threshold: float,
+) -> List[str]:
+    """
+    Return a description of every metric that regressed beyond its threshold.
+
+    Results are matched by backend, scale and benchmark name; benchmarks
+    missing from either side are ignored. A latency or memory metric
+    regresses when it grows by more than the threshold (as a fraction of
+    the baseline), throughput when it drops by more than the threshold.
+    """
+    if (current["backend"], current["scale"]) != (
+        baseline["backend"],
+        baseline["scale"],
+    ):
+        return []
+    previous = {result["name"]: result for result in baseline["results"]}
+    regressions: List[str] = []
+    for result in current["results"]:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = before[metric], result[metric]
+            if old <= 0:
+                continue
+            limit = memory_threshold if metric == "peak_kib" else threshold
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > limit:
+                regressions.append(
+                    f"{result['name']}.{metric}: {old:,.1f} -> {new:,.1f} "
+                    f"({change:+.0%}, limit {limit:.0%})"
+                )
+    return regressions
+
+
+def report(results: List[BenchResult]) -> None:
+    print(
+        f"  {'benchmark':<28}{'ops':>9}{'p50 us':>11}{'p95 us':>11}"
+        f"{'p99 us':>11}{'ops/s':>11}{'peak KiB':>11}"
+    )
+    for result in results:
+        print(
+            f"  {result.name:<28}{result.ops:>9}{result.p50_us:>11.1f}"
+            f"{result.p95_us:>11.1f}{result.p99_us:>11.1f}"
+            f"{result.throughput_per_s:>11.1f}{result.peak_kib:>11.1f}"
+        )
+
+
+def main() -> None:
+    """
+    Benchmark the embedding, ingestion and retrieval hot paths.
+
+    Builds a deterministic synthetic corpus at the chosen scale, then
+    measures per-call latency (p50/p95/p99), throughput and peak memory
+    of:
+    - embed_text;
+    - Orchestrator.ingest_quotation;
+    - upsert_quotation_embedding (postgres backend only);
+    - get_similar_quotations (the in-process backend searches its NumPy
+      shard instead).
+
+    Results are written as JSON to --output and compared with the
+    baseline at --baseline, if present; the exit status is 1 when a
+    metric regressed beyond its threshold. --save-baseline records the
+    run as the new baseline. Everything runs offline: in process by
+    default, or against a local database with --database-url.
+
+    Usage:
+        python -m scripts.bench_suite --scale 1k
+        python -m scripts.bench_suite --scale 100k --save-baseline
+        python -m scripts.bench_suite --scale 1m --dim 256
+        python -m scripts.bench_suite --database-url postgresql+psycopg://...
+    """
+    parser = argparse.ArgumentParser(
+        description=main.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scale", choices=sorted(SCALES), default="1k")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ops", type=int, default=1000, help="Timed calls per stage.")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--memory-ops", type=int, default=100)
+    parser.add_argument(
+        "--dim",
+        type=int,
+        default=EMBEDDING_DIM,
+        help="Vector size of the in-process search index.",
+    )
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed latency/throughput regression (fraction of the baseline).",
+    )
+    parser.add_argument("--memory-threshold", type=float, default=0.25)
+    args = parser.parse_args()
+
+    count = SCALES[args.scale]
+    ops = min(args.ops, count)
+    backend: Any = (
+        PostgresBackend(args.database_url)
+        if args.database_url
+        else MemoryBackend(args.dim)
+    )
+    print(f"{backend.name} backend, {args.scale} quotations (seed {args.seed}):")
+
+    try:
+        results = [backend.populate(count, args.seed)]
+        texts = [upload.raw_text for upload in synthetic_corpus(256, args.seed)]
+        results.append(
+            run_benchmark(
+                "embed_text",
+                lambda i: embed_text(texts[i % len(texts)]),
+                ops,
+                rounds=args.rounds,
+                memory_ops=args.memory_ops,
+            )
+        )
+        for name, op in backend.stages(args.seed, ops).items():
+            results.append(
+                run_benchmark(
+                    name, op, ops, rounds=args.rounds, memory_ops=args.memory_ops
+                )
+            )
+    finally:
+        backend.close()
+    report(results)
+
+    run = {
+        "backend": backend.name,
+        "scale": args.scale,
+        "seed": args.seed,
+        "dim": backend.dim,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "results": [asdict(result) for result in results],
+    }
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(run, indent=2) + "\n", encoding="utf-8")
+    print(f"Results written to {output}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(run, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline saved to {baseline_path}")
+        return
+    if not baseline_path.exists():
+        return
+
+    baseline = json.loads(baseline_path.read_text("utf-8"))
+    regressions = compare(run, baseline, args.threshold, args.memory_threshold)
+    if (run["backend"], run["scale"]) != (baseline["backend"], baseline["scale"]):
+        print(f"Baseline {baseline_path} is for another backend or scale; skipped.")
+    elif regressions:
+        print(f"Regressions against {baseline_path}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    else:
+        print(f"No regressions against {baseline_path}.")
+
+
+if __name__ == "__main__":
+    main()
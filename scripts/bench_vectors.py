@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Tuple
+
+from pgvector import Vector  # type: ignore[import-untyped]
+
+from app.core.embeddings import EMBEDDING_DIM, embed_text
+from app.db.vector_codec import vector_from_binary, vector_from_text, vector_to_binary
+
+
+def legacy_embed(text: str, dim: int) -> list:
+    """embed_text before it returned arrays: one Python float per component."""
+    rng = random.Random(hash(text))
+    return [rng.uniform(-1.0, 1.0) for _ in range(dim)]
+
+
+def _per_call(fn: Callable[[], Any], repeat: int, number: int) -> Tuple[float, int]:
+    """Best per-call time (us) and bytes allocated by one call."""
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1e6, peak
+
+
+def main() -> None:
+    """
+    Compare the cost of moving one embedding between Python and pgvector.
+
+    "list + text" is the previous path: embed_text built a list of Python
+    floats, the stock VECTOR type rendered it as a '[x,y,...]' literal and
+    parsed results back into a list. "pgvector Vector" is pgvector's own
+    psycopg adapter (binary parameters, text results through a list).
+    "numpy" is app.db.vector_codec: float32 arrays encoded to and decoded
+    from the binary format, and text results parsed by NumPy.
+
+    Usage:
+        python -m scripts.bench_vectors
+        python -m scripts.bench_vectors --dim 768
+    """
+    parser = argparse.ArgumentParser(
+        description=main.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    array = embed_text("benchmark vector", dim=args.dim)
+    as_list = array.tolist()
+    literal = Vector(array).to_text()
+    binary = Vector(array).to_binary()
+
+    cases: Dict[str, Callable[[], Any]] = {
+        "embed: list of floats (previous)": lambda: legacy_embed(
+            "benchmark vector", args.dim
+        ),
+        "embed: float32 array": lambda: embed_text("benchmark vector", dim=args.dim),
+        "encode: list + text literal": lambda: Vector._to_db(as_list),
+        "encode: list -> pgvector Vector binary": lambda: Vector(as_list).to_binary(),
+        "encode: numpy -> pgvector Vector binary": lambda: Vector(array).to_binary(),
+        "encode: numpy binary": lambda: vector_to_binary(array),
+        "decode: text -> list (previous)": lambda: Vector._from_db(literal),
+        "decode: text -> pgvector Vector": lambda: Vector.from_text(literal),
+        "decode: text -> numpy": lambda: vector_from_text(literal),
+        "decode: binary -> pgvector Vector": lambda: Vector.from_binary(binary),
+        "decode: binary -> numpy": lambda: vector_from_binary(binary),
+    }
+
+    print(f"one {args.dim}-dim vector per call")
+    for name, fn in cases.items():
+        per_call, allocated = _per_call(fn, args.repeat, args.number)
+        print(
+            f"    {name:<42}: {per_call:8.1f} us/call, "
+            f"{allocated / 1024:7.1f} KiB allocated"
+        )
+
+
+if __name__ == "__main__":
+    main()
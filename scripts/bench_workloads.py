@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List
+
+from app.core.embeddings import embed_text
+from app.core.executors import (
+    BULK,
+    INTERACTIVE,
+    PriorityScheduler,
+    WorkloadExecutors,
+)
+
+Runner = Callable[..., Awaitable[Any]]
+
+
+def bulk_batch(size: int, io_ms: float) -> None:
+    """
+    Stand-in for an ingest batch: embed `size` texts, then write them.
+
+    The write is a sleep, like a thread blocked on the database: it holds
+    the thread (and, in the real service, a connection) but not the GIL.
+    """
+    for index in range(size):
+        embed_text(f"bulk quotation {index}")
+    time.sleep(io_ms / 1000.0)
+
+
+def interactive_call(io_ms: float) -> None:
+    """Stand-in for the query path: embed one query, then search."""
+    embed_text("server rack price")
+    time.sleep(io_ms / 1000.0)
+
+
+def shared_runner(threads: int) -> Runner:
+    """Both classes on one thread pool, like the Starlette threadpool."""
+    executor = ThreadPoolExecutor(max_workers=threads)
+
+    async def run(workload: str, function: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, function, *args
+        )
+
+    return run
+
+
+def partitioned_runner(
+    interactive: int, bulk: int, bulk_under_load: int, priority: bool
+) -> Runner:
+    workers = {INTERACTIVE: interactive, BULK: bulk}
+    scheduler = PriorityScheduler(
+        workers, {BULK: bulk_under_load} if priority else None
+    )
+    return WorkloadExecutors(workers, scheduler).run
+
+
+async def measure(
+    run: Runner, args: argparse.Namespace, with_bulk: bool
+) -> List[float]:
+    stop = asyncio.Event()
+
+    async def bulk_client() -> None:
+        while not stop.is_set():
+            await run(BULK, bulk_batch, args.batch_size, args.bulk_io_ms)
+
+    async def interactive_client(latencies: List[float]) -> None:
+        for _ in range(args.queries):
+            started = time.perf_counter()
+            await run(INTERACTIVE, interactive_call, args.query_io_ms)
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(args.query_interval_ms / 1000.0)
+
+    bulk = (
+        [asyncio.ensure_future(bulk_client()) for _ in range(args.bulk_clients)]
+        if with_bulk
+        else []
+    )
+    latencies: List[float] = []
+    await asyncio.gather(
+        *(interactive_client(latencies) for _ in range(args.query_clients))
+    )
+    stop.set()
+    await asyncio.gather(*bulk)
+    return latencies
+
+
+def report(label: str, latencies: List[float]) -> None:
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"  {label:<28} p50 {statistics.median(ordered) * 1000:8.2f} ms"
+        f"   p99 {p99 * 1000:8.2f} ms"
+    )
+
+
+def main() -> None:
+    """
+    Compare query latency while bulk ingestion runs, per executor layout.
+
+    Interactive clients embed a query in a loop while bulk clients keep
+    submitting ingest-sized batches. Reports interactive p50/p99 for:
+    - an idle system;
+    - one shared thread pool (the Starlette threadpool before workload
+      classes);
+    - separate interactive/bulk pools without priority;
+    - separate pools with bulk throttled while queries run.
+
+    Usage:
+        python -m scripts.bench_workloads --bulk-clients 64 --queries 200
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-clients", type=int, default=4)
+    parser.add_argument("--query-interval-ms", type=float, default=2.0)
+    parser.add_argument("--query-io-ms", type=float, default=2.0)
+    parser.add_argument("--bulk-clients", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--bulk-io-ms", type=float, default=20.0)
+    parser.add_argument("--threads", type=int, default=40)
+    parser.add_argument("--bulk-workers", type=int, default=4)
+    parser.add_argument("--bulk-workers-under-load", type=int, default=1)
+    args = parser.parse_args()
+
+    layouts = [
+        ("idle", shared_runner(args.threads), False),
+        ("shared pool", shared_runner(args.threads), True),
+        (
+            "partitioned",
+            partitioned_runner(
+                args.threads, args.bulk_workers, args.bulk_workers_under_load, False
+            ),
+            True,
+        ),
+        (
+            "partitioned + priority",
+            partitioned_runner(
+                args.threads, args.bulk_workers, args.bulk_workers_under_load, True
+            ),
+            True,
+        ),
+    ]
+    print(
+        f"{args.query_clients} query clients, {args.bulk_clients} bulk clients "
+        f"(batches of {args.batch_size}):"
+    )
+    for label, run, with_bulk in layouts:
+        report(label, asyncio.run(measure(run, args, with_bulk)))
+
+
+if __name__ == "__main__":
+    main()
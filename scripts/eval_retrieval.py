@@ -0,0 +1,589 @@
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import orjson
+
+DEFAULT_OUTPUT_DIR = "var/eval"
+
+# Number of set bits of every byte, for Hamming distances on packed codes.
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+@dataclass
+class Corpus:
+    vectors: np.ndarray  # (n, dim) float32
+    suppliers: np.ndarray  # (n,) supplier number of each vector
+    ids: np.ndarray  # (n,) quotation ids (row numbers for synthetic data)
+    supplier_names: List[str]
+
+
+@dataclass
+class QuerySet:
+    vectors: np.ndarray  # (q, dim) float32
+    # Supplier number to filter on, or -1 for an unfiltered query.
+    suppliers: np.ndarray
+
+
+@dataclass
+class Evaluation:
+    """Recall, latency and memory of one retrieval configuration."""
+
+    name: str
+    params: Dict[str, object]
+    recall: float
+    # Recall over the supplier-filtered queries only (None without any).
+    recall_filtered: Optional[float]
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    index_mib: float
+    pareto: bool = False
+    notes: List[str] = field(default_factory=list)
+
+
+def synthetic_corpus(
+    count: int, dim: int, suppliers: int, clusters: int, seed: int
+) -> Corpus:
+    """
+    Clustered Gaussian vectors, like embeddings of related documents.
+
+    Uniform random vectors make every neighbour almost equally far, which
+    hides the recall differences between configurations.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    assignment = rng.integers(0, clusters, count)
+    vectors = centers[assignment] + 0.35 * rng.standard_normal(
+        (count, dim), dtype=np.float32
+    )
+    return Corpus(
+        vectors=vectors.astype(np.float32),
+        suppliers=rng.integers(0, suppliers, count),
+        ids=np.arange(1, count + 1),
+        supplier_names=[f"Supplier {index}" for index in range(suppliers)],
+    )
+
+
+def database_corpus(database_url: str) -> Corpus:
+    """Load every stored embedding and its supplier from quotation_embeddings."""
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+
+    from app.db.models import Quotation, QuotationEmbedding
+    from app.db.session import build_engine
+
+    engine = build_engine(database_url, pool_size=1, max_overflow=0)
+    try:
+        with Session(engine) as db:
+            rows = db.execute(
+                select(Quotation.id, Quotation.supplier, QuotationEmbedding.embedding)
+                .join(
+                    QuotationEmbedding, QuotationEmbedding.quotation_id == Quotation.id
+                )
+                .order_by(Quotation.id)
+            ).all()
+    finally:
+        engine.dispose()
+    if not rows:
+        raise SystemExit("quotation_embeddings is empty.")
+    names = sorted({row.supplier for row in rows})
+    numbers = {name: index for index, name in enumerate(names)}
+    return Corpus(
+        vectors=np.asarray([row.embedding for row in rows], dtype=np.float32),
+        suppliers=np.asarray([numbers[row.supplier] for row in rows]),
+        ids=np.asarray([row.id for row in rows]),
+        supplier_names=names,
+    )
+
+
+def sample_queries(
+    corpus: Corpus, count: int, filtered_fraction: float, seed: int
+) -> QuerySet:
+    """Perturbed corpus vectors, some restricted to one supplier."""
+    rng = np.random.default_rng(seed + 1)
+    picks = rng.integers(0, len(corpus.vectors), count)
+    scale = float(np.std(corpus.vectors)) * 0.25
+    vectors = corpus.vectors[picks] + scale * rng.standard_normal(
+        (count, corpus.vectors.shape[1]), dtype=np.float32
+    )
+    filtered = rng.random(count) < filtered_fraction
+    suppliers = np.where(filtered, corpus.suppliers[picks], -1)
+    return QuerySet(vectors.astype(np.float32), suppliers)
+
+
+def _top(distances: np.ndarray, count: int) -> np.ndarray:
+    """Positions of the `count` smallest distances, nearest first."""
+    count = min(count, int(np.count_nonzero(np.isfinite(distances))))
+    if count <= 0:
+        return np.empty(0, dtype=np.int64)
+    nearest = np.argpartition(distances, count - 1)[:count]
+    return nearest[np.argsort(distances[nearest], kind="stable")]
+
+
+class ExactIndex:
+    """Brute-force L2 search; also the source of the ground truth."""
+
+    def __init__(self, vectors: np.ndarray) -> None:
+        self.vectors = vectors
+        self.norms = np.einsum("ij,ij->i", vectors, vectors)
+
+    def distances(self, query: np.ndarray) -> np.ndarray:
+        # Squared L2 without materializing (n, dim) differences.
+        return self.norms - 2.0 * (self.vectors @ query) + query @ query
+
+    def nbytes(self) -> int:
+        return self.vectors.nbytes + self.norms.nbytes
+
+
+class QuantizedIndex:
+    """
+    Approximate distances over compressed vectors.
+
+    - float16: half precision (pgvector halfvec);
+    - int8: symmetric scalar quantization with one global scale;
+    - binary: one sign bit per dimension, ranked by Hamming distance
+      (pgvector binary_quantize).
+    """
+
+    def __init__(self, vectors: np.ndarray, mode: str) -> None:
+        self.mode = mode
+        if mode == "float16":
+            self.codes = vectors.astype(np.float16)
+        elif mode == "int8":
+            self.scale = float(np.abs(vectors).max()) / 127.0 or 1.0
+            self.codes = np.round(vectors / self.scale).astype(np.int8)
+        elif mode == "binary":
+            self.codes = np.packbits(vectors > 0, axis=1)
+        else:
+            raise ValueError(f"Unknown quantization mode: {mode!r}")
+        if mode != "binary":
+            decoded = self._decode(self.codes)
+            self.norms = np.einsum("ij,ij->i", decoded, decoded)
+
+    def _decode(self, codes: np.ndarray) -> np.ndarray:
+        if self.mode == "int8":
+            return codes.astype(np.float32) * self.scale
+        return codes.astype(np.float32)
+
+    def distances(self, query: np.ndarray) -> np.ndarray:
+        if self.mode == "binary":
+            code = np.packbits(query > 0)
+            return POPCOUNT[np.bitwise_xor(self.codes, code)].sum(
+                axis=1, dtype=np.float32
+            )
+        return self.norms - 2.0 * (self._decode(self.codes) @ query)
+
+    def nbytes(self) -> int:
+        return self.codes.nbytes + getattr(self, "norms", np.empty(0)).nbytes
+
+
+class IVFIndex:
+    """
+    Inverted file index (as pgvector ivfflat): k-means lists, exact
+    distances within the `probes` lists nearest to the query.
+    """
+
+    def __init__(self, vectors: np.ndarray, lists: int, seed: int) -> None:
+        self.vectors = vectors
+        self.centroids = _kmeans(vectors, lists, seed)
+        assignment = _nearest_centroid(vectors, self.centroids)
+        self.members = [np.flatnonzero(assignment == index) for index in range(lists)]
+        self.probes = 1
+
+    def distances(self, query: np.ndarray) -> np.ndarray:
+        centroid_distances = np.einsum(
+            "ij,ij->i", self.centroids - query, self.centroids - query
+        )
+        probed = np.concatenate(
+            [self.members[index] for index in _top(centroid_distances, self.probes)]
+        )
+        distances = np.full(len(self.vectors), np.inf, dtype=np.float32)
+        difference = self.vectors[probed] - query
+        distances[probed] = np.einsum("ij,ij->i", difference, difference)
+        return distances
+
+    def nbytes(self) -> int:
+        member_bytes = sum(members.nbytes for members in self.members)
+        return self.vectors.nbytes + self.centroids.nbytes + member_bytes
+
+
+def _nearest_centroid(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    norms = np.einsum("ij,ij->i", centroids, centroids)
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), 8192):
+        chunk = vectors[start : start + 8192]
+        assignment[start : start + 8192] = np.argmin(
+            norms - 2.0 * (chunk @ centroids.T), axis=1
+        )
+    return assignment
+
+
+def _kmeans(
+    vectors: np.ndarray, lists: int, seed: int, iterations: int = 10
+) -> np.ndarray:
+    """Lloyd's k-means on a sample, like ivfflat's index build."""
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), min(len(vectors), lists * 50), False)]
+    centroids = sample[rng.choice(len(sample), lists, False)].copy()
+    for _ in range(iterations):
+        assignment = _nearest_centroid(sample, centroids)
+        for index in range(lists):
+            members = sample[assignment == index]
+            if len(members):
+                centroids[index] = members.mean(axis=0)
+    return centroids
+
+
+Searcher = Callable[[np.ndarray, int, int], np.ndarray]
+
+
+def ground_truth(corpus: Corpus, queries: QuerySet, k: int) -> List[np.ndarray]:
+    """Exact top-k positions per query, with supplier filters applied first."""
+    exact = ExactIndex(corpus.vectors)
+    truth = []
+    for query, supplier in zip(queries.vectors, queries.suppliers, strict=True):
+        distances = exact.distances(query)
+        if supplier >= 0:
+            distances = np.where(corpus.suppliers == supplier, distances, np.inf)
+        truth.append(_top(distances, k))
+    return truth
+
+
+def approximate_searcher(
+    index: object,
+    corpus: Corpus,
+    exact: ExactIndex,
+    overfetch: int,
+) -> Searcher:
+    """
+    Search `index` for k * overfetch candidates, filter, then re-rank.
+
+    Supplier filters are applied to the candidates (post-filtering, as an
+    ANN index scan does), so a selective filter needs more over-fetch.
+    With overfetch > 1 the candidates are re-ranked by exact distance;
+    otherwise they keep the index's approximate order.
+    """
+
+    def search(query: np.ndarray, supplier: int, k: int) -> np.ndarray:
+        candidates = _top(index.distances(query), k * overfetch)  # type: ignore[attr-defined]
+        if supplier >= 0:
+            candidates = candidates[corpus.suppliers[candidates] == supplier]
+        if overfetch > 1 and len(candidates) > k:
+            exact_distances = exact.distances(query)[candidates]
+            candidates = candidates[np.argsort(exact_distances, kind="stable")]
+        return candidates[:k]
+
+    return search
+
+
+def evaluate(
+    name: str,
+    params: Dict[str, object],
+    search: Searcher,
+    queries: QuerySet,
+    truth: List[np.ndarray],
+    k: int,
+    index_bytes: int,
+) -> Evaluation:
+    latencies: List[float] = []
+    recalls: List[float] = []
+    for query, supplier, expected in zip(
+        queries.vectors, queries.suppliers, truth, strict=True
+    ):
+        started = time.perf_counter()
+        found = search(query, int(supplier), k)
+        latencies.append(time.perf_counter() - started)
+        if len(expected):
+            recalls.append(len(np.intersect1d(found, expected)) / len(expected))
+        else:
+            recalls.append(1.0)
+    latencies.sort()
+    filtered = [
+        recall
+        for recall, supplier in zip(recalls, queries.suppliers, strict=True)
+        if supplier >= 0
+    ]
+    return Evaluation(
+        name=name,
+        params=params,
+        recall=statistics.fmean(recalls),
+        recall_filtered=statistics.fmean(filtered) if filtered else None,
+        p50_ms=statistics.median(latencies) * 1000,
+        p95_ms=latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        p99_ms=latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        index_mib=index_bytes / 2**20,
+    )
+
+
+def sweep_in_process(
+    corpus: Corpus,
+    queries: QuerySet,
+    truth: List[np.ndarray],
+    args: argparse.Namespace,
+) -> List[Evaluation]:
+    """Exact search, IVF probes and quantization modes, each with over-fetch."""
+    exact = ExactIndex(corpus.vectors)
+
+    def exact_search(query: np.ndarray, supplier: int, k: int) -> np.ndarray:
+        distances = exact.distances(query)
+        if supplier >= 0:
+            distances = np.where(corpus.suppliers == supplier, distances, np.inf)
+        return _top(distances, k)
+
+    results = [
+        evaluate("exact", {}, exact_search, queries, truth, args.k, exact.nbytes())
+    ]
+
+    lists = args.lists or max(1, int(np.sqrt(len(corpus.vectors))))
+    ivf = IVFIndex(corpus.vectors, lists, args.seed)
+    for probes in args.probes:
+        if probes > lists:
+            continue
+        ivf.probes = probes
+        for overfetch in args.overfetch:
+            results.append(
+                evaluate(
+                    "ivf",
+                    {"lists": lists, "probes": probes, "overfetch": overfetch},
+                    approximate_searcher(ivf, corpus, exact, overfetch),
+                    queries,
+                    truth,
+                    args.k,
+                    ivf.nbytes(),
+                )
+            )
+
+    for mode in args.quantization:
+        quantized = QuantizedIndex(corpus.vectors, mode)
+        for overfetch in args.overfetch:
+            evaluation = evaluate(
+                mode,
+                {"overfetch": overfetch},
+                approximate_searcher(quantized, corpus, exact, overfetch),
+                queries,
+                truth,
+                args.k,
+                quantized.nbytes(),
+            )
+            if overfetch > 1:
+                evaluation.notes.append("re-ranks from full vectors")
+            results.append(evaluation)
+    return results
+
+
+def sweep_database(
+    corpus: Corpus,
+    queries: QuerySet,
+    truth: List[np.ndarray],
+    args: argparse.Namespace,
+) -> List[Evaluation]:
+    """
+    Run the production similarity statement under each index setting.
+
+    hnsw.ef_search and ivfflat.probes only change anything when an HNSW
+    or IVFFlat index exists on quotation_embeddings.embedding; the index
+    size is reported for every configuration.
+    """
+    from sqlalchemy import text
+    from sqlalchemy.orm import Session
+
+    from app.db.retrieval import similarity_statement
+    from app.db.session import build_engine
+
+    position = {int(quotation_id): row for row, quotation_id in enumerate(corpus.ids)}
+    engine = build_engine(args.database_url, pool_size=1, max_overflow=0)
+    results: List[Evaluation] = []
+    try:
+        with Session(engine) as db:
+            index_bytes = db.execute(
+                text(
+                    "SELECT coalesce(sum(pg_relation_size(indexrelid)), 0) "
+                    "FROM pg_index WHERE indrelid = 'quotation_embeddings'::regclass"
+                )
+            ).scalar_one()
+
+            for ef_search in args.ef_search:
+                for probes in args.probes:
+                    for overfetch in args.overfetch:
+
+                        def search(
+                            query: np.ndarray,
+                            supplier: int,
+                            k: int,
+                            ef_search: int = ef_search,
+                            probes: int = probes,
+                            overfetch: int = overfetch,
+                        ) -> np.ndarray:
+                            db.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+                            db.execute(text(f"SET LOCAL ivfflat.probes = {probes}"))
+                            params: Dict[str, object] = {
+                                "embedding": query.tolist(),
+                                "limit": k * overfetch,
+                            }
+                            if supplier >= 0:
+                                params["supplier"] = corpus.supplier_names[supplier]
+                            rows = db.execute(
+                                similarity_statement("l2", supplier >= 0, rows=True),
+                                params,
+                            ).all()
+                            db.rollback()
+                            return np.asarray(
+                                [position[row.id] for row in rows[:k]], dtype=np.int64
+                            )
+
+                        results.append(
+                            evaluate(
+                                "postgres",
+                                {
+                                    "ef_search": ef_search,
+                                    "probes": probes,
+                                    "overfetch": overfetch,
+                                },
+                                search,
+                                queries,
+                                truth,
+                                args.k,
+                                index_bytes,
+                            )
+                        )
+    finally:
+        engine.dispose()
+    return results
+
+
+def mark_pareto(results: Sequence[Evaluation]) -> None:
+    """Flag configurations that no other one beats on both recall and p50."""
+    for result in results:
+        result.pareto = not any(
+            other.recall >= result.recall
+            and other.p50_ms <= result.p50_ms
+            and (other.recall > result.recall or other.p50_ms < result.p50_ms)
+            for other in results
+        )
+
+
+def _describe(result: Evaluation) -> str:
+    params = " ".join(f"{key}={value}" for key, value in result.params.items())
+    return f"{result.name} {params}".strip()
+
+
+def print_table(results: Sequence[Evaluation], k: int) -> None:
+    print(
+        f"  {'':1} {'configuration':<40}{f'recall@{k}':>10}{'filtered':>10}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'index MiB':>11}"
+    )
+    for result in sorted(results, key=lambda result: (result.p50_ms, -result.recall)):
+        filtered = (
+            "-" if result.recall_filtered is None else f"{result.recall_filtered:.4f}"
+        )
+        print(
+            f"  {'*' if result.pareto else ' ':1} {_describe(result):<40}"
+            f"{result.recall:>10.4f}{filtered:>10}{result.p50_ms:>9.3f}"
+            f"{result.p95_ms:>9.3f}{result.p99_ms:>9.3f}{result.index_mib:>11.1f}"
+        )
+    print("  * Pareto-optimal: no configuration is both faster and more accurate.")
+
+
+def main() -> None:
+    """
+    Measure the recall/latency trade-off of retrieval configurations.
+
+    Computes exact top-k neighbours by brute force, over a synthetic
+    clustered corpus or over every stored embedding (--database-url),
+    then evaluates each configuration against them:
+    - in process: exact search, IVF lists x probes, and float16 / int8 /
+      binary quantization, each with over-fetch factors (fetch k x factor
+      candidates, apply supplier filters, re-rank exactly);
+    - with --database-url, also the production similarity statement for
+      each hnsw.ef_search x ivfflat.probes x over-fetch combination.
+
+    Prints recall@k (overall and over the supplier-filtered queries),
+    latency percentiles and index memory per configuration, marks the
+    Pareto frontier, and writes the results as JSON to --output (default
+    var/eval/retrieval-<time>.json). In-process latencies compare the
+    strategies as NumPy implements them (float16/int8 are decoded per
+    query); use the database sweep for absolute numbers.
+
+    Usage:
+        python -m scripts.eval_retrieval --corpus-size 50000 --dim 256
+        python -m scripts.eval_retrieval --probes 1 4 16 --overfetch 1 4 \\
+            --quantization int8 binary --filtered-fraction 0.3
+        python -m scripts.eval_retrieval --database-url postgresql+psycopg://... \\
+            --ef-search 20 40 100
+    """
+    parser = argparse.ArgumentParser(
+        description=main.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--corpus-size", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--clusters", type=int, default=64)
+    parser.add_argument("--suppliers", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--filtered-fraction", type=float, default=0.2)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--lists", type=int, default=None, help="IVF lists (default sqrt(n))."
+    )
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[40])
+    parser.add_argument("--overfetch", type=int, nargs="+", default=[1, 4])
+    parser.add_argument(
+        "--quantization",
+        nargs="*",
+        choices=("float16", "int8", "binary"),
+        default=["float16", "int8", "binary"],
+    )
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    if args.database_url:
+        corpus = database_corpus(args.database_url)
+    else:
+        corpus = synthetic_corpus(
+            args.corpus_size, args.dim, args.suppliers, args.clusters, args.seed
+        )
+    queries = sample_queries(corpus, args.queries, args.filtered_fraction, args.seed)
+    truth = ground_truth(corpus, queries, args.k)
+    print(
+        f"{len(corpus.vectors)} vectors of {corpus.vectors.shape[1]} dimensions, "
+        f"{args.queries} queries ({args.filtered_fraction:.0%} supplier-filtered), "
+        f"k={args.k}"
+    )
+
+    results = sweep_in_process(corpus, queries, truth, args)
+    if args.database_url:
+        results += sweep_database(corpus, queries, truth, args)
+    mark_pareto(results)
+    print_table(results, args.k)
+
+    output = Path(
+        args.output
+        or f"{DEFAULT_OUTPUT_DIR}/retrieval-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    run: Dict[str, object] = {
+        "corpus": "database" if args.database_url else "synthetic",
+        "size": len(corpus.vectors),
+        "dim": int(corpus.vectors.shape[1]),
+        "queries": args.queries,
+        "filtered_fraction": args.filtered_fraction,
+        "k": args.k,
+        "seed": args.seed,
+        "results": [asdict(result) for result in results],
+    }
+    output.write_bytes(orjson.dumps(run, option=orjson.OPT_INDENT_2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Union
+
+import orjson
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+
+def completion_tokens(prompt: str, max_tokens: int) -> List[str]:
+    """
+    Deterministic completion for a prompt: the words of its question line.
+
+    Tests can predict the answer for each prompt of a batch, which is how
+    they check that streamed choices are routed to the right caller.
+    """
+    question = next(
+        (
+            line[len("Question:") :].strip()
+            for line in reversed(prompt.splitlines())
+            if line.startswith("Question:")
+        ),
+        prompt.strip(),
+    )
+    words = ["Answer", "to"] + question.split()
+    return [f" {word}" if index else word for index, word in enumerate(words)][
+        :max_tokens
+    ]
+
+
+def create_app(
+    *,
+    first_token_delay_s: float = 0.0,
+    token_delay_s: float = 0.0,
+) -> FastAPI:
+    """
+    Build a fake OpenAI-compatible completions server.
+
+    Supports `POST /v1/completions` with a single prompt or a list of
+    prompts, streamed (Server-Sent Events, one token per choice per
+    event) or not, and `GET /v1/models`. `app.state` records the
+    received payloads and the number of streams abandoned by the client.
+    A prompt containing "FAIL" makes the request fail with a 500.
+    """
+    app = FastAPI()
+    app.state.requests = []
+    app.state.cancelled_streams = 0
+
+    @app.get("/v1/models")
+    async def models() -> Dict[str, Any]:
+        return {"object": "list", "data": [{"id": "fake", "object": "model"}]}
+
+    @app.post("/v1/completions")
+    async def completions(request: Request) -> Any:
+        payload = orjson.loads(await request.body())
+        app.state.requests.append(payload)
+
+        prompt: Union[str, List[str]] = payload["prompt"]
+        prompts = prompt if isinstance(prompt, list) else [prompt]
+        if any("FAIL" in text for text in prompts):
+            return ORJSONResponse({"error": {"message": "boom"}}, status_code=500)
+
+        max_tokens = int(payload.get("max_tokens", 16))
+        completions = [completion_tokens(text, max_tokens) for text in prompts]
+        model = payload.get("model", "fake")
+        created = int(time.time())
+
+        if not payload.get("stream"):
+            return {
+                "id": "cmpl-fake",
+                "object": "text_completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {"index": index, "text": "".join(tokens), "finish_reason": "stop"}
+                    for index, tokens in enumerate(completions)
+                ],
+            }
+
+        def event(index: int, text: str, finish_reason: Any) -> bytes:
+            chunk = {
+                "id": "cmpl-fake",
+                "object": "text_completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {"index": index, "text": text, "finish_reason": finish_reason}
+                ],
+            }
+            return b"data: " + orjson.dumps(chunk) + b"\n\n"
+
+        async def stream() -> AsyncIterator[bytes]:
+            finished = False
+            try:
+                await asyncio.sleep(first_token_delay_s)
+                for position in range(max(map(len, completions))):
+                    for index, tokens in enumerate(completions):
+                        if position < len(tokens):
+                            yield event(index, tokens[position], None)
+                    await asyncio.sleep(token_delay_s)
+                for index in range(len(completions)):
+                    yield event(index, "", "stop")
+                yield b"data: [DONE]\n\n"
+                finished = True
+            finally:
+                if not finished:
+                    app.state.cancelled_streams += 1
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    """
+    Run a fake OpenAI-compatible completions server for local development.
+
+    Point the API at it with GENERATOR_BACKEND=llm and
+    LLM_BASE_URL=http://127.0.0.1:8081/v1.
+
+    Usage:
+        python -m scripts.fake_llm_server --port 8081 --token-delay-ms 20
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--first-token-delay-ms", type=float, default=50.0)
+    parser.add_argument("--token-delay-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    app = create_app(
+        first_token_delay_s=args.first_token_delay_ms / 1000.0,
+        token_delay_s=args.token_delay_ms / 1000.0,
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
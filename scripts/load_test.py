@@ -0,0 +1,451 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+import subprocess
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+
+import httpx
+import orjson
+from pydantic import BaseModel, Field, validator
+
+from app.core.config import settings
+from scripts.bench_extractor_rules import PRODUCTS
+from scripts.bench_suite import SUPPLIERS, synthetic_quotation
+
+PROFILES_DIR = Path(__file__).with_name("load_profiles")
+DEFAULT_OUTPUT_DIR = "var/load"
+
+Operation = Literal["query", "upload_single", "upload_batch"]
+
+
+class OperationMix(BaseModel):
+    """One kind of request and its share of the traffic."""
+
+    operation: Operation
+    weight: float = Field(..., gt=0)
+    top_k: int = Field(default=5, ge=1, le=50)
+    batch_size: int = Field(default=10, ge=1)
+    # Upload mode ("sync"/"async"); the server's UPLOAD_MODE when unset.
+    mode: Optional[Literal["sync", "async"]] = None
+
+    class Config:
+        extra = "forbid"
+
+
+class Stage(BaseModel):
+    """A period of the run with a constant arrival rate."""
+
+    duration_s: float = Field(..., gt=0)
+    rate_per_s: float = Field(..., gt=0)
+    # Overrides the profile's mix during this stage.
+    mix: Optional[List[OperationMix]] = None
+
+    class Config:
+        extra = "forbid"
+
+
+class LoadProfile(BaseModel):
+    """
+    A versioned workload: arrival rates over time and the request mix.
+
+    Profiles live in scripts/load_profiles/. Bump `version` whenever a
+    profile changes, so results of different releases are only compared
+    when they were produced by the same traffic.
+    """
+
+    name: str
+    version: int = Field(..., ge=1)
+    description: str = ""
+    seed: int = 0
+    # Open loop: "poisson" (exponential gaps) or "uniform" (fixed gaps).
+    arrival: Literal["poisson", "uniform"] = "poisson"
+    stages: List[Stage]
+    mix: List[OperationMix]
+    # Width of the time buckets of the report.
+    interval_s: float = Field(default=5.0, gt=0)
+    timeout_s: float = Field(default=30.0, gt=0)
+    # Arrivals beyond this many outstanding requests are dropped (and
+    # counted) instead of sent, so an overloaded target cannot make the
+    # generator itself run out of memory.
+    max_in_flight: int = Field(default=256, ge=1)
+
+    class Config:
+        extra = "forbid"
+
+    @validator("stages", "mix")
+    def _not_empty(cls, value: List[Any]) -> List[Any]:
+        if not value:
+            raise ValueError("must not be empty")
+        return value
+
+
+def load_profile(name_or_path: str) -> tuple[LoadProfile, str]:
+    """Load a profile by name (from PROFILES_DIR) or path, with its digest."""
+    path = Path(name_or_path)
+    if not path.suffix:
+        path = PROFILES_DIR / f"{name_or_path}.json"
+    raw = path.read_bytes()
+    profile = LoadProfile.parse_raw(raw)
+    digest = hashlib.sha256(
+        orjson.dumps(orjson.loads(raw), option=orjson.OPT_SORT_KEYS)
+    )
+    return profile, digest.hexdigest()[:16]
+
+
+@dataclass
+class PlannedRequest:
+    offset_s: float
+    operation: str
+    path: str
+    body: bytes
+
+
+@dataclass
+class Sample:
+    offset_s: float
+    operation: str
+    # Measured from the planned send time, so a target that falls behind
+    # is charged for the queueing it causes (no coordinated omission).
+    latency_s: float = 0.0
+    status: Optional[int] = None
+    error: Optional[str] = None
+    dropped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not self.dropped and self.status is not None and self.status < 400
+
+
+def plan_requests(profile: LoadProfile) -> List[PlannedRequest]:
+    """
+    Build the full request schedule of a profile up front.
+
+    Everything is derived from the profile seed, so two runs of the same
+    profile version send the same requests at the same offsets. Bodies
+    are rendered in advance to keep the send loop on time.
+    """
+    rng = random.Random(profile.seed)
+    prefix = settings.api_prefix
+    planned: List[PlannedRequest] = []
+    next_quotation = 0
+    stage_start = 0.0
+
+    for stage in profile.stages:
+        mix = stage.mix or profile.mix
+        weights = [entry.weight for entry in mix]
+        stage_end = stage_start + stage.duration_s
+        offset = stage_start
+        while True:
+            if profile.arrival == "poisson":
+                offset += rng.expovariate(stage.rate_per_s)
+            else:
+                offset += 1.0 / stage.rate_per_s
+            if offset >= stage_end:
+                break
+            entry = rng.choices(mix, weights)[0]
+            query_string = f"?mode={entry.mode}" if entry.mode else ""
+
+            if entry.operation == "query":
+                product = rng.choice(PRODUCTS)
+                payload: Any = {"query": f"{product} price", "top_k": entry.top_k}
+                if rng.random() < 0.2:
+                    supplier = f"Supplier {rng.randrange(SUPPLIERS)}"
+                    payload["filters"] = {"supplier": supplier}
+                path = f"{prefix}/query"
+            else:
+                count = entry.batch_size if entry.operation == "upload_batch" else 1
+                uploads = [
+                    synthetic_quotation(next_quotation + index, profile.seed).dict()
+                    for index in range(count)
+                ]
+                next_quotation += count
+                payload = uploads if entry.operation == "upload_batch" else uploads[0]
+                path = f"{prefix}/upload{query_string}"
+
+            planned.append(
+                PlannedRequest(offset, entry.operation, path, orjson.dumps(payload))
+            )
+        stage_start = stage_end
+
+    return planned
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    planned: List[PlannedRequest],
+    profile: LoadProfile,
+) -> List[Sample]:
+    """Send the planned requests on schedule, whatever the responses do."""
+    samples: List[Sample] = []
+    tasks: List["asyncio.Task[None]"] = []
+    in_flight = 0
+    started = time.perf_counter()
+
+    async def send(request: PlannedRequest, due: float) -> None:
+        nonlocal in_flight
+        sample = Sample(request.offset_s, request.operation)
+        try:
+            response = await client.post(
+                request.path,
+                content=request.body,
+                headers={"Content-Type": "application/json"},
+                timeout=profile.timeout_s,
+            )
+            sample.status = response.status_code
+        except Exception as exc:
+            sample.error = type(exc).__name__
+        finally:
+            sample.latency_s = time.perf_counter() - due
+            in_flight -= 1
+            samples.append(sample)
+
+    for request in planned:
+        due = started + request.offset_s
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if in_flight >= profile.max_in_flight:
+            samples.append(Sample(request.offset_s, request.operation, dropped=True))
+            continue
+        in_flight += 1
+        tasks.append(asyncio.create_task(send(request, due)))
+
+    await asyncio.gather(*tasks)
+    return samples
+
+
+def _percentile_ms(ordered: List[float], fraction: float) -> Optional[float]:
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, math.ceil(len(ordered) * fraction) - 1)
+    return round(ordered[max(0, index)] * 1000.0, 2)
+
+
+def summarize(samples: List[Sample], duration_s: float) -> Dict[str, Any]:
+    """Request count, throughput, error rate and latency percentiles."""
+    sent = [sample for sample in samples if not sample.dropped]
+    ok = sorted(sample.latency_s for sample in sent if sample.ok)
+    errors = len(sent) - len(ok)
+    return {
+        "requests": len(samples),
+        "dropped": len(samples) - len(sent),
+        "errors": errors,
+        "error_rate": round(errors / len(sent), 4) if sent else 0.0,
+        "throughput_per_s": round(len(ok) / duration_s, 2) if duration_s else 0.0,
+        "p50_ms": _percentile_ms(ok, 0.50),
+        "p95_ms": _percentile_ms(ok, 0.95),
+        "p99_ms": _percentile_ms(ok, 0.99),
+        "statuses": dict(
+            Counter(str(sample.status or sample.error) for sample in sent)
+        ),
+    }
+
+
+def build_report(samples: List[Sample], profile: LoadProfile) -> Dict[str, Any]:
+    """Summaries for the whole run and per time bucket, by operation."""
+    duration = sum(stage.duration_s for stage in profile.stages)
+    by_operation: Dict[str, List[Sample]] = defaultdict(list)
+    buckets: Dict[int, Dict[str, List[Sample]]] = defaultdict(lambda: defaultdict(list))
+    for sample in samples:
+        by_operation[sample.operation].append(sample)
+        bucket = buckets[int(sample.offset_s // profile.interval_s)]
+        bucket[sample.operation].append(sample)
+        bucket["all"].append(sample)
+
+    timeline = []
+    for index in sorted(buckets):
+        start = index * profile.interval_s
+        width = min(profile.interval_s, duration - start)
+        timeline.append(
+            {
+                "start_s": start,
+                "operations": {
+                    operation: summarize(bucket_samples, width)
+                    for operation, bucket_samples in sorted(buckets[index].items())
+                },
+            }
+        )
+
+    return {
+        "total": summarize(samples, duration),
+        "operations": {
+            operation: summarize(operation_samples, duration)
+            for operation, operation_samples in sorted(by_operation.items())
+        },
+        "timeline": timeline,
+    }
+
+
+def _fmt_ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    def header(label: str) -> str:
+        return (
+            f"  {label:<16}{'reqs':>7}{'ok/s':>8}{'err%':>7}{'drop':>6}"
+            f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        )
+
+    def line(label: str, summary: Dict[str, Any]) -> str:
+        return (
+            f"  {label:<16}{summary['requests']:>7}"
+            f"{summary['throughput_per_s']:>8.1f}"
+            f"{summary['error_rate'] * 100:>7.1f}{summary['dropped']:>6}"
+            f"{_fmt_ms(summary['p50_ms']):>10}{_fmt_ms(summary['p95_ms']):>10}"
+            f"{_fmt_ms(summary['p99_ms']):>10}"
+        )
+
+    print(header("from (s)"))
+    for bucket in report["timeline"]:
+        print(line(f"{bucket['start_s']:g}", bucket["operations"]["all"]))
+    print(header("operation"))
+    for operation, summary in report["operations"].items():
+        print(line(operation, summary))
+    print(line("total", report["total"]))
+
+
+@asynccontextmanager
+async def open_client(
+    base_url: Optional[str], profile: LoadProfile
+) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Client for a running server at `base_url`, or for an in-process app.
+
+    The in-process app is built with app.main.create_app and its lifespan
+    runs around the load, as under uvicorn. It shares the event loop with
+    the load generator, so use a real server for absolute numbers and the
+    in-process mode for quick, relative comparisons.
+    """
+    if base_url:
+        limits = httpx.Limits(max_connections=profile.max_in_flight)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+            yield client
+        return
+
+    from app.main import create_app
+
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        # Unhandled errors become 500 responses, as under uvicorn.
+        transport = httpx.ASGITransport(  # type: ignore[arg-type]
+            app=app, raise_app_exceptions=False
+        )
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://load-test"
+        ) as client:
+            yield client
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _run(args: argparse.Namespace) -> Dict[str, Any]:
+    profile, digest = load_profile(args.profile)
+    if args.rate_scale != 1.0:
+        for stage in profile.stages:
+            stage.rate_per_s *= args.rate_scale
+    planned = plan_requests(profile)
+    print(
+        f"Profile {profile.name} v{profile.version} ({digest}): "
+        f"{len(planned)} requests over "
+        f"{sum(stage.duration_s for stage in profile.stages):.0f}s "
+        f"against {args.base_url or 'in-process app'}"
+    )
+
+    async with open_client(args.base_url, profile) as client:
+        samples = await run_load(client, planned, profile)
+
+    return {
+        "profile": {
+            "name": profile.name,
+            "version": profile.version,
+            "digest": digest,
+            "rate_scale": args.rate_scale,
+        },
+        "target": args.base_url or "in-process",
+        "revision": _git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        **build_report(samples, profile),
+        "samples": [asdict(sample) for sample in samples] if args.samples else None,
+    }
+
+
+def main() -> None:
+    """
+    Drive the API with an open-loop workload profile and report latency.
+
+    Requests are sent at the times planned from the profile (arrival
+    process, rate per stage, mix of queries, single uploads and batch
+    uploads), whether or not earlier requests have completed, like real
+    independent clients. Reports p50/p95/p99 latency, throughput and
+    error rate per operation and per time bucket, and writes the report
+    as JSON to --output (default var/load/<profile>-v<version>-<time>.json).
+
+    Usage:
+        python -m scripts.load_test --profile smoke
+        python -m scripts.load_test --profile mixed --base-url http://127.0.0.1:8000
+        python -m scripts.load_test --profile path/to/profile.json --rate-scale 2
+    """
+    parser = argparse.ArgumentParser(
+        description=main.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--profile",
+        default="mixed",
+        help=f"Profile name in {PROFILES_DIR} or path to a profile JSON file.",
+    )
+    parser.add_argument(
+        "--base-url",
+        default=None,
+        help="Server to load (e.g. a local uvicorn); in-process app if unset.",
+    )
+    parser.add_argument(
+        "--rate-scale",
+        type=float,
+        default=1.0,
+        help="Multiply every stage's arrival rate (recorded in the report).",
+    )
+    parser.add_argument("--output", default=None)
+    parser.add_argument(
+        "--samples", action="store_true", help="Include every request in the JSON."
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(_run(args))
+    print_report(report)
+
+    profile = report["profile"]
+    output = Path(
+        args.output
+        or (
+            f"{DEFAULT_OUTPUT_DIR}/{profile['name']}-v{profile['version']}-"
+            f"{datetime.now():%Y%m%d-%H%M%S}.json"
+        )
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
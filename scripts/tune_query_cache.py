@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import argparse
+from typing import List, Sequence
+
+from app.agents.query_cache import SemanticQueryCache
+from app.agents.reranker import FeatureReranker
+from app.agents.retriever import RetrieverAgent
+from app.core.config import settings
+from app.core.embeddings import embed_text
+from app.core.schemas import QueryRequest
+from app.db.session import SessionLocal
+
+
+def replay(
+    queries: Sequence[str],
+    embeddings: Sequence[Sequence[float]],
+    rankings: Sequence[List[int]],
+    threshold: float,
+    top_k: int,
+) -> tuple[float, float]:
+    """
+    Replay a query log through a cache with the given threshold.
+
+    Returns the hit rate and the mean recall@top_k of the served rankings
+    against the rankings a fresh search would have returned.
+    """
+    cache = SemanticQueryCache(max_entries=len(queries), threshold=threshold, ttl_s=1e9)
+    hits = 0
+    recall = 0.0
+    for embedding, fresh in zip(embeddings, rankings, strict=True):
+        cached = cache.lookup(embedding, {}, top_k)
+        if cached is None:
+            cache.store(embedding, {}, top_k, fresh, cache.generation)
+            continue
+        hits += 1
+        recall += len(set(cached) & set(fresh)) / max(1, len(fresh))
+    return hits / max(1, len(queries)), recall / hits if hits else 1.0
+
+
+def main() -> None:
+    """
+    Tune QUERY_CACHE_SIMILARITY_THRESHOLD against recall on a query log.
+
+    Runs every query of the log (one per line) against the database
+    without the cache, then replays the log through a SemanticQueryCache
+    for each threshold. For each threshold it prints the hit rate and the
+    recall@top_k of the rankings served from the cache. Pick the lowest
+    threshold whose recall is acceptable.
+
+    Usage:
+        python -m scripts.tune_query_cache queries.txt --top-k 5 \\
+            --thresholds 0.8 0.9 0.95 0.98 0.99
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("queries", help="Text file with one query per line.")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument(
+        "--thresholds",
+        type=float,
+        nargs="+",
+        default=[0.8, 0.85, 0.9, 0.95, 0.98, 0.99, 0.999],
+    )
+    args = parser.parse_args()
+
+    with open(args.queries, encoding="utf-8") as handle:
+        queries = [line.strip() for line in handle if line.strip()]
+    embeddings = [embed_text(query) for query in queries]
+
+    reranker = FeatureReranker.from_settings() if settings.rerank_enabled else None
+    db = SessionLocal()
+    try:
+        retriever = RetrieverAgent(db=db, reranker=reranker)
+        rankings = [
+            [
+                quotation.id
+                for quotation in retriever.retrieve_embedded(
+                    QueryRequest(query=query, top_k=args.top_k), embedding
+                )
+            ]
+            for query, embedding in zip(queries, embeddings, strict=True)
+        ]
+    finally:
+        db.close()
+
+    print(f"{len(queries)} queries, top_k={args.top_k}")
+    print(f"{'threshold':>10} {'hit rate':>9} {'recall@k':>9}")
+    for threshold in sorted(args.thresholds):
+        hit_rate, recall = replay(queries, embeddings, rankings, threshold, args.top_k)
+        print(f"{threshold:>10.3f} {hit_rate:>9.1%} {recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.admission import (
+    INGEST,
+    QUERY,
+    AdmissionControlMiddleware,
+    AdmissionController,
+    AdmissionGate,
+    RouteClassPolicy,
+)
+from app.core.executors import BULK, INTERACTIVE
+from app.core.metrics import REGISTRY
+from app.db import session
+from app.db.pool import PoolStats, TimedQueuePool
+
+
+def _app(controller: AdmissionController) -> TestClient:
+    app = FastAPI()
+
+    @app.post("/api/upload")
+    def upload() -> dict:
+        return {"ok": True}
+
+    @app.post("/api/query")
+    def query() -> dict:
+        return {"answer": "ok"}
+
+    @app.get("/api/health")
+    def health() -> dict:
+        return {"status": "ok"}
+
+    app.add_middleware(AdmissionControlMiddleware, controller=controller)
+    return TestClient(app)
+
+
+def _controller(
+    *,
+    max_inflight: int = 1,
+    max_queue: int = 1,
+    pool_stats: Optional[Dict[str, PoolStats]] = None,
+) -> AdmissionController:
+    pools = pool_stats or {}
+    return AdmissionController(
+        {
+            INGEST: RouteClassPolicy(
+                gate=AdmissionGate(max_inflight, max_queue),
+                max_pool_wait_ms=100.0,
+                workload=BULK,
+            ),
+            QUERY: RouteClassPolicy(
+                gate=AdmissionGate(max_inflight, max_queue),
+                max_pool_wait_ms=1000.0,
+                workload=INTERACTIVE,
+            ),
+        },
+        api_prefix="/api",
+        pool_stats=lambda workload: pools.get(workload, PoolStats()),
+        queue_timeout_s=0.05,
+        retry_after_s=3,
+    )
+
+
+def test_gate_hands_released_slot_to_waiter() -> None:
+    async def scenario() -> tuple:
+        gate = AdmissionGate(max_inflight=1, max_queue=1)
+        assert gate.try_acquire()
+
+        waiter = asyncio.create_task(gate.acquire(timeout=1.0))
+        await asyncio.sleep(0)
+        assert gate.queued == 1
+
+        gate.release()
+        granted = await waiter
+        return granted, gate.inflight, gate.queued
+
+    assert asyncio.run(scenario()) == (True, 1, 0)
+
+
+def test_gate_times_out_when_no_slot_frees_up() -> None:
+    async def scenario() -> tuple:
+        gate = AdmissionGate(max_inflight=1, max_queue=1)
+        gate.try_acquire()
+        granted = await gate.acquire(timeout=0.01)
+        return granted, gate.inflight, gate.queued
+
+    assert asyncio.run(scenario()) == (False, 1, 0)
+
+
+def test_full_queue_is_rejected_with_429_and_counted() -> None:
+    client = _app(_controller(max_inflight=0, max_queue=0))
+    before = REGISTRY.counter(
+        "admission_decisions_total", "", ("route_class", "decision")
+    ).value(route_class=INGEST, decision="shed_queue_full")
+
+    response = client.post("/api/upload")
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "3"
+    after = REGISTRY.counter(
+        "admission_decisions_total", "", ("route_class", "decision")
+    ).value(route_class=INGEST, decision="shed_queue_full")
+    assert after == before + 1
+
+
+def test_pool_saturation_sheds_ingest_but_not_health() -> None:
+    client = _app(
+        _controller(
+            max_inflight=4, pool_stats={BULK: PoolStats(checkout_wait_ms=500.0)}
+        )
+    )
+
+    assert client.post("/api/upload").status_code == 503
+    assert client.get("/api/health").status_code == 200
+
+
+def test_waiting_bulk_pool_does_not_shed_queries() -> None:
+    client = _app(
+        _controller(
+            max_inflight=4,
+            pool_stats={
+                BULK: PoolStats(checkout_wait_ms=5000.0, waiting=9, capacity=4)
+            },
+        )
+    )
+
+    assert client.post("/api/upload").status_code == 503
+    assert client.post("/api/query").status_code == 200
+
+
+def test_admitted_requests_release_their_slot() -> None:
+    controller = _controller(max_inflight=1)
+    client = _app(controller)
+
+    assert client.post("/api/upload").status_code == 200
+    assert client.post("/api/upload").status_code == 200
+    assert controller.policies[INGEST].gate.inflight == 0
+
+
+def test_queued_checkouts_beyond_capacity_shed_before_the_average_rises() -> None:
+    queued = PoolStats(checkout_wait_ms=0.0, waiting=12, capacity=10)
+    client = _app(_controller(max_inflight=4, pool_stats={INTERACTIVE: queued}))
+
+    assert client.post("/api/query").status_code == 503
+    assert client.post("/api/upload").status_code == 200
+
+
+def test_pool_stats_are_reported_per_workload(monkeypatch: pytest.MonkeyPatch) -> None:
+    bulk_pool = TimedQueuePool(lambda: None, pool_size=2, max_overflow=2)
+    bulk_pool.waiting = 3
+    monkeypatch.setattr(session, "_engines", {BULK: SimpleNamespace(pool=bulk_pool)})
+
+    assert session.pool_stats(BULK) == PoolStats(0.0, 3, 4)
+    assert session.pool_stats(INTERACTIVE) == PoolStats()
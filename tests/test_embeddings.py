@@ -1,15 +1,17 @@
-from app.core.embeddings import EMBEDDING_DIM, embed_text
+import random
 
+import numpy as np
 
-def test_embed_text_returns_list_of_floats() -> None:
+from app.core.embeddings import EMBEDDING_DIM, _stable_seed, embed_text
+
+
+def test_embed_text_returns_float32_array() -> None:
     text = "Sample quotation text."
     embedding = embed_text(text)
 
-    assert isinstance(embedding, list), "Embedding should be a list."
-    assert len(embedding) == EMBEDDING_DIM, "Embedding has unexpected dimension."
-    assert all(
-        isinstance(value, float) for value in embedding
-    ), "All embedding values must be floats."
+    assert isinstance(embedding, np.ndarray), "Embedding should be a NumPy array."
+    assert embedding.shape == (EMBEDDING_DIM,), "Embedding has unexpected dimension."
+    assert embedding.dtype == np.float32, "Embedding values must be float32."
 
 
 def test_embed_text_is_deterministic_for_same_text() -> None:
@@ -17,7 +19,7 @@ def test_embed_text_is_deterministic_for_same_text() -> None:
     embedding_1 = embed_text(text)
     embedding_2 = embed_text(text)
 
-    assert embedding_1 == embedding_2, "Embeddings must be deterministic."
+    assert np.array_equal(embedding_1, embedding_2), "Embeddings must be deterministic."
 
 
 def test_embed_text_normalizes_whitespace() -> None:
@@ -25,11 +27,25 @@ def test_embed_text_normalizes_whitespace() -> None:
     embedding_1 = embed_text(base)
     embedding_2 = embed_text("  Multi   Agent   RAG   quotation  ")
 
-    assert embedding_1 == embedding_2, "Whitespace normalization should not change embedding."
+    assert np.array_equal(
+        embedding_1, embedding_2
+    ), "Whitespace normalization should not change embedding."
 
 
 def test_embed_text_differs_for_different_texts() -> None:
     embedding_a = embed_text("First quotation text.")
     embedding_b = embed_text("Second quotation text.")
 
-    assert embedding_a != embedding_b, "Different texts should produce different embeddings."
+    assert not np.array_equal(
+        embedding_a, embedding_b
+    ), "Different texts should produce different embeddings."
+
+
+def test_embed_text_matches_previously_stored_vectors() -> None:
+    # Vectors used to be built with random.Random; stored float4 values
+    # must stay comparable with new query embeddings.
+    for text in ("First quotation text.", ""):
+        rng = random.Random(_stable_seed(text))
+        legacy = [rng.uniform(-1.0, 1.0) for _ in range(EMBEDDING_DIM)]
+
+        assert np.array_equal(embed_text(text), np.asarray(legacy, dtype=np.float32))
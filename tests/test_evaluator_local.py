@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import warnings
+from datetime import datetime
+from typing import List
+
+import numpy as np
+import pytest
+
+from app.agents.base import EvaluatorAgentProtocol
+from app.agents.evaluator_local import LocalGroundingEvaluator, _covered
+from app.agents.generator_simple import SimpleGeneratorAgent
+from app.core.schemas import QueryRequest, StructuredQuotation
+
+
+def _quotation(id: int, supplier: str, raw_text: str) -> StructuredQuotation:
+    return StructuredQuotation(
+        id=id,
+        supplier=supplier,
+        raw_text=raw_text,
+        created_at=datetime(2025, 1, 1),
+    )
+
+
+CONTEXT: List[StructuredQuotation] = [
+    _quotation(
+        1,
+        "ACME Corp",
+        "Quotation for a server rack 42U with installation. "
+        "Server rack unit price $1,200.00, installation services 350.00, "
+        "total due USD 1,550.00.",
+    ),
+    _quotation(
+        2,
+        "Globex Ltd",
+        "Network switch 48 ports, delivery within 10 business days. Price 899.90 EUR.",
+    ),
+]
+
+
+@pytest.fixture
+def evaluator() -> LocalGroundingEvaluator:
+    return LocalGroundingEvaluator()
+
+
+def test_implements_protocol(evaluator: LocalGroundingEvaluator) -> None:
+    assert isinstance(evaluator, EvaluatorAgentProtocol)
+
+
+def test_answer_copied_from_context_is_grounded(evaluator: LocalGroundingEvaluator) -> None:
+    query = QueryRequest(query="server rack installation")
+    answer = (
+        "ACME Corp quoted a server rack 42U with installation; "
+        "the server rack unit price $1,200.00 and total due USD 1,550.00."
+    )
+
+    result = evaluator.evaluate(query=query, answer=answer, context=CONTEXT)
+
+    assert result.is_answer_grounded is True
+    assert result.metadata["numeric_consistency"] == 1.0
+    assert result.metadata["unsupported_prices"] == []
+    assert result.metadata["query_coverage"] == 1.0
+    assert result.metadata["ngram_containment"] >= 0.5
+    assert 0.0 < result.metadata["minhash_similarity"] < 1.0
+    assert 0.5 < result.relevance_score <= 1.0
+
+
+def test_unsupported_price_makes_answer_ungrounded(evaluator: LocalGroundingEvaluator) -> None:
+    query = QueryRequest(query="server rack installation")
+    answer = (
+        "ACME Corp quoted a server rack 42U with installation; "
+        "the server rack unit price $999.00 and total due USD 1,550.00."
+    )
+
+    result = evaluator.evaluate(query=query, answer=answer, context=CONTEXT)
+
+    assert result.is_answer_grounded is False
+    assert result.metadata["numeric_consistency"] == 0.5
+    assert result.metadata["unsupported_prices"] == [999.0]
+
+
+def test_counts_and_ids_are_not_prices(evaluator: LocalGroundingEvaluator) -> None:
+    query = QueryRequest(query="network switch")
+    answer = SimpleGeneratorAgent().generate(query, CONTEXT)
+
+    result = evaluator.evaluate(query=query, answer=answer, context=CONTEXT)
+
+    assert result.is_answer_grounded is True
+    assert result.metadata["numeric_consistency"] == 1.0
+
+
+def test_unrelated_answer_and_empty_context(evaluator: LocalGroundingEvaluator) -> None:
+    query = QueryRequest(query="server rack")
+    unrelated = evaluator.evaluate(
+        query=query,
+        answer="The weather in Lisbon will be sunny with light winds tomorrow.",
+        context=CONTEXT,
+    )
+    empty = evaluator.evaluate(query=query, answer="No quotations matched.", context=[])
+
+    assert unrelated.is_answer_grounded is False
+    assert unrelated.metadata["ngram_containment"] == 0.0
+    assert unrelated.metadata["minhash_similarity"] < 0.1
+    assert empty.is_answer_grounded is False
+    assert empty.relevance_score == 0.0
+
+
+def test_batch_matches_single_evaluations(evaluator: LocalGroundingEvaluator) -> None:
+    items = [
+        (QueryRequest(query="server rack"), "server rack unit price $1,200.00", CONTEXT),
+        (QueryRequest(query="switch"), "Network switch 48 ports for 899.90 EUR", CONTEXT[1:]),
+        (QueryRequest(query="switch"), "Network switch 48 ports for 899.90 EUR", CONTEXT[:1]),
+        (QueryRequest(query="anything"), "", []),
+    ]
+
+    batch = evaluator.evaluate_batch(items)
+
+    assert [result.dict() for result in batch] == [
+        evaluator.evaluate(query=query, answer=answer, context=context).dict()
+        for query, answer, context in items
+    ]
+    assert [result.is_answer_grounded for result in batch] == [True, True, False, False]
+
+
+def test_huge_amounts_are_ignored_without_overflow(
+    evaluator: LocalGroundingEvaluator,
+) -> None:
+    answer = "Totals: 99999999999999999999.00 EUR and " + "9" * 400 + ".00 EUR."
+    context = [_quotation(1, "ACME Corp", "Total: 12.50 EUR.")]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        result = evaluator.evaluate(QueryRequest(query="total"), answer, context)
+
+    assert result.metadata["numeric_consistency"] == 1.0
+    assert result.metadata["unsupported_prices"] == []
+
+
+def test_large_prices_do_not_collide_across_pairs() -> None:
+    # With 1024 pairs, value * batch + pair keys wrap modulo 2**64 and
+    # 1 and 1 + 2**54 would share a key.
+    batch = 1024
+    empty = np.empty(0, dtype=np.int64)
+    needles = [np.array([1], dtype=np.int64)] + [empty] * (batch - 1)
+    haystacks = [np.array([1 + 2**54], dtype=np.int64)] + [empty] * (batch - 1)
+
+    total, hits = _covered(needles, haystacks)
+
+    assert total[0] == 1
+    assert hits.sum() == 0
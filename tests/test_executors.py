@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import List
+
+import pytest
+
+from app.core.executors import (
+    BULK,
+    INTERACTIVE,
+    PriorityScheduler,
+    WorkloadExecutors,
+    current_workload,
+    workload,
+)
+from app.core.tracing import current_span, tracer
+from app.db import session as session_module
+
+
+def test_bulk_yields_to_interactive_work() -> None:
+    scheduler = PriorityScheduler({INTERACTIVE: 4, BULK: 3}, {BULK: 1})
+    bulk_started = threading.Event()
+    release = threading.Event()
+    peak: List[int] = []
+
+    def bulk_task() -> None:
+        with scheduler.slot(BULK):
+            peak.append(scheduler.active[BULK])
+            bulk_started.set()
+            release.wait(5)
+
+    with scheduler.slot(INTERACTIVE):
+        threads = [threading.Thread(target=bulk_task) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        bulk_started.wait(5)
+        time.sleep(0.05)
+        assert scheduler.active[BULK] == 1
+
+    # With the interactive task gone, the waiting bulk tasks may start.
+    deadline = time.monotonic() + 5
+    while scheduler.active[BULK] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert scheduler.active[BULK] == 3
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert scheduler.active == {INTERACTIVE: 0, BULK: 0}
+
+
+def test_interactive_runs_while_bulk_threads_are_busy() -> None:
+    executors = WorkloadExecutors(
+        {INTERACTIVE: 2, BULK: 1},
+        PriorityScheduler({INTERACTIVE: 2, BULK: 1}),
+    )
+    release = threading.Event()
+
+    async def run() -> float:
+        bulk = asyncio.ensure_future(executors.run(BULK, release.wait, 5))
+        await asyncio.sleep(0.01)
+        started = time.perf_counter()
+        workload_name = await executors.run(INTERACTIVE, current_workload)
+        elapsed = time.perf_counter() - started
+        assert workload_name == INTERACTIVE
+        release.set()
+        await bulk
+        return elapsed
+
+    try:
+        assert asyncio.run(run()) < 0.5
+    finally:
+        executors.shutdown()
+
+
+def test_run_tags_the_call_and_keeps_the_callers_context() -> None:
+    executors = WorkloadExecutors(
+        {INTERACTIVE: 1, BULK: 1}, PriorityScheduler({INTERACTIVE: 1, BULK: 1})
+    )
+
+    def probe() -> tuple:
+        return current_workload(), current_span(), threading.current_thread().name
+
+    async def run() -> tuple:
+        with tracer.span("test.parent") as parent:
+            return parent, await executors.run(BULK, probe)
+
+    try:
+        parent, (workload_name, span, thread_name) = asyncio.run(run())
+    finally:
+        executors.shutdown()
+
+    assert workload_name == BULK
+    assert span is parent
+    assert thread_name.startswith("bulk-worker")
+
+
+def test_bulk_tagged_calls_use_the_bulk_connection_pool(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(session_module, "_engines", {})
+    db = session_module.SessionLocal()
+
+    @workload(BULK)
+    def ingest() -> object:
+        assert current_workload() == BULK
+        return db.get_bind()
+
+    bulk_engine = ingest()
+
+    assert bulk_engine is session_module.get_engine(BULK)
+    assert db.get_bind() is session_module.get_engine(INTERACTIVE)
+    assert bulk_engine.pool.size() == session_module.settings.db_bulk_pool_size
+
+
+def test_unknown_workload_class_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        workload("batch")
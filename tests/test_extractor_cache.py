@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pytest
+
+from app.agents import extractor_cache
+from app.agents.extractor import ExtractorAgent
+from app.agents.extractor_cache import (
+    EXTRACTION_CACHE_SAVED,
+    CachingExtractorAgent,
+    ExtractionCache,
+    text_fingerprint,
+)
+from app.core.schemas import QuotationUploadRequest
+
+
+class CountingExtractor:
+    name = "counting"
+
+    def __init__(self, version: str = "1") -> None:
+        self.version = version
+        self.calls = 0
+
+    def extract_structured_fields(
+        self, upload_request: QuotationUploadRequest
+    ) -> Dict[str, Any]:
+        self.calls += 1
+        return {"total": 10.0, "items": [{"description": "Widget"}]}
+
+
+class FakeSession:
+    def close(self) -> None:
+        pass
+
+
+def _upload(raw_text: str) -> QuotationUploadRequest:
+    return QuotationUploadRequest(supplier="ACME Corp", raw_text=raw_text)
+
+
+@pytest.fixture
+def table(monkeypatch: pytest.MonkeyPatch) -> Dict[str, Any]:
+    """Replace the extraction_cache repository functions with a dict."""
+    state: Dict[str, Any] = {"rows": {}, "purged": [], "queries": 0, "writes": 0}
+
+    class Row:
+        def __init__(self, fields: dict, extraction_ms: float) -> None:
+            self.fields = fields
+            self.extraction_ms = extraction_ms
+
+    def get_entry(db, *, extractor_name, extractor_version, text_hash):
+        return state["rows"].get((extractor_name, extractor_version, text_hash))
+
+    def save_entry(
+        db, *, extractor_name, extractor_version, text_hash, fields, extraction_ms
+    ):
+        state["rows"].setdefault(
+            (extractor_name, extractor_version, text_hash), Row(fields, extraction_ms)
+        )
+
+    def get_entries(db, *, extractor_name, extractor_version, text_hashes):
+        state["queries"] += 1
+        keys = [(extractor_name, extractor_version, text) for text in text_hashes]
+        return [
+            SimpleNamespace(text_hash=key[2], **vars(state["rows"][key]))
+            for key in keys
+            if key in state["rows"]
+        ]
+
+    def save_entries(db, *, extractor_name, extractor_version, entries):
+        state["writes"] += 1
+        for text_hash, fields, extraction_ms in entries:
+            state["rows"].setdefault(
+                (extractor_name, extractor_version, text_hash),
+                Row(fields, extraction_ms),
+            )
+
+    def delete_stale(db, *, extractor_name, current_version, min_age):
+        state["purged"].append((extractor_name, current_version))
+        stale = [
+            key
+            for key, row in state["rows"].items()
+            if key[0] == extractor_name
+            and key[1] != current_version
+            and getattr(row, "age", timedelta(0)) > min_age
+        ]
+        for key in stale:
+            del state["rows"][key]
+        return len(stale)
+
+    def list_recent(db, *, extractor_name, extractor_version, limit):
+        newest_first = [
+            SimpleNamespace(
+                text_hash=key[2], fields=row.fields, extraction_ms=row.extraction_ms
+            )
+            for key, row in reversed(list(state["rows"].items()))
+            if key[:2] == (extractor_name, extractor_version)
+        ]
+        return newest_first[:limit]
+
+    monkeypatch.setattr(extractor_cache, "get_extraction_cache_entry", get_entry)
+    monkeypatch.setattr(
+        extractor_cache, "list_recent_extraction_cache_entries", list_recent
+    )
+    monkeypatch.setattr(extractor_cache, "save_extraction_cache_entry", save_entry)
+    monkeypatch.setattr(extractor_cache, "get_extraction_cache_entries", get_entries)
+    monkeypatch.setattr(extractor_cache, "save_extraction_cache_entries", save_entries)
+    monkeypatch.setattr(
+        extractor_cache, "delete_stale_extraction_cache_entries", delete_stale
+    )
+    return state
+
+
+def test_fingerprint_ignores_line_endings_and_trailing_whitespace() -> None:
+    assert text_fingerprint("Total: 10  \r\nTax: 1\n\n") == text_fingerprint(
+        "Total: 10\nTax: 1"
+    )
+    assert text_fingerprint("Total: 10") != text_fingerprint("Total: 11")
+
+
+def test_memory_hit_skips_extractor_and_counts_saved_time() -> None:
+    extractor = CountingExtractor()
+    agent = CachingExtractorAgent(extractor, ExtractionCache(max_entries=8))
+    saved_before = EXTRACTION_CACHE_SAVED.value(extractor="counting")
+
+    first = agent.extract_structured_fields(_upload("Widget 2 x 5.00"))
+    first["items"].append({"description": "mutated by caller"})
+    second = agent.extract_structured_fields(_upload("Widget 2 x 5.00\r\n"))
+
+    assert extractor.calls == 1
+    assert second == {"total": 10.0, "items": [{"description": "Widget"}]}
+    assert EXTRACTION_CACHE_SAVED.value(extractor="counting") > saved_before
+
+
+def test_version_bump_invalidates_cached_results() -> None:
+    cache = ExtractionCache(max_entries=8)
+    old = CountingExtractor(version="1")
+    new = CountingExtractor(version="2")
+
+    CachingExtractorAgent(old, cache).extract_structured_fields(_upload("text"))
+    CachingExtractorAgent(new, cache).extract_structured_fields(_upload("text"))
+
+    assert (old.calls, new.calls) == (1, 1)
+
+
+def test_lru_evicts_least_recently_used_entry() -> None:
+    extractor = CountingExtractor()
+    agent = CachingExtractorAgent(extractor, ExtractionCache(max_entries=2))
+
+    for text in ("a", "b", "a", "c", "a", "b"):
+        agent.extract_structured_fields(_upload(text))
+
+    # "b" was evicted by "c"; "a" stayed because it was used recently.
+    assert extractor.calls == 4
+
+
+def test_store_serves_results_after_restart_and_purges_old_versions(
+    table: Dict[str, Any],
+) -> None:
+    table["rows"][("counting", "0", "stale")] = SimpleNamespace(age=timedelta(days=8))
+    # Still written by workers of the other version (rolling deploy).
+    table["rows"][("counting", "2", "recent")] = SimpleNamespace(age=timedelta(hours=1))
+    first = CountingExtractor()
+    CachingExtractorAgent(
+        first, ExtractionCache(session_factory=FakeSession)
+    ).extract_structured_fields(_upload("text"))
+
+    restarted = CountingExtractor()
+    cache = ExtractionCache(session_factory=FakeSession)
+    result = CachingExtractorAgent(restarted, cache).extract_structured_fields(
+        _upload("text")
+    )
+
+    assert (first.calls, restarted.calls) == (1, 0)
+    assert result["total"] == 10.0
+    assert len(cache) == 1
+    assert ("counting", "0", "stale") not in table["rows"]
+    assert ("counting", "2", "recent") in table["rows"]
+    assert table["purged"] == [("counting", "1"), ("counting", "1")]
+
+
+def test_preload_fills_memory_with_newest_entries(table: Dict[str, Any]) -> None:
+    writer = CachingExtractorAgent(
+        CountingExtractor(), ExtractionCache(session_factory=FakeSession)
+    )
+    for text in ("old", "middle", "new"):
+        writer.extract_structured_fields(_upload(text))
+    table["rows"][("counting", "0", "stale")] = object()
+
+    cache = ExtractionCache(max_entries=2, session_factory=FakeSession)
+    extractor = CountingExtractor()
+    agent = CachingExtractorAgent(extractor, cache)
+
+    assert agent.preload() == 2
+    assert len(cache) == 2
+    table["rows"].clear()
+    agent.extract_structured_fields(_upload("middle"))
+    agent.extract_structured_fields(_upload("new"))
+    assert extractor.calls == 0
+
+
+def test_batch_lookup_and_store_use_one_round_trip_each(
+    table: Dict[str, Any],
+) -> None:
+    writer = CachingExtractorAgent(
+        CountingExtractor(), ExtractionCache(session_factory=FakeSession)
+    )
+    uploads = [_upload(f"text {n}") for n in range(4)]
+    writer.extract_structured_fields(uploads[0])
+    key = ("counting", "1", text_fingerprint("text 3"))
+
+    reader = CachingExtractorAgent(
+        CountingExtractor(), ExtractionCache(session_factory=FakeSession)
+    )
+    found = reader.extract_cached_many(uploads + uploads[:1])
+    reader.store_cache_entries([(key, {"total": 3.0}, 1.0), (key, {"total": 3.0}, 1.0)])
+
+    assert [fields is not None for fields in found] == [True, False, False, False, True]
+    assert found[0] == found[4] and found[0] is not found[4]
+    assert (table["queries"], table["writes"]) == (1, 1)
+    assert reader.extract_cached_many(uploads[3:]) == [{"total": 3.0}]
+    assert table["queries"] == 1
+
+
+def test_store_failures_do_not_break_extraction() -> None:
+    def broken_session() -> FakeSession:
+        raise RuntimeError("database is down")
+
+    extractor = CountingExtractor()
+    agent = CachingExtractorAgent(
+        extractor, ExtractionCache(session_factory=broken_session)
+    )
+
+    assert agent.extract_structured_fields(_upload("text"))["total"] == 10.0
+    assert agent.extract_structured_fields(_upload("text"))["total"] == 10.0
+    assert extractor.calls == 1
+
+
+def test_extractor_without_version_is_rejected() -> None:
+    class Unversioned:
+        def extract_structured_fields(self, upload_request):
+            return {}
+
+    with pytest.raises(ValueError):
+        CachingExtractorAgent(Unversioned(), ExtractionCache())
+
+
+def test_extractor_agent_with_cache_returns_same_fields() -> None:
+    upload = _upload("Quotation 1\nWidget 2 x 5.00\nTotal: 10.00")
+    plain: List[Dict[str, Any]] = [ExtractorAgent().extract_structured_fields(upload)]
+    cached_agent = ExtractorAgent(cache=ExtractionCache())
+
+    cached = [cached_agent.extract_structured_fields(upload) for _ in range(2)]
+
+    assert cached == plain * 2
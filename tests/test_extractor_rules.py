@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from app.agents.extractor import ExtractorAgent
+from app.agents.extractor_rules import RuleBasedExtractorAgent, parse_amount
+from app.core.schemas import QuotationUploadRequest
+
+QUOTATION_TEXT = """Quotation #2024-117
+Supplier: ACME Corp
+Customer: Globex Ltd
+
+Description | Qty | Unit | Total
+Server rack 42U | 2 | $1,200.00 | $2,400.00
+Network switch 10 x 350.00 = 3,500.00
+3 x Patch cable @ 4.50
+Call us at 555 1234 for details.
+Subtotal: 5,913.50
+Tax (10%): 591.35
+Total: USD 6,504.85
+"""
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("1,234.56", 1234.56),
+        ("1.234,56", 1234.56),
+        ("5,000", 5000.0),
+        ("0.125", 0.125),
+        ("12,5", 12.5),
+        ("1,234,567", 1234567.0),
+    ],
+)
+def test_parse_amount_handles_both_decimal_conventions(text: str, expected: float) -> None:
+    assert parse_amount(text) == expected
+
+
+def test_rules_extractor_fills_contract_fields() -> None:
+    result = RuleBasedExtractorAgent().extract(QUOTATION_TEXT)
+
+    assert result.title == "Quotation #2024-117"
+    assert result.vendor_name == "ACME Corp"
+    assert result.customer_name == "Globex Ltd"
+    assert [
+        (item.description, item.quantity, item.unit_price, item.total_price)
+        for item in result.items
+    ] == [
+        ("Server rack 42U", 2.0, 1200.0, 2400.0),
+        ("Network switch", 10.0, 350.0, 3500.0),
+        ("Patch cable", 3.0, 4.5, 13.5),
+    ]
+    assert result.subtotal == 5913.5
+    assert result.taxes == 591.35
+    assert result.total == 6504.85
+    assert result.currency == "USD"
+
+
+def test_rules_extractor_derives_missing_totals() -> None:
+    text = "Widget 2 x 10.00\nGadget | 1 | 5,50 | 5,50\nVAT: 3,10\n"
+
+    result = RuleBasedExtractorAgent().extract(text)
+
+    assert result.subtotal == 25.5
+    assert result.taxes == 3.1
+    assert result.total == 28.6
+    assert result.currency is None
+
+
+def test_rules_extractor_ignores_lines_whose_numbers_do_not_add_up() -> None:
+    result = RuleBasedExtractorAgent().extract("Order 12 placed on 2024 05 17\n")
+
+    assert result.items == []
+    assert result.total is None
+
+
+def test_rules_extractor_stays_linear_on_adversarial_input() -> None:
+    text = "\n".join(["total " + " " * 900 + "z", "1," * 400 + "x", "x" * 200_000] * 50)
+
+    started = time.perf_counter()
+    RuleBasedExtractorAgent().extract(text)
+
+    assert time.perf_counter() - started < 2.0
+
+
+def test_extractor_agent_merges_contract_fields() -> None:
+    upload = QuotationUploadRequest(supplier="ACME Corp", raw_text=QUOTATION_TEXT)
+
+    result = ExtractorAgent().extract_structured_fields(upload)
+
+    assert result["supplier"] == "ACME Corp"
+    assert result["raw_text"] == QUOTATION_TEXT
+    assert result["total"] == 6504.85
+    assert result["items"][0] == {
+        "description": "Server rack 42U",
+        "quantity": 2.0,
+        "unit_price": 1200.0,
+        "total_price": 2400.0,
+    }
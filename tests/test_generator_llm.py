@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import Any, Iterator, List
+
+import httpx
+import pytest
+import uvicorn
+
+from app.agents.base import GeneratorAgentProtocol
+from app.agents.generator_llm import (
+    LLM_GENERATIONS,
+    LLM_TIME_TO_FIRST_TOKEN,
+    LLMGenerationError,
+    LLMGeneratorAgent,
+    build_prompt,
+)
+from app.core.orchestrator import MultiAgentOrchestrator
+from app.core.schemas import QueryRequest, StructuredQuotation
+from scripts.fake_llm_server import create_app
+
+CONTEXT = [
+    StructuredQuotation(
+        id=7,
+        supplier="ACME Corp",
+        raw_text="Server rack   42U\nUnit price $1,200.00",
+        created_at=datetime(2025, 1, 1),
+    )
+]
+
+
+@pytest.fixture(scope="module")
+def server() -> Iterator[Any]:
+    app = create_app(token_delay_s=0.02)
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    app.state.base_url = f"http://127.0.0.1:{port}/v1"
+    yield app
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+def _agent(server: Any, **kwargs: Any) -> LLMGeneratorAgent:
+    client = httpx.AsyncClient(base_url=server.state.base_url)
+    return LLMGeneratorAgent(client, model="fake", max_tokens=32, **kwargs)
+
+
+def _expected(question: str) -> str:
+    return "Answer to " + question
+
+
+def test_build_prompt_lists_quotations_and_question() -> None:
+    prompt = build_prompt(QueryRequest(query="rack price?"), CONTEXT)
+
+    assert "[#7] ACME Corp: Server rack 42U Unit price $1,200.00" in prompt
+    assert prompt.endswith("Question: rack price?\nAnswer:")
+
+
+def test_streams_tokens_and_records_latency(server: Any) -> None:
+    ttft_before = LLM_TIME_TO_FIRST_TOKEN.count(model="fake")
+    ok_before = LLM_GENERATIONS.value(model="fake", outcome="ok")
+
+    async def run() -> List[str]:
+        agent = _agent(server)
+        assert isinstance(agent, GeneratorAgentProtocol)
+        try:
+            return [
+                chunk
+                async for chunk in agent.astream(
+                    QueryRequest(query="which rack?"), CONTEXT
+                )
+            ]
+        finally:
+            await agent.aclose()
+
+    chunks = asyncio.run(run())
+
+    assert chunks == ["Answer", " to", " which", " rack?"]
+    assert LLM_TIME_TO_FIRST_TOKEN.count(model="fake") == ttft_before + 1
+    assert LLM_GENERATIONS.value(model="fake", outcome="ok") == ok_before + 1
+
+
+def test_concurrent_prompts_share_one_request(server: Any) -> None:
+    questions = ["first question", "second one", "third"]
+    server.state.requests.clear()
+
+    async def run() -> List[str]:
+        agent = _agent(server, batch_window_ms=50, max_batch_size=8)
+        try:
+            return await asyncio.gather(
+                *(
+                    agent.agenerate(QueryRequest(query=question), CONTEXT)
+                    for question in questions
+                )
+            )
+        finally:
+            await agent.aclose()
+
+    answers = asyncio.run(run())
+
+    assert answers == [_expected(question) for question in questions]
+    assert len(server.state.requests) == 1
+    assert len(server.state.requests[0]["prompt"]) == 3
+
+
+def test_disconnecting_consumer_cancels_the_request(server: Any) -> None:
+    server.state.cancelled_streams = 0
+    long_question = " ".join(f"word{index}" for index in range(30))
+
+    async def run() -> str:
+        agent = _agent(server, max_batch_size=1)
+        try:
+            stream = agent.astream(QueryRequest(query=long_question), CONTEXT)
+            first = await stream.__anext__()
+            await stream.aclose()
+            return first
+        finally:
+            await agent.aclose()
+
+    assert asyncio.run(run()) == "Answer"
+    deadline = time.monotonic() + 5
+    while server.state.cancelled_streams == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert server.state.cancelled_streams == 1
+
+
+def test_server_errors_fail_every_prompt_of_the_batch(server: Any) -> None:
+    errors_before = LLM_GENERATIONS.value(model="fake", outcome="error")
+
+    async def run() -> List[Any]:
+        agent = _agent(server, batch_window_ms=50)
+        try:
+            return await asyncio.gather(
+                agent.agenerate(QueryRequest(query="FAIL please"), CONTEXT),
+                agent.agenerate(QueryRequest(query="fine"), CONTEXT),
+                return_exceptions=True,
+            )
+        finally:
+            await agent.aclose()
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, LLMGenerationError) for result in results)
+    assert "500" in str(results[0])
+    assert LLM_GENERATIONS.value(model="fake", outcome="error") == errors_before + 2
+
+
+def test_orchestrator_streams_llm_answer(server: Any) -> None:
+    class FakeRetriever:
+        def retrieve(self, query: QueryRequest) -> List[StructuredQuotation]:
+            return CONTEXT
+
+    async def run() -> Any:
+        agent = _agent(server)
+        try:
+            orchestrator = MultiAgentOrchestrator(
+                extractor=None,
+                retriever=FakeRetriever(),
+                evaluator=None,
+                generator=agent,
+            )
+            return await orchestrator.answer_query("rack price")
+        finally:
+            await agent.aclose()
+
+    response = asyncio.run(run())
+
+    assert response.answer == _expected("rack price")
+    assert response.quotations == CONTEXT
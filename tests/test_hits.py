@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, List, Sequence, Tuple
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.agents import retriever as retriever_module
+from app.agents.retriever import RetrieverAgent
+from app.core.hits import HitDetailsLoader, QuotationHit, load_hit_details
+from app.core.schemas import QueryRequest
+from app.core.serialization import quotation_payload
+from app.db.retrieval import similarity_statement
+
+CREATED_AT = datetime(2025, 1, 1)
+
+
+class FakeDetails:
+    def __init__(self, missing: Sequence[int] = ()) -> None:
+        self.calls: List[List[int]] = []
+        self.missing = set(missing)
+
+    def __call__(self, ids: Sequence[int]) -> List[Tuple[int, str, Any]]:
+        self.calls.append(list(ids))
+        return [
+            (quotation_id, f"quotation {quotation_id}", {"total": quotation_id})
+            for quotation_id in ids
+            if quotation_id not in self.missing
+        ]
+
+
+def _hits(loader: HitDetailsLoader, ids: Sequence[int]) -> List[QuotationHit]:
+    return [
+        QuotationHit(quotation_id, "ACME Corp", 0.1, CREATED_AT, loader)
+        for quotation_id in ids
+    ]
+
+
+def test_first_access_loads_every_hit_in_one_query() -> None:
+    fetch = FakeDetails()
+    loader = HitDetailsLoader(fetch)
+    hits = _hits(loader, [3, 1, 2])
+
+    assert not any(hit.loaded for hit in hits)
+    assert hits[1].raw_text == "quotation 1"
+    assert [hit.structured_json for hit in hits] == [
+        {"total": 3},
+        {"total": 1},
+        {"total": 2},
+    ]
+    assert fetch.calls == [[3, 1, 2]]
+
+
+def test_deleted_quotations_raise_lookup_error() -> None:
+    loader = HitDetailsLoader(FakeDetails(missing=[2]))
+    present, deleted = _hits(loader, [1, 2])
+
+    with pytest.raises(LookupError):
+        _ = deleted.raw_text
+    assert present.raw_text == "quotation 1"
+
+
+def test_payloads_share_one_details_load() -> None:
+    fetch = FakeDetails()
+    (hit,) = _hits(HitDetailsLoader(fetch), [5])
+
+    payload = quotation_payload(hit, include_raw_text=False)
+
+    assert payload["id"] == 5
+    assert "raw_text" not in payload
+    assert fetch.calls == [[5]]  # structured_json is part of the payload
+    assert quotation_payload(hit)["raw_text"] == "quotation 5"
+    assert len(fetch.calls) == 1
+
+
+def test_compact_statement_selects_no_texts() -> None:
+    sql = str(
+        similarity_statement("l2", False, compact=True).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+
+    assert "raw_text" not in sql
+    assert "structured_json" not in sql
+    assert "distance" in sql
+
+
+def test_compact_retriever_loads_details_with_its_own_session(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sessions: List[str] = []
+
+    class FakeSession:
+        def __enter__(self) -> "FakeSession":
+            sessions.append("open")
+            return self
+
+        def __exit__(self, *exc: Any) -> None:
+            sessions.append("closed")
+
+    def search(
+        db: Any, embedding: Any, loader: HitDetailsLoader, limit: int, supplier: Any
+    ) -> List[QuotationHit]:
+        return _hits(loader, [7, 3][:limit])
+
+    fetch = FakeDetails()
+    monkeypatch.setattr(retriever_module, "get_similar_quotation_hits", search)
+    monkeypatch.setattr(
+        retriever_module,
+        "get_quotation_details_by_ids",
+        lambda db, ids: fetch(ids),
+    )
+    retriever = RetrieverAgent(
+        db=None,  # type: ignore[arg-type]
+        compact=True,
+        details_session_factory=FakeSession,  # type: ignore[arg-type]
+    )
+
+    results = retriever.retrieve(QueryRequest(query="rack price", top_k=2))
+
+    assert all(isinstance(result, QuotationHit) for result in results)
+    assert sessions == []
+    load_hit_details(results)
+    assert [result.raw_text for result in results] == ["quotation 7", "quotation 3"]
+    assert sessions == ["open", "closed"]
+    assert fetch.calls == [[7, 3]]
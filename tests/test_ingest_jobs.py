@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+from typing import List, Sequence
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+
+from app.api.routes.jobs import get_ingest_queue
+from app.core.config import settings
+from app.core.ingest_jobs import IngestQueue
+from app.core.ingest_log import IngestLog
+from app.core.schemas import (
+    IngestItemResult,
+    QuotationUploadRequest,
+    StructuredQuotation,
+)
+from app.db.session import get_db
+from app.main import create_app
+
+
+class FakeSession:
+    def close(self) -> None:
+        pass
+
+
+class FakeIngestor:
+    """Records batch sizes and fails uploads whose text contains 'boom'."""
+
+    def __init__(self) -> None:
+        self.batches: List[int] = []
+        self._next_id = 1
+
+    def ingest_batch(
+        self,
+        db: FakeSession,
+        uploads: Sequence[QuotationUploadRequest],
+    ) -> List[IngestItemResult]:
+        self.batches.append(len(uploads))
+        results = []
+        for index, upload in enumerate(uploads):
+            if "boom" in upload.raw_text:
+                results.append(IngestItemResult(index=index, status="error", error="boom"))
+                continue
+            quotation = StructuredQuotation(
+                id=self._next_id,
+                supplier=upload.supplier,
+                raw_text=upload.raw_text,
+                created_at=datetime.utcnow(),
+            )
+            self._next_id += 1
+            results.append(IngestItemResult(index=index, status="ok", quotation=quotation))
+        return results
+
+
+def _uploads(*texts: str) -> List[QuotationUploadRequest]:
+    return [QuotationUploadRequest(supplier="ACME Corp", raw_text=text) for text in texts]
+
+
+def _queue(tmp_path: Path, ingestor: FakeIngestor, batch_size: int = 64) -> IngestQueue:
+    return IngestQueue(
+        log=IngestLog(tmp_path / "ingest.log", fsync=False),
+        ingestor=ingestor,
+        session_factory=FakeSession,
+        batch_size=batch_size,
+        max_latency_s=0.01,
+        autostart=False,
+    )
+
+
+def test_ingest_log_replays_uncommitted_records(tmp_path: Path) -> None:
+    log = IngestLog(tmp_path / "ingest.log", fsync=False)
+    log.append([{"n": 1}, {"n": 2}, {"n": 3}])
+
+    records, offset = log.read(2)
+    assert [record["n"] for record in records] == [1, 2]
+    log.commit(offset)
+
+    reopened = IngestLog(tmp_path / "ingest.log", fsync=False)
+    records, offset = reopened.read(10)
+    assert [record["n"] for record in records] == [3]
+
+    reopened.commit(offset)
+    assert reopened.pending_bytes() == 0
+    assert (tmp_path / "ingest.log").stat().st_size == 0
+
+
+def test_ingest_log_ignores_partial_trailing_line(tmp_path: Path) -> None:
+    path = tmp_path / "ingest.log"
+    log = IngestLog(path, fsync=False)
+    log.append([{"n": 1}])
+    with path.open("ab") as handle:
+        handle.write(b'{"n": 2')
+
+    records, _ = log.read(10)
+
+    assert records == [{"n": 1}]
+
+
+def test_queue_group_commits_in_bounded_batches(tmp_path: Path) -> None:
+    ingestor = FakeIngestor()
+    queue = _queue(tmp_path, ingestor, batch_size=2)
+
+    job = queue.submit(_uploads("one", "boom", "three"))
+
+    assert queue.drain_once() == 2
+    assert queue.drain_once() == 1
+    assert ingestor.batches == [2, 1]
+
+    status = queue.get_job(job.job_id).to_schema()
+    assert status.status == "completed"
+    assert status.processed == 3
+    assert status.failed == 1
+    assert [result.index for result in status.results] == [0, 1, 2]
+    assert status.results[1].status == "error"
+    assert status.finished_at is not None
+
+
+def test_queue_replays_batch_after_database_outage(tmp_path: Path) -> None:
+    class FlakyIngestor(FakeIngestor):
+        def ingest_batch(self, db, uploads):
+            if not self.batches:
+                self.batches.append(len(uploads))
+                raise OperationalError("COMMIT", {}, Exception("server closed"))
+            return super().ingest_batch(db, uploads)
+
+    ingestor = FlakyIngestor()
+    queue = _queue(tmp_path, ingestor)
+    job = queue.submit(_uploads("one", "two"))
+
+    with pytest.raises(OperationalError):
+        queue.drain_once()
+    assert queue.get_job(job.job_id).to_schema().status != "completed"
+
+    assert queue.drain_once() == 2
+    assert ingestor.batches == [2, 2]
+    status = queue.get_job(job.job_id).to_schema()
+    assert status.status == "completed"
+    assert status.failed == 0
+
+
+def test_upload_async_mode_returns_job_and_reports_progress(tmp_path: Path) -> None:
+    ingestor = FakeIngestor()
+    queue = _queue(tmp_path, ingestor)
+
+    app = create_app()
+    app.dependency_overrides[get_db] = FakeSession
+    app.dependency_overrides[get_ingest_queue] = lambda: queue
+    client = TestClient(app)
+
+    response = client.post(
+        f"{settings.api_prefix}/upload",
+        params={"mode": "async"},
+        json=[{"supplier": "ACME Corp", "raw_text": "Async quotation."}],
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.headers["location"].endswith(job_id)
+
+    assert queue.drain_once() == 1
+
+    status = client.get(f"{settings.api_prefix}/jobs/{job_id}").json()
+    assert status["status"] == "completed"
+    assert status["results"][0]["quotation"]["raw_text"] == "Async quotation."
+
+    missing = client.get(f"{settings.api_prefix}/jobs/unknown")
+    assert missing.status_code == 404
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.agents import extractor_cache as extractor_cache_module
+from app.agents import orchestrator as orchestrator_module
+from app.agents.extractor import ExtractorAgent
+from app.agents.extractor_cache import EXTRACTION_CACHE_LOOKUPS, ExtractionCache
+from app.agents.orchestrator import Orchestrator
+from app.core.embeddings import embed_text
+from app.core.ingest_pool import IngestProcessPool
+from app.core.schemas import QuotationUploadRequest
+
+
+class FailingExtractor:
+    """Extractor that fails for texts containing 'boom' (module level: picklable)."""
+
+    def extract_structured_fields(self, upload: QuotationUploadRequest) -> Dict[str, Any]:
+        if "boom" in upload.raw_text:
+            raise ValueError(f"cannot extract {upload.raw_text!r}")
+        return {"supplier": upload.supplier}
+
+
+def _uploads(texts: List[str]) -> List[QuotationUploadRequest]:
+    return [
+        QuotationUploadRequest(supplier=f"Supplier {index}", raw_text=text)
+        for index, text in enumerate(texts)
+    ]
+
+
+@pytest.fixture(scope="module")
+def pool() -> Iterator[IngestProcessPool]:
+    pool = IngestProcessPool(2, chunk_size=3, min_items=1, extractor_factory=FailingExtractor)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_keeps_order_and_returns_float32_vectors(pool: IngestProcessPool) -> None:
+    texts = [f"Quotation number {index}" for index in range(7)]
+
+    prepared = pool.prepare(_uploads(texts))
+
+    assert [item.structured_json for item in prepared] == [
+        {"supplier": f"Supplier {index}"} for index in range(7)
+    ]
+    for text, item in zip(texts, prepared, strict=True):
+        assert item.error is None
+        assert item.embedding.dtype == np.float32
+        np.testing.assert_array_equal(
+            item.embedding, np.asarray(embed_text(text), dtype=np.float32)
+        )
+
+
+def test_pool_isolates_failing_items(pool: IngestProcessPool) -> None:
+    prepared = pool.prepare(_uploads(["ok 1", "boom", "ok 2", "ok 3"]))
+
+    assert [item.error is None for item in prepared] == [True, False, True, True]
+    assert "cannot extract 'boom'" in prepared[1].error
+    assert prepared[1].embedding is None
+
+
+def test_pool_serves_parent_cache_hits_and_stores_worker_results(
+    pool: IngestProcessPool,
+) -> None:
+    cache = ExtractionCache()
+    extractor = ExtractorAgent(cache=cache)
+    uploads = _uploads([f"Item {index}  Total: {index}.00 EUR" for index in range(4)])
+    extractor.extract_structured_fields(uploads[0])
+    hits_before = EXTRACTION_CACHE_LOOKUPS.value(extractor="rules", result="memory")
+    misses_before = EXTRACTION_CACHE_LOOKUPS.value(extractor="rules", result="miss")
+
+    prepared = pool.prepare(uploads, extractor)
+
+    # The pool's own extractor (FailingExtractor) was not used.
+    assert [item.structured_json for item in prepared] == [
+        ExtractorAgent().extract_structured_fields(upload) for upload in uploads
+    ]
+    assert prepared[0].cache_entry is None
+    assert all(item.cache_entry is not None for item in prepared[1:])
+    assert len(cache) == 4
+    assert (
+        EXTRACTION_CACHE_LOOKUPS.value(extractor="rules", result="memory")
+        == hits_before + 1
+    )
+    assert (
+        EXTRACTION_CACHE_LOOKUPS.value(extractor="rules", result="miss")
+        == misses_before + 3
+    )
+
+
+def test_pool_reads_and_writes_the_persistent_cache_once_per_batch(
+    pool: IngestProcessPool,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: List[Any] = []
+    monkeypatch.setattr(
+        extractor_cache_module,
+        "get_extraction_cache_entries",
+        lambda db, **kwargs: calls.append(("get", len(kwargs["text_hashes"]))) or [],
+    )
+    monkeypatch.setattr(
+        extractor_cache_module,
+        "save_extraction_cache_entries",
+        lambda db, **kwargs: calls.append(("save", len(kwargs["entries"]))),
+    )
+    monkeypatch.setattr(
+        extractor_cache_module,
+        "delete_stale_extraction_cache_entries",
+        lambda db, **kwargs: 0,
+    )
+    cache = ExtractionCache(session_factory=lambda: SimpleNamespace(close=lambda: None))
+    uploads = _uploads([f"Item {index}  Total: {index}.00 EUR" for index in range(6)])
+
+    prepared = pool.prepare(uploads, ExtractorAgent(cache=cache))
+
+    assert all(item.error is None for item in prepared)
+    assert calls == [("get", 6), ("save", 6)]
+
+
+def test_fully_cached_batches_skip_the_workers(
+    pool: IngestProcessPool,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    class ExplodingExecutor:
+        def submit(self, *args: Any) -> None:
+            raise AssertionError("cache hits must not reach the workers")
+
+    extractor = ExtractorAgent(cache=ExtractionCache())
+    uploads = _uploads(["Total: 5.00 EUR", "Total: 7.00 EUR"])
+    expected = [extractor.extract_structured_fields(upload) for upload in uploads]
+    monkeypatch.setattr(pool, "_executor", ExplodingExecutor())
+
+    prepared = pool.prepare(uploads, extractor)
+
+    assert [item.structured_json for item in prepared] == expected
+    assert all(item.error is None for item in prepared)
+
+
+class FakeSession:
+    def __init__(self, commit_error: Optional[Exception] = None) -> None:
+        self.commits = 0
+        self.rollbacks = 0
+        self._commit_error = commit_error
+
+    @contextmanager
+    def begin_nested(self) -> Iterator[None]:
+        yield
+
+    def commit(self) -> None:
+        if self._commit_error is not None:
+            raise self._commit_error
+        self.commits += 1
+
+    def rollback(self) -> None:
+        self.rollbacks += 1
+
+
+def test_ingest_batch_writes_in_parent_in_input_order(
+    pool: IngestProcessPool,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    written: List[SimpleNamespace] = []
+
+    def add_quotation_with_embedding(db, *, supplier, raw_text, structured_json, embedding):
+        if raw_text == "db fails":
+            raise RuntimeError("constraint violated")
+        quotation = SimpleNamespace(
+            id=len(written) + 1,
+            supplier=supplier,
+            raw_text=raw_text,
+            structured_json=structured_json,
+            created_at=datetime(2025, 1, 1),
+            embedding=embedding,
+        )
+        written.append(quotation)
+        return quotation
+
+    monkeypatch.setattr(
+        orchestrator_module, "add_quotation_with_embedding", add_quotation_with_embedding
+    )
+    db = FakeSession()
+    orchestrator = Orchestrator(extractor=FailingExtractor(), pool=pool)
+
+    results = orchestrator.ingest_batch(db, _uploads(["a", "boom", "b", "db fails", "c"]))
+
+    assert [result.status for result in results] == ["ok", "error", "ok", "error", "ok"]
+    assert [result.index for result in results] == [0, 1, 2, 3, 4]
+    assert [result.quotation.raw_text for result in results if result.quotation] == [
+        "a",
+        "b",
+        "c",
+    ]
+    assert results[3].error == "constraint violated"
+    assert all(isinstance(quotation.embedding, np.ndarray) for quotation in written)
+    assert db.commits == 1
+
+
+def test_ingest_batch_raises_when_the_database_is_unavailable(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    outage = OperationalError("INSERT", {}, Exception("server closed"))
+
+    def add_quotation_with_embedding(db, **kwargs):
+        raise outage
+
+    monkeypatch.setattr(
+        orchestrator_module, "add_quotation_with_embedding", add_quotation_with_embedding
+    )
+    db = FakeSession()
+    orchestrator = Orchestrator(extractor=FailingExtractor())
+
+    with pytest.raises(OperationalError):
+        orchestrator.ingest_batch(db, _uploads(["a", "b"]))
+    assert db.rollbacks == 1
+
+
+def test_ingest_batch_raises_when_the_commit_fails(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(
+        orchestrator_module,
+        "add_quotation_with_embedding",
+        lambda db, **kwargs: SimpleNamespace(
+            id=1, created_at=datetime(2025, 1, 1), **kwargs
+        ),
+    )
+    db = FakeSession(commit_error=RuntimeError("could not serialize access"))
+    orchestrator = Orchestrator(extractor=FailingExtractor())
+
+    with pytest.raises(RuntimeError):
+        orchestrator.ingest_batch(db, _uploads(["a"]))
+    assert db.rollbacks == 1
+
+
+def test_small_batches_stay_in_process(monkeypatch: pytest.MonkeyPatch) -> None:
+    class ExplodingPool:
+        min_items = 10
+
+        def prepare(self, uploads):
+            raise AssertionError("small batches must not use the pool")
+
+    orchestrator = Orchestrator(extractor=FailingExtractor(), pool=ExplodingPool())
+
+    prepared = orchestrator._prepare(_uploads(["a", "b"]))
+
+    assert [item.structured_json["supplier"] for item in prepared] == [
+        "Supplier 0",
+        "Supplier 1",
+    ]
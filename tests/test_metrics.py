@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import pytest
+
+from app.core.metrics import MetricsRegistry
+
+
+def test_counter_and_gauge_render_in_prometheus_format() -> None:
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Handled requests.", ("route",))
+    inflight = registry.gauge("inflight", "In-flight requests.")
+
+    requests.inc(route="upload")
+    requests.inc(2, route="upload")
+    inflight.set_function(lambda: 4)
+
+    text = registry.render()
+
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="upload"} 3.0' in text
+    assert "inflight 4.0" in text
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.1, 0.5, 2.0):
+        latency.observe(value)
+
+    text = registry.render()
+
+    assert 'latency_seconds_bucket{le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "latency_seconds_count 4" in text
+    assert latency.sum() == pytest.approx(2.65)
+
+
+def test_registry_returns_existing_metric_and_checks_labels() -> None:
+    registry = MetricsRegistry()
+    counter = registry.counter("events_total", "Events.", ("kind",))
+
+    assert registry.counter("events_total", "Events.", ("kind",)) is counter
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+    with pytest.raises(ValueError):
+        registry.gauge("events_total", "Events.")
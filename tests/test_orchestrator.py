@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from app.core.orchestrator import MultiAgentOrchestrator, QueryBudget
+from app.core.schemas import EvaluationResult, QueryRequest, StructuredQuotation
+
+
+def _quotations(count: int) -> List[StructuredQuotation]:
+    return [
+        StructuredQuotation(
+            id=index,
+            supplier="ACME Corp",
+            raw_text=f"Quotation {index}.",
+            created_at=datetime.utcnow(),
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+class FakeEmbeddingRetriever:
+    def __init__(self, delay_s: float = 0.0) -> None:
+        self.delay_s = delay_s
+        self.calls: List[tuple] = []
+
+    def retrieve(self, query: QueryRequest) -> Sequence[StructuredQuotation]:
+        raise AssertionError("retrieve_embedded should be used")
+
+    def retrieve_embedded(
+        self,
+        query: QueryRequest,
+        embedding: Sequence[float],
+        supplier: Optional[str] = None,
+    ) -> Sequence[StructuredQuotation]:
+        time.sleep(self.delay_s)
+        self.calls.append((query.top_k, len(embedding), supplier))
+        return _quotations(query.top_k)
+
+
+class RecordingEvaluator:
+    def __init__(self, delay_s: float = 0.0) -> None:
+        self.delay_s = delay_s
+        self.started = threading.Event()
+
+    def evaluate(
+        self,
+        query: QueryRequest,
+        answer: str,
+        context: Sequence[StructuredQuotation],
+    ) -> EvaluationResult:
+        self.started.set()
+        time.sleep(self.delay_s)
+        return EvaluationResult(
+            query=query.query,
+            answer=answer,
+            is_answer_grounded=True,
+            relevance_score=0.9,
+            metadata={"evaluator": "recording"},
+        )
+
+
+def _orchestrator(retriever, evaluator, **budget) -> MultiAgentOrchestrator:
+    return MultiAgentOrchestrator(
+        extractor=None,
+        retriever=retriever,
+        evaluator=evaluator,
+        budget=QueryBudget(**budget),
+    )
+
+
+def test_answer_query_reports_stage_timings_in_evaluation_metadata() -> None:
+    retriever = FakeEmbeddingRetriever()
+    orchestrator = _orchestrator(retriever, RecordingEvaluator(), budget_ms=5000)
+    query = QueryRequest(query="cloud hosting", top_k=2, filters={"supplier": " ACME "})
+
+    result = asyncio.run(orchestrator.answer_query(query))
+
+    assert retriever.calls == [(2, 1536, "ACME")]
+    assert [quotation.id for quotation in result.quotations] == [1, 2]
+    assert result.degraded == []
+    metadata = result.evaluation.metadata
+    assert metadata["evaluator"] == "recording"
+    assert set(metadata["timings_ms"]) == {
+        "prepare",
+        "retrieve",
+        "generate",
+        "evaluate",
+        "total",
+    }
+    assert metadata["top_k"] == 2
+
+
+def test_top_k_is_lowered_when_budget_is_half_spent() -> None:
+    retriever = FakeEmbeddingRetriever()
+    # Preparing the query alone takes longer than half of a 1 µs budget.
+    orchestrator = _orchestrator(
+        retriever, None, budget_ms=0.001, degraded_top_k=3, min_evaluate_ms=0.0
+    )
+
+    result = asyncio.run(orchestrator.answer_query(QueryRequest(query="q", top_k=10)))
+
+    assert retriever.calls[0][0] == 3
+    assert len(result.quotations) == 3
+    assert "top_k" in result.degraded
+
+
+def test_evaluation_is_skipped_when_budget_is_exhausted() -> None:
+    evaluator = RecordingEvaluator()
+    orchestrator = _orchestrator(
+        FakeEmbeddingRetriever(delay_s=0.05), evaluator, budget_ms=20, min_evaluate_ms=10
+    )
+
+    result = asyncio.run(orchestrator.answer_query("q"))
+
+    assert result.evaluation is None
+    assert not evaluator.started.is_set()
+    assert "evaluate_skipped" in result.degraded
+    assert "evaluate" not in result.timings_ms
+
+
+def test_slow_evaluation_is_abandoned_at_the_deadline() -> None:
+    orchestrator = _orchestrator(
+        FakeEmbeddingRetriever(), RecordingEvaluator(delay_s=0.5), budget_ms=150
+    )
+
+    started = time.perf_counter()
+    result = asyncio.run(orchestrator.answer_query("q"))
+
+    assert time.perf_counter() - started < 0.45
+    assert result.evaluation is None
+    assert "evaluate_timeout" in result.degraded
+
+
+def test_evaluation_overlaps_with_answer_streaming() -> None:
+    evaluator = RecordingEvaluator()
+    orchestrator = _orchestrator(FakeEmbeddingRetriever(), evaluator, budget_ms=5000)
+
+    async def consume() -> List[str]:
+        kinds = []
+        async for event in orchestrator.stream_query(QueryRequest(query="q", top_k=3)):
+            kinds.append(event.kind)
+            if event.kind == "answer" and kinds.count("answer") == 1:
+                # A slow client: evaluation should start meanwhile.
+                await asyncio.sleep(0.1)
+                assert evaluator.started.is_set()
+        return kinds
+
+    kinds = asyncio.run(consume())
+
+    assert kinds == ["quotations"] + ["answer"] * 4 + ["evaluation", "done"]
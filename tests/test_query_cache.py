@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Iterator, List
+
+import numpy as np
+import pytest
+
+from app.agents import orchestrator as orchestrator_module
+from app.agents import retriever as retriever_module
+from app.agents.extractor_simple import SimpleExtractorAgent
+from app.agents.orchestrator import Orchestrator
+from app.agents.query_cache import (
+    QUERY_CACHE_HIT_SIMILARITY,
+    QUERY_CACHE_LOOKUPS,
+    SemanticQueryCache,
+)
+from app.agents.retriever import RetrieverAgent
+from app.core.schemas import QuotationUploadRequest, QueryRequest
+
+DIM = 64
+
+
+def _vector(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=DIM)
+
+
+def _paraphrase(vector: np.ndarray, similarity: float, seed: int = 99) -> np.ndarray:
+    """A vector with exactly the given cosine similarity to `vector`."""
+    unit = vector / np.linalg.norm(vector)
+    noise = np.random.default_rng(seed).normal(size=DIM)
+    noise -= noise.dot(unit) * unit
+    noise /= np.linalg.norm(noise)
+    return similarity * unit + np.sqrt(1 - similarity**2) * noise
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_similar_query_with_same_filters_hits() -> None:
+    cache = SemanticQueryCache(threshold=0.95)
+    query = _vector(1)
+    cache.store(query, {"supplier": "ACME"}, 5, [3, 1, 2, 9, 4], cache.generation)
+    hits = QUERY_CACHE_LOOKUPS.value(result="hit")
+    observed = QUERY_CACHE_HIT_SIMILARITY.count()
+
+    assert cache.lookup(_paraphrase(query, 0.97), {"supplier": "ACME"}, 3) == [3, 1, 2]
+    assert cache.lookup(_paraphrase(query, 0.9), {"supplier": "ACME"}, 3) is None
+    assert cache.lookup(query, {"supplier": "Globex"}, 3) is None
+    assert cache.lookup(query, {"supplier": "ACME"}, 10) is None
+    assert QUERY_CACHE_LOOKUPS.value(result="hit") == hits + 1
+    assert QUERY_CACHE_HIT_SIMILARITY.count() == observed + 1
+
+
+def test_entries_expire_and_least_recently_used_is_replaced() -> None:
+    clock = FakeClock()
+    cache = SemanticQueryCache(max_entries=2, ttl_s=10.0, clock=clock)
+    first, second, third = _vector(1), _vector(2), _vector(3)
+    cache.store(first, {}, 5, [1], cache.generation)
+    cache.store(second, {}, 5, [2], cache.generation)
+    assert cache.lookup(first, {}, 5) == [1]
+
+    cache.store(third, {}, 5, [3], cache.generation)
+
+    assert cache.lookup(second, {}, 5) is None
+    assert cache.lookup(first, {}, 5) == [1]
+    clock.now = 11.0
+    assert cache.lookup(first, {}, 5) is None
+    assert len(cache) == 0
+
+
+def test_invalidate_drops_entries_and_results_of_running_searches() -> None:
+    cache = SemanticQueryCache()
+    query = _vector(1)
+    cache.store(query, {}, 5, [1], cache.generation)
+    started = cache.generation
+
+    cache.invalidate()
+    cache.store(query, {}, 5, [1], started)
+
+    assert cache.lookup(query, {}, 5) is None
+    assert len(cache) == 0
+
+
+def _row(quotation_id: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=quotation_id,
+        supplier="ACME Corp",
+        raw_text=f"quotation {quotation_id}",
+        structured_json={},
+        created_at=datetime(2025, 1, 1),
+    )
+
+
+def test_retriever_serves_repeated_query_from_cache(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    searches: List[int] = []
+    loaded: List[List[int]] = []
+
+    def search(db: Any, embedding: Any, limit: int, supplier: Any) -> List[Any]:
+        searches.append(limit)
+        return [_row(7), _row(3)]
+
+    def by_ids(db: Any, ids: List[int]) -> List[Any]:
+        loaded.append(list(ids))
+        return [_row(quotation_id) for quotation_id in ids]
+
+    monkeypatch.setattr(retriever_module, "get_similar_quotation_rows", search)
+    monkeypatch.setattr(retriever_module, "get_quotation_rows_by_ids", by_ids)
+    retriever = RetrieverAgent(db=None, cache=SemanticQueryCache())  # type: ignore[arg-type]
+
+    first = retriever.retrieve(QueryRequest(query="rack price", top_k=2))
+    second = retriever.retrieve(QueryRequest(query="  rack   price ", top_k=2))
+
+    assert [quotation.id for quotation in first] == [7, 3]
+    assert [quotation.id for quotation in second] == [7, 3]
+    assert searches == [2]
+    assert loaded == [[7, 3]]
+
+
+class FakeSession:
+    @contextmanager
+    def begin_nested(self) -> Iterator[None]:
+        yield
+
+    def commit(self) -> None:
+        pass
+
+
+def test_ingestion_invalidates_the_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        orchestrator_module,
+        "add_quotation_with_embedding",
+        lambda db, *, supplier, raw_text, structured_json, embedding: _row(1),
+    )
+    cache = SemanticQueryCache()
+    cache.store(_vector(1), {}, 5, [1], cache.generation)
+    orchestrator = Orchestrator(extractor=SimpleExtractorAgent(), query_cache=cache)
+
+    orchestrator.ingest_batch(
+        FakeSession(),  # type: ignore[arg-type]
+        [QuotationUploadRequest(supplier="ACME Corp", raw_text="Widget $10")],
+    )
+
+    assert len(cache) == 0
+    assert cache.generation == 1
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Any, AsyncGenerator, List, Sequence, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.agents.generator_llm import LLMGenerationError
+from app.api.routes.query import get_evaluator, get_generator, get_retriever_factory
+from app.core.config import settings
+from app.core.schemas import EvaluationResult, QueryRequest, StructuredQuotation
+from app.db.session import get_session_factory
+from app.main import create_app
+
+
+class FakeSession:
+    def close(self) -> None:
+        pass
+
+
+class FakeRetriever:
+    def __init__(self, db: FakeSession) -> None:
+        self._db = db
+
+    def retrieve(self, query: QueryRequest) -> Sequence[StructuredQuotation]:
+        return [
+            StructuredQuotation(
+                id=index,
+                supplier="ACME Corp",
+                raw_text=f"Quotation {index} for {query.query}.",
+                created_at=datetime.utcnow(),
+            )
+            for index in range(1, query.top_k + 1)
+        ]
+
+
+class FakeEvaluator:
+    def evaluate(
+        self,
+        query: QueryRequest,
+        answer: str,
+        context: Sequence[StructuredQuotation],
+    ) -> EvaluationResult:
+        return EvaluationResult(
+            query=query.query,
+            answer=answer,
+            is_answer_grounded=bool(context),
+            relevance_score=0.5,
+        )
+
+
+class FailingGenerator:
+    async def astream(
+        self,
+        query: QueryRequest,
+        context: Sequence[StructuredQuotation],
+    ) -> AsyncGenerator[str, None]:
+        yield "Partial"
+        raise LLMGenerationError("completions server returned 500")
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = create_app()
+    app.dependency_overrides[get_session_factory] = lambda: FakeSession
+    app.dependency_overrides[get_retriever_factory] = lambda: FakeRetriever
+    app.dependency_overrides[get_evaluator] = FakeEvaluator
+    return TestClient(app)
+
+
+def _parse_sse(body: str) -> List[Tuple[str, Any]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_query_returns_answer_quotations_and_timings(client: TestClient) -> None:
+    response = client.post(
+        f"{settings.api_prefix}/query",
+        json={"query": "cloud hosting", "top_k": 2},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [quotation["id"] for quotation in data["quotations"]] == [1, 2]
+    assert "ACME Corp (#1)" in data["answer"]
+    assert data["evaluation"]["is_answer_grounded"] is True
+    assert set(data["timings_ms"]) == {"retrieve", "generate", "evaluate", "total"}
+
+
+def test_query_stream_emits_stages_in_order(client: TestClient) -> None:
+    response = client.post(
+        f"{settings.api_prefix}/query/stream",
+        json={"query": "cloud hosting", "top_k": 2},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = _parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names == ["quotations", "answer", "answer", "answer", "evaluation", "done"]
+
+    quotations = events[0][1]
+    assert len(quotations["quotations"]) == 2
+    assert "retrieve" in quotations["timings_ms"]
+
+    answer = "".join(data["delta"] for name, data in events if name == "answer")
+    assert answer == events[4][1]["evaluation"]["answer"]
+    assert set(events[-1][1]["timings_ms"]) == {
+        "retrieve",
+        "generate",
+        "evaluate",
+        "total",
+    }
+
+
+def test_query_reports_generation_failures_as_bad_gateway(client: TestClient) -> None:
+    client.app.dependency_overrides[get_generator] = FailingGenerator
+
+    response = client.post("/api/query", json={"query": "laptops", "top_k": 2})
+
+    assert response.status_code == 502
+    assert response.json() == {
+        "detail": "Answer generation failed: completions server returned 500"
+    }
+
+
+def test_query_stream_reports_failures_without_internal_details(
+    client: TestClient,
+) -> None:
+    class BrokenRetriever(FakeRetriever):
+        def retrieve(self, query: QueryRequest) -> Sequence[StructuredQuotation]:
+            raise RuntimeError("connection to server at 10.0.0.5 failed")
+
+    client.app.dependency_overrides[get_generator] = FailingGenerator
+    response = client.post("/api/query/stream", json={"query": "laptops", "top_k": 2})
+    assert _parse_sse(response.text)[-1] == (
+        "error",
+        {"code": "generation_failed", "detail": "Answer generation failed."},
+    )
+
+    client.app.dependency_overrides[get_retriever_factory] = lambda: BrokenRetriever
+    response = client.post("/api/query/stream", json={"query": "laptops", "top_k": 2})
+    assert _parse_sse(response.text) == [
+        ("error", {"code": "internal_error", "detail": "Internal server error."})
+    ]
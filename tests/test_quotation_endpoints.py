@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.api.lifespan import get_registry
+from app.api.routes import quotations as quotation_routes
+from app.db import repositories
+from app.db.models import Quotation
+from app.db.session import get_db
+from app.db.sharding import InMemoryShard, ShardedVectorStore, ShardWrite, build_shards
+from app.main import create_app
+
+
+def _quotation(quotation_id: int, version: int = 1) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=quotation_id,
+        supplier="ACME Corp",
+        raw_text=f"Quotation {quotation_id} raw text.",
+        structured_json={"total_price": 10.0},
+        created_at=datetime(2025, 1, 1, 12, 0, 0),
+        version=version,
+    )
+
+
+@pytest.fixture
+def store(monkeypatch: pytest.MonkeyPatch) -> Dict[str, Any]:
+    """Replace the repository functions with an in-memory store that counts full loads."""
+    state: Dict[str, Any] = {
+        "rows": {1: _quotation(1), 2: _quotation(2)},
+        "full_loads": 0,
+    }
+
+    def get_quotation_by_id(db: Any, quotation_id: int):
+        state["full_loads"] += 1
+        return state["rows"].get(quotation_id)
+
+    def get_quotation_version(db: Any, quotation_id: int):
+        row = state["rows"].get(quotation_id)
+        return None if row is None else row.version
+
+    def page(skip: int, limit: int) -> List[SimpleNamespace]:
+        rows = sorted(state["rows"].values(), key=lambda row: -row.id)
+        return rows[skip : skip + limit]
+
+    def list_quotations(db: Any, *, skip: int, limit: int) -> List[SimpleNamespace]:
+        state["full_loads"] += 1
+        return page(skip, limit)
+
+    def list_quotation_versions(db: Any, *, skip: int, limit: int):
+        return [(row.id, row.version) for row in page(skip, limit)]
+
+    monkeypatch.setattr(quotation_routes, "get_quotation_by_id", get_quotation_by_id)
+    monkeypatch.setattr(quotation_routes, "get_quotation_version", get_quotation_version)
+    monkeypatch.setattr(quotation_routes, "list_quotations", list_quotations)
+    monkeypatch.setattr(quotation_routes, "list_quotation_versions", list_quotation_versions)
+    return state
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = create_app()
+    app.dependency_overrides[get_db] = lambda: None
+    return TestClient(app)
+
+
+def test_get_quotation_returns_etag_and_cache_control(client: TestClient, store: Dict[str, Any]) -> None:
+    response = client.get("/api/quotations/1")
+
+    assert response.status_code == 200
+    assert response.json()["raw_text"] == "Quotation 1 raw text."
+    assert response.headers["etag"] == '"q1.v1"'
+    assert response.headers["cache-control"].startswith("public, max-age=")
+
+
+def test_matching_if_none_match_returns_304_without_full_load(
+    client: TestClient, store: Dict[str, Any]
+) -> None:
+    etag = client.get("/api/quotations/1").headers["etag"]
+    loads = store["full_loads"]
+
+    response = client.get("/api/quotations/1", headers={"If-None-Match": f"W/{etag}"})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert store["full_loads"] == loads
+
+
+def test_new_version_invalidates_etag(client: TestClient, store: Dict[str, Any]) -> None:
+    etag = client.get("/api/quotations/1").headers["etag"]
+    store["rows"][1].version = 2
+
+    response = client.get("/api/quotations/1", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"q1.v2"'
+
+
+def test_representation_without_raw_text_has_its_own_etag(
+    client: TestClient, store: Dict[str, Any]
+) -> None:
+    full = client.get("/api/quotations/1")
+    lean = client.get("/api/quotations/1", params={"include_raw_text": "false"})
+
+    assert "raw_text" not in lean.json()
+    assert lean.headers["etag"] != full.headers["etag"]
+
+
+def test_unknown_quotation_returns_404(client: TestClient, store: Dict[str, Any]) -> None:
+    response = client.get("/api/quotations/99", headers={"If-None-Match": "*"})
+
+    assert response.status_code == 404
+
+
+def test_list_etag_changes_when_page_changes(client: TestClient, store: Dict[str, Any]) -> None:
+    first = client.get("/api/quotations")
+    assert [item["id"] for item in first.json()] == [2, 1]
+
+    loads = store["full_loads"]
+    cached = client.get("/api/quotations", headers={"If-None-Match": first.headers["etag"]})
+    assert cached.status_code == 304
+    assert store["full_loads"] == loads
+
+    store["rows"][3] = _quotation(3)
+    refreshed = client.get("/api/quotations", headers={"If-None-Match": first.headers["etag"]})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != first.headers["etag"]
+
+
+def test_pages_are_ordered_by_id_within_one_created_at() -> None:
+    engine = create_engine("sqlite://")
+    Quotation.__table__.create(engine)
+    created_at = datetime(2025, 1, 1)
+    with Session(engine) as db:
+        db.add_all(
+            Quotation(
+                id=quotation_id, supplier="ACME", raw_text="", created_at=created_at
+            )
+            for quotation_id in (2, 5, 1, 4, 3)
+        )
+        db.commit()
+
+        first = repositories.list_quotations(db, skip=0, limit=3)
+        versions = repositories.list_quotation_versions(db, skip=3, limit=3)
+
+    assert [quotation.id for quotation in first] == [5, 4, 3]
+    assert [quotation_id for quotation_id, _ in versions] == [2, 1]
+
+
+def _sharded_client(store: ShardedVectorStore) -> TestClient:
+    app = create_app()
+    app.dependency_overrides[get_db] = lambda: None
+    app.dependency_overrides[get_registry] = lambda: SimpleNamespace(vector_store=store)
+    return TestClient(app)
+
+
+def test_sharded_storage_serves_quotation_routes() -> None:
+    store = ShardedVectorStore(build_shards(["memory://a", "memory://b"]))
+    written = store.add_batch(
+        [
+            ShardWrite(f"Supplier {n}", f"Quotation {n}.", None, np.ones(8))
+            for n in range(5)
+        ]
+    )
+    newest = sorted(written, key=lambda row: (row.created_at, row.id), reverse=True)
+    client = _sharded_client(store)
+
+    page = client.get("/api/quotations", params={"skip": 1, "limit": 3})
+    assert [item["id"] for item in page.json()] == [row.id for row in newest[1:4]]
+    cached = client.get(
+        "/api/quotations",
+        params={"skip": 1, "limit": 3},
+        headers={"If-None-Match": page.headers["etag"]},
+    )
+    assert cached.status_code == 304
+
+    quotation = client.get(f"/api/quotations/{written[2].id}")
+    assert quotation.json()["raw_text"] == "Quotation 2."
+    assert quotation.headers["etag"] == f'"q{written[2].id}.v1"'
+    assert client.get("/api/quotations/999").status_code == 404
+    store.shutdown()
+
+
+def test_sharded_reads_fail_when_a_shard_does_not_answer() -> None:
+    class BrokenShard(InMemoryShard):
+        def get_rows(self, ids):
+            raise RuntimeError("connection refused")
+
+        def list_rows(self, limit):
+            raise RuntimeError("connection refused")
+
+    healthy = InMemoryShard("a")
+    healthy.add_batch([ShardWrite("ACME Corp", "Quotation.", None, np.ones(8))])
+    store = ShardedVectorStore([healthy, BrokenShard("b")])
+    client = _sharded_client(store)
+
+    assert client.get("/api/quotations").status_code == 503
+    assert client.get("/api/quotations/1").status_code == 200
+    assert client.get("/api/quotations/2").status_code == 503
+    store.shutdown()
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi import Depends
+from fastapi.testclient import TestClient
+
+from app.api.lifespan import get_registry
+from app.core.config import settings
+from app.core.registry import WARMUP_FAILURES, AgentRegistry
+from app.main import create_app
+
+
+def test_importing_the_app_does_not_create_the_engine() -> None:
+    code = (
+        "import app.main, app.db.session as session\n"
+        "assert not session._engines\n"
+        "db = session.SessionLocal()\n"
+        "assert db.get_bind() is session._engines['interactive']\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_lifespan_builds_one_registry_shared_by_requests(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    monkeypatch.setattr(settings, "warmup_enabled", False)
+    monkeypatch.setattr(settings, "ingest_log_path", str(tmp_path / "ingest.log"))
+    app = create_app()
+    seen = []
+
+    @app.get("/registry")
+    def registry_id(registry: AgentRegistry = Depends(get_registry)) -> dict:
+        seen.append(registry)
+        return {}
+
+    with TestClient(app) as client:
+        registry = app.state.registry
+        client.get("/registry")
+        client.get("/registry")
+        drain_thread = registry.ingest_queue._thread
+        assert drain_thread is not None and drain_thread.is_alive()
+
+    assert seen == [registry, registry]
+    assert registry.orchestrator._extractor is registry.extractor
+    assert registry.ingest_queue._ingestor is registry.orchestrator
+    assert not drain_thread.is_alive()
+
+
+def test_registry_is_built_on_first_use_without_lifespan() -> None:
+    app = create_app()
+
+    class FakeRequest:
+        pass
+
+    request: Any = FakeRequest()
+    request.app = app
+
+    assert get_registry(request) is get_registry(request) is app.state.registry
+
+
+def test_api_writes_and_reads_through_vector_shards(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    monkeypatch.setattr(settings, "warmup_enabled", False)
+    monkeypatch.setattr(settings, "ingest_log_path", str(tmp_path / "ingest.log"))
+    monkeypatch.setattr(settings, "vector_shard_urls", ["memory://a", "memory://b"])
+
+    with TestClient(create_app()) as client:
+        registry = client.app.state.registry
+        assert registry.vector_store is not None
+        assert registry.orchestrator._store is registry.vector_store
+
+        stored = client.post(
+            "/api/upload",
+            params={"mode": "sync"},
+            json={"supplier": "ACME Corp", "raw_text": "Total: 10.00 EUR"},
+        )
+        assert stored.status_code == 200
+        quotation_id = stored.json()[0]["id"]
+        fetched = client.get(f"/api/quotations/{quotation_id}")
+        assert fetched.json()["raw_text"] == "Total: 10.00 EUR"
+
+
+def test_warmup_reports_every_step_and_survives_failures(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    registry = AgentRegistry.from_settings()
+    calls = []
+
+    def database_down() -> None:
+        raise ConnectionError("database is down")
+
+    def no_session() -> Any:
+        raise ConnectionError("database is down")
+
+    monkeypatch.setattr(registry, "_warm_database", database_down)
+    monkeypatch.setattr(
+        registry.extractor, "preload_cache", lambda: calls.append("caches") or 3
+    )
+    failures = WARMUP_FAILURES.value(step="retrieval")
+
+    durations = registry.warmup(session_factory=no_session)
+
+    assert list(durations) == ["database", "retrieval", "caches"]
+    assert calls == ["caches"]
+    assert WARMUP_FAILURES.value(step="retrieval") == failures + 1
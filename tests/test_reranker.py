@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pytest
+
+from app.agents import retriever as retriever_module
+from app.agents.base import RerankerProtocol
+from app.agents.reranker import (
+    FEATURES,
+    RERANK_PROMOTED,
+    FeatureReranker,
+    RerankWeights,
+)
+from app.agents.retriever import RetrieverAgent
+from app.core.schemas import QueryRequest, StructuredQuotation
+
+NOW = datetime(2025, 6, 1)
+
+
+def _quotation(
+    id: int,
+    raw_text: str = "Quotation",
+    *,
+    supplier: str = "ACME Corp",
+    age_days: float = 0.0,
+    **fields: Any,
+) -> StructuredQuotation:
+    return StructuredQuotation(
+        id=id,
+        supplier=supplier,
+        raw_text=raw_text,
+        structured_json=fields,
+        created_at=NOW - timedelta(days=age_days),
+    )
+
+
+def _ids(quotations: List[StructuredQuotation]) -> List[int]:
+    return [quotation.id for quotation in quotations]
+
+
+@pytest.fixture
+def reranker() -> FeatureReranker:
+    return FeatureReranker(
+        RerankWeights(vector=0.6, lexical=0.2, structured=0.15, recency=0.05),
+        recency_half_life_days=30.0,
+    )
+
+
+def test_implements_protocol(reranker: FeatureReranker) -> None:
+    assert isinstance(reranker, RerankerProtocol)
+
+
+def test_feature_matrix(reranker: FeatureReranker) -> None:
+    candidates = [
+        _quotation(1, "Server rack 42U, priced in USD", currency="USD", total=500.0),
+        _quotation(2, "Network switch", age_days=30, currency="EUR", total=5000.0),
+    ]
+    query = QueryRequest(query="server rack in USD", filters={"max_total": 1000})
+
+    features = reranker.features(query, candidates, [0.0, 1.0])
+
+    assert features.shape == (len(FEATURES), 2)
+    assert features[0].tolist() == [1.0, 0.5]
+    assert features[1].tolist() == pytest.approx([1.0, 0.0])
+    assert features[2].tolist() == [1.0, 0.0]
+    assert features[3].tolist() == pytest.approx([1.0, 0.5])
+
+
+def test_structured_matches_can_outrank_vector_order(
+    reranker: FeatureReranker,
+) -> None:
+    candidates = [
+        _quotation(1, "Laptop offer", currency="EUR"),
+        _quotation(2, "Laptop offer", currency="EUR"),
+        _quotation(3, "Laptop offer", currency="USD"),
+    ]
+    query = QueryRequest(query="laptop", top_k=2, filters={"currency": "usd"})
+    promoted_before = RERANK_PROMOTED.value()
+
+    ranked = reranker.rerank(query, candidates, [0.30, 0.31, 0.32])
+
+    assert _ids(ranked) == [3, 1]
+    assert RERANK_PROMOTED.value() == promoted_before + 1
+
+
+def test_ties_keep_vector_order(reranker: FeatureReranker) -> None:
+    candidates = [_quotation(index) for index in range(1, 6)]
+
+    ranked = reranker.rerank(QueryRequest(query="x", top_k=3), candidates, [0.5] * 5)
+
+    assert _ids(ranked) == [1, 2, 3]
+
+
+def test_supplier_named_in_query(reranker: FeatureReranker) -> None:
+    candidates = [
+        _quotation(1, supplier="Globex Ltd"),
+        _quotation(2, supplier="Initech"),
+    ]
+
+    ranked = reranker.rerank(
+        QueryRequest(query="initech offers", top_k=2), candidates, [0.1, 0.15]
+    )
+
+    assert _ids(ranked) == [2, 1]
+
+
+def test_retriever_over_fetches_for_reranker(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: List[Dict[str, Any]] = []
+
+    def get_similar_quotation_rows(db, embedding, limit, supplier, with_distance):
+        calls.append(
+            {"limit": limit, "supplier": supplier, "with_distance": with_distance}
+        )
+        return [
+            SimpleNamespace(
+                id=index,
+                supplier="ACME Corp",
+                raw_text="Offer",
+                structured_json={"currency": "USD" if index == 7 else "EUR"},
+                created_at=NOW,
+                distance=0.1 + index / 100,
+            )
+            for index in range(limit)
+        ]
+
+    monkeypatch.setattr(
+        retriever_module, "get_similar_quotation_rows", get_similar_quotation_rows
+    )
+    agent = RetrieverAgent(db=None, reranker=FeatureReranker(), candidates=10)
+
+    results = agent.retrieve_embedded(
+        QueryRequest(query="offer in USD", top_k=3), [0.0], supplier="ACME Corp"
+    )
+
+    assert calls == [{"limit": 10, "supplier": "ACME Corp", "with_distance": True}]
+    assert _ids(results)[0] == 7
+    assert len(results) == 3
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from app.core.schemas import StructuredQuotation
+from app.core.serialization import quotation_model, quotation_payload
+from app.db.models import Quotation
+
+CREATED_AT = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _quotation(structured_json: dict | None = None) -> Quotation:
+    return Quotation(
+        id=7,
+        supplier="ACME Corp",
+        raw_text="Raw quotation text",
+        structured_json=structured_json,
+        created_at=CREATED_AT,
+    )
+
+
+def test_quotation_payload_from_orm_object() -> None:
+    payload = quotation_payload(_quotation({"total": 10.0}))
+
+    assert payload == {
+        "id": 7,
+        "supplier": "ACME Corp",
+        "raw_text": "Raw quotation text",
+        "structured_json": {"total": 10.0},
+        "created_at": CREATED_AT,
+    }
+
+
+def test_quotation_payload_can_omit_raw_text_and_fills_empty_json() -> None:
+    payload = quotation_payload(_quotation(), include_raw_text=False)
+
+    assert "raw_text" not in payload
+    assert payload["structured_json"] == {}
+
+
+def test_quotation_model_matches_validated_model() -> None:
+    quotation = _quotation({"currency": "EUR"})
+
+    fast = quotation_model(quotation)
+    validated = StructuredQuotation.from_orm(quotation)
+
+    assert fast == validated
+    assert quotation_payload(fast) == quotation_payload(validated)
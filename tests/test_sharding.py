@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import threading
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pytest
+
+from app.agents.extractor_simple import SimpleExtractorAgent
+from app.agents.orchestrator import Orchestrator
+from app.agents.query_cache import SemanticQueryCache
+from app.agents.retriever import RetrieverAgent
+from app.core.schemas import QueryRequest, QuotationUploadRequest
+from app.db.sharding import (
+    SHARD_ROW_FETCHES,
+    SHARD_SEARCHES,
+    SHARDED_PARTIAL_RESULTS,
+    InMemoryShard,
+    ShardedVectorStore,
+    ShardRow,
+    ShardWrite,
+    build_shards,
+)
+
+DIM = 8
+
+
+def _write(supplier: str, text: str, seed: int) -> ShardWrite:
+    embedding = np.random.default_rng(seed).normal(size=DIM)
+    return ShardWrite(supplier, text, {"seed": seed}, embedding)
+
+
+class SlowShard(InMemoryShard):
+    """A shard whose searches block until released."""
+
+    def __init__(self, name: str, **kwargs: int) -> None:
+        super().__init__(name, **kwargs)
+        self.release = threading.Event()
+
+    def search(
+        self,
+        embedding: Sequence[float],
+        limit: int,
+        supplier: Optional[str] = None,
+    ) -> List[ShardRow]:
+        self.release.wait(5)
+        return super().search(embedding, limit, supplier)
+
+    def get_rows(self, ids: Sequence[int]) -> List[ShardRow]:
+        self.release.wait(5)
+        return super().get_rows(ids)
+
+
+class BrokenShard(InMemoryShard):
+    def search(
+        self,
+        embedding: Sequence[float],
+        limit: int,
+        supplier: Optional[str] = None,
+    ) -> List[ShardRow]:
+        raise RuntimeError("connection refused")
+
+    def get_rows(self, ids: Sequence[int]) -> List[ShardRow]:
+        raise RuntimeError("connection refused")
+
+
+def test_supplier_key_keeps_a_supplier_on_one_shard() -> None:
+    store = ShardedVectorStore(build_shards(["memory://a", "memory://b", "memory://c"]))
+    writes = [_write(f"Supplier {n % 5}", f"quote {n}", n) for n in range(40)]
+
+    results = store.add_batch(writes)
+
+    assert [row.raw_text for row in results] == [w.raw_text for w in writes]
+    assert len({row.id for row in results}) == 40
+    for supplier in {w.supplier for w in writes}:
+        holders = [
+            shard.name
+            for shard in store.shards
+            if shard.search(np.zeros(DIM), 100, supplier)
+        ]
+        assert holders == [store.shard_for(supplier, "").name]
+    assert sum(len(shard) for shard in store.shards) == 40
+    store.shutdown()
+
+
+def test_scatter_gather_matches_a_single_store() -> None:
+    writes = [_write(f"Supplier {n % 7}", f"quote {n}", n) for n in range(60)]
+    single = InMemoryShard("all")
+    single.add_batch(writes)
+    store = ShardedVectorStore(
+        build_shards(["memory://a", "memory://b", "memory://c"]), shard_key="content"
+    )
+    store.add_batch(writes)
+    query = np.random.default_rng(1000).normal(size=DIM)
+
+    result = store.search(query, 10)
+
+    expected = single.search(query, 10)
+    assert not result.partial
+    assert [row.raw_text for row in result.rows] == [r.raw_text for r in expected]
+    assert [row.distance for row in result.rows] == pytest.approx(
+        [row.distance for row in expected]
+    )
+    ids = [row.id for row in result.rows[:3]]
+    fetched = store.get_rows(ids[::-1])
+    assert not fetched.partial
+    assert [row.id for row in fetched.rows] == ids[::-1]
+    store.shutdown()
+
+
+def test_slow_and_failing_shards_give_a_partial_result() -> None:
+    slow = SlowShard("slow", first_id=2, id_step=3)
+    shards = [InMemoryShard("fast", first_id=1, id_step=3), slow]
+    shards.append(BrokenShard("broken", first_id=3, id_step=3))
+    store = ShardedVectorStore(shards, shard_key="content", timeout_s=0.05)
+    store.add_batch([_write("ACME", f"quote {n}", n) for n in range(30)])
+    partial = SHARDED_PARTIAL_RESULTS.value()
+    timeouts = SHARD_SEARCHES.value(shard="slow", outcome="timeout")
+
+    try:
+        result = store.search(np.zeros(DIM), 30)
+    finally:
+        slow.release.set()
+        store.shutdown()
+
+    assert result.partial
+    assert sorted(result.missing_shards) == ["broken", "slow"]
+    assert {row.id % 3 for row in result.rows} == {1}
+    assert result.rows == sorted(result.rows, key=lambda row: row.distance)
+    assert SHARDED_PARTIAL_RESULTS.value() == partial + 1
+    assert SHARD_SEARCHES.value(shard="slow", outcome="timeout") == timeouts + 1
+
+
+def test_row_fetches_by_id_share_the_search_deadline() -> None:
+    slow = SlowShard("slow", first_id=2, id_step=3)
+    shards = [InMemoryShard("fast", first_id=1, id_step=3), slow]
+    shards.append(BrokenShard("broken", first_id=3, id_step=3))
+    store = ShardedVectorStore(shards, shard_key="content", timeout_s=0.05)
+    written = store.add_batch([_write("ACME", f"quote {n}", n) for n in range(30)])
+    ids = [row.id for row in written]
+    timeouts = SHARD_ROW_FETCHES.value(shard="slow", outcome="timeout")
+
+    try:
+        result = store.get_rows(ids)
+    finally:
+        slow.release.set()
+        store.shutdown()
+
+    assert result.partial
+    assert sorted(result.missing_shards) == ["broken", "slow"]
+    assert [row.id for row in result.rows] == [i for i in ids if i % 3 == 1]
+    assert SHARD_ROW_FETCHES.value(shard="slow", outcome="timeout") == timeouts + 1
+
+
+def test_agents_read_and_write_through_the_store() -> None:
+    store = ShardedVectorStore(
+        build_shards(["memory://a", "memory://b"]), shard_key="content"
+    )
+    orchestrator = Orchestrator(extractor=SimpleExtractorAgent(), store=store)
+    uploads = [
+        QuotationUploadRequest(supplier=f"Supplier {n}", raw_text=f"Rack {n} $100")
+        for n in range(6)
+    ]
+
+    results = orchestrator.ingest_batch(None, uploads)  # type: ignore[arg-type]
+
+    assert [result.status for result in results] == ["ok"] * 6
+    assert all(len(shard) for shard in store.shards)
+
+    retriever = RetrieverAgent(db=None, store=store)  # type: ignore[arg-type]
+    found = retriever.retrieve(QueryRequest(query="Rack 3 $100", top_k=3))
+    assert len(found) == 3
+    assert not retriever.partial
+    store.shutdown()
+
+
+def test_cached_rankings_rehydrated_without_a_shard_are_partial() -> None:
+    broken = BrokenShard("broken", first_id=2, id_step=2)
+    store = ShardedVectorStore(
+        [InMemoryShard("fast", first_id=1, id_step=2), broken], shard_key="content"
+    )
+    written = store.add_batch([_write("ACME", f"quote {n}", n) for n in range(6)])
+    ids = [row.id for row in written]
+    cache = SemanticQueryCache()
+    query = QueryRequest(query="quote", top_k=6)
+    embedding = np.ones(DIM)
+    cache.store(embedding, query.filters, 6, ids, cache.generation)
+    retriever = RetrieverAgent(
+        db=None, store=store, cache=cache  # type: ignore[arg-type]
+    )
+
+    found = retriever.retrieve_embedded(query, embedding)
+
+    assert retriever.partial
+    assert [quotation.id for quotation in found] == [i for i in ids if i % 2 == 1]
+    store.shutdown()
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+import pytest
+from fastapi.testclient import TestClient
+from pgvector import Vector  # type: ignore[import-untyped]
+from sqlalchemy import create_engine, text
+
+from app.api.admission import QUERY, AdmissionController
+from app.api.routes import diagnostics
+from app.core.config import settings
+from app.db.slow_queries import (
+    SLOW_QUERIES,
+    SlowQueryLog,
+    plan_flags,
+    redact,
+)
+from app.main import create_app
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_slow_statements_are_captured_with_redacted_parameters() -> None:
+    log = SlowQueryLog(threshold_ms=0.0, explain_sample_rate=1.0)
+    engine = create_engine("sqlite://")
+    log.install(engine)
+    slow = SLOW_QUERIES.value(kind="SELECT")
+
+    with engine.connect() as connection:
+        connection.execute(
+            text("SELECT :supplier,\n    :note"),
+            {"supplier": "ACME", "note": "x" * 500},
+        )
+
+    (entry,) = [e for e in log.entries() if e.statement.startswith("SELECT ?")]
+    assert entry.statement == "SELECT ?, ?"
+    assert entry.kind == "SELECT"
+    assert entry.parameters[0] == "ACME"
+    assert entry.parameters[1].endswith("<500 chars>")
+    # EXPLAIN ANALYZE is only run on Postgres.
+    assert entry.plan is None
+    assert SLOW_QUERIES.value(kind="SELECT") >= slow + 1
+
+
+def test_string_parameters_of_writes_are_fully_redacted() -> None:
+    log = SlowQueryLog(threshold_ms=0.0)
+    engine = create_engine("sqlite://")
+    log.install(engine)
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE notes (supplier TEXT, amount INT)"))
+        connection.execute(
+            text("INSERT INTO notes VALUES (:supplier, :amount)"),
+            {"supplier": "ACME Corp", "amount": 3},
+        )
+
+    (entry,) = [e for e in log.entries() if e.kind == "INSERT"]
+    assert entry.parameters == ["<9 chars>", 3]
+
+
+def test_fast_statements_are_only_timed() -> None:
+    log = SlowQueryLog(threshold_ms=60_000.0)
+    engine = create_engine("sqlite://")
+    log.install(engine)
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    assert log.entries() == []
+
+
+def test_vectors_are_redacted() -> None:
+    embedding = [0.1] * 1536
+
+    assert redact({"embedding": embedding, "limit": 5}) == {
+        "embedding": "<vector dim=1536>",
+        "limit": 5,
+    }
+    assert redact(Vector([0.5] * 32)) == "<vector dim=32>"
+    assert redact(b"\x00" * 10) == "<10 bytes>"
+    assert redact(["ACME", 3]) == ["ACME", 3]
+
+
+def test_plan_flags_find_seq_scans_and_disk_sorts() -> None:
+    plan = [
+        {
+            "Plan": {
+                "Node Type": "Limit",
+                "Plans": [
+                    {
+                        "Node Type": "Sort",
+                        "Sort Space Type": "Disk",
+                        "Plans": [
+                            {
+                                "Node Type": "Seq Scan",
+                                "Relation Name": "quotation_embeddings",
+                            },
+                            {"Node Type": "Seq Scan", "Relation Name": "quotations"},
+                        ],
+                    }
+                ],
+            }
+        }
+    ]
+
+    assert plan_flags(plan) == ["seq_scan:quotation_embeddings", "sort_spilled"]
+    index_plan = [{"Plan": {"Node Type": "Index Scan", "Relation Name": "x"}}]
+    assert plan_flags(index_plan) == []
+
+
+def test_explains_are_rate_limited() -> None:
+    clock = FakeClock()
+    log = SlowQueryLog(
+        threshold_ms=0.0, explain_sample_rate=1.0, explain_interval_s=10.0, clock=clock
+    )
+
+    assert log._should_explain()
+    clock.now = 5.0
+    assert not log._should_explain()
+    clock.now = 10.0
+    assert log._should_explain()
+    assert not SlowQueryLog(0.0, explain_sample_rate=0.0)._should_explain()
+
+
+def test_endpoint_lists_captured_statements(monkeypatch: pytest.MonkeyPatch) -> None:
+    log = SlowQueryLog(threshold_ms=0.0)
+    engine = create_engine("sqlite://")
+    log.install(engine)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        connection.execute(text("SELECT 2"))
+    log._entries[0].flags = ["seq_scan:quotation_embeddings"]
+    monkeypatch.setattr(diagnostics, "get_slow_query_log", lambda: log)
+    monkeypatch.setattr(settings, "db_slow_query_endpoint_enabled", True)
+
+    client = TestClient(create_app())
+    everything = client.get("/api/internal/slow-queries").json()
+    flagged = client.get("/api/internal/slow-queries?flagged=true").json()
+
+    assert [entry["statement"] for entry in everything] == ["SELECT 2", "SELECT 1"]
+    assert [entry["statement"] for entry in flagged] == ["SELECT 1"]
+    first: Dict[str, Any] = everything[0]
+    assert {"fingerprint", "duration_ms", "workload", "plan"} <= set(first)
+
+
+def test_endpoint_is_off_by_default_and_admission_controlled() -> None:
+    client = TestClient(create_app())
+
+    assert client.get("/api/internal/slow-queries").status_code == 404
+    controller = AdmissionController.from_settings(settings)
+    assert controller.classify("/api/internal/slow-queries") == QUERY
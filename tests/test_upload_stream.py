@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence
+
+from fastapi.testclient import TestClient
+
+from app.api.routes.upload import _iter_ndjson_lines, get_orchestrator
+from app.core.config import settings
+from app.core.schemas import (
+    IngestItemResult,
+    QuotationUploadRequest,
+    StructuredQuotation,
+)
+from app.db.session import get_session_factory
+from app.main import create_app
+
+
+class FakeSession:
+    def close(self) -> None:
+        pass
+
+
+class FakeOrchestrator:
+    def __init__(self) -> None:
+        self.batches: List[int] = []
+
+    def ingest_batch(
+        self,
+        db: FakeSession,
+        uploads: Sequence[QuotationUploadRequest],
+    ) -> List[IngestItemResult]:
+        self.batches.append(len(uploads))
+        return [
+            IngestItemResult(
+                index=index,
+                status="ok",
+                quotation=StructuredQuotation(
+                    id=index + 1,
+                    supplier=upload.supplier,
+                    raw_text=upload.raw_text,
+                    created_at=datetime.utcnow(),
+                ),
+            )
+            for index, upload in enumerate(uploads)
+        ]
+
+
+async def _collect(chunks: List[bytes], max_line_bytes: int) -> List[Optional[bytes]]:
+    async def stream() -> AsyncIterator[bytes]:
+        for chunk in chunks:
+            yield chunk
+
+    return [line async for line in _iter_ndjson_lines(stream(), max_line_bytes)]
+
+
+def test_iter_ndjson_lines_handles_split_and_oversized_lines() -> None:
+    lines = asyncio.run(
+        _collect([b'{"a":', b' 1}\n{"b"', b": 2}\n" + b"x" * 20, b"yyy\nlast"], 10)
+    )
+
+    assert lines == [b'{"a": 1}', b'{"b": 2}', None, b"last"]
+
+
+def test_stream_upload_returns_ordered_results_per_line() -> None:
+    orchestrator = FakeOrchestrator()
+    app = create_app()
+    app.dependency_overrides[get_orchestrator] = lambda: orchestrator
+    app.dependency_overrides[get_session_factory] = lambda: FakeSession
+    client = TestClient(app)
+
+    body = "\n".join(
+        [
+            json.dumps({"supplier": "ACME Corp", "raw_text": "first"}),
+            "not json",
+            "",
+            json.dumps({"supplier": "ACME Corp", "raw_text": "second"}),
+            json.dumps({"supplier": "ACME Corp"}),
+            json.dumps({"supplier": "ACME Corp", "raw_text": "third"}),
+        ]
+    )
+
+    response = client.post(
+        f"{settings.api_prefix}/upload/stream",
+        params={"batch_size": 2},
+        content=body,
+        headers={"content-type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [result["index"] for result in results] == [0, 1, 2, 3, 4]
+    assert [result["status"] for result in results] == [
+        "ok",
+        "error",
+        "ok",
+        "error",
+        "ok",
+    ]
+    assert results[2]["quotation"]["raw_text"] == "second"
+    assert orchestrator.batches == [1, 1, 1]
+
+
+def test_stream_upload_rejects_other_content_types() -> None:
+    app = create_app()
+    app.dependency_overrides[get_orchestrator] = FakeOrchestrator
+    app.dependency_overrides[get_session_factory] = lambda: FakeSession
+    client = TestClient(app)
+
+    response = client.post(f"{settings.api_prefix}/upload/stream", json=[])
+
+    assert response.status_code == 415
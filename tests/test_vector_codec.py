@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import numpy as np
+import psycopg
+import pytest
+from pgvector import Vector  # type: ignore[import-untyped]
+from pgvector.psycopg.vector import register_vector_info  # type: ignore[import-untyped]
+from psycopg.adapt import AdaptersMap, PyFormat, Transformer
+from psycopg.pq import Format
+from psycopg.types import TypeInfo
+from sqlalchemy.dialects.postgresql import psycopg as psycopg_dialect
+
+from app.core.embeddings import embed_text
+from app.db.types import BinaryVector
+from app.db.vector_codec import (
+    register_numpy_vector,
+    vector_from_binary,
+    vector_from_text,
+    vector_to_binary,
+)
+
+
+def test_binary_encoding_matches_pgvector() -> None:
+    vector = embed_text("server rack")
+
+    encoded = vector_to_binary(vector)
+
+    assert bytes(encoded) == Vector(vector).to_binary()
+    decoded = vector_from_binary(bytes(encoded))
+    assert decoded.dtype == np.float32
+    assert decoded.dtype.isnative
+    assert np.array_equal(decoded, vector)
+
+
+def test_text_decoding_matches_pgvector() -> None:
+    vector = embed_text("server rack")
+    literal = Vector(vector).to_text()
+
+    assert np.array_equal(vector_from_text(literal), vector)
+    assert np.array_equal(vector_from_text(memoryview(literal.encode())), vector)
+
+
+def test_malformed_vectors_are_rejected() -> None:
+    with pytest.raises(ValueError):
+        vector_to_binary(np.zeros((2, 2), dtype=np.float32))
+    with pytest.raises(ValueError):
+        vector_from_binary(b"\x00\x02\x00\x01" + b"\x00" * 8)
+
+
+def test_binary_vector_results_are_arrays() -> None:
+    vector = embed_text("server rack")
+    process = BinaryVector(vector.shape[0]).result_processor(
+        psycopg_dialect.dialect(), None
+    )
+
+    assert process(vector) is vector
+    assert process(None) is None
+    assert np.array_equal(process(Vector(vector)), vector)
+    assert np.array_equal(process(Vector(vector).to_text()), vector)
+
+
+class FakeConnection:
+    connection = None
+
+    def __init__(self) -> None:
+        self.adapters = AdaptersMap(psycopg.adapters)
+
+
+def test_psycopg_connections_exchange_arrays_in_binary() -> None:
+    vector = embed_text("server rack")
+    connection = FakeConnection()
+    register_vector_info(connection, TypeInfo("vector", 16400, 16405))
+    register_numpy_vector(connection)
+    transformer = Transformer(connection)  # type: ignore[arg-type]
+
+    dumper = transformer.get_dumper(vector, PyFormat.AUTO)
+    text_loader = transformer.get_loader(16400, Format.TEXT)
+    binary_loader = transformer.get_loader(16400, Format.BINARY)
+
+    assert dumper.format == Format.BINARY
+    assert bytes(dumper.dump(vector)) == Vector(vector).to_binary()
+    assert np.array_equal(text_loader.load(Vector(vector).to_text().encode()), vector)
+    assert np.array_equal(binary_loader.load(Vector(vector).to_binary()), vector)